@@ -6,6 +6,7 @@ import { ArrowLeft, FileText, ClipboardList } from "lucide-react"
 import { useFormById } from '@/hooks/use-forms'
 import { useCompanyInfo } from '@/hooks/use-company-info'
 import { usePermissions } from "@/hooks/use-permissions"
+import { usePdfReady } from "@/hooks/use-pdf-ready"
 import Image from "next/image"
 import Link from "next/link"
 import { Button } from "@/components/ui/button"
@@ -157,6 +158,10 @@ export default function FormDetailsPage({ params }: { params: Promise<{ id: stri
     (formType === "return" && canViewReturnForms) || (formType === "accountability" && canViewAccountabilityForms)
   )
 
+  const { isLoading: isCompanyInfoLoading } = useCompanyInfo(true)
+
+  // Tell the backend PDF renderer when the form (and its logos) has rendered
+  usePdfReady(!isLoading && !isCompanyInfoLoading && !!data)
 
   if (isLoading) {
     return (
@@ -5,13 +5,20 @@ from fastapi import HTTPException, Request
 from fastapi.security import HTTPBearer
 import os
 import json
+import time
 import base64
+import asyncio
+import hashlib
 import logging
+from collections import OrderedDict
 from urllib.parse import unquote
-from typing import Optional
+from typing import Dict, Optional
 import httpx
+import jwt
 from dotenv import load_dotenv
 
+from http_client import get_http_client
+
 load_dotenv()
 
 # Set up logging
@@ -21,31 +28,33 @@ logger = logging.getLogger(__name__)
 # Support both naming conventions: NEXT_PUBLIC_* (for frontend) and without prefix (for backend)
 SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL") or os.getenv("SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY") or os.getenv("SUPABASE_ANON_KEY")
+# Legacy HS256 projects: the project's JWT secret (Settings > API > JWT Secret)
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+
+# Token verification mode:
+# - "local" (default): verify signature and expiry in-process against the cached
+#   JWKS / JWT secret, calling Supabase only when the signing key is unknown
+# - "remote": always verify with Supabase /auth/v1/user
+AUTH_VERIFY_MODE = os.getenv("AUTH_VERIFY_MODE", "local").lower()
+JWKS_REFRESH_INTERVAL = int(os.getenv("SUPABASE_JWKS_REFRESH_SECONDS", "600"))
+JWKS_MIN_REFETCH_INTERVAL = 30
+JWT_LEEWAY_SECONDS = 10
+_ASYMMETRIC_ALGORITHMS = {"ES256", "RS256", "EdDSA"}
+
+# Verified-token cache: dashboards fire many parallel requests with the same token
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024"))
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", "60"))
+# How long a user-wide revocation (password change, deleted user) is remembered:
+# the longest access token lifetime (Supabase default: 1 hour)
+TOKEN_REVOCATION_TTL_SECONDS = int(os.getenv("AUTH_TOKEN_REVOCATION_TTL_SECONDS", "3600"))
 
 security = HTTPBearer(auto_error=False)
 
 async def verify_auth(request: Request) -> dict:
     """
     Verify user authentication using Supabase session from cookies or Authorization header.
-    Also accepts CRON_SECRET for internal cron job calls.
     Returns the user data if authenticated, raises HTTPException if not.
     """
-    # Check for internal cron call with CRON_SECRET
-    auth_header = request.headers.get("Authorization")
-    is_cron_internal = request.headers.get("X-Cron-Internal") == "true"
-    
-    if auth_header and auth_header.startswith("Bearer ") and is_cron_internal:
-        token = auth_header.split("Bearer ")[1]
-        cron_secret = os.getenv("CRON_SECRET")
-        if cron_secret and token == cron_secret:
-            # Return a system user for cron jobs
-            return {
-                "user": {"id": "system-cron", "email": "cron@system.internal"},
-                "user_id": "system-cron",
-                "email": "cron@system.internal",
-                "user_metadata": {"name": "System Cron Job"}
-            }
-    
     if not SUPABASE_URL or not SUPABASE_ANON_KEY:
         missing = []
         if not SUPABASE_URL:
@@ -60,6 +69,7 @@ async def verify_auth(request: Request) -> dict:
     access_token = None
     
     # Try to get token from Authorization header first
+    auth_header = request.headers.get("Authorization")
     if auth_header and auth_header.startswith("Bearer "):
         access_token = auth_header.split("Bearer ")[1]
     else:
@@ -85,53 +95,250 @@ async def verify_auth(request: Request) -> dict:
             detail="Unauthorized"
         )
     
+    token_key = _token_cache_key(access_token)
+    if _revocations.is_revoked(access_token, token_key):
+        raise HTTPException(
+            status_code=401,
+            detail="Unauthorized"
+        )
+    
+    cached = _token_cache.get(token_key)
+    if cached is not None:
+        return dict(cached)
+    
+    # Parallel requests from the same session share one verification
+    pending = _pending_verifications.get(token_key)
+    if pending is None:
+        pending = asyncio.ensure_future(_verify_and_cache(token_key, access_token))
+        _pending_verifications[token_key] = pending
+        pending.add_done_callback(lambda _: _pending_verifications.pop(token_key, None))
+    
+    return dict(await asyncio.shield(pending))
+
+
+async def _verify_and_cache(token_key: str, access_token: str) -> dict:
+    """Verify the access token and store the result in the verified-token cache"""
+    user_data = None
+    if AUTH_VERIFY_MODE == "local":
+        # Verify signature and expiry in-process; None means the signing key
+        # is unknown locally and Supabase has to decide
+        user_data = await _verify_token_locally(access_token)
+    
+    if user_data is None:
+        user_data = await _verify_token_remotely(access_token)
+    
+    result = {
+        "user": user_data,
+        "user_id": user_data["id"],
+        "email": user_data.get("email"),
+        "user_metadata": user_data.get("user_metadata", {})
+    }
+    _token_cache.set(token_key, result, _get_token_expiry(access_token))
+    return result
+
+
+class _VerifiedTokenCache:
+    """
+    Bounded LRU cache of verified tokens (keyed by token hash) to the verify_auth result.
+    Entries live for at most `ttl` seconds and never past the token's own `exp`.
+    """
+    
+    def __init__(self, max_size: int, ttl: float):
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._max_size = max_size
+        self._ttl = ttl
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, token_key: str) -> Optional[dict]:
+        entry = self._entries.get(token_key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, result = entry
+        if expires_at <= time.time():
+            del self._entries[token_key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(token_key)
+        self.hits += 1
+        return result
+    
+    def set(self, token_key: str, result: dict, token_exp: Optional[float]) -> None:
+        if self._max_size <= 0 or self._ttl <= 0:
+            return
+        
+        expires_at = time.time() + self._ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        if expires_at <= time.time():
+            return
+        
+        self._entries[token_key] = (expires_at, result)
+        self._entries.move_to_end(token_key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, token_key: str) -> None:
+        self._entries.pop(token_key, None)
+    
+    def invalidate_user(self, user_id: str) -> None:
+        for token_key in [k for k, (_, result) in self._entries.items() if result.get("user_id") == user_id]:
+            del self._entries[token_key]
+    
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxSize": self._max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class _TokenRevocations:
+    """
+    Tokens revoked by this backend. Locally verified tokens stay valid until `exp`
+    as far as their signature goes, so logout and password changes are recorded
+    here and checked on every request: a logged-out session (by its session_id
+    claim, or token hash) until the token expires, and every token a user was
+    issued before a password change or deletion for TOKEN_REVOCATION_TTL_SECONDS.
+    Revocations are per process; with several workers, only the one handling the
+    logout / password change knows until the token expires (AUTH_VERIFY_MODE=remote
+    asks Supabase on every cache miss instead).
+    """
+    
+    def __init__(self, user_ttl: float):
+        self._sessions: Dict[str, float] = {}  # session key -> forget at
+        self._users: Dict[str, float] = {}  # user id -> revoked at
+        self._user_ttl = user_ttl
+    
+    def revoke_session(self, access_token: str) -> None:
+        claims = _unverified_claims(access_token)
+        exp = claims.get("exp")
+        forget_at = float(exp) if isinstance(exp, (int, float)) else time.time() + self._user_ttl
+        self._prune()
+        self._sessions[_session_key(claims, _token_cache_key(access_token))] = forget_at
+    
+    def revoke_user(self, user_id: str) -> None:
+        self._prune()
+        # Whole seconds, like `iat`: tokens issued from this second on stay valid
+        self._users[user_id] = int(time.time())
+    
+    def is_revoked(self, access_token: str, token_key: str) -> bool:
+        if not self._sessions and not self._users:
+            return False
+        claims = _unverified_claims(access_token)
+        if _session_key(claims, token_key) in self._sessions:
+            return True
+        revoked_at = self._users.get(claims.get("sub"))
+        issued_at = claims.get("iat")
+        return revoked_at is not None and (not isinstance(issued_at, (int, float)) or issued_at < revoked_at)
+    
+    def _prune(self) -> None:
+        now = time.time()
+        for key in [k for k, forget_at in self._sessions.items() if forget_at <= now]:
+            del self._sessions[key]
+        for user_id in [u for u, revoked_at in self._users.items() if revoked_at + self._user_ttl <= now]:
+            del self._users[user_id]
+
+
+_token_cache = _VerifiedTokenCache(TOKEN_CACHE_MAX_SIZE, TOKEN_CACHE_TTL_SECONDS)
+_revocations = _TokenRevocations(TOKEN_REVOCATION_TTL_SECONDS)
+_pending_verifications: Dict[str, asyncio.Future] = {}
+
+
+def _token_cache_key(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+
+def _unverified_claims(access_token: str) -> dict:
+    """Claims of a token without verifying it ({} if it cannot be decoded)"""
+    try:
+        claims = jwt.decode(access_token, options={"verify_signature": False})
+        return claims if isinstance(claims, dict) else {}
+    except jwt.PyJWTError:
+        return {}
+
+
+def _session_key(claims: dict, token_key: str) -> str:
+    session_id = claims.get("session_id")
+    return f"session:{session_id}" if session_id else token_key
+
+
+def _get_token_expiry(access_token: str) -> Optional[float]:
+    """Read the `exp` claim without verifying (the token has already been verified)"""
+    try:
+        exp = _unverified_claims(access_token).get("exp")
+        return float(exp) if exp is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def invalidate_token(access_token: Optional[str]) -> None:
+    """Revoke a token's session (e.g. on logout) and drop it from the verified-token cache"""
+    if access_token:
+        _revocations.revoke_session(access_token)
+        _token_cache.invalidate(_token_cache_key(access_token))
+
+
+def invalidate_user_tokens(user_id: Optional[str]) -> None:
+    """Revoke every token a user was issued so far (e.g. after a password change)"""
+    if user_id:
+        _revocations.revoke_user(user_id)
+        _token_cache.invalidate_user(user_id)
+
+
+def get_token_cache_stats() -> dict:
+    """Hit/miss counters and size of the verified-token cache"""
+    return _token_cache.stats()
+
+
+async def _verify_token_remotely(access_token: str) -> dict:
+    """Verify the access token with Supabase /auth/v1/user and return the user data"""
     try:
         # Verify the token using Supabase REST API
-        async with httpx.AsyncClient() as client:
-            verify_response = await client.get(
-                f"{SUPABASE_URL}/auth/v1/user",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "apikey": SUPABASE_ANON_KEY
-                },
-                timeout=10.0
+        client = get_http_client()
+        verify_response = await client.get(
+            f"{SUPABASE_URL}/auth/v1/user",
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "apikey": SUPABASE_ANON_KEY
+            },
+            timeout=10.0
+        )
+        
+        if verify_response.status_code != 200:
+            raise HTTPException(
+                status_code=401,
+                detail="Unauthorized"
             )
-            
-            if verify_response.status_code != 200:
-                raise HTTPException(
-                    status_code=401,
-                    detail="Unauthorized"
-                )
-            
-            response_data = verify_response.json()
-            
-            # Handle different response structures
-            # Supabase might return {"user": {...}} or directly {...}
-            if isinstance(response_data, dict) and "user" in response_data:
-                user_data = response_data["user"]
-            else:
-                user_data = response_data
-            
-            # Validate user data
-            if not user_data or not isinstance(user_data, dict):
-                raise HTTPException(
-                    status_code=401,
-                    detail="Unauthorized"
-                )
-            
-            user_id = user_data.get("id")
-            if not user_id:
-                raise HTTPException(
-                    status_code=401,
-                    detail="Unauthorized"
-                )
-            return {
-                "user": user_data,
-                "user_id": user_id,
-                "email": user_data.get("email"),
-                "user_metadata": user_data.get("user_metadata", {})
-            }
-            
+        
+        response_data = verify_response.json()
+        
+        # Handle different response structures
+        # Supabase might return {"user": {...}} or directly {...}
+        if isinstance(response_data, dict) and "user" in response_data:
+            user_data = response_data["user"]
+        else:
+            user_data = response_data
+        
+        # Validate user data
+        if not user_data or not isinstance(user_data, dict):
+            raise HTTPException(
+                status_code=401,
+                detail="Unauthorized"
+            )
+        
+        user_id = user_data.get("id")
+        if not user_id:
+            raise HTTPException(
+                status_code=401,
+                detail="Unauthorized"
+            )
+        return user_data
+        
     except HTTPException:
         raise
     except httpx.TimeoutException:
@@ -140,8 +347,6 @@ async def verify_auth(request: Request) -> dict:
             status_code=503,
             detail="Service unavailable"
         )
-    except HTTPException:
-        raise
     except Exception as e:
         logger.error(f"Authentication error: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -150,6 +355,130 @@ async def verify_auth(request: Request) -> dict:
         )
 
 
+class _JWKSCache:
+    """
+    Cache of the Supabase project's public signing keys (JWKS), indexed by kid.
+    Stale keys keep being served while a background task refreshes them, and an
+    unknown kid triggers an immediate (rate limited) refetch to pick up rotated keys.
+    """
+    
+    def __init__(self, refresh_interval: float, min_refetch_interval: float):
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetched_at = 0.0
+        self._last_attempt = 0.0
+        self._refresh_interval = refresh_interval
+        self._min_refetch_interval = min_refetch_interval
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+    
+    async def get_signing_key(self, kid: str) -> Optional[jwt.PyJWK]:
+        """Return the key for kid, or None if the project does not publish it"""
+        now = time.monotonic()
+        
+        if not self._keys:
+            await self.refresh()
+        elif now - self._fetched_at > self._refresh_interval:
+            self._schedule_refresh()
+        
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._last_attempt > self._min_refetch_interval:
+            # Unknown kid - keys may have been rotated since the last fetch
+            await self.refresh()
+            key = self._keys.get(kid)
+        return key
+    
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh())
+    
+    async def refresh(self) -> None:
+        """Fetch the JWKS from Supabase, keeping the current keys if the fetch fails"""
+        started = time.monotonic()
+        async with self._lock:
+            # Another coroutine refreshed while we were waiting for the lock
+            if self._last_attempt >= started:
+                return
+            self._last_attempt = time.monotonic()
+            
+            try:
+                client = get_http_client()
+                response = await client.get(
+                    f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json",
+                    headers={"apikey": SUPABASE_ANON_KEY},
+                    timeout=5.0
+                )
+                response.raise_for_status()
+                
+                keys: Dict[str, jwt.PyJWK] = {}
+                for jwk_data in response.json().get("keys", []):
+                    kid = jwk_data.get("kid")
+                    if not kid:
+                        continue
+                    try:
+                        keys[kid] = jwt.PyJWK(jwk_data)
+                    except jwt.PyJWTError as e:
+                        logger.warning(f"Skipping unusable JWKS key {kid}: {e}")
+                
+                self._keys = keys
+                self._fetched_at = time.monotonic()
+            except Exception as e:
+                logger.warning(f"Failed to refresh Supabase JWKS: {type(e).__name__}: {str(e)}")
+
+
+_jwks_cache = _JWKSCache(JWKS_REFRESH_INTERVAL, JWKS_MIN_REFETCH_INTERVAL)
+
+
+async def _verify_token_locally(access_token: str) -> Optional[dict]:
+    """
+    Verify a Supabase access token in-process.
+    Returns the user data built from the token claims, None if the signing key
+    is not known locally (caller falls back to Supabase), and raises 401 for
+    tokens that are malformed, expired or fail signature verification.
+    """
+    try:
+        header = jwt.get_unverified_header(access_token)
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    algorithm = header.get("alg")
+    if algorithm == "HS256":
+        # Legacy projects sign with the shared JWT secret
+        if not SUPABASE_JWT_SECRET:
+            return None
+        key = SUPABASE_JWT_SECRET
+    elif algorithm in _ASYMMETRIC_ALGORITHMS and header.get("kid"):
+        signing_key = await _jwks_cache.get_signing_key(header["kid"])
+        if signing_key is None:
+            return None
+        key = signing_key.key
+    else:
+        return None
+    
+    try:
+        claims = jwt.decode(
+            access_token,
+            key,
+            algorithms=[algorithm],
+            audience="authenticated",
+            options={"require": ["exp", "sub"]},
+            leeway=JWT_LEEWAY_SECONDS
+        )
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    # Same shape as the /auth/v1/user response for the fields handlers use
+    return {
+        "id": claims["sub"],
+        "aud": claims.get("aud"),
+        "role": claims.get("role"),
+        "email": claims.get("email"),
+        "phone": claims.get("phone"),
+        "app_metadata": claims.get("app_metadata") or {},
+        "user_metadata": claims.get("user_metadata") or {},
+        "is_anonymous": claims.get("is_anonymous", False),
+    }
+
+
 def _extract_token_from_cookie(auth_token_cookie: str) -> Optional[str]:
     """Extract access token from Supabase cookie"""
     access_token = None
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Backfill the asset activity ledger (asset_activity) from the transaction tables
+Copies checkouts, checkins, moves, reservations, leases, lease returns,
+disposals, maintenance and audits that have no ledger row yet. Safe to re-run.
+
+Usage: python backfill_activity_ledger.py [activity_type ...]
+"""
+import sys
+import asyncio
+
+from dotenv import load_dotenv
+
+# Set event loop policy BEFORE importing anything that uses asyncio
+if sys.platform == 'win32':
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+load_dotenv()
+
+from database import prisma
+from utils.activity_ledger import ACTIVITY_TYPES, backfill_activity_ledger
+
+
+async def main(activity_types):
+    await prisma.connect()
+    try:
+        written = await backfill_activity_ledger(activity_types or None)
+    finally:
+        await prisma.disconnect()
+
+    for activity_type, count in written.items():
+        print(f"{activity_type}: {count} row(s) added")
+    print(f"Total: {sum(written.values())} row(s) added")
+
+
+if __name__ == "__main__":
+    requested = sys.argv[1:]
+    unknown = [t for t in requested if t not in ACTIVITY_TYPES]
+    if unknown:
+        print(f"ERROR: Unknown activity type(s): {', '.join(unknown)}", file=sys.stderr)
+        print(f"Valid types: {', '.join(ACTIVITY_TYPES)}", file=sys.stderr)
+        sys.exit(1)
+    asyncio.run(main(requested))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-row writes vs. batched writes (utils/batch_writes.py)
+Writes N "deleted" history logs for one asset inside a transaction, once with
+one create per row and once through execute_batched, counts the requests sent
+to the query engine and rolls both transactions back, so nothing is kept.
+
+Usage: python benchmark_batch_writes.py [rows] [batch_size] [asset_id]
+"""
+import sys
+import asyncio
+import time
+from datetime import timedelta
+
+from dotenv import load_dotenv
+
+# Set event loop policy BEFORE importing anything that uses asyncio
+if sys.platform == 'win32':
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+load_dotenv()
+
+from database import prisma
+from utils.batch_writes import BATCH_WRITE_SIZE, execute_batched
+
+
+class _Rollback(Exception):
+    """Raised to discard the benchmark's writes"""
+
+
+def _log(asset_id):
+    return {"assetId": asset_id, "eventType": "deleted", "actionBy": "benchmark"}
+
+
+async def _per_row(transaction, asset_id, rows, batch_size):
+    for _ in range(rows):
+        await transaction.assetshistorylogs.create(data=_log(asset_id))
+
+
+async def _batched(transaction, asset_id, rows, batch_size):
+    await execute_batched(
+        transaction,
+        (lambda batch: batch.assetshistorylogs.create(data=_log(asset_id)) for _ in range(rows)),
+        batch_size
+    )
+
+
+async def _measure(write, asset_id, rows, batch_size):
+    """Engine requests and seconds for one write strategy (transaction start/rollback included)"""
+    engine = prisma._engine
+    original_request = engine.request
+    requests = 0
+
+    async def counting_request(*args, **kwargs):
+        nonlocal requests
+        requests += 1
+        return await original_request(*args, **kwargs)
+
+    engine.request = counting_request
+    started = time.perf_counter()
+    try:
+        async with prisma.tx(timeout=timedelta(minutes=5)) as transaction:
+            await write(transaction, asset_id, rows, batch_size)
+            raise _Rollback()
+    except _Rollback:
+        pass
+    finally:
+        engine.request = original_request
+    return requests, time.perf_counter() - started
+
+
+async def main(rows, batch_size, asset_id):
+    await prisma.connect()
+    try:
+        if not asset_id:
+            asset = await prisma.assets.find_first(where={"isDeleted": False})
+            if not asset:
+                print("ERROR: No asset found to attach the history logs to", file=sys.stderr)
+                return 1
+            asset_id = asset.id
+
+        print(f"Writing {rows} history log(s) for asset {asset_id} (batch size {batch_size}), rolled back")
+        for label, write in (("per-row", _per_row), ("batched", _batched)):
+            requests, seconds = await _measure(write, asset_id, rows, batch_size)
+            print(f"{label:>8}: {requests:>6} engine request(s) {seconds * 1000:>10.1f} ms")
+    finally:
+        await prisma.disconnect()
+    return 0
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    try:
+        rows = int(args[0]) if len(args) > 0 else 200
+        batch_size = int(args[1]) if len(args) > 1 else BATCH_WRITE_SIZE
+    except ValueError:
+        print("ERROR: rows and batch_size must be integers", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(asyncio.run(main(rows, batch_size, args[2] if len(args) > 2 else None)))
@@ -5,6 +5,8 @@ import sys
 import asyncio
 from contextlib import asynccontextmanager
 
+from http_client import start_http_client, close_http_client
+
 # Import Prisma client (generated in prisma_client subdirectory)
 try:
     from prisma_client import Prisma
@@ -20,12 +22,27 @@ prisma = Prisma()
 
 @asynccontextmanager
 async def lifespan(app):
-    """Manage Prisma client lifecycle"""
-    # Startup: Connect to database
+    """Manage Prisma client, shared HTTP client and form PDF renderer lifecycle"""
+    # Startup: Connect to database and open the outbound HTTP connection pool
     await prisma.connect()
+    await start_http_client()
+    # Launch the warm Chromium used for form PDFs
+    from utils.form_pdf_generator import start_form_pdf_renderer, close_form_pdf_renderer
+    await start_form_pdf_renderer()
+    # First start after deploy: fill the storage catalog in the background
+    from utils.storage_usage import reconcile_storage_objects_if_empty
+    storage_catalog_task = asyncio.create_task(reconcile_storage_objects_if_empty())
     
     yield
     
-    # Shutdown: Disconnect from database
+    storage_catalog_task.cancel()
+    # Shutdown: Close pooled HTTP, cache and storage connections, the PDF renderer, disconnect from database
+    # (imported here: the response cache depends on permissions, which imports this module)
+    from utils.response_cache import close_response_cache
+    from utils.storage import close_storage_admin
+    await close_form_pdf_renderer()
+    await close_response_cache()
+    await close_storage_admin()
+    await close_http_client()
     await prisma.disconnect()
 
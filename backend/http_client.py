@@ -0,0 +1,88 @@
+"""
+Shared outbound HTTP client
+One process-wide httpx.AsyncClient (created and closed by the app lifespan) so
+calls to Supabase and other services reuse pooled keep-alive connections
+instead of paying a TCP+TLS handshake per request.
+"""
+import os
+import logging
+from typing import Optional
+from urllib.parse import urlparse
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL") or os.getenv("SUPABASE_URL")
+
+# Pool configuration
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+# Connection limit for the Supabase host (auth, admin API), which takes most of our traffic
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "50"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+HTTP_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _create_client() -> httpx.AsyncClient:
+    """Build the pooled client, with a dedicated connection pool for the Supabase host"""
+    mounts = {}
+    if SUPABASE_URL:
+        supabase_host = urlparse(SUPABASE_URL).netloc
+        if supabase_host:
+            mounts[f"all://{supabase_host}"] = httpx.AsyncHTTPTransport(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=min(HTTP_MAX_KEEPALIVE_CONNECTIONS, HTTP_MAX_CONNECTIONS_PER_HOST),
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+                )
+            )
+
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        ),
+        mounts=mounts
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared client. Created lazily if the lifespan has not started it
+    (e.g. scripts importing routers directly). Do not close it - use it as
+    `await get_http_client().get(...)`, not in an `async with` block.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+async def start_http_client() -> None:
+    """Create the shared client on app startup"""
+    get_http_client()
+    logger.info(f"Shared HTTP client started (http2={HTTP2_AVAILABLE})")
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections on app shutdown"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -2,13 +2,14 @@
 FastAPI Backend for Asset Management System
 Main application entry point
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import logging
 from dotenv import load_dotenv
 
 from database import lifespan
+from utils.response_cache import get_response_cache_stats
 from routers import locations, sites, departments, company_info, categories, subcategories, employees, assets, checkout, checkin, move, reserve, lease, lease_return, dispose, maintenance, dashboard, schedule, auth, audit, inventory, users, asset_events, forms, file_history, reports, reports_audit, reports_checkout, reports_depreciation, reports_lease, reports_location, reports_maintenance, reports_reservation, reports_transaction, reports_automated, cron
 
 # Load environment variables
@@ -109,6 +110,14 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "ok", "service": "backend"}
 
+@app.get("/health/cache")
+async def cache_health(request: Request):
+    """Response cache backend and hit/miss counters (per worker); requires the CRON_SECRET bearer token"""
+    cron_secret = os.getenv("CRON_SECRET")
+    if not cron_secret or request.headers.get("authorization") != f"Bearer {cron_secret}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return get_response_cache_stats()
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -40,6 +40,7 @@ class PaginationInfo(BaseModel):
     totalPages: int
     hasNextPage: bool
     hasPreviousPage: bool
+    nextCursor: Optional[str] = None
 
 
 class AssetEventsResponse(BaseModel):
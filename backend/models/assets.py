@@ -2,7 +2,7 @@
 Pydantic models for Assets API
 """
 from pydantic import BaseModel, ConfigDict, field_validator
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Dict, Any
 from datetime import datetime
 from decimal import Decimal
 
@@ -259,12 +259,14 @@ class PaginationInfo(BaseModel):
     pageSize: int
     total: int
     totalPages: int
+    nextCursor: Optional[str] = None
 
 class SummaryInfo(BaseModel):
     totalAssets: int
     totalValue: float
     availableAssets: int
     checkedOutAssets: int
+    checkedOutAssetsValue: Optional[float] = None
 
 class AssetsResponse(BaseModel):
     assets: List[Asset]
@@ -277,6 +279,10 @@ class AssetResponse(BaseModel):
 class StatusesResponse(BaseModel):
     statuses: List[str]
 
+class DistinctValuesResponse(BaseModel):
+    field: str
+    values: List[str]
+
 class SummaryResponse(BaseModel):
     summary: SummaryInfo
 
@@ -288,3 +294,33 @@ class GenerateAssetTagResponse(BaseModel):
     assetTagId: str
     companySuffix: str
 
+
+class AssetImportJobCreate(BaseModel):
+    assets: List[Dict[str, Any]]
+    fileName: str = "import.xlsx"
+    filePath: Optional[str] = None
+    fileSize: Optional[int] = None
+    mimeType: Optional[str] = None
+
+class AssetImportJobResponse(BaseModel):
+    jobId: str
+    status: str
+    totalRows: int
+    statusUrl: str
+
+class AssetImportJobStatus(BaseModel):
+    jobId: str
+    status: str
+    fileName: str
+    totalRows: int
+    recordsProcessed: int
+    recordsCreated: int
+    recordsSkipped: int
+    recordsFailed: int
+    progress: float
+    chunksCompleted: int
+    totalChunks: int
+    failures: List[Dict[str, Any]]
+    errorMessage: Optional[str] = None
+    createdAt: datetime
+    updatedAt: datetime
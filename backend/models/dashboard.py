@@ -27,3 +27,29 @@ class DashboardStatsResponse(BaseModel):
     summary: Dict
     calendar: Dict
 
+
+class ActivityItem(BaseModel):
+    id: str
+    activityType: str
+    sourceId: str
+    activityDate: str
+    actor: Optional[str] = None
+    details: Optional[str] = None
+    assetId: str
+    assetTagId: str
+    assetDescription: str
+    employeeUserId: Optional[str] = None
+    employeeName: Optional[str] = None
+
+class ActivityPaginationInfo(BaseModel):
+    total: int
+    page: int
+    pageSize: int
+    totalPages: int
+    hasNextPage: bool
+    hasPreviousPage: bool
+    nextCursor: Optional[str] = None
+
+class ActivityFeedResponse(BaseModel):
+    activities: List[ActivityItem]
+    pagination: ActivityPaginationInfo
@@ -57,6 +57,7 @@ class PaginationInfo(BaseModel):
     totalPages: int
     hasNextPage: bool
     hasPreviousPage: bool
+    nextCursor: Optional[str] = None
 
 class InventoryItemsResponse(BaseModel):
     items: List[InventoryItem]
@@ -52,6 +52,7 @@ class PaginationInfo(BaseModel):
     totalPages: int
     hasNextPage: bool
     hasPreviousPage: bool
+    nextCursor: Optional[str] = None
 
 class AuditItem(BaseModel):
     id: str
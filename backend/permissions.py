@@ -0,0 +1,165 @@
+"""
+Permission resolution for FastAPI routes
+Loads a user's AssetUser row (role, isActive and can* flags) once and caches it
+for a short TTL, so permission checks no longer cost a database round-trip each.
+"""
+from fastapi import Depends, HTTPException, Request
+import os
+import time
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from auth import verify_auth
+from database import prisma
+
+logger = logging.getLogger(__name__)
+
+# Cross-request cache lifetime. Changes made through routers/users.py invalidate
+# the cache immediately; this bounds staleness for other workers/processes.
+PERMISSION_CACHE_TTL_SECONDS = float(os.getenv("PERMISSION_CACHE_TTL_SECONDS", "30"))
+
+PERMISSION_FIELDS = (
+    "canDeleteAssets",
+    "canManageImport",
+    "canManageExport",
+    "canCreateAssets",
+    "canEditAssets",
+    "canViewAssets",
+    "canManageEmployees",
+    "canManageSetup",
+    "canCheckout",
+    "canCheckin",
+    "canReserve",
+    "canMove",
+    "canLease",
+    "canDispose",
+    "canManageMaintenance",
+    "canAudit",
+    "canManageMedia",
+    "canManageTrash",
+    "canManageUsers",
+    "canManageReturnForms",
+    "canViewReturnForms",
+    "canManageAccountabilityForms",
+    "canViewAccountabilityForms",
+    "canManageReports",
+    "canManageInventory",
+)
+
+# userId -> (expires_at, AssetUser)
+_asset_user_cache: Dict[str, Tuple[float, Any]] = {}
+
+
+async def get_asset_user(user_id: str):
+    """
+    Return the AssetUser row for a Supabase user id, or None if there is none.
+    Rows are served from the cross-request cache while fresh; missing users are
+    not cached so a newly created account is picked up on its next request.
+    """
+    if not user_id:
+        return None
+
+    entry = _asset_user_cache.get(user_id)
+    if entry is not None:
+        expires_at, asset_user = entry
+        if expires_at > time.monotonic():
+            return asset_user
+        _asset_user_cache.pop(user_id, None)
+
+    asset_user = await prisma.assetuser.find_unique(
+        where={"userId": user_id}
+    )
+    if asset_user is not None and PERMISSION_CACHE_TTL_SECONDS > 0:
+        _asset_user_cache[user_id] = (time.monotonic() + PERMISSION_CACHE_TTL_SECONDS, asset_user)
+    return asset_user
+
+
+def invalidate_user_permissions(user_id: Optional[str] = None) -> None:
+    """Drop a user's cached permissions, or the whole cache if no user id is given"""
+    if user_id is None:
+        _asset_user_cache.clear()
+    else:
+        _asset_user_cache.pop(user_id, None)
+
+
+class PermissionSet:
+    """Resolved permissions of the authenticated user"""
+
+    def __init__(self, user_id: str, asset_user):
+        self.user_id = user_id
+        self.asset_user = asset_user
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self.asset_user and self.asset_user.isActive)
+
+    @property
+    def is_admin(self) -> bool:
+        return self.is_active and self.asset_user.role == "admin"
+
+    @property
+    def role(self) -> Optional[str]:
+        return self.asset_user.role if self.asset_user else None
+
+    def has(self, permission: str) -> bool:
+        """Check a single permission. Admins have all permissions, inactive users none."""
+        if not self.is_active:
+            return False
+        if self.is_admin:
+            return True
+        return bool(getattr(self.asset_user, permission, False))
+
+    def require(self, permission: str, detail: str = "Forbidden") -> None:
+        """Raise 403 unless the user has the permission"""
+        if not self.has(permission):
+            raise HTTPException(status_code=403, detail=detail)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Full permission set as stored on the AssetUser row (empty if the user has none)"""
+        if not self.asset_user:
+            return {}
+        permissions = {
+            "role": self.asset_user.role,
+            "isActive": self.asset_user.isActive,
+            "isApproved": self.asset_user.isApproved,
+        }
+        for field in PERMISSION_FIELDS:
+            permissions[field] = getattr(self.asset_user, field)
+        return permissions
+
+
+async def get_user_permissions(
+    request: Request,
+    auth: dict = Depends(verify_auth)
+) -> PermissionSet:
+    """
+    FastAPI dependency resolving the authenticated user's permissions, for routes
+    to check with permissions.has(...) instead of check_permission. The result is
+    stored on request.state so the row is loaded once per request.
+    A failed lookup leaves the user without permissions, like check_permission.
+    """
+    permissions = getattr(request.state, "user_permissions", None)
+    if permissions is not None:
+        return permissions
+
+    user_id = auth.get("user", {}).get("id") or auth.get("user_id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    try:
+        asset_user = await get_asset_user(user_id)
+    except Exception as e:
+        logger.error(f"Error loading permissions: {type(e).__name__}: {str(e)}", exc_info=True)
+        asset_user = None
+    permissions = PermissionSet(user_id, asset_user)
+    request.state.user_permissions = permissions
+    return permissions
+
+
+async def check_permission(user_id: str, permission: str) -> bool:
+    """Check if user has a specific permission. Admins have all permissions."""
+    try:
+        asset_user = await get_asset_user(user_id)
+        return PermissionSet(user_id, asset_user).has(permission)
+    except Exception:
+        return False
@@ -15,6 +15,7 @@ from models.asset_events import (
 )
 from auth import verify_auth
 from database import prisma
+from utils.pagination import keyset_order, keyset_where, split_page
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +52,7 @@ async def get_asset_events(
     field: Optional[str] = Query(None, description="Filter by field"),
     page: int = Query(1, ge=1, description="Page number"),
     pageSize: int = Query(50, ge=1, le=100, description="Page size"),
+    cursor: Optional[str] = Query(None, description="pagination.nextCursor of the previous page; replaces page"),
     auth: dict = Depends(verify_auth)
 ):
     """Get all asset events with pagination and filtering"""
@@ -84,14 +86,15 @@ async def get_asset_events(
             where=where_clause if where_clause else None
         )
         
-        # Get events with pagination
+        # Get events with pagination (by cursor when given, else by page number)
         db_events = await prisma.assetshistorylogs.find_many(
-            where=where_clause if where_clause else None,
+            where=keyset_where(where_clause if where_clause else None, cursor),
             include={"asset": True},
-            order={"createdAt": "desc"},
-            skip=skip,
-            take=pageSize,
+            order=keyset_order(),
+            skip=0 if cursor else skip,
+            take=pageSize + 1,
         )
+        db_events, next_cursor = split_page(db_events, pageSize)
         
         # Get unique field values for filter dropdown
         all_events_with_fields = await prisma.assetshistorylogs.find_many(
@@ -119,8 +122,9 @@ async def get_asset_events(
                 pageSize=pageSize,
                 total=total_count,
                 totalPages=total_pages,
-                hasNextPage=page < total_pages,
-                hasPreviousPage=page > 1,
+                hasNextPage=next_cursor is not None,
+                hasPreviousPage=page > 1 or cursor is not None,
+                nextCursor=next_cursor,
             )
         )
     
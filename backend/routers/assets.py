@@ -7,10 +7,8 @@ from datetime import datetime
 from decimal import Decimal
 import logging
 import asyncio
-import os
 import re
 import random
-from supabase import create_client, Client
 
 from models.assets import (
     Asset,
@@ -19,6 +17,7 @@ from models.assets import (
     AssetsResponse,
     AssetResponse,
     StatusesResponse,
+    DistinctValuesResponse,
     SummaryResponse,
     DeleteResponse,
     BulkDeleteRequest,
@@ -36,10 +35,39 @@ from models.assets import (
     ReservationInfo,
     AuditHistoryInfo,
     GenerateAssetTagRequest,
-    GenerateAssetTagResponse
+    GenerateAssetTagResponse,
+    AssetImportJobCreate,
+    AssetImportJobResponse,
+    AssetImportJobStatus
 )
-from auth import verify_auth, SUPABASE_URL, SUPABASE_ANON_KEY
+from auth import verify_auth, SUPABASE_ANON_KEY
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.storage import get_storage_admin
+from utils.storage_usage import get_storage_usage, ASSET_STORAGE_SCOPES, DOCUMENT_STORAGE_SCOPES, IMAGE_STORAGE_SCOPES
+from utils.media_catalog import fetch_catalog_page, asset_tag_id_from_file_name
+from http_client import get_http_client
+from utils.asset_distinct import get_distinct_asset_values, invalidate_distinct_asset_values, DISTINCT_ASSET_FIELDS
+from utils.response_cache import cached_response, invalidate_response_cache, TAG_ASSETS
+from utils.pagination import keyset_order, keyset_where, split_page
+from utils.batch_writes import execute_batched
+from utils.asset_import import (
+    IMPORT_CHUNK_SIZE,
+    get_import_job,
+    import_asset_chunk,
+    import_job_progress,
+    invalid_import_rows,
+    resolve_reference_data,
+    start_import_job,
+)
+from utils.relation_counts import count_by
+from utils.asset_search import (
+    can_use_search_index,
+    search_asset_ids,
+    search_asset_status_groups,
+    search_index_ready,
+    refresh_asset_search_index,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -272,6 +300,50 @@ def build_where_clause(
     return where_clause
 
 
+async def get_asset_summary(where_clause: Dict[str, Any]) -> SummaryInfo:
+    """
+    Summary statistics for the assets matching where_clause, computed in the database
+    with one group_by on status (count and sum of cost per status) instead of loading rows
+    """
+    status_groups = await prisma.assets.group_by(
+        by=["status"],
+        where=where_clause,
+        count=True,
+        sum={"cost": True}
+    )
+    return summarize_status_groups(status_groups)
+
+
+def summarize_status_groups(status_groups: List[Dict[str, Any]]) -> SummaryInfo:
+    """Fold per-status group_by rows (status, _count._all, _sum.cost) into SummaryInfo"""
+    total_assets = 0
+    total_value = 0.0
+    available_assets = 0
+    checked_out_assets = 0
+    checked_out_value = 0.0
+    for row in status_groups:
+        count = row.get("_count", {}).get("_all", 0)
+        value = float(row.get("_sum", {}).get("cost") or 0)
+        total_assets += count
+        total_value += value
+        
+        # Status filters are case-insensitive elsewhere, so match groups the same way
+        status_name = (row.get("status") or "").lower()
+        if status_name == "available":
+            available_assets += count
+        elif status_name == "checked out":
+            checked_out_assets += count
+            checked_out_value += value
+    
+    return SummaryInfo(
+        totalAssets=total_assets,
+        totalValue=total_value,
+        availableAssets=available_assets,
+        checkedOutAssets=checked_out_assets,
+        checkedOutAssetsValue=checked_out_value
+    )
+
+
 @router.post("/generate-tag", response_model=GenerateAssetTagResponse)
 async def generate_asset_tag(
     request: GenerateAssetTagRequest,
@@ -337,6 +409,7 @@ async def generate_asset_tag(
 
 
 @router.get("", response_model=Union[AssetsResponse, StatusesResponse, SummaryResponse])
+@cached_response("assets.list", tags=[TAG_ASSETS], ttl=15, permission="canViewAssets")
 async def get_assets(
     search: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
@@ -348,16 +421,22 @@ async def get_assets(
     searchFields: Optional[str] = Query(None),
     statuses: bool = Query(False, description="Return only unique statuses"),
     summary: bool = Query(False, description="Return only summary statistics"),
-    auth: dict = Depends(verify_auth)
+    cursor: Optional[str] = Query(None, description="pagination.nextCursor of the previous page; replaces page"),
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
-    """Get all assets with optional search filter and pagination"""
+    """
+    Get all assets with optional search filter and pagination.
+    Pages are selected by page number or, for deep paging, by the keyset cursor
+    returned as pagination.nextCursor.
+    """
     try:
         user_id = auth.get("user", {}).get("id") or auth.get("user_id")
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canViewAssets")
+        has_permission = permissions.has("canViewAssets")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -373,64 +452,45 @@ async def get_assets(
         
         skip = (page - 1) * pageSize
         
+        # Searches over the default fields use the trigram index (utils/asset_search.py).
+        # Its per-status groups give the summary and total; if the index is not fully
+        # populated or a query fails, fall back to the ILIKE where clause. Ranked results
+        # are paged by number only, so a cursor request keeps the (createdAt, id) order
+        # of the where clause path.
+        search_status_groups = None
+        page_ids: List[str] = []
+        if can_use_search_index(search, searchFields) and not cursor and await search_index_ready():
+            try:
+                if statuses or summary:
+                    search_status_groups = await search_asset_status_groups(
+                        search, category=category, status=status, include_deleted=includeDeleted
+                    )
+                else:
+                    search_status_groups, page_ids = await asyncio.gather(
+                        search_asset_status_groups(
+                            search, category=category, status=status, include_deleted=includeDeleted
+                        ),
+                        search_asset_ids(
+                            search, skip, pageSize, category=category, status=status, include_deleted=includeDeleted
+                        )
+                    )
+            except Exception as e:
+                search_status_groups = None
+                logger.warning(f"Asset search index unavailable, using ILIKE search: {type(e).__name__}: {str(e)}")
+        
         # Check if unique statuses are requested
         if statuses:
-            # Fetch all matching assets and extract unique statuses
-            # Prisma Python doesn't support select, so we fetch all fields
-            assets_with_status = await prisma.assets.find_many(
-                where=where_clause
-            )
-            unique_statuses = sorted(list(set(
-                asset.status for asset in assets_with_status if asset.status
-            )))
+            if search_status_groups is not None:
+                unique_statuses = sorted({row["status"] for row in search_status_groups if row["status"]})
+            else:
+                unique_statuses = await get_distinct_asset_values("status", where_clause)
             return StatusesResponse(statuses=unique_statuses)
         
         # Check if summary is requested
         if summary:
-            total_assets = await prisma.assets.count(where=where_clause)
-            # Fetch all matching assets to calculate sum (Prisma Python doesn't support select)
-            assets_for_sum = await prisma.assets.find_many(
-                where=where_clause
-            )
-            total_value = sum(
-                float(asset.cost) if asset.cost is not None else 0.0
-                for asset in assets_for_sum
-            )
-            available_assets = await prisma.assets.count(
-                where={
-                    **where_clause,
-                    "status": {"equals": "Available", "mode": "insensitive"}
-                }
-            )
-            checked_out_assets = await prisma.assets.count(
-                where={
-                    **where_clause,
-                    "status": {"equals": "Checked out", "mode": "insensitive"}
-                }
-            )
-            
-            # Calculate value of checked out assets only
-            checked_out_where = {
-                **where_clause,
-                "status": {"equals": "Checked out", "mode": "insensitive"}
-            }
-            checked_out_assets_for_value = await prisma.assets.find_many(
-                where=checked_out_where
-            )
-            checked_out_value = sum(
-                float(asset.cost) if asset.cost is not None else 0.0
-                for asset in checked_out_assets_for_value
-            )
-            
-            return SummaryResponse(
-                summary=SummaryInfo(
-                    totalAssets=total_assets,
-                    totalValue=total_value,
-                    availableAssets=available_assets,
-                    checkedOutAssets=checked_out_assets,
-                    checkedOutAssetsValue=checked_out_value
-                )
-            )
+            if search_status_groups is not None:
+                return SummaryResponse(summary=summarize_status_groups(search_status_groups))
+            return SummaryResponse(summary=await get_asset_summary(where_clause))
         
         # Optimize includes for deleted assets - they don't need heavy relations
         # For deleted assets, we only need basic info (category, subCategory)
@@ -472,31 +532,38 @@ async def get_assets(
                     }
                 }
         
-        # Get total count and assets in parallel
-        total_count, assets_data = await asyncio.gather(
-            prisma.assets.count(where=where_clause),
-            prisma.assets.find_many(
-                where=where_clause,
-                include=include_dict,
-                order=[{"createdAt": "desc"}, {"id": "desc"}],
-                skip=skip,
-                take=pageSize
+        next_cursor = None
+        if search_status_groups is not None:
+            # Ranked page of ids from the search index, then load those assets in rank order
+            summary_info = summarize_status_groups(search_status_groups)
+            assets_data = []
+            if page_ids:
+                assets_data = await prisma.assets.find_many(
+                    where={"id": {"in": page_ids}},
+                    include=include_dict
+                )
+                rank = {asset_id: index for index, asset_id in enumerate(page_ids)}
+                assets_data.sort(key=lambda asset: rank[asset.id])
+        else:
+            # Get summary statistics (which include the total count) and the page of assets in parallel.
+            # One extra row tells whether there is a next page to issue a cursor for.
+            summary_info, assets_data = await asyncio.gather(
+                get_asset_summary(where_clause),
+                prisma.assets.find_many(
+                    where=keyset_where(where_clause, cursor),
+                    include=include_dict,
+                    order=keyset_order(),
+                    skip=0 if cursor else skip,
+                    take=pageSize + 1
+                )
             )
-        )
+            assets_data, next_cursor = split_page(assets_data, pageSize)
+        total_count = summary_info.totalAssets
         
-        # Get image counts for all assets - optimized batch query
-        assets_with_image_count = []
-        image_counts = {}
-        if assets_data:
-            asset_tag_ids = [asset.assetTagId for asset in assets_data]
-            # Batch fetch all image counts at once instead of individual queries
-            if asset_tag_ids:
-                all_images = await prisma.assetsimage.find_many(
-                    where={"assetTagId": {"in": asset_tag_ids}}
-                )
-                # Count images per asset tag ID
-                for asset_tag_id in asset_tag_ids:
-                    image_counts[asset_tag_id] = sum(1 for img in all_images if img.assetTagId == asset_tag_id)
+        # Get image counts for the page's assets with one grouped count query
+        image_counts = await count_by(
+            prisma.assetsimage, "assetTagId", [asset.assetTagId for asset in assets_data]
+        )
         
         # Convert to Asset models
         assets = []
@@ -628,30 +695,6 @@ async def get_assets(
                 logger.error(f"Error creating Asset model: {type(e).__name__}: {str(e)}", exc_info=True)
                 continue
         
-        # Calculate summary statistics in parallel
-        # Fetch all matching assets to calculate sum (Prisma Python doesn't support select)
-        assets_for_sum, available_assets, checked_out_assets = await asyncio.gather(
-            prisma.assets.find_many(
-                where=where_clause
-            ),
-            prisma.assets.count(
-                where={
-                    **where_clause,
-                    "status": {"equals": "Available", "mode": "insensitive"}
-                }
-            ),
-            prisma.assets.count(
-                where={
-                    **where_clause,
-                    "status": {"equals": "Checked out", "mode": "insensitive"}
-                }
-            )
-        )
-        
-        total_value = sum(
-            float(asset.cost) if asset.cost is not None else 0.0
-            for asset in assets_for_sum
-        )
         total_pages = (total_count + pageSize - 1) // pageSize if total_count > 0 else 0
         
         return AssetsResponse(
@@ -660,21 +703,57 @@ async def get_assets(
                 page=page,
                 pageSize=pageSize,
                 total=total_count,
-                totalPages=total_pages
+                totalPages=total_pages,
+                nextCursor=next_cursor
             ),
-            summary=SummaryInfo(
-                totalAssets=total_count,
-                totalValue=total_value,
-                availableAssets=available_assets,
-                checkedOutAssets=checked_out_assets
-            )
+            summary=summary_info
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching assets: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch assets")
 
 
+@router.get("/distinct", response_model=DistinctValuesResponse)
+async def get_distinct_values(
+    field: str = Query(..., description="One of: status, location, site, department, assetType"),
+    category: Optional[str] = Query(None),
+    includeDeleted: bool = Query(False),
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
+):
+    """Get the distinct values of an asset column for filter dropdowns"""
+    try:
+        user_id = auth.get("user", {}).get("id") or auth.get("user_id")
+        if not user_id:
+            raise HTTPException(status_code=401, detail="Unauthorized")
+        
+        has_permission = permissions.has("canViewAssets")
+        if not has_permission:
+            raise HTTPException(
+                status_code=403,
+                detail="You do not have permission to view assets"
+            )
+        
+        if field not in DISTINCT_ASSET_FIELDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid field. Must be one of: {', '.join(DISTINCT_ASSET_FIELDS)}"
+            )
+        
+        where_clause = build_where_clause(category=category, include_deleted=includeDeleted)
+        values = await get_distinct_asset_values(field, where_clause)
+        return DistinctValuesResponse(field=field, values=values)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching distinct asset values: {type(e).__name__}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to fetch distinct values")
+
+
 # Form PDF generation request model
 from pydantic import BaseModel
 
@@ -683,19 +762,87 @@ class FormPDFRequest(BaseModel):
     url: Optional[str] = None
     elementId: Optional[str] = None
     elementIds: Optional[List[str]] = None
+    # "browser" (default) prints the form page in Chromium; "native" draws the
+    # form data with fpdf2 (utils/form_pdf_native.py) and needs no browser
+    renderer: Optional[str] = None
+    # Native renderer input: saved form id(s), or unsaved form data shaped like the forms API
+    formId: Optional[str] = None
+    formIds: Optional[List[str]] = None
+    form: Optional[Dict[str, Any]] = None
+
+
+async def _native_form_pdf_response(
+    form_type: str,
+    request: FormPDFRequest,
+    permissions: PermissionSet,
+    single_filename: str,
+    batch_filename: str
+):
+    """Render return / accountability forms with the browser-free renderer"""
+    from utils.form_pdf_native import (
+        render_forms_pdf, load_forms, load_company_logo, NATIVE_FORM_BATCH_LIMIT
+    )
+    
+    form_ids = request.formIds or ([request.formId] if request.formId else [])
+    if not form_ids and not request.form:
+        raise HTTPException(status_code=400, detail="Form ID(s) or form data required")
+    if len(form_ids) > NATIVE_FORM_BATCH_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {NATIVE_FORM_BATCH_LIMIT} forms can be rendered per request"
+        )
+    
+    if form_ids:
+        permission = "canViewReturnForms" if form_type == "return" else "canViewAccountabilityForms"
+        if not permissions.has(permission):
+            raise HTTPException(status_code=403, detail="You do not have permission to view this form")
+        try:
+            forms = await load_forms(form_type, list(dict.fromkeys(form_ids)))
+        except ValueError as ve:
+            raise HTTPException(status_code=404, detail=str(ve))
+    else:
+        forms = [request.form]
+    
+    logo = await load_company_logo()
+    pdf_data = await asyncio.to_thread(render_forms_pdf, form_type, forms, logo)
+    
+    filename = batch_filename if len(forms) > 1 else single_filename
+    return Response(
+        content=pdf_data,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(len(pdf_data)),
+        }
+    )
 
 
 @router.post("/return-form/pdf")
 async def generate_return_form_pdf(
     request: FormPDFRequest,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
-    """Generate PDF from return form HTML or URL using Playwright"""
+    """Generate PDF from return form HTML or URL using Playwright, or from form data (renderer="native")"""
     try:
         user_id = auth.get("user", {}).get("id")
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
         
+        if request.renderer == "native":
+            try:
+                return await _native_form_pdf_response(
+                    "return", request, permissions, "return-of-assets-combined.pdf", "return-of-assets-forms.pdf"
+                )
+            except ImportError as ie:
+                logger.error(f"fpdf2 not available: {ie}")
+                raise HTTPException(
+                    status_code=500,
+                    detail="PDF generation not available. Please install fpdf2: pip install fpdf2"
+                )
+        if request.renderer not in (None, "browser"):
+            raise HTTPException(status_code=400, detail="renderer must be 'browser' or 'native'")
+        
         if not request.html and not request.url:
             raise HTTPException(status_code=400, detail="HTML content or URL is required")
         
@@ -705,7 +852,7 @@ async def generate_return_form_pdf(
             raise HTTPException(status_code=400, detail="Element ID(s) required")
         
         try:
-            from utils.form_pdf_generator import generate_form_pdf
+            from utils.form_pdf_generator import generate_form_pdf, FormPdfBusyError
             
             pdf_data = await generate_form_pdf(
                 html=request.html,
@@ -730,6 +877,8 @@ async def generate_return_form_pdf(
                 status_code=500, 
                 detail="PDF generation not available. Please install playwright: pip install playwright && playwright install chromium"
             )
+        except FormPdfBusyError as be:
+            raise HTTPException(status_code=503, detail=str(be), headers={"Retry-After": "5"})
         except ValueError as ve:
             raise HTTPException(status_code=400, detail=str(ve))
     
@@ -746,14 +895,29 @@ async def generate_return_form_pdf(
 @router.post("/accountability-form/pdf")
 async def generate_accountability_form_pdf(
     request: FormPDFRequest,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
-    """Generate PDF from accountability form HTML or URL using Playwright"""
+    """Generate PDF from accountability form HTML or URL using Playwright, or from form data (renderer="native")"""
     try:
         user_id = auth.get("user", {}).get("id")
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
         
+        if request.renderer == "native":
+            try:
+                return await _native_form_pdf_response(
+                    "accountability", request, permissions, "accountability-form.pdf", "accountability-forms.pdf"
+                )
+            except ImportError as ie:
+                logger.error(f"fpdf2 not available: {ie}")
+                raise HTTPException(
+                    status_code=500,
+                    detail="PDF generation not available. Please install fpdf2: pip install fpdf2"
+                )
+        if request.renderer not in (None, "browser"):
+            raise HTTPException(status_code=400, detail="renderer must be 'browser' or 'native'")
+        
         if not request.html and not request.url:
             raise HTTPException(status_code=400, detail="HTML content or URL is required")
         
@@ -763,7 +927,7 @@ async def generate_accountability_form_pdf(
             raise HTTPException(status_code=400, detail="Element ID(s) required")
         
         try:
-            from utils.form_pdf_generator import generate_form_pdf
+            from utils.form_pdf_generator import generate_form_pdf, FormPdfBusyError
             
             pdf_data = await generate_form_pdf(
                 html=request.html,
@@ -788,6 +952,8 @@ async def generate_accountability_form_pdf(
                 status_code=500, 
                 detail="PDF generation not available. Please install playwright: pip install playwright && playwright install chromium"
             )
+        except FormPdfBusyError as be:
+            raise HTTPException(status_code=503, detail=str(be), headers={"Retry-After": "5"})
         except ValueError as ve:
             raise HTTPException(status_code=400, detail=str(ve))
     
@@ -925,7 +1091,8 @@ async def get_asset_history(
 @router.post("/import")
 async def import_assets(
     request: Dict[str, Any],
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Import assets from Excel file"""
     try:
@@ -934,7 +1101,7 @@ async def import_assets(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canManageImport")
+        has_permission = permissions.has("canManageImport")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -956,449 +1123,32 @@ async def import_assets(
             raise HTTPException(status_code=400, detail="Invalid request body. Expected an array of assets.")
         
         # Validate that assets have required fields
-        invalid_assets = [asset for asset in assets if not asset or not isinstance(asset, dict) or not asset.get("assetTagId") or (isinstance(asset.get("assetTagId"), str) and asset.get("assetTagId", "").strip() == "")]
+        invalid_indices = invalid_import_rows(assets)
         
-        if invalid_assets:
-            invalid_indices = [assets.index(asset) + 2 for asset in invalid_assets]  # +2 because row 1 is header
+        if invalid_indices:
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid data format: {len(invalid_assets)} row(s) are missing required 'Asset Tag ID' field. Please ensure your Excel file has the correct column headers.",
+                detail=f"Invalid data format: {len(invalid_indices)} row(s) are missing required 'Asset Tag ID' field. Please ensure your Excel file has the correct column headers.",
                 headers={"X-Invalid-Rows": ",".join(map(str, invalid_indices))}
             )
         
-        # Pre-process: collect all unique categories, subcategories, locations, departments, and sites
-        unique_categories = set()
-        unique_subcategories = set()
-        unique_locations = set()
-        unique_departments = set()
-        unique_sites = set()
-        subcategory_to_category_map = {}
-        
-        for asset in assets:
-            category_name = asset.get("category", "").strip() if asset.get("category") else None
-            subcategory_name = asset.get("subCategory", "").strip() if asset.get("subCategory") else None
-            
-            if category_name:
-                unique_categories.add(category_name)
-            if subcategory_name:
-                unique_subcategories.add(subcategory_name)
-                if category_name and subcategory_name not in subcategory_to_category_map:
-                    subcategory_to_category_map[subcategory_name] = category_name
-            
-            if asset.get("location"):
-                unique_locations.add(asset.get("location", "").strip())
-            if asset.get("department"):
-                unique_departments.add(asset.get("department", "").strip())
-            if asset.get("site"):
-                unique_sites.add(asset.get("site", "").strip())
-        
-        # Batch create categories
-        category_map = {}
-        if unique_categories:
-            category_names_list = list(unique_categories)
-            existing_categories = await prisma.category.find_many(
-                where={"name": {"in": category_names_list}}
-            )
-            for cat in existing_categories:
-                category_map[cat.name] = str(cat.id)
-            
-            missing_categories = [name for name in category_names_list if name not in category_map]
-            if missing_categories:
-                # Create missing categories
-                for name in missing_categories:
-                    try:
-                        new_cat = await prisma.category.create(
-                            data={"name": name, "description": "Auto-created during import"}
-                        )
-                        category_map[name] = str(new_cat.id)
-                    except Exception:
-                        # Category might have been created by another request, try to fetch it
-                        existing = await prisma.category.find_first(where={"name": name})
-                        if existing:
-                            category_map[name] = str(existing.id)
-        
-        # Batch create subcategories
-        subcategory_map = {}
-        if unique_subcategories:
-            subcategory_names_list = list(unique_subcategories)
-            existing_subcategories = await prisma.subcategory.find_many(
-                where={"name": {"in": subcategory_names_list}},
-                include={"category": True}
-            )
-            
-            for subcat in existing_subcategories:
-                expected_parent = subcategory_to_category_map.get(subcat.name)
-                if not expected_parent or subcat.category.name == expected_parent:
-                    subcategory_map[subcat.name] = str(subcat.id)
-            
-            missing_subcategories = [name for name in subcategory_names_list if name not in subcategory_map]
-            if missing_subcategories:
-                # Group by parent category
-                subcategories_by_category = {}
-                for subcat_name in missing_subcategories:
-                    parent_category_name = subcategory_to_category_map.get(subcat_name)
-                    if parent_category_name and parent_category_name in category_map:
-                        category_id = category_map[parent_category_name]
-                        if category_id not in subcategories_by_category:
-                            subcategories_by_category[category_id] = []
-                        subcategories_by_category[category_id].append(subcat_name)
-                    else:
-                        # Use default category
-                        default_key = "default"
-                        if default_key not in subcategories_by_category:
-                            subcategories_by_category[default_key] = []
-                        subcategories_by_category[default_key].append(subcat_name)
-                
-                # Get or create default category
-                default_category_id = None
-                if "default" in subcategories_by_category:
-                    default_category = await prisma.category.find_first()
-                    if not default_category:
-                        default_category = await prisma.category.create(
-                            data={"name": "Default", "description": "Default category for subcategories without parent"}
-                        )
-                    default_category_id = str(default_category.id)
-                
-                # Create subcategories
-                for category_id_or_default, subcat_names in subcategories_by_category.items():
-                    parent_id = default_category_id if category_id_or_default == "default" else category_id_or_default
-                    if parent_id:
-                        for subcat_name in subcat_names:
-                            try:
-                                new_subcat = await prisma.subcategory.create(
-                                    data={
-                                        "name": subcat_name,
-                                        "description": "Auto-created during import",
-                                        "categoryId": parent_id
-                                    }
-                                )
-                                subcategory_map[subcat_name] = str(new_subcat.id)
-                            except Exception:
-                                # Subcategory might exist, try to fetch it
-                                existing = await prisma.subcategory.find_first(where={"name": subcat_name})
-                                if existing:
-                                    subcategory_map[subcat_name] = str(existing.id)
-        
-        # Batch create locations
-        location_map = {}
-        if unique_locations:
-            location_names_list = list(unique_locations)
-            existing_locations = await prisma.assetslocation.find_many(
-                where={"name": {"in": location_names_list}}
-            )
-            for loc in existing_locations:
-                location_map[loc.name] = str(loc.id)
-            
-            missing_locations = [name for name in location_names_list if name not in location_map]
-            if missing_locations:
-                for name in missing_locations:
-                    try:
-                        new_loc = await prisma.assetslocation.create(
-                            data={"name": name, "description": "Auto-created during import"}
-                        )
-                        location_map[name] = str(new_loc.id)
-                    except Exception:
-                        existing = await prisma.assetslocation.find_first(where={"name": name})
-                        if existing:
-                            location_map[name] = str(existing.id)
-        
-        # Batch create departments
-        department_map = {}
-        if unique_departments:
-            department_names_list = list(unique_departments)
-            existing_departments = await prisma.assetsdepartment.find_many(
-                where={"name": {"in": department_names_list}}
-            )
-            for dept in existing_departments:
-                department_map[dept.name] = str(dept.id)
-            
-            missing_departments = [name for name in department_names_list if name not in department_map]
-            if missing_departments:
-                for name in missing_departments:
-                    try:
-                        new_dept = await prisma.assetsdepartment.create(
-                            data={"name": name, "description": "Auto-created during import"}
-                        )
-                        department_map[name] = str(new_dept.id)
-                    except Exception:
-                        existing = await prisma.assetsdepartment.find_first(where={"name": name})
-                        if existing:
-                            department_map[name] = str(existing.id)
-        
-        # Batch create sites
-        site_map = {}
-        if unique_sites:
-            site_names_list = list(unique_sites)
-            existing_sites = await prisma.assetssite.find_many(
-                where={"name": {"in": site_names_list}}
-            )
-            for site in existing_sites:
-                site_map[site.name] = str(site.id)
-            
-            missing_sites = [name for name in site_names_list if name not in site_map]
-            if missing_sites:
-                for name in missing_sites:
-                    try:
-                        new_site = await prisma.assetssite.create(
-                            data={"name": name, "description": "Auto-created during import"}
-                        )
-                        site_map[name] = str(new_site.id)
-                    except Exception:
-                        existing = await prisma.assetssite.find_first(where={"name": name})
-                        if existing:
-                            site_map[name] = str(existing.id)
-        
-        # Check for existing assets
-        asset_tag_ids = [asset.get("assetTagId") for asset in assets if asset.get("assetTagId") and isinstance(asset.get("assetTagId"), str)]
-        
-        if not asset_tag_ids:
+        if not any(isinstance(asset.get("assetTagId"), str) for asset in assets):
             raise HTTPException(status_code=400, detail="No valid Asset Tag IDs found in the import file. Please check your Excel file format.")
         
-        existing_assets = await prisma.assets.find_many(
-            where={"assetTagId": {"in": asset_tag_ids}},
-            select={"assetTagId": True, "isDeleted": True}
-        )
-        
-        existing_asset_tags = {asset.assetTagId for asset in existing_assets}
-        deleted_asset_tags = {asset.assetTagId for asset in existing_assets if asset.isDeleted}
-        
-        # Helper functions
-        def parse_number(value: Any) -> Optional[float]:
-            if value is None or value == "":
-                return None
-            try:
-                if isinstance(value, str):
-                    value = value.replace(",", "")
-                num = float(value)
-                return num if not (num != num) else None  # Check for NaN
-            except (ValueError, TypeError):
-                return None
-        
-        def parse_boolean(value: Any) -> Optional[bool]:
-            if value is None or value == "":
-                return None
-            if isinstance(value, bool):
-                return value
-            if isinstance(value, str):
-                lower = value.lower().strip()
-                if lower in ["true", "yes", "1"]:
-                    return True
-                if lower in ["false", "no", "0"]:
-                    return False
-            return bool(value) if value else None
-        
-        # Prepare data for batch insert
-        assets_to_create = []
-        for asset in assets:
-            asset_tag_id = asset.get("assetTagId")
-            if not asset_tag_id or asset_tag_id in existing_asset_tags:
-                continue
-            
-            category_id = None
-            if asset.get("category"):
-                category_id = category_map.get(asset.get("category"))
-            elif asset.get("categoryId"):
-                category_id = asset.get("categoryId")
-            
-            subcategory_id = None
-            if asset.get("subCategory"):
-                subcategory_id = subcategory_map.get(asset.get("subCategory"))
-            elif asset.get("subCategoryId"):
-                subcategory_id = asset.get("subCategoryId")
-            
-            asset_data = {
-                "assetTagId": asset_tag_id,
-                "description": asset.get("description") or "",
-                "purchasedFrom": asset.get("purchasedFrom"),
-                "purchaseDate": parse_date(asset.get("purchaseDate")),
-                "brand": asset.get("brand"),
-                "cost": parse_number(asset.get("cost")),
-                "model": asset.get("model"),
-                "serialNo": asset.get("serialNo"),
-                "additionalInformation": asset.get("additionalInformation"),
-                "xeroAssetNo": asset.get("xeroAssetNo"),
-                "owner": asset.get("owner"),
-                "pbiNumber": asset.get("pbiNumber"),
-                "status": asset.get("status"),
-                "issuedTo": asset.get("issuedTo"),
-                "poNumber": asset.get("poNumber"),
-                "paymentVoucherNumber": asset.get("paymentVoucherNumber"),
-                "assetType": asset.get("assetType"),
-                "deliveryDate": parse_date(asset.get("deliveryDate")),
-                "unaccountedInventory": parse_boolean(asset.get("unaccountedInventory") or asset.get("unaccounted2021Inventory")),
-                "remarks": asset.get("remarks"),
-                "qr": asset.get("qr"),
-                "oldAssetTag": asset.get("oldAssetTag"),
-                "depreciableAsset": parse_boolean(asset.get("depreciableAsset")) or False,
-                "depreciableCost": parse_number(asset.get("depreciableCost")),
-                "salvageValue": parse_number(asset.get("salvageValue")),
-                "assetLifeMonths": int(asset.get("assetLifeMonths")) if asset.get("assetLifeMonths") else None,
-                "depreciationMethod": asset.get("depreciationMethod"),
-                "dateAcquired": parse_date(asset.get("dateAcquired")),
-                "categoryId": category_id,
-                "subCategoryId": subcategory_id,
-                "department": asset.get("department"),
-                "site": asset.get("site"),
-                "location": asset.get("location"),
-            }
-            assets_to_create.append(asset_data)
+        # Create missing categories, subcategories, locations, departments and sites
+        reference = await resolve_reference_data(assets)
         
-        # Batch insert assets
+        # Insert in chunks (one create_many each)
+        results = []
         created_count = 0
-        if assets_to_create:
-            # Use create_many for better performance
-            try:
-                # Note: create_many returns an integer count in Prisma Python
-                created_count = await prisma.assets.create_many(
-                    data=assets_to_create,
-                    skip_duplicates=True
-                )
-            except Exception as e:
-                logger.error(f"Error creating assets: {e}", exc_info=True)
-                # Fallback: create one by one
-                for asset_data in assets_to_create:
-                    try:
-                        await prisma.assets.create(data=asset_data)
-                        created_count += 1
-                    except Exception:
-                        pass
-            
-            # Create history logs for imported assets
-            created_asset_tag_ids = [a["assetTagId"] for a in assets_to_create]
-            created_assets = await prisma.assets.find_many(
-                where={"assetTagId": {"in": created_asset_tag_ids}},
-                select={"id": True, "assetTagId": True, "createdAt": True}
+        for start in range(0, len(assets), IMPORT_CHUNK_SIZE):
+            chunk_results, chunk_created = await import_asset_chunk(
+                assets[start:start + IMPORT_CHUNK_SIZE],
+                reference,
+                user_name
             )
-            
-            # Check for existing history logs
-            existing_history_logs = await prisma.assetshistorylogs.find_many(
-                where={
-                    "assetId": {"in": [str(a.id) for a in created_assets]},
-                    "eventType": "added"
-                },
-                select={"assetId": True}
-            )
-            
-            existing_asset_ids = {log.assetId for log in existing_history_logs}
-            assets_needing_history = [a for a in created_assets if str(a.id) not in existing_asset_ids]
-            
-            if assets_needing_history:
-                history_logs_to_create = [
-                    {
-                        "assetId": str(asset.id),
-                        "eventType": "added",
-                        "actionBy": user_name,
-                        "eventDate": asset.createdAt,
-                    }
-                    for asset in assets_needing_history
-                ]
-                await prisma.assetshistorylogs.create_many(
-                    data=history_logs_to_create,
-                    skip_duplicates=True
-                )
-            
-            # Process audit history records
-            assets_with_audit = [
-                asset for asset in assets
-                if asset.get("assetTagId") and asset.get("assetTagId") not in existing_asset_tags
-                and (asset.get("lastAuditDate") or asset.get("lastAuditType") or asset.get("lastAuditor"))
-            ]
-            
-            if assets_with_audit:
-                audit_asset_tag_ids = [asset.get("assetTagId") for asset in assets_with_audit]
-                audit_created_assets = await prisma.assets.find_many(
-                    where={"assetTagId": {"in": audit_asset_tag_ids}},
-                    select={"id": True, "assetTagId": True}
-                )
-                
-                asset_id_map = {a.assetTagId: str(a.id) for a in audit_created_assets}
-                
-                audit_records_to_create = []
-                for asset in assets_with_audit:
-                    asset_id = asset_id_map.get(asset.get("assetTagId"))
-                    if not asset_id:
-                        continue
-                    
-                    audit_date = None
-                    if asset.get("lastAuditDate"):
-                        if isinstance(asset.get("lastAuditDate"), datetime):
-                            audit_date = asset.get("lastAuditDate")
-                        else:
-                            audit_date = parse_date(asset.get("lastAuditDate")) or datetime.now()
-                    else:
-                        audit_date = datetime.now()
-                    
-                    if not asset.get("lastAuditDate") and not asset.get("lastAuditType"):
-                        continue
-                    
-                    audit_records_to_create.append({
-                        "assetId": asset_id,
-                        "auditType": asset.get("lastAuditType") or "Imported Audit",
-                        "auditDate": audit_date,
-                        "auditor": asset.get("lastAuditor"),
-                        "status": "Completed",
-                        "notes": "Imported from Excel file",
-                    })
-                
-                if audit_records_to_create:
-                    await prisma.assetsaudithistory.create_many(
-                        data=audit_records_to_create,
-                        skip_duplicates=True
-                    )
-            
-            # Process checkout records
-            checkout_statuses = ["checked out", "checked-out", "checkedout", "in use"]
-            checkout_assets = [
-                asset_data for asset_data in assets_to_create
-                if asset_data.get("status") and asset_data.get("status", "").lower().strip() in checkout_statuses
-            ]
-            
-            if checkout_assets:
-                checkout_asset_tag_ids = [a["assetTagId"] for a in checkout_assets]
-                checkout_created_assets = await prisma.assets.find_many(
-                    where={"assetTagId": {"in": checkout_asset_tag_ids}},
-                    select={"id": True, "assetTagId": True}
-                )
-                
-                checkout_asset_id_map = {a.assetTagId: str(a.id) for a in checkout_created_assets}
-                
-                checkout_records_to_create = []
-                for asset_data in checkout_assets:
-                    asset_id = checkout_asset_id_map.get(asset_data["assetTagId"])
-                    if not asset_id:
-                        continue
-                    
-                    checkout_date = asset_data.get("deliveryDate") or asset_data.get("purchaseDate") or datetime.now()
-                    if not isinstance(checkout_date, datetime):
-                        checkout_date = parse_date(checkout_date) or datetime.now()
-                    
-                    checkout_records_to_create.append({
-                        "assetId": asset_id,
-                        "employeeUserId": None,
-                        "checkoutDate": checkout_date,
-                        "expectedReturnDate": None,
-                    })
-                
-                if checkout_records_to_create:
-                    await prisma.assetscheckout.create_many(
-                        data=checkout_records_to_create,
-                        skip_duplicates=True
-                    )
-        
-        # Prepare results
-        results = []
-        for asset in assets:
-            asset_tag_id = asset.get("assetTagId")
-            if not asset_tag_id:
-                continue
-            
-            if asset_tag_id in existing_asset_tags:
-                if asset_tag_id in deleted_asset_tags:
-                    results.append({"asset": asset_tag_id, "action": "skipped", "reason": "Asset exists in trash"})
-                else:
-                    results.append({"asset": asset_tag_id, "action": "skipped", "reason": "Duplicate asset tag"})
-            else:
-                results.append({"asset": asset_tag_id, "action": "created"})
+            results.extend(chunk_results)
+            created_count += chunk_created
         
         return {
             "message": "Assets imported successfully",
@@ -1406,7 +1156,8 @@ async def import_assets(
             "summary": {
                 "total": len(assets),
                 "created": created_count,
-                "skipped": len(assets) - created_count
+                "skipped": sum(1 for result in results if result["action"] == "skipped"),
+                "failed": sum(1 for result in results if result["action"] == "failed")
             }
         }
     
@@ -1429,34 +1180,99 @@ async def import_assets(
         )
 
 
-# Helper functions for documents
-def get_supabase_admin_client() -> Client:
-    """Get Supabase admin client for storage operations"""
-    supabase_service_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    if not supabase_service_key:
-        raise HTTPException(
-            status_code=500,
-            detail="Supabase service role key not configured"
+@router.post("/import/jobs", response_model=AssetImportJobResponse, status_code=202)
+async def create_import_job(
+    job_data: AssetImportJobCreate,
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
+):
+    """
+    Start a background import of a whole spreadsheet. Rows are validated, inserted
+    in chunks and tracked on a FileHistory record; poll GET /import/jobs/{job_id}.
+    """
+    try:
+        user_id = auth.get("user_id")
+        if not user_id:
+            raise HTTPException(status_code=401, detail="Unauthorized")
+        
+        # Check permission
+        has_permission = permissions.has("canManageImport")
+        if not has_permission:
+            raise HTTPException(
+                status_code=403,
+                detail="You do not have permission to import assets"
+            )
+        
+        if not job_data.assets:
+            raise HTTPException(status_code=400, detail="Invalid request body. Expected an array of assets.")
+        
+        invalid_indices = invalid_import_rows(job_data.assets)
+        if invalid_indices:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid data format: {len(invalid_indices)} row(s) are missing required 'Asset Tag ID' field. Please ensure your Excel file has the correct column headers.",
+                headers={"X-Invalid-Rows": ",".join(map(str, invalid_indices[:100]))}
+            )
+        
+        user_metadata = auth.get("user_metadata", {})
+        user_name = (
+            user_metadata.get("name") or
+            user_metadata.get("full_name") or
+            auth.get("email", "").split("@")[0] if auth.get("email") else
+            auth.get("user_id", "system")
+        )
+        
+        file_history = await start_import_job(
+            job_data.assets,
+            user_id,
+            user_name,
+            job_data.fileName,
+            file_path=job_data.filePath,
+            file_size=job_data.fileSize,
+            mime_type=job_data.mimeType
         )
-    return create_client(SUPABASE_URL, supabase_service_key)
+        
+        return AssetImportJobResponse(
+            jobId=str(file_history.id),
+            status=file_history.status,
+            totalRows=len(job_data.assets),
+            statusUrl=f"/api/assets/import/jobs/{file_history.id}"
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting import job: {type(e).__name__}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to start import")
 
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission"""
+@router.get("/import/jobs/{job_id}", response_model=AssetImportJobStatus)
+async def get_import_job_status(
+    job_id: str,
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
+):
+    """Progress and outcome of an import job"""
     try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
+        user_id = auth.get("user_id")
+        if not user_id:
+            raise HTTPException(status_code=401, detail="Unauthorized")
         
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
+        file_history = await get_import_job(job_id)
+        if not file_history:
+            raise HTTPException(status_code=404, detail="Import job not found")
         
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
+        # Jobs are visible to their owner and to import managers
+        if file_history.userId != user_id and not permissions.has("canManageImport"):
+            raise HTTPException(status_code=403, detail="You do not have permission to view this import")
+        
+        return AssetImportJobStatus(**import_job_progress(file_history))
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching import job: {type(e).__name__}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to fetch import job")
 
 
 # Document routes - must be registered before /{asset_id} route
@@ -1475,336 +1291,43 @@ async def get_documents(
         # Allow viewing documents without canManageMedia permission
         # Users can view but actions (upload/delete) are controlled by client-side checks
         
-        supabase_admin = get_supabase_admin_client()
-        
-        # Helper function to recursively list all files in a folder
-        async def list_all_files(bucket: str, folder: str = "") -> List[Dict[str, Any]]:
-            all_files: List[Dict[str, Any]] = []
-            
-            try:
-                response = supabase_admin.storage.from_(bucket).list(folder, {
-                    "limit": 1000
-                })
-                
-                if not response:
-                    return all_files
-                
-                for item in response:
-                    item_path = f"{folder}/{item['name']}" if folder else item['name']
-                    
-                    # Check if it's a folder by checking if id is missing
-                    is_folder = item.get('id') is None
-                    
-                    if is_folder:
-                        # It's a folder, recursively list files inside
-                        sub_files = await list_all_files(bucket, item_path)
-                        all_files.extend(sub_files)
-                    else:
-                        # Include all files
-                        all_files.append({
-                            "name": item['name'],
-                            "id": item.get('id') or item_path,
-                            "created_at": item.get('created_at') or datetime.now().isoformat(),
-                            "path": item_path,
-                            "metadata": item.get('metadata', {})
-                        })
-            except Exception as e:
-                logger.warning(f"Error listing files from {bucket}/{folder}: {e}")
-            
-            return all_files
-        
-        # Fetch fresh file list
-        # List files from assets_documents folder in assets bucket
-        assets_files = await list_all_files('assets', 'assets_documents')
-        
-        # List files from assets_documents folder in file-history bucket
-        file_history_files = await list_all_files('file-history', 'assets/assets_documents')
-        
-        # Combine files from both buckets
-        combined_files: List[Dict[str, Any]] = []
-        
-        # Add files from assets bucket (only from assets_documents folder)
-        for file in assets_files:
-            if file['path'].startswith('assets_documents/') and not file['path'].startswith('assets_images/'):
-                combined_files.append({
-                    **file,
-                    "bucket": 'assets',
-                })
-        
-        # Add files from file-history bucket (only from assets/assets_documents folder)
-        for file in file_history_files:
-            if file['path'].startswith('assets/assets_documents/') and not file['path'].startswith('assets/assets_images/'):
-                combined_files.append({
-                    **file,
-                    "bucket": 'file-history',
-                })
-        
-        # Sort by created_at descending
-        combined_files.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        
-        # Paginate
-        total_count = len(combined_files)
-        skip = (page - 1) * pageSize
-        paginated_files = combined_files[skip:skip + pageSize]
-        
-        # Prepare all file data and extract URLs/assetTagIds
-        file_data = []
-        for file in paginated_files:
-            try:
-                url_data = supabase_admin.storage.from_(file['bucket']).get_public_url(file['path'])
-                public_url = url_data if isinstance(url_data, str) else url_data.get('publicUrl', '') if isinstance(url_data, dict) else ''
-                
-                # Extract full filename and assetTagId
-                path_parts = file['path'].split('/')
-                actual_file_name = path_parts[-1]
-                
-                # Extract assetTagId - filename format is: assetTagId-timestamp.ext
-                file_name_without_ext = actual_file_name.rsplit('.', 1)[0] if '.' in actual_file_name else actual_file_name
-                import re
-                timestamp_match = re.search(r'-(20\d{2}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2}-\d{3}Z)$', file_name_without_ext)
-                asset_tag_id = file_name_without_ext[:timestamp_match.start()] if timestamp_match else file_name_without_ext.split('-')[0] if '-' in file_name_without_ext else file_name_without_ext
-                
-                # If the extracted assetTagId is "documents", it's a standalone document upload
-                if asset_tag_id == 'documents':
-                    asset_tag_id = ''
-                
-                file_data.append({
-                    "file": file,
-                    "publicUrl": public_url,
-                    "assetTagId": asset_tag_id,
-                    "actualFileName": actual_file_name,
-                    "storageSize": file.get('metadata', {}).get('size') if isinstance(file.get('metadata'), dict) else None,
-                    "storageMimeType": file.get('metadata', {}).get('mimetype') if isinstance(file.get('metadata'), dict) else None,
-                })
-            except Exception as e:
-                logger.warning(f"Error processing file {file.get('path', 'unknown')}: {e}")
-                continue
-        
-        # Batch query: Get all linked documents in a single query
-        all_public_urls = [fd['publicUrl'] for fd in file_data if fd['publicUrl']]
-        
-        # Normalize URLs by removing query parameters and fragments
-        def normalize_url(url: str) -> str:
-            try:
-                from urllib.parse import urlparse
-                parsed = urlparse(url)
-                return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-            except:
-                return url.split('?')[0].split('#')[0]
-        
-        normalized_public_urls = [normalize_url(url) for url in all_public_urls]
-        
-        # Build OR conditions for URL matching
-        url_conditions = []
-        if all_public_urls:
-            url_conditions.append({"documentUrl": {"in": all_public_urls}})
-        if normalized_public_urls:
-            url_conditions.append({"documentUrl": {"in": normalized_public_urls}})
-        
-        # Add filename-based matches
-        for fd in file_data:
-            if fd['actualFileName']:
-                url_conditions.append({"documentUrl": {"contains": fd['actualFileName']}})
-        
-        # Query linked documents
-        # Note: Prisma Python doesn't support 'select', so we fetch all fields
-        all_linked_documents = []
-        if url_conditions:
-            try:
-                all_linked_documents_raw = await prisma.assetsdocument.find_many(
-                    where={"OR": url_conditions}
-                )
-                # Extract only the fields we need
-                all_linked_documents = [
-                    {
-                        "assetTagId": doc.assetTagId,
-                        "documentUrl": doc.documentUrl,
-                        "documentType": doc.documentType,
-                        "documentSize": doc.documentSize,
-                        "fileName": doc.fileName,
-                        "mimeType": doc.mimeType,
-                    }
-                    for doc in all_linked_documents_raw
-                ]
-            except Exception as e:
-                logger.warning(f"Error querying linked documents: {e}")
-        
-        # Create maps for quick lookup
-        document_url_to_asset_tag_ids: Dict[str, set] = {}
-        asset_tag_id_to_document_urls: Dict[str, set] = {}
-        document_url_to_metadata: Dict[str, Dict[str, Any]] = {}
-        
-        for doc in all_linked_documents:
-            if not doc.get('assetTagId') or not doc.get('documentUrl'):
-                continue
-            
-            doc_url = doc['documentUrl']
-            
-            # Store metadata
-            document_url_to_metadata[doc_url] = {
-                "documentType": doc.get('documentType'),
-                "documentSize": doc.get('documentSize'),
-                "fileName": doc.get('fileName'),
-                "mimeType": doc.get('mimeType'),
-            }
-            
-            # Map by documentUrl
-            if doc_url not in document_url_to_asset_tag_ids:
-                document_url_to_asset_tag_ids[doc_url] = set()
-            document_url_to_asset_tag_ids[doc_url].add(doc['assetTagId'])
-            
-            # Map by assetTagId
-            if doc['assetTagId'] not in asset_tag_id_to_document_urls:
-                asset_tag_id_to_document_urls[doc['assetTagId']] = set()
-            asset_tag_id_to_document_urls[doc['assetTagId']].add(doc_url)
-        
-        # Also check for filename matches
-        for fd in file_data:
-            asset_tag_id = fd['assetTagId']
-            actual_file_name = fd['actualFileName']
-            if not asset_tag_id:
-                continue
-            
-            matching_urls = [
-                url for url in asset_tag_id_to_document_urls.get(asset_tag_id, [])
-                if actual_file_name.lower() in url.lower()
-            ]
-            
-            for url in matching_urls:
-                if url not in document_url_to_asset_tag_ids:
-                    document_url_to_asset_tag_ids[url] = set()
-                document_url_to_asset_tag_ids[url].add(asset_tag_id)
-        
-        # Get all unique asset tag IDs that are linked
-        all_linked_asset_tag_ids = set()
-        for fd in file_data:
-            tag_ids = document_url_to_asset_tag_ids.get(fd['publicUrl'], set())
-            all_linked_asset_tag_ids.update(tag_ids)
-        
-        # Batch query: Get all asset deletion status
-        linked_assets_info_map: Dict[str, bool] = {}
-        if all_linked_asset_tag_ids:
-            try:
-                assets = await prisma.assets.find_many(
-                    where={"assetTagId": {"in": list(all_linked_asset_tag_ids)}},
-                    select={"assetTagId": True, "isDeleted": True}
-                )
-                for asset in assets:
-                    linked_assets_info_map[asset['assetTagId']] = asset.get('isDeleted', False)
-            except Exception as e:
-                logger.warning(f"Error querying assets: {e}")
-        
-        # Calculate total storage used from ALL files (not just paginated)
-        documents_files = [f for f in combined_files if f['path'].startswith('assets_documents/') or f['path'].startswith('assets/assets_documents/')]
-        all_file_data = []
-        for file in documents_files:
-            try:
-                url_data = supabase_admin.storage.from_(file['bucket']).get_public_url(file['path'])
-                public_url = url_data if isinstance(url_data, str) else url_data.get('publicUrl', '') if isinstance(url_data, dict) else ''
-                all_file_data.append({
-                    "publicUrl": public_url,
-                    "storageSize": file.get('metadata', {}).get('size') if isinstance(file.get('metadata'), dict) else None,
-                })
-            except Exception:
-                continue
-        
-        # Get metadata for all files from database
-        all_file_public_urls = [fd['publicUrl'] for fd in all_file_data if fd['publicUrl']]
-        all_db_documents = []
-        if all_file_public_urls:
-            try:
-                # Note: Prisma Python doesn't support 'select', so we fetch all fields
-                all_db_documents_raw = await prisma.assetsdocument.find_many(
-                    where={"documentUrl": {"in": all_file_public_urls}}
-                )
-                # Extract only the fields we need
-                all_db_documents = [
-                    {
-                        "documentUrl": doc.documentUrl,
-                        "documentType": doc.documentType,
-                        "documentSize": doc.documentSize,
-                        "fileName": doc.fileName,
-                        "mimeType": doc.mimeType,
-                    }
-                    for doc in all_db_documents_raw
-                ]
-            except Exception as e:
-                logger.warning(f"Error querying all documents for storage calculation: {e}")
-        
-        all_document_url_to_metadata: Dict[str, Dict[str, Any]] = {}
-        for doc in all_db_documents:
-            if doc.get('documentUrl'):
-                all_document_url_to_metadata[doc['documentUrl']] = {
-                    "documentType": doc.get('documentType'),
-                    "documentSize": doc.get('documentSize'),
-                    "fileName": doc.get('fileName'),
-                    "mimeType": doc.get('mimeType'),
-                }
-        
-        # Calculate total storage used
-        total_storage_used = sum(
-            (fd.get('storageSize') or all_document_url_to_metadata.get(fd['publicUrl'], {}).get('documentSize') or 0)
-            for fd in all_file_data
-        )
+        rows, total_count = await fetch_catalog_page("documents", DOCUMENT_STORAGE_SCOPES, page, pageSize)
+        total_storage_used = await get_storage_usage(DOCUMENT_STORAGE_SCOPES)
         
         # Build the response (only for paginated documents)
         documents = []
-        for fd in file_data:
-            # Find matching database documentUrl
-            normalized_public_url = normalize_url(fd['publicUrl'])
-            matching_db_document_url = None
-            
-            for db_document_url in document_url_to_asset_tag_ids.keys():
-                normalized_db_url = normalize_url(db_document_url)
-                if db_document_url == fd['publicUrl'] or normalized_db_url == normalized_public_url:
-                    matching_db_document_url = db_document_url
-                    break
-            
-            # Also check by filename if no exact match found
-            if not matching_db_document_url and fd['actualFileName']:
-                for db_document_url in document_url_to_asset_tag_ids.keys():
-                    if fd['actualFileName'].lower() in db_document_url.lower():
-                        matching_db_document_url = db_document_url
-                        break
-            
-            # Use database documentUrl if found, otherwise use storage publicUrl
-            final_document_url = matching_db_document_url or fd['publicUrl']
+        for row in rows:
+            actual_file_name = row['path'].split('/')[-1]
+            links = row['links']
             
-            # Get linked asset tag IDs
-            linked_asset_tag_ids = list(
-                document_url_to_asset_tag_ids.get(final_document_url, set()) or
-                document_url_to_asset_tag_ids.get(fd['publicUrl'], set()) or
-                []
-            )
+            # One entry per linked asset, in link order
+            linked_assets_info_map: Dict[str, bool] = {}
+            for link in links:
+                if link.get('assetTagId'):
+                    linked_assets_info_map.setdefault(link['assetTagId'], bool(link.get('isDeleted')))
+            linked_asset_tag_ids = list(linked_assets_info_map.keys())
             linked_assets_info = [
-                {"assetTagId": tag_id, "isDeleted": linked_assets_info_map.get(tag_id, False)}
-                for tag_id in linked_asset_tag_ids
+                {"assetTagId": tag_id, "isDeleted": is_deleted}
+                for tag_id, is_deleted in linked_assets_info_map.items()
             ]
-            has_deleted_asset = any(info['isDeleted'] for info in linked_assets_info)
-            
-            # Get metadata
-            db_metadata = document_url_to_metadata.get(final_document_url) or document_url_to_metadata.get(fd['publicUrl']) or {}
             
             # Prefer storage metadata over database metadata
-            document_type = db_metadata.get('documentType')
-            document_size = fd.get('storageSize') or db_metadata.get('documentSize')
-            file_name = db_metadata.get('fileName') or fd['actualFileName']
-            mime_type = fd.get('storageMimeType') or db_metadata.get('mimeType')
+            db_metadata = links[0] if links else {}
             
             documents.append({
-                "id": fd['file'].get('id') or fd['file']['path'],
-                "documentUrl": final_document_url,
-                "assetTagId": fd['assetTagId'],
-                "fileName": file_name,
-                "createdAt": fd['file'].get('created_at') or datetime.now().isoformat(),
+                "id": f"{row['bucket']}/{row['path']}",
+                "documentUrl": db_metadata.get('url') or row['public_url'],
+                "assetTagId": asset_tag_id_from_file_name(actual_file_name, 'documents'),
+                "fileName": db_metadata.get('fileName') or actual_file_name,
+                "createdAt": row['created_at'],
                 "isLinked": len(linked_asset_tag_ids) > 0,
                 "linkedAssetTagId": linked_asset_tag_ids[0] if linked_asset_tag_ids else None,
                 "linkedAssetTagIds": linked_asset_tag_ids,
                 "linkedAssetsInfo": linked_assets_info,
-                "assetIsDeleted": has_deleted_asset,
-                "documentType": document_type,
-                "documentSize": document_size,
-                "mimeType": mime_type,
+                "assetIsDeleted": any(linked_assets_info_map.values()),
+                "documentType": db_metadata.get('documentType'),
+                "documentSize": int(row['size']) if row.get('size') else db_metadata.get('documentSize'),
+                "mimeType": row.get('mime_type') or db_metadata.get('mimeType'),
             })
         
         return {
@@ -1832,7 +1355,8 @@ async def get_documents(
 async def upload_document(
     file: UploadFile = File(...),
     documentType: Optional[str] = Form(None),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Upload a document to storage"""
     try:
@@ -1841,7 +1365,7 @@ async def upload_document(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check media permission
-        has_permission = await check_permission(user_id, "canManageMedia")
+        has_permission = permissions.has("canManageMedia")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canManageMedia required")
         
@@ -1889,52 +1413,10 @@ async def upload_document(
         # Check storage limit (5MB total - temporary)
         storage_limit = 5 * 1024 * 1024  # 5MB limit
         
-        supabase_admin = get_supabase_admin_client()
+        storage_admin = get_storage_admin()
         
         try:
-            # List all files to calculate total size
-            async def list_all_files(bucket: str, folder: str = "") -> List[Dict[str, Any]]:
-                all_files: List[Dict[str, Any]] = []
-                try:
-                    response = supabase_admin.storage.from_(bucket).list(folder, {"limit": 1000})
-                    if not response:
-                        return all_files
-                    for item in response:
-                        item_path = f"{folder}/{item['name']}" if folder else item['name']
-                        is_folder = item.get('id') is None
-                        if is_folder:
-                            sub_files = await list_all_files(bucket, item_path)
-                            all_files.extend(sub_files)
-                        else:
-                            all_files.append({
-                                "metadata": item.get('metadata', {}),
-                                "path": item_path
-                            })
-                except Exception:
-                    pass
-                return all_files
-            
-            assets_files = await list_all_files('assets', '')
-            file_history_files = await list_all_files('file-history', 'assets')
-            
-            # Calculate storage from files
-            current_storage_used = 0
-            for f in assets_files + file_history_files:
-                if isinstance(f.get('metadata'), dict) and f['metadata'].get('size'):
-                    current_storage_used += f['metadata']['size']
-            
-            # Also check database for documents that might have size info
-            try:
-                db_documents = await prisma.assetsdocument.find_many(
-                    select={"documentUrl": True, "documentSize": True}
-                )
-                storage_sizes = {f.get('metadata', {}).get('size') for f in assets_files + file_history_files if isinstance(f.get('metadata'), dict)}
-                for doc in db_documents:
-                    if doc.get('documentSize') and doc['documentSize'] not in storage_sizes:
-                        current_storage_used += doc['documentSize']
-            except Exception:
-                pass
-            
+            current_storage_used = await get_storage_usage(ASSET_STORAGE_SCOPES)
             if current_storage_used + file_size > storage_limit:
                 raise HTTPException(
                     status_code=400,
@@ -1957,27 +1439,27 @@ async def upload_document(
         
         try:
             # Try assets bucket first
-            response = supabase_admin.storage.from_('assets').upload(
+            response = await storage_admin.from_('assets').upload(
                 file_path,
                 file_content,
                 file_options={"content-type": file.content_type or "application/octet-stream"}
             )
             
             if response:
-                url_data = supabase_admin.storage.from_('assets').get_public_url(file_path)
+                url_data = await storage_admin.from_('assets').get_public_url(file_path)
                 public_url = url_data if isinstance(url_data, str) else (url_data.get('publicUrl', '') if isinstance(url_data, dict) else '')
         except Exception as upload_error:
             # If assets bucket doesn't exist, try file-history bucket
             error_msg = str(upload_error).lower()
             if 'bucket not found' in error_msg or 'not found' in error_msg:
                 try:
-                    response = supabase_admin.storage.from_('file-history').upload(
+                    response = await storage_admin.from_('file-history').upload(
                         file_path,
                         file_content,
                         file_options={"content-type": file.content_type or "application/octet-stream"}
                     )
                     if response:
-                        url_data = supabase_admin.storage.from_('file-history').get_public_url(file_path)
+                        url_data = await storage_admin.from_('file-history').get_public_url(file_path)
                         public_url = url_data if isinstance(url_data, str) else (url_data.get('publicUrl', '') if isinstance(url_data, dict) else '')
                 except Exception as fallback_error:
                     logger.error(f"Storage upload error: {fallback_error}")
@@ -2012,6 +1494,7 @@ async def upload_document(
                     "mimeType": file.content_type,
                 }
             )
+            await invalidate_response_cache(TAG_ASSETS)
             
             return {
                 "id": str(document_record.id),
@@ -2047,7 +1530,8 @@ async def upload_document(
 @router.get("/documents/bulk")
 async def get_bulk_asset_documents(
     assetTagIds: str = Query(..., description="Comma-separated list of asset tag IDs"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Get documents for multiple asset tag IDs"""
     try:
@@ -2055,7 +1539,7 @@ async def get_bulk_asset_documents(
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
 
-        has_permission = await check_permission(user_id, "canViewAssets")
+        has_permission = permissions.has("canViewAssets")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canViewAssets required")
 
@@ -2106,7 +1590,8 @@ async def get_bulk_asset_documents(
 @router.get("/documents/{asset_tag_id}")
 async def get_asset_documents(
     asset_tag_id: str,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Get all documents for a specific asset by assetTagId"""
     try:
@@ -2115,7 +1600,7 @@ async def get_asset_documents(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check view permission
-        has_permission = await check_permission(user_id, "canViewAssets")
+        has_permission = permissions.has("canViewAssets")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canViewAssets required")
         
@@ -2151,7 +1636,8 @@ async def get_asset_documents(
 @router.delete("/documents/delete")
 async def delete_document_by_url(
     documentUrl: str = Query(..., description="Document URL to delete"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete document by URL - removes all links and optionally deletes from storage"""
     try:
@@ -2160,7 +1646,7 @@ async def delete_document_by_url(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check media permission
-        has_permission = await check_permission(user_id, "canManageMedia")
+        has_permission = permissions.has("canManageMedia")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canManageMedia required")
         
@@ -2188,13 +1674,14 @@ async def delete_document_by_url(
                     }
                 )
                 deleted_count = result
+                await invalidate_response_cache(TAG_ASSETS)
             except Exception as db_error:
                 logger.error(f"Error deleting document links: {db_error}")
                 raise HTTPException(status_code=500, detail="Failed to delete document links")
         
         # Delete the file from storage
         try:
-            supabase_admin = get_supabase_admin_client()
+            storage_admin = get_storage_admin()
             import re
             from urllib.parse import unquote
             
@@ -2216,7 +1703,7 @@ async def delete_document_by_url(
                 logger.info(f"Attempting to delete document from storage: bucket={bucket}, path={path}")
                 
                 # Delete from storage
-                delete_response = supabase_admin.storage.from_(bucket).remove([path])
+                delete_response = await storage_admin.from_(bucket).remove([path])
                 
                 # Check for errors in response
                 if delete_response:
@@ -2248,7 +1735,8 @@ async def delete_document_by_url(
 @router.delete("/documents/delete/{document_id}")
 async def delete_document_by_id(
     document_id: str,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete document by ID - removes from database only (keeps file in storage)"""
     try:
@@ -2257,7 +1745,7 @@ async def delete_document_by_id(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check media permission
-        has_permission = await check_permission(user_id, "canManageMedia")
+        has_permission = permissions.has("canManageMedia")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canManageMedia required")
         
@@ -2291,6 +1779,7 @@ async def delete_document_by_id(
                 raise HTTPException(status_code=404, detail="Document not found")
             logger.error(f"Error deleting document: {db_error}")
             raise HTTPException(status_code=500, detail="Failed to delete document")
+        await invalidate_response_cache(TAG_ASSETS)
         
         return {
             "success": True,
@@ -2307,7 +1796,8 @@ async def delete_document_by_id(
 @router.delete("/documents/bulk-delete")
 async def bulk_delete_documents(
     request: Dict[str, Any],
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Bulk delete documents by URLs"""
     try:
@@ -2316,7 +1806,7 @@ async def bulk_delete_documents(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check media permission
-        has_permission = await check_permission(user_id, "canManageMedia")
+        has_permission = permissions.has("canManageMedia")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canManageMedia required")
         
@@ -2329,34 +1819,21 @@ async def bulk_delete_documents(
             )
         
         total_deleted_links = 0
-        supabase_admin = get_supabase_admin_client()
+        storage_admin = get_storage_admin()
         
         # Process each document URL
         for document_url in document_urls:
-            # Find all AssetsDocument records linked to this document URL
+            # Delete all AssetsDocument records linked to this document URL (delete_many returns the count)
             try:
-                linked_documents = await prisma.assetsdocument.find_many(
+                total_deleted_links += await prisma.assetsdocument.delete_many(
                     where={
                         "documentUrl": document_url,
                     }
                 )
             except Exception as db_error:
-                logger.warning(f"Error finding linked documents for {document_url}: {db_error}")
+                logger.warning(f"Error deleting document links for {document_url}: {db_error}")
                 continue
             
-            # Delete all database links for this document (if any exist)
-            if linked_documents:
-                try:
-                    await prisma.assetsdocument.delete_many(
-                        where={
-                            "documentUrl": document_url,
-                        }
-                    )
-                    total_deleted_links += len(linked_documents)
-                except Exception as db_error:
-                    logger.warning(f"Error deleting document links for {document_url}: {db_error}")
-                    continue
-            
             # Delete the file from storage
             try:
                 import re
@@ -2378,7 +1855,7 @@ async def bulk_delete_documents(
                     path = unquote(path)
                     
                     # Delete from storage
-                    delete_response = supabase_admin.storage.from_(bucket).remove([path])
+                    delete_response = await storage_admin.from_(bucket).remove([path])
                     
                     # Check for errors in response
                     if delete_response:
@@ -2394,6 +1871,9 @@ async def bulk_delete_documents(
                 logger.error(f"Storage deletion error for {document_url}: {storage_error}", exc_info=True)
                 # Continue with other files even if one fails
         
+        if total_deleted_links:
+            await invalidate_response_cache(TAG_ASSETS)
+        
         return {
             "success": True,
             "message": f"Deleted {len(document_urls)} document(s){f' and removed {total_deleted_links} link(s)' if total_deleted_links > 0 else ''}",
@@ -2411,7 +1891,8 @@ async def bulk_delete_documents(
 @router.get("/images/bulk")
 async def get_bulk_asset_images(
     assetTagIds: str = Query(..., description="Comma-separated list of asset tag IDs"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Get images for multiple asset tag IDs"""
     try:
@@ -2419,7 +1900,7 @@ async def get_bulk_asset_images(
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
 
-        has_permission = await check_permission(user_id, "canViewAssets")
+        has_permission = permissions.has("canViewAssets")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canViewAssets required")
 
@@ -2468,7 +1949,8 @@ async def get_bulk_asset_images(
 @router.get("/images/{asset_tag_id}")
 async def get_asset_images(
     asset_tag_id: str,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Get all images for a specific asset tag ID"""
     try:
@@ -2476,7 +1958,7 @@ async def get_asset_images(
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
 
-        has_permission = await check_permission(user_id, "canViewAssets")
+        has_permission = permissions.has("canViewAssets")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canViewAssets required")
 
@@ -2499,7 +1981,8 @@ async def get_asset_images(
 @router.delete("/images/delete/{image_id}")
 async def delete_image_by_id(
     image_id: str,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete an image record from the database by its ID (keeps file in storage)"""
     try:
@@ -2507,7 +1990,7 @@ async def delete_image_by_id(
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
 
-        has_permission = await check_permission(user_id, "canManageMedia")
+        has_permission = permissions.has("canManageMedia")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canManageMedia required")
 
@@ -2524,6 +2007,7 @@ async def delete_image_by_id(
         await prisma.assetsimage.delete(
             where={"id": image_id}
         )
+        await invalidate_response_cache(TAG_ASSETS)
 
         return {"success": True, "message": "Image deleted from database"}
     except HTTPException:
@@ -2541,7 +2025,7 @@ async def get_media(
     pageSize: int = Query(50, ge=1, le=1000),
     auth: dict = Depends(verify_auth)
 ):
-    """Get all media (images) with pagination from storage buckets"""
+    """Get all media (images) with pagination from the media catalog"""
     try:
         user_id = auth.get("user_id")
         if not user_id:
@@ -2550,354 +2034,42 @@ async def get_media(
         # Allow viewing media without canManageMedia permission
         # Users can view but actions (upload/delete) are controlled by client-side checks
         
-        supabase_admin = get_supabase_admin_client()
-        
-        # Helper function to recursively list all files in a folder
-        async def list_all_files(bucket: str, folder: str = "") -> List[Dict[str, Any]]:
-            all_files: List[Dict[str, Any]] = []
-            
-            try:
-                response = supabase_admin.storage.from_(bucket).list(folder, {
-                    "limit": 1000
-                })
-                
-                if not response:
-                    return all_files
-                
-                for item in response:
-                    item_path = f"{folder}/{item['name']}" if folder else item['name']
-                    
-                    # Check if it's a folder by checking if id is missing
-                    is_folder = item.get('id') is None
-                    
-                    if is_folder:
-                        # It's a folder, recursively list files inside
-                        sub_files = await list_all_files(bucket, item_path)
-                        all_files.extend(sub_files)
-                    else:
-                        # Include all files
-                        all_files.append({
-                            "name": item['name'],
-                            "id": item.get('id') or item_path,
-                            "created_at": item.get('created_at') or datetime.now().isoformat(),
-                            "path": item_path,
-                            "metadata": item.get('metadata', {})
-                        })
-            except Exception as e:
-                logger.warning(f"Error listing files from {bucket}/{folder}: {e}")
-            
-            return all_files
-        
-        # Fetch fresh file list
-        # List files from assets_images folder in assets bucket
-        assets_files = await list_all_files('assets', 'assets_images')
-        
-        # List files from assets_images folder in file-history bucket
-        file_history_files = await list_all_files('file-history', 'assets/assets_images')
-        
-        # Combine files from both buckets
-        combined_files: List[Dict[str, Any]] = []
-        
-        # Add files from assets bucket (only from assets_images folder)
-        # Filter by path to ensure we only get images, not documents from assets_documents
-        for file in assets_files:
-            # Ensure file is in assets_images folder and NOT in assets_documents folder
-            if file['path'].startswith('assets_images/') and not file['path'].startswith('assets_documents/'):
-                combined_files.append({
-                    **file,
-                    "bucket": 'assets',
-                })
-        
-        # Add files from file-history bucket (only from assets/assets_images folder)
-        # Filter by path to ensure we only get images, not documents from assets/assets_documents
-        for file in file_history_files:
-            # Ensure file is in assets/assets_images folder and NOT in assets/assets_documents folder
-            if file['path'].startswith('assets/assets_images/') and not file['path'].startswith('assets/assets_documents/'):
-                combined_files.append({
-                    **file,
-                    "bucket": 'file-history',
-                })
-        
-        # Sort by created_at descending
-        combined_files.sort(key=lambda x: datetime.fromisoformat(x['created_at'].replace('Z', '+00:00')) if x.get('created_at') else datetime.min, reverse=True)
-        
-        # Paginate
-        total_count = len(combined_files)
-        skip = (page - 1) * pageSize
-        paginated_files = combined_files[skip:skip + pageSize]
-        
-        # Prepare file data and extract URLs/assetTagIds
-        file_data = []
-        for file in paginated_files:
-            url_data = supabase_admin.storage.from_(file['bucket']).get_public_url(file['path'])
-            public_url = url_data.get('publicUrl', '') if isinstance(url_data, dict) else str(url_data)
-            
-            # Extract full filename and assetTagId
-            path_parts = file['path'].split('/')
-            actual_file_name = path_parts[-1]
-            
-            # Extract assetTagId - filename format is: assetTagId-timestamp.ext
-            file_name_without_ext = actual_file_name.rsplit('.', 1)[0] if '.' in actual_file_name else actual_file_name
-            # Try to match pattern: assetTagId-YYYY-MM-DDTHH-MM-SS-sssZ
-            import re
-            timestamp_match = re.search(r'-(20\d{2}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2}-\d{3}Z)$', file_name_without_ext)
-            asset_tag_id = file_name_without_ext[:timestamp_match.start()] if timestamp_match else file_name_without_ext.split('-')[0] if '-' in file_name_without_ext else file_name_without_ext
-            
-            # If the extracted assetTagId is "media", it's a standalone media upload, not linked to an asset
-            if asset_tag_id == 'media':
-                asset_tag_id = ''
-            
-            file_data.append({
-                "file": file,
-                "publicUrl": public_url,
-                "assetTagId": asset_tag_id,
-                "actualFileName": actual_file_name,
-                "storageSize": file.get('metadata', {}).get('size'),
-                "storageMimeType": file.get('metadata', {}).get('mimetype'),
-            })
-        
-        # Batch query: Get all linked images in a single query
-        all_public_urls = [fd['publicUrl'] for fd in file_data if fd['publicUrl']]
-        
-        # Normalize URLs by removing query parameters and fragments for better matching
-        def normalize_url(url: str) -> str:
-            try:
-                from urllib.parse import urlparse
-                parsed = urlparse(url)
-                return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-            except:
-                return url.split('?')[0].split('#')[0]
-        
-        normalized_public_urls = [normalize_url(url) for url in all_public_urls]
-        
-        # Build OR conditions for URL matching
-        url_conditions = []
-        if all_public_urls:
-            url_conditions.append({"imageUrl": {"in": all_public_urls}})
-        if normalized_public_urls:
-            url_conditions.append({"imageUrl": {"in": normalized_public_urls}})
-        
-        # Add filename-based matches
-        for fd in file_data:
-            if fd['actualFileName']:
-                url_conditions.append({"imageUrl": {"contains": fd['actualFileName']}})
-        
-        # Query linked images - Note: Prisma Python doesn't support 'select', so we fetch all fields
-        all_linked_images_raw = []
-        if url_conditions:
-            try:
-                all_linked_images_raw = await prisma.assetsimage.find_many(
-                    where={"OR": url_conditions} if url_conditions else {}
-                )
-            except Exception as e:
-                logger.warning(f"Error querying linked images: {e}")
-        
-        # Extract only the fields we need
-        all_linked_images = [
-            {
-                "assetTagId": img.assetTagId,
-                "imageUrl": img.imageUrl,
-                "imageType": img.imageType,
-                "imageSize": img.imageSize,
-            }
-            for img in all_linked_images_raw
-        ]
-        
-        # Create maps for quick lookup
-        image_url_to_asset_tag_ids: Dict[str, set] = {}
-        image_url_to_metadata: Dict[str, Dict[str, Any]] = {}
-        
-        for img in all_linked_images:
-            if not img.get('assetTagId') or not img.get('imageUrl'):
-                continue
-            
-            img_url = img['imageUrl']
-            normalized_img_url = normalize_url(img_url)
-            
-            # Store metadata
-            image_url_to_metadata[img_url] = {
-                "imageType": img.get('imageType'),
-                "imageSize": img.get('imageSize'),
-            }
-            
-            # Map by exact URL
-            if img_url not in image_url_to_asset_tag_ids:
-                image_url_to_asset_tag_ids[img_url] = set()
-            image_url_to_asset_tag_ids[img_url].add(img['assetTagId'])
-            
-            # Also map normalized URL
-            if normalized_img_url not in image_url_to_asset_tag_ids:
-                image_url_to_asset_tag_ids[normalized_img_url] = set()
-            image_url_to_asset_tag_ids[normalized_img_url].add(img['assetTagId'])
-        
-        # Match database URLs to storage publicUrls
-        for fd in file_data:
-            public_url = fd['publicUrl']
-            normalized_public_url = normalize_url(public_url)
-            
-            # Check if any database URL matches this publicUrl
-            for img in all_linked_images:
-                if not img.get('assetTagId') or not img.get('imageUrl'):
-                    continue
-                
-                normalized_db_url = normalize_url(img['imageUrl'])
-                
-                # Match by exact URL or normalized URL
-                if img['imageUrl'] == public_url or normalized_db_url == normalized_public_url:
-                    if public_url not in image_url_to_asset_tag_ids:
-                        image_url_to_asset_tag_ids[public_url] = set()
-                    image_url_to_asset_tag_ids[public_url].add(img['assetTagId'])
-        
-        # Also check for filename matches
-        for fd in file_data:
-            public_url = fd['publicUrl']
-            actual_file_name = fd['actualFileName']
-            if not actual_file_name:
-                continue
-            
-            normalized_public_url = normalize_url(public_url)
-            file_name_lower = actual_file_name.lower()
-            
-            for img in all_linked_images:
-                if not img.get('assetTagId') or not img.get('imageUrl'):
-                    continue
-                
-                normalized_db_url = normalize_url(img['imageUrl'])
-                db_url_lower = img['imageUrl'].lower()
-                
-                # Check multiple matching strategies
-                if (normalized_db_url == normalized_public_url or 
-                    file_name_lower in db_url_lower or 
-                    file_name_lower in normalized_public_url):
-                    if public_url not in image_url_to_asset_tag_ids:
-                        image_url_to_asset_tag_ids[public_url] = set()
-                    image_url_to_asset_tag_ids[public_url].add(img['assetTagId'])
-        
-        # Get all unique asset tag IDs that are linked
-        all_linked_asset_tag_ids = set()
-        for fd in file_data:
-            tag_ids = image_url_to_asset_tag_ids.get(fd['publicUrl'], set())
-            all_linked_asset_tag_ids.update(tag_ids)
-        
-        # Batch query: Get all asset deletion status
-        linked_assets_info_map = {}
-        if all_linked_asset_tag_ids:
-            try:
-                assets = await prisma.assets.find_many(
-                    where={"assetTagId": {"in": list(all_linked_asset_tag_ids)}}
-                )
-                for asset in assets:
-                    linked_assets_info_map[asset.assetTagId] = asset.isDeleted or False
-            except Exception as e:
-                logger.warning(f"Error querying linked assets: {e}")
-        
-        # Calculate total storage used from ALL files (not just paginated)
-        images_files = [f for f in combined_files if f['path'].startswith('assets_images/') or f['path'].startswith('assets/assets_images/')]
-        all_file_data = []
-        for file in images_files:
-            try:
-                url_data = supabase_admin.storage.from_(file['bucket']).get_public_url(file['path'])
-                public_url = url_data.get('publicUrl', '') if isinstance(url_data, dict) else str(url_data)
-                all_file_data.append({
-                    "publicUrl": public_url,
-                    "storageSize": file.get('metadata', {}).get('size') if isinstance(file.get('metadata'), dict) else None,
-                })
-            except Exception:
-                continue
-        
-        # Get metadata for all files from database
-        all_file_public_urls = [fd['publicUrl'] for fd in all_file_data if fd['publicUrl']]
-        all_db_images = []
-        if all_file_public_urls:
-            try:
-                # Normalize URLs for matching
-                normalized_all_urls = [normalize_url(url) for url in all_file_public_urls]
-                
-                # Build OR conditions for URL matching
-                all_url_conditions = []
-                if all_file_public_urls:
-                    all_url_conditions.append({"imageUrl": {"in": all_file_public_urls}})
-                if normalized_all_urls:
-                    all_url_conditions.append({"imageUrl": {"in": normalized_all_urls}})
-                
-                # Query all images from database - Note: Prisma Python doesn't support 'select', so we fetch all fields
-                all_db_images_raw = await prisma.assetsimage.find_many(
-                    where={"OR": all_url_conditions} if all_url_conditions else {}
-                )
-                # Extract only the fields we need
-                all_db_images = [
-                    {
-                        "imageUrl": img.imageUrl,
-                        "imageSize": img.imageSize,
-                    }
-                    for img in all_db_images_raw
-                ]
-            except Exception as e:
-                logger.warning(f"Error querying all images for storage calculation: {e}")
-        
-        all_image_url_to_metadata: Dict[str, Dict[str, Any]] = {}
-        for img in all_db_images:
-            if img.get('imageUrl'):
-                all_image_url_to_metadata[img['imageUrl']] = {
-                    "imageSize": img.get('imageSize'),
-                }
-        
-        # Calculate total storage used - use storage size OR database size as fallback
-        total_storage_used = sum(
-            (fd.get('storageSize') or all_image_url_to_metadata.get(fd['publicUrl'], {}).get('imageSize') or 0)
-            for fd in all_file_data
-        )
+        rows, total_count = await fetch_catalog_page("images", IMAGE_STORAGE_SCOPES, page, pageSize)
+        total_storage_used = await get_storage_usage(IMAGE_STORAGE_SCOPES)
         
         # Build the response
         images = []
-        for fd in file_data:
-            public_url = fd['publicUrl']
-            normalized_public_url = normalize_url(public_url)
-            
-            # Find matching database imageUrl
-            matching_db_image_url = None
-            for db_image_url in image_url_to_asset_tag_ids.keys():
-                normalized_db_url = normalize_url(db_image_url)
-                if db_image_url == public_url or normalized_db_url == normalized_public_url:
-                    matching_db_image_url = db_image_url
-                    break
-            
-            # Also check by filename if no exact match
-            if not matching_db_image_url and fd['actualFileName']:
-                for db_image_url in image_url_to_asset_tag_ids.keys():
-                    if fd['actualFileName'].lower() in db_image_url.lower():
-                        matching_db_image_url = db_image_url
-                        break
-            
-            # Use database imageUrl if found, otherwise use storage publicUrl
-            final_image_url = matching_db_image_url or public_url
+        for row in rows:
+            actual_file_name = row['path'].split('/')[-1]
+            links = row['links']
             
-            # Get linked asset tag IDs
-            linked_asset_tag_ids = list(image_url_to_asset_tag_ids.get(final_image_url, image_url_to_asset_tag_ids.get(public_url, set())))
+            # One entry per linked asset, in link order
+            linked_assets_info_map: Dict[str, bool] = {}
+            for link in links:
+                if link.get('assetTagId'):
+                    linked_assets_info_map.setdefault(link['assetTagId'], bool(link.get('isDeleted')))
+            linked_asset_tag_ids = list(linked_assets_info_map.keys())
             linked_assets_info = [
-                {"assetTagId": tag_id, "isDeleted": linked_assets_info_map.get(tag_id, False)}
-                for tag_id in linked_asset_tag_ids
+                {"assetTagId": tag_id, "isDeleted": is_deleted}
+                for tag_id, is_deleted in linked_assets_info_map.items()
             ]
-            has_deleted_asset = any(info['isDeleted'] for info in linked_assets_info)
             
-            # Get metadata
-            db_metadata = image_url_to_metadata.get(final_image_url, image_url_to_metadata.get(public_url, {}))
-            image_type = fd['storageMimeType'] or db_metadata.get('imageType')
-            image_size = fd['storageSize'] or db_metadata.get('imageSize')
+            # Prefer storage metadata over database metadata
+            db_metadata = links[0] if links else {}
             
             images.append({
-                "id": fd['file'].get('id') or fd['file']['path'],
-                "imageUrl": final_image_url,
-                "assetTagId": fd['assetTagId'],
-                "fileName": fd['actualFileName'],
-                "createdAt": fd['file'].get('created_at') or datetime.now().isoformat(),
+                "id": f"{row['bucket']}/{row['path']}",
+                "imageUrl": db_metadata.get('url') or row['public_url'],
+                "assetTagId": asset_tag_id_from_file_name(actual_file_name, 'media'),
+                "fileName": actual_file_name,
+                "createdAt": row['created_at'],
                 "isLinked": len(linked_asset_tag_ids) > 0,
                 "linkedAssetTagId": linked_asset_tag_ids[0] if linked_asset_tag_ids else None,
                 "linkedAssetTagIds": linked_asset_tag_ids,
                 "linkedAssetsInfo": linked_assets_info,
-                "assetIsDeleted": has_deleted_asset,
-                "imageType": image_type,
-                "imageSize": image_size,
+                "assetIsDeleted": any(linked_assets_info_map.values()),
+                "imageType": row.get('mime_type') or db_metadata.get('imageType'),
+                "imageSize": int(row['size']) if row.get('size') else db_metadata.get('imageSize'),
             })
         
         return {
@@ -2923,7 +2095,8 @@ async def get_media(
 @router.post("/media/upload")
 async def upload_media(
     file: UploadFile = File(...),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Upload a media file (image) to storage"""
     try:
@@ -2931,7 +2104,7 @@ async def upload_media(
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
 
-        has_permission = await check_permission(user_id, "canManageMedia")
+        has_permission = permissions.has("canManageMedia")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canManageMedia required")
 
@@ -2960,41 +2133,10 @@ async def upload_media(
 
         # Check storage limit (5GB total)
         storage_limit = 5 * 1024 * 1024 * 1024  # 5GB
-        supabase_admin = get_supabase_admin_client()
+        storage_admin = get_storage_admin()
 
-        # Calculate current storage used (simplified - just check if we're close to limit)
-        # In production, you might want to cache this or calculate more efficiently
         try:
-            # List files to calculate storage
-            async def list_all_files(bucket: str, folder: str = "") -> List[Dict[str, Any]]:
-                all_files: List[Dict[str, Any]] = []
-                try:
-                    response = supabase_admin.storage.from_(bucket).list(folder, {"limit": 1000})
-                    if not response:
-                        return all_files
-                    for item in response:
-                        item_path = f"{folder}/{item['name']}" if folder else item['name']
-                        is_folder = item.get('id') is None
-                        if is_folder:
-                            sub_files = await list_all_files(bucket, item_path)
-                            all_files.extend(sub_files)
-                        else:
-                            all_files.append({
-                                "metadata": item.get('metadata', {}),
-                                "path": item_path
-                            })
-                except Exception as e:
-                    logger.warning(f"Error listing files from {bucket}/{folder}: {e}")
-                return all_files
-
-            assets_files = await list_all_files('assets', '')
-            file_history_files = await list_all_files('file-history', 'assets')
-
-            current_storage_used = 0
-            for f in assets_files + file_history_files:
-                if f.get('metadata', {}).get('size'):
-                    current_storage_used += f['metadata']['size']
-
+            current_storage_used = await get_storage_usage(ASSET_STORAGE_SCOPES)
             if current_storage_used + file_size > storage_limit:
                 raise HTTPException(
                     status_code=400,
@@ -3017,7 +2159,7 @@ async def upload_media(
         final_file_path = file_path
 
         try:
-            upload_response = supabase_admin.storage.from_('assets').upload(
+            upload_response = await storage_admin.from_('assets').upload(
                 file_path,
                 contents,
                 file_options={"content-type": file.content_type, "upsert": "false"}
@@ -3025,7 +2167,7 @@ async def upload_media(
             if upload_response and isinstance(upload_response, dict) and upload_response.get('error'):
                 # Try file-history bucket as fallback
                 fallback_path = file_path
-                fallback_response = supabase_admin.storage.from_('file-history').upload(
+                fallback_response = await storage_admin.from_('file-history').upload(
                     fallback_path,
                     contents,
                     file_options={"content-type": file.content_type, "upsert": "false"}
@@ -3035,11 +2177,11 @@ async def upload_media(
                         status_code=500,
                         detail=f"Failed to upload image to storage: {fallback_response.get('error')}"
                     )
-                url_data = supabase_admin.storage.from_('file-history').get_public_url(fallback_path)
+                url_data = await storage_admin.from_('file-history').get_public_url(fallback_path)
                 public_url = url_data.get('publicUrl') if isinstance(url_data, dict) else str(url_data)
                 final_file_path = fallback_path
             else:
-                url_data = supabase_admin.storage.from_('assets').get_public_url(file_path)
+                url_data = await storage_admin.from_('assets').get_public_url(file_path)
                 public_url = url_data.get('publicUrl') if isinstance(url_data, dict) else str(url_data)
         except Exception as upload_error:
             logger.error(f"Storage upload error: {upload_error}")
@@ -3071,7 +2213,8 @@ async def upload_media(
 @router.delete("/media/delete")
 async def delete_media(
     imageUrl: str = Query(...),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete a media file by its URL (removes database links and optionally the file from storage)"""
     try:
@@ -3079,7 +2222,7 @@ async def delete_media(
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
 
-        has_permission = await check_permission(user_id, "canManageMedia")
+        has_permission = permissions.has("canManageMedia")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canManageMedia required")
 
@@ -3096,10 +2239,11 @@ async def delete_media(
             await prisma.assetsimage.delete_many(
                 where={"imageUrl": imageUrl}
             )
+            await invalidate_response_cache(TAG_ASSETS)
 
         # Delete the file from storage
         try:
-            supabase_admin = get_supabase_admin_client()
+            storage_admin = get_storage_admin()
             import re
             from urllib.parse import unquote, urlparse
             
@@ -3122,7 +2266,7 @@ async def delete_media(
                 logger.info(f"Attempting to delete file from storage: bucket={bucket}, path={path}")
                 
                 # Delete from storage
-                delete_response = supabase_admin.storage.from_(bucket).remove([path])
+                delete_response = await storage_admin.from_(bucket).remove([path])
                 
                 # Check for errors in response
                 if delete_response:
@@ -3158,7 +2302,8 @@ async def delete_media(
 @router.delete("/media/bulk-delete")
 async def bulk_delete_media(
     request: Dict[str, Any],
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Bulk delete media files by URLs (removes database links and optionally files from storage)"""
     try:
@@ -3166,7 +2311,7 @@ async def bulk_delete_media(
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
 
-        has_permission = await check_permission(user_id, "canManageMedia")
+        has_permission = permissions.has("canManageMedia")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canManageMedia required")
 
@@ -3178,21 +2323,14 @@ async def bulk_delete_media(
             )
 
         total_deleted_links = 0
-        supabase_admin = get_supabase_admin_client()
+        storage_admin = get_storage_admin()
 
         for image_url in image_urls:
-            # Find all AssetsImage records linked to this image URL
-            linked_images = await prisma.assetsimage.find_many(
+            # Delete all AssetsImage records linked to this image URL (delete_many returns the count)
+            total_deleted_links += await prisma.assetsimage.delete_many(
                 where={"imageUrl": image_url}
             )
 
-            # Delete all database links for this image (if any exist)
-            if linked_images:
-                await prisma.assetsimage.delete_many(
-                    where={"imageUrl": image_url}
-                )
-                total_deleted_links += len(linked_images)
-
             # Delete the file from storage
             try:
                 import re
@@ -3214,7 +2352,7 @@ async def bulk_delete_media(
                     path = unquote(path)
                     
                     # Delete from storage
-                    delete_response = supabase_admin.storage.from_(bucket).remove([path])
+                    delete_response = await storage_admin.from_(bucket).remove([path])
                     
                     # Check for errors in response
                     if delete_response:
@@ -3229,6 +2367,9 @@ async def bulk_delete_media(
             except Exception as storage_error:
                 logger.error(f"Storage deletion error for {image_url}: {storage_error}", exc_info=True)
 
+        if total_deleted_links:
+            await invalidate_response_cache(TAG_ASSETS)
+
         return {
             "success": True,
             "message": f"Deleted {len(image_urls)} image(s){f' and removed {total_deleted_links} link(s)' if total_deleted_links > 0 else ''}",
@@ -3245,7 +2386,8 @@ async def bulk_delete_media(
 @router.post("/upload-document")
 async def upload_document_to_asset(
     req: Request,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Upload or link a document to an asset"""
     try:
@@ -3253,7 +2395,7 @@ async def upload_document_to_asset(
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
 
-        has_permission = await check_permission(user_id, "canManageMedia")
+        has_permission = permissions.has("canManageMedia")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canManageMedia required")
 
@@ -3321,7 +2463,7 @@ async def upload_document_to_asset(
             # Try to get file size from storage
             document_size = None
             try:
-                supabase_admin = get_supabase_admin_client()
+                storage_admin = get_storage_admin()
                 import re
                 url_match = re.search(r'/storage/v1/object/public/([^/]+)/(.+)', document_url)
                 if url_match:
@@ -3331,7 +2473,7 @@ async def upload_document_to_asset(
                     file_name = path_parts[-1]
                     folder_path = '/'.join(path_parts[:-1]) if len(path_parts) > 1 else ''
 
-                    file_list = supabase_admin.storage.from_(bucket).list(folder_path, {"limit": 1000})
+                    file_list = await storage_admin.from_(bucket).list(folder_path, {"limit": 1000})
                     if file_list:
                         for f in file_list:
                             if f.get('name') == file_name and f.get('metadata', {}).get('size'):
@@ -3355,6 +2497,7 @@ async def upload_document_to_asset(
                     "mimeType": mime_type,
                 }
             )
+            await invalidate_response_cache(TAG_ASSETS)
 
             return {
                 "id": str(document_record.id),
@@ -3409,12 +2552,12 @@ async def upload_document_to_asset(
         file_path = f"assets_documents/{file_name}"
 
         # Upload to Supabase storage
-        supabase_admin = get_supabase_admin_client()
+        storage_admin = get_storage_admin()
         public_url = None
         final_file_path = file_path
 
         try:
-            upload_response = supabase_admin.storage.from_('assets').upload(
+            upload_response = await storage_admin.from_('assets').upload(
                 file_path,
                 contents,
                 file_options={"content-type": file.content_type, "upsert": "false"}
@@ -3422,7 +2565,7 @@ async def upload_document_to_asset(
             if upload_response and isinstance(upload_response, dict) and upload_response.get('error'):
                 # Try file-history bucket as fallback
                 fallback_path = f"assets/{file_path}"
-                fallback_response = supabase_admin.storage.from_('file-history').upload(
+                fallback_response = await storage_admin.from_('file-history').upload(
                     fallback_path,
                     contents,
                     file_options={"content-type": file.content_type, "upsert": "false"}
@@ -3432,11 +2575,11 @@ async def upload_document_to_asset(
                         status_code=500,
                         detail=f"Failed to upload document to storage: {fallback_response.get('error')}"
                     )
-                url_data = supabase_admin.storage.from_('file-history').get_public_url(fallback_path)
+                url_data = await storage_admin.from_('file-history').get_public_url(fallback_path)
                 public_url = url_data.get('publicUrl') if isinstance(url_data, dict) else str(url_data)
                 final_file_path = fallback_path
             else:
-                url_data = supabase_admin.storage.from_('assets').get_public_url(file_path)
+                url_data = await storage_admin.from_('assets').get_public_url(file_path)
                 public_url = url_data.get('publicUrl') if isinstance(url_data, dict) else str(url_data)
         except Exception as upload_error:
             logger.error(f"Storage upload error: {upload_error}")
@@ -3462,6 +2605,7 @@ async def upload_document_to_asset(
                 "mimeType": file.content_type,
             }
         )
+        await invalidate_response_cache(TAG_ASSETS)
 
         return {
             "id": str(document_record.id),
@@ -3480,7 +2624,8 @@ async def upload_document_to_asset(
 @router.post("/upload-image")
 async def upload_image_to_asset(
     req: Request,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Upload or link an image to an asset"""
     try:
@@ -3488,7 +2633,7 @@ async def upload_image_to_asset(
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
 
-        has_permission = await check_permission(user_id, "canManageMedia")
+        has_permission = permissions.has("canManageMedia")
         if not has_permission:
             raise HTTPException(status_code=403, detail="Permission denied: canManageMedia required")
 
@@ -3539,7 +2684,7 @@ async def upload_image_to_asset(
             # Try to get file size from storage
             image_size = None
             try:
-                supabase_admin = get_supabase_admin_client()
+                storage_admin = get_storage_admin()
                 import re
                 url_match = re.search(r'/storage/v1/object/public/([^/]+)/(.+)', image_url)
                 if url_match:
@@ -3549,7 +2694,7 @@ async def upload_image_to_asset(
                     file_name = path_parts[-1]
                     folder_path = '/'.join(path_parts[:-1]) if len(path_parts) > 1 else ''
 
-                    file_list = supabase_admin.storage.from_(bucket).list(folder_path, {"limit": 1000})
+                    file_list = await storage_admin.from_(bucket).list(folder_path, {"limit": 1000})
                     if file_list:
                         for f in file_list:
                             if f.get('name') == file_name and f.get('metadata', {}).get('size'):
@@ -3567,6 +2712,7 @@ async def upload_image_to_asset(
                     "imageSize": image_size,
                 }
             )
+            await invalidate_response_cache(TAG_ASSETS)
 
             return {
                 "id": str(image_record.id),
@@ -3605,12 +2751,12 @@ async def upload_image_to_asset(
         file_path = f"assets_images/{file_name}"
 
         # Upload to Supabase storage
-        supabase_admin = get_supabase_admin_client()
+        storage_admin = get_storage_admin()
         public_url = None
         final_file_path = file_path
 
         try:
-            upload_response = supabase_admin.storage.from_('assets').upload(
+            upload_response = await storage_admin.from_('assets').upload(
                 file_path,
                 contents,
                 file_options={"content-type": file.content_type, "upsert": "false"}
@@ -3618,7 +2764,7 @@ async def upload_image_to_asset(
             if upload_response and isinstance(upload_response, dict) and upload_response.get('error'):
                 # Try file-history bucket as fallback
                 fallback_path = f"assets/{file_path}"
-                fallback_response = supabase_admin.storage.from_('file-history').upload(
+                fallback_response = await storage_admin.from_('file-history').upload(
                     fallback_path,
                     contents,
                     file_options={"content-type": file.content_type, "upsert": "false"}
@@ -3628,11 +2774,11 @@ async def upload_image_to_asset(
                         status_code=500,
                         detail=f"Failed to upload image to storage: {fallback_response.get('error')}"
                     )
-                url_data = supabase_admin.storage.from_('file-history').get_public_url(fallback_path)
+                url_data = await storage_admin.from_('file-history').get_public_url(fallback_path)
                 public_url = url_data.get('publicUrl') if isinstance(url_data, dict) else str(url_data)
                 final_file_path = fallback_path
             else:
-                url_data = supabase_admin.storage.from_('assets').get_public_url(file_path)
+                url_data = await storage_admin.from_('assets').get_public_url(file_path)
                 public_url = url_data.get('publicUrl') if isinstance(url_data, dict) else str(url_data)
         except Exception as upload_error:
             logger.error(f"Storage upload error: {upload_error}")
@@ -3656,6 +2802,7 @@ async def upload_image_to_asset(
                 "imageSize": file_size,
             }
         )
+        await invalidate_response_cache(TAG_ASSETS)
 
         return {
             "id": str(image_record.id),
@@ -3675,9 +2822,11 @@ async def upload_image_to_asset(
 
 
 @router.get("/{asset_id}", response_model=AssetResponse)
+@cached_response("assets.detail", tags=[TAG_ASSETS], ttl=30, permission="canViewAssets")
 async def get_asset(
     asset_id: str = Path(..., description="Asset ID (UUID) or assetTagId"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Get a single asset by ID or assetTagId"""
     try:
@@ -3686,7 +2835,7 @@ async def get_asset(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canViewAssets")
+        has_permission = permissions.has("canViewAssets")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -3899,7 +3048,8 @@ async def get_asset(
 @router.post("", response_model=AssetResponse, status_code=201)
 async def create_asset(
     asset_data: AssetCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new asset"""
     try:
@@ -3908,7 +3058,7 @@ async def create_asset(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canCreateAssets")
+        has_permission = permissions.has("canCreateAssets")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -3988,6 +3138,10 @@ async def create_asset(
                 }
             )
         
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS)
+        await refresh_asset_search_index([new_asset_data.id])
+        
         # Convert to Asset model
         category_info = None
         if new_asset_data.category:
@@ -4083,7 +3237,8 @@ async def create_asset(
 async def update_asset(
     asset_id: str = Path(..., description="Asset ID (UUID) or assetTagId"),
     asset_data: AssetUpdate = None,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Update an existing asset"""
     try:
@@ -4092,7 +3247,7 @@ async def update_asset(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canEditAssets")
+        has_permission = permissions.has("canEditAssets")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -4265,6 +3420,10 @@ async def update_asset(
                     }
                 )
         
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS)
+        await refresh_asset_search_index([actual_asset_id])
+        
         # Get image count
         image_count = await prisma.assetsimage.count(
             where={"assetTagId": updated_asset_data.assetTagId}
@@ -4366,7 +3525,8 @@ async def update_asset(
 async def delete_asset(
     asset_id: str = Path(..., description="Asset ID (UUID) or assetTagId"),
     permanent: bool = Query(False, description="Permanently delete the asset"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete an asset (soft delete by default, permanent if specified)"""
     try:
@@ -4375,7 +3535,7 @@ async def delete_asset(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canDeleteAssets")
+        has_permission = permissions.has("canDeleteAssets")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -4423,6 +3583,9 @@ async def delete_asset(
                     where={"id": actual_asset_id}
                 )
             
+            invalidate_distinct_asset_values()
+            await invalidate_response_cache(TAG_ASSETS)
+            
             return DeleteResponse(
                 success=True,
                 message="Asset permanently deleted"
@@ -4448,6 +3611,9 @@ async def delete_asset(
                     }
                 )
             
+            invalidate_distinct_asset_values()
+            await invalidate_response_cache(TAG_ASSETS)
+            
             return DeleteResponse(
                 success=True,
                 message="Asset archived. It will be permanently deleted after 30 days."
@@ -4492,7 +3658,8 @@ async def delete_history_log(
 @router.patch("/{asset_id}/restore")
 async def restore_asset(
     asset_id: str = Path(..., description="Asset ID (UUID) or assetTagId"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Restore a soft-deleted asset"""
     try:
@@ -4501,7 +3668,7 @@ async def restore_asset(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canManageTrash")
+        has_permission = permissions.has("canManageTrash")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -4531,6 +3698,8 @@ async def restore_asset(
                 "isDeleted": False
             }
         )
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS)
         
         return {"success": True, "message": "Asset restored successfully"}
     
@@ -4544,7 +3713,8 @@ async def restore_asset(
 @router.post("/bulk-restore", response_model=BulkRestoreResponse)
 async def bulk_restore_assets(
     request: BulkRestoreRequest,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Bulk restore multiple soft-deleted assets"""
     try:
@@ -4553,7 +3723,7 @@ async def bulk_restore_assets(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canManageTrash")
+        has_permission = permissions.has("canManageTrash")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -4563,19 +3733,21 @@ async def bulk_restore_assets(
         if not request.ids or len(request.ids) == 0:
             raise HTTPException(status_code=400, detail="Invalid request. Expected an array of asset IDs.")
         
-        # Restore all assets in a transaction
-        async with prisma.tx() as transaction:
-            # Update all assets to restore them
-            result = await transaction.assets.update_many(
-                where={
-                    "id": {"in": request.ids},
-                    "isDeleted": True  # Only restore assets that are actually deleted
-                },
-                data={
-                    "deletedAt": None,
-                    "isDeleted": False
-                }
-            )
+        # Restore all assets with one statement (atomic on its own, so no
+        # interactive transaction and its extra engine round-trips)
+        result = await prisma.assets.update_many(
+            where={
+                "id": {"in": request.ids},
+                "isDeleted": True  # Only restore assets that are actually deleted
+            },
+            data={
+                "deletedAt": None,
+                "isDeleted": False
+            }
+        )
+        
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS)
         
         return BulkRestoreResponse(
             success=True,
@@ -4592,7 +3764,8 @@ async def bulk_restore_assets(
 
 @router.delete("/trash/empty")
 async def empty_trash(
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Permanently delete all soft-deleted assets"""
     try:
@@ -4601,7 +3774,7 @@ async def empty_trash(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canManageTrash")
+        has_permission = permissions.has("canManageTrash")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -4614,6 +3787,8 @@ async def empty_trash(
                 "isDeleted": True
             }
         )
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS)
         
         return {
             "success": True,
@@ -4629,7 +3804,8 @@ async def empty_trash(
 @router.post("/bulk-delete", response_model=BulkDeleteResponse)
 async def bulk_delete_assets(
     request: BulkDeleteRequest,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Bulk delete multiple assets (soft delete or permanent)"""
     try:
@@ -4638,7 +3814,7 @@ async def bulk_delete_assets(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canDeleteAssets")
+        has_permission = permissions.has("canDeleteAssets")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -4659,15 +3835,17 @@ async def bulk_delete_assets(
         if request.permanent:
             # Permanent delete (hard delete)
             async with prisma.tx() as transaction:
-                # Log history for each asset before deleting
-                for asset_id in request.ids:
-                    await transaction.assetshistorylogs.create(
+                # Log history for each asset before deleting (one engine request per batch)
+                await execute_batched(transaction, (
+                    lambda batch, asset_id=asset_id: batch.assetshistorylogs.create(
                         data={
                             "assetId": asset_id,
                             "eventType": "deleted",
                             "actionBy": user_name
                         }
                     )
+                    for asset_id in request.ids
+                ))
                 
                 # Delete all assets
                 result = await transaction.assets.delete_many(
@@ -4676,6 +3854,9 @@ async def bulk_delete_assets(
                     }
                 )
             
+            invalidate_distinct_asset_values()
+            await invalidate_response_cache(TAG_ASSETS)
+            
             return BulkDeleteResponse(
                 success=True,
                 deletedCount=result,
@@ -4684,15 +3865,17 @@ async def bulk_delete_assets(
         else:
             # Soft delete
             async with prisma.tx() as transaction:
-                # Log history for each asset
-                for asset_id in request.ids:
-                    await transaction.assetshistorylogs.create(
+                # Log history for each asset (one engine request per batch)
+                await execute_batched(transaction, (
+                    lambda batch, asset_id=asset_id: batch.assetshistorylogs.create(
                         data={
                             "assetId": asset_id,
                             "eventType": "deleted",
                             "actionBy": user_name
                         }
                     )
+                    for asset_id in request.ids
+                ))
                 
                 # Soft delete - set isDeleted and deletedAt
                 result = await transaction.assets.update_many(
@@ -4705,6 +3888,9 @@ async def bulk_delete_assets(
                     }
                 )
             
+            invalidate_distinct_asset_values()
+            await invalidate_response_cache(TAG_ASSETS)
+            
             return BulkDeleteResponse(
                 success=True,
                 deletedCount=result,
@@ -5135,7 +4321,6 @@ async def generate_asset_pdf(
         if sections.photos:
             add_section_title('Photos')
             if images and len(images) > 0:
-                import httpx
                 import tempfile
                 import os as os_module
                 
@@ -5180,41 +4365,40 @@ async def generate_asset_pdf(
                     img_embedded = False
                     if img.imageUrl:
                         try:
-                            with httpx.Client(timeout=10.0) as client:
-                                response = client.get(img.imageUrl)
-                                if response.status_code == 200:
-                                    img_ext = img.imageType.split('/')[-1] if img.imageType else 'jpg'
-                                    if img_ext not in ['jpg', 'jpeg', 'png', 'gif']:
-                                        img_ext = 'jpg'
-                                    
-                                    with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{img_ext}') as tmp_file:
-                                        tmp_file.write(response.content)
-                                        tmp_path = tmp_file.name
-                                    
-                                    # Get image dimensions to maintain aspect ratio
-                                    from PIL import Image as PILImage
-                                    with PILImage.open(tmp_path) as pil_img:
-                                        orig_w, orig_h = pil_img.size
-                                    
-                                    # Calculate scaled dimensions to fit in cell while maintaining aspect ratio
-                                    max_w = col_widths[0] - 4
-                                    max_h = row_height - 4
-                                    
-                                    # Calculate scale factor
-                                    scale_w = max_w / orig_w
-                                    scale_h = max_h / orig_h
-                                    scale = min(scale_w, scale_h)  # Use smaller scale to fit
-                                    
-                                    img_w = orig_w * scale
-                                    img_h = orig_h * scale
-                                    
-                                    # Center image in cell
-                                    img_x = start_x + 2 + (max_w - img_w) / 2
-                                    img_y = start_y + 2 + (max_h - img_h) / 2
-                                    
-                                    pdf.image(tmp_path, x=img_x, y=img_y, w=img_w, h=img_h)
-                                    img_embedded = True
-                                    os_module.unlink(tmp_path)
+                            response = await get_http_client().get(img.imageUrl, timeout=10.0)
+                            if response.status_code == 200:
+                                img_ext = img.imageType.split('/')[-1] if img.imageType else 'jpg'
+                                if img_ext not in ['jpg', 'jpeg', 'png', 'gif']:
+                                    img_ext = 'jpg'
+                                
+                                with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{img_ext}') as tmp_file:
+                                    tmp_file.write(response.content)
+                                    tmp_path = tmp_file.name
+                                
+                                # Get image dimensions to maintain aspect ratio
+                                from PIL import Image as PILImage
+                                with PILImage.open(tmp_path) as pil_img:
+                                    orig_w, orig_h = pil_img.size
+                                
+                                # Calculate scaled dimensions to fit in cell while maintaining aspect ratio
+                                max_w = col_widths[0] - 4
+                                max_h = row_height - 4
+                                
+                                # Calculate scale factor
+                                scale_w = max_w / orig_w
+                                scale_h = max_h / orig_h
+                                scale = min(scale_w, scale_h)  # Use smaller scale to fit
+                                
+                                img_w = orig_w * scale
+                                img_h = orig_h * scale
+                                
+                                # Center image in cell
+                                img_x = start_x + 2 + (max_w - img_w) / 2
+                                img_y = start_y + 2 + (max_h - img_h) / 2
+                                
+                                pdf.image(tmp_path, x=img_x, y=img_y, w=img_w, h=img_h)
+                                img_embedded = True
+                                os_module.unlink(tmp_path)
                         except Exception as img_error:
                             logger.warning(f"Failed to embed image: {img_error}")
                     
@@ -9,7 +9,10 @@ import re
 
 from models.audit import AuditCreate, AuditUpdate, AuditsListResponse, AuditDetailResponse, AuditStatsResponse
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.activity_ledger import ACTIVITY_AUDIT, activity, actor_name, record_activity
+from utils.response_cache import cached_response, invalidate_response_cache, TAG_ASSETS, TAG_AUDIT
 
 logger = logging.getLogger(__name__)
 
@@ -21,24 +24,6 @@ def is_uuid(value: str) -> bool:
 router = APIRouter(prefix="/api/assets", tags=["audit"])
 
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission"""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
-
-
 def parse_date(date_str: str) -> datetime:
     """Parse date string to datetime"""
     try:
@@ -103,7 +88,8 @@ async def get_asset_audits(
 async def create_audit(
     asset_id: str,
     audit_data: AuditCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new audit record for an asset"""
     try:
@@ -112,7 +98,7 @@ async def create_audit(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canAudit")
+        has_permission = permissions.has("canAudit")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -134,17 +120,26 @@ async def create_audit(
         # Parse audit date
         audit_date = parse_date(audit_data.auditDate)
         
-        # Create audit record (use the actual asset.id)
-        audit = await prisma.assetsaudithistory.create(
-            data={
-                "assetId": asset.id,
-                "auditType": audit_data.auditType,
-                "auditDate": audit_date,
-                "notes": audit_data.notes,
-                "auditor": audit_data.auditor,
-                "status": audit_data.status or "Completed"
-            }
-        )
+        # Create audit record (use the actual asset.id) and its ledger row together
+        async with prisma.tx() as transaction:
+            audit = await transaction.assetsaudithistory.create(
+                data={
+                    "assetId": asset.id,
+                    "auditType": audit_data.auditType,
+                    "auditDate": audit_date,
+                    "notes": audit_data.notes,
+                    "auditor": audit_data.auditor,
+                    "status": audit_data.status or "Completed"
+                }
+            )
+            await record_activity(transaction, activity(
+                ACTIVITY_AUDIT,
+                audit.id,
+                asset.id,
+                audit_date,
+                actor=audit_data.auditor or actor_name(auth),
+                details=audit.auditType
+            ))
         
         # Format response
         audit_dict = {
@@ -158,6 +153,7 @@ async def create_audit(
             "createdAt": audit.createdAt.isoformat() if hasattr(audit.createdAt, 'isoformat') else str(audit.createdAt),
             "updatedAt": audit.updatedAt.isoformat() if hasattr(audit.updatedAt, 'isoformat') else str(audit.updatedAt),
         }
+        await invalidate_response_cache(TAG_ASSETS, TAG_AUDIT)
         
         return AuditDetailResponse(audit=audit_dict)
     
@@ -172,7 +168,8 @@ async def create_audit(
 async def update_audit(
     audit_id: str,
     audit_data: AuditUpdate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Update an audit record"""
     try:
@@ -181,7 +178,7 @@ async def update_audit(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canAudit")
+        has_permission = permissions.has("canAudit")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -232,6 +229,7 @@ async def update_audit(
             "createdAt": audit.createdAt.isoformat() if hasattr(audit.createdAt, 'isoformat') else str(audit.createdAt),
             "updatedAt": audit.updatedAt.isoformat() if hasattr(audit.updatedAt, 'isoformat') else str(audit.updatedAt),
         }
+        await invalidate_response_cache(TAG_ASSETS, TAG_AUDIT)
         
         return AuditDetailResponse(audit=audit_dict)
     
@@ -245,7 +243,8 @@ async def update_audit(
 @router.delete("/audit/{audit_id}")
 async def delete_audit(
     audit_id: str,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete an audit record"""
     try:
@@ -254,7 +253,7 @@ async def delete_audit(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canAudit")
+        has_permission = permissions.has("canAudit")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -273,6 +272,7 @@ async def delete_audit(
         await prisma.assetsaudithistory.delete(
             where={"id": audit_id}
         )
+        await invalidate_response_cache(TAG_ASSETS, TAG_AUDIT)
         
         return {"success": True}
     
@@ -284,6 +284,7 @@ async def delete_audit(
 
 
 @router.get("/audit/stats", response_model=AuditStatsResponse)
+@cached_response("audit.stats", tags=[TAG_AUDIT], ttl=30)
 async def get_audit_stats(
     auth: dict = Depends(verify_auth)
 ):
@@ -13,28 +13,14 @@ from models.categories import (
     CategoryResponse
 )
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.response_cache import invalidate_response_cache, TAG_ASSETS
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/categories", tags=["categories"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 @router.get("", response_model=CategoriesResponse)
 async def get_categories(
@@ -107,7 +93,8 @@ async def get_categories(
 @router.post("", response_model=CategoryResponse, status_code=201)
 async def create_category(
     category_data: CategoryCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new category"""
     try:
@@ -116,7 +103,7 @@ async def create_category(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to create categories
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -181,7 +168,8 @@ async def create_category(
 async def update_category(
     category_id: str,
     category_data: CategoryUpdate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Update an existing category"""
     try:
@@ -190,7 +178,7 @@ async def update_category(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to update categories
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -236,6 +224,7 @@ async def update_category(
                 "subCategories": True
             }
         )
+        await invalidate_response_cache(TAG_ASSETS)
         
         # Map subcategories
         subcategories = []
@@ -267,7 +256,8 @@ async def update_category(
 @router.delete("/{category_id}")
 async def delete_category(
     category_id: str,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete a category"""
     try:
@@ -276,7 +266,7 @@ async def delete_category(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to delete categories
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -310,6 +300,7 @@ async def delete_category(
         await prisma.category.delete(
             where={"id": category_id}
         )
+        await invalidate_response_cache(TAG_ASSETS)
         
         return {"success": True}
     
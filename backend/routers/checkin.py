@@ -8,28 +8,18 @@ import logging
 
 from models.checkin import CheckinCreate, CheckinResponse, CheckinStatsResponse, CheckinAssetUpdate
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.asset_distinct import invalidate_distinct_asset_values
+from utils.asset_search import refresh_asset_search_index
+from utils.response_cache import cached_response, invalidate_response_cache, TAG_ASSETS, TAG_CHECKIN, TAG_CHECKOUT
+from utils.activity_ledger import ACTIVITY_CHECKIN, activity, record_activity
+from utils.bulk_transactions import create_history_logs, create_rows, fetch_assets_by_id, fetch_employee_names, fetch_rows_in_order, history_log, unique_ids, update_assets
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/assets/checkin", tags=["checkin"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 def parse_date(date_str: str) -> datetime:
     """Parse date string to datetime"""
@@ -44,7 +34,8 @@ def parse_date(date_str: str) -> datetime:
 @router.post("", response_model=CheckinResponse, status_code=status.HTTP_201_CREATED)
 async def create_checkin(
     checkin_data: CheckinCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create checkin records for assets"""
     try:
@@ -53,7 +44,7 @@ async def create_checkin(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canCheckin")
+        has_permission = permissions.has("canCheckin")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -79,29 +70,27 @@ async def create_checkin(
         # Parse date
         checkin_date = parse_date(checkin_data.checkinDate)
 
-        # Create checkin records and update assets in a transaction
-        checkin_records = []
+        asset_ids = unique_ids(checkin_data.assetIds)
         
-        # Use Prisma transaction
+        # Set-based: the batch is read and written with a fixed number of queries
         async with prisma.tx() as transaction:
-            for asset_id in checkin_data.assetIds:
-                asset_update = checkin_data.updates.get(asset_id) if checkin_data.updates else None
-                
-                # Get the asset and all its checkouts
-                # Note: Prisma Python doesn't support 'order' inside 'include', so we'll sort in Python
-                asset = await transaction.assets.find_unique(
-                    where={"id": asset_id},
-                    include={
-                        "checkouts": {
-                            "include": {
-                                "checkins": True
-                            }
+            # Get the assets and all their checkouts
+            # Note: Prisma Python doesn't support 'order' inside 'include', so we'll sort in Python
+            assets_by_id = await fetch_assets_by_id(
+                transaction,
+                asset_ids,
+                include={
+                    "checkouts": {
+                        "include": {
+                            "checkins": True
                         }
                     }
-                )
+                }
+            )
 
-                if not asset:
-                    raise HTTPException(status_code=404, detail=f"Asset with ID {asset_id} not found")
+            active_checkouts_by_asset: Dict[str, list] = {}
+            for asset_id in asset_ids:
+                asset = assets_by_id[asset_id]
 
                 if asset.status != "Checked out":
                     raise HTTPException(
@@ -115,7 +104,6 @@ async def create_checkin(
                     if len(checkout.checkins) == 0 and checkout.employeeUserId is not None
                 ]
                 # Sort by checkoutDate descending (most recent first)
-                # Note: Prisma Python doesn't support 'order' inside 'include', so we sort in Python
                 active_checkouts.sort(key=lambda x: x.checkoutDate if x.checkoutDate else datetime.min, reverse=True)
 
                 if len(active_checkouts) == 0:
@@ -124,120 +112,117 @@ async def create_checkin(
                         detail=f"No active checkout found for asset {asset.assetTagId}"
                     )
 
+                active_checkouts_by_asset[asset_id] = active_checkouts
+
+            # Names for the assignedEmployee history logs, in one query
+            employee_names = await fetch_employee_names(
+                transaction,
+                (checkouts[0].employeeUserId for checkouts in active_checkouts_by_asset.values())
+            )
+
+            asset_updates: Dict[str, Dict[str, Any]] = {}
+            history_logs = []
+            checkin_rows = []
+
+            for asset_id in asset_ids:
+                asset = assets_by_id[asset_id]
+                active_checkouts = active_checkouts_by_asset[asset_id]
+                asset_update = checkin_data.updates.get(asset_id) if checkin_data.updates else None
+
                 # Use the most recent active checkout for history logging
                 active_checkout = active_checkouts[0]
 
-                # Prepare history logs
-                history_logs = []
-
                 # Log status change from "Checked out" to "Available"
-                history_logs.append({
-                    "field": "status",
-                    "changeFrom": asset.status,
-                    "changeTo": "Available"
-                })
+                history_logs.append(history_log(asset_id, "status", asset.status, "Available", userName, checkin_date))
 
                 # Log assignedEmployee clearing (employee assignment ends when checked in)
-                if active_checkout.employeeUserId:
-                    try:
-                        employee = await transaction.employeeuser.find_unique(
-                            where={"id": active_checkout.employeeUserId}
-                        )
-                        employee_name = employee.name if employee else active_checkout.employeeUserId
-                        
-                        history_logs.append({
-                            "field": "assignedEmployee",
-                            "changeFrom": employee_name,
-                            "changeTo": ""
-                        })
-                    except Exception as e:
-                        logger.error(f"Error fetching employee for checkin history log: {e}")
-                        history_logs.append({
-                            "field": "assignedEmployee",
-                            "changeFrom": active_checkout.employeeUserId,
-                            "changeTo": ""
-                        })
+                employee_name = employee_names.get(active_checkout.employeeUserId, active_checkout.employeeUserId)
+                history_logs.append(history_log(asset_id, "assignedEmployee", employee_name, "", userName, checkin_date))
 
                 # Update asset status to Available and location if provided
                 update_data: Dict[str, Any] = {
                     "status": "Available"
                 }
 
-                # Update location if return location is provided
-                new_location = asset_update.returnLocation if asset_update and asset_update.returnLocation is not None else asset.location
-
                 if asset_update and asset_update.returnLocation is not None:
+                    new_location = asset_update.returnLocation
                     update_data["location"] = new_location
 
                     # Log location change if different from current location
                     if str(asset.location or '') != str(new_location or ''):
-                        history_logs.append({
-                            "field": "location",
-                            "changeFrom": asset.location or "",
-                            "changeTo": new_location or ""
-                        })
-
-                # Update asset
-                await transaction.assets.update(
-                    where={"id": asset_id},
-                    data=update_data
-                )
-
-                # Create history logs for each changed field
-                if history_logs:
-                    for log in history_logs:
-                        await transaction.assetshistorylogs.create(
-                            data={
-                                "assetId": asset_id,
-                                "eventType": "edited",
-                                "field": log["field"],
-                                "changeFrom": log["changeFrom"],
-                                "changeTo": log["changeTo"],
-                                "actionBy": userName,
-                                "eventDate": checkin_date
-                            }
-                        )
+                        history_logs.append(history_log(asset_id, "location", asset.location or "", new_location or "", userName, checkin_date))
+
+                asset_updates[asset_id] = update_data
 
                 # Create checkin records for ALL active checkouts (not just one)
                 # This ensures all active checkouts are marked as checked in
                 for checkout in active_checkouts:
-                    checkin = await transaction.assetscheckin.create(
-                        data={
-                            "assetId": asset_id,
-                            "checkoutId": checkout.id,
-                            "employeeUserId": checkout.employeeUserId,
-                            # Note: Prisma Python requires datetime objects, not date objects, even for Date fields
-                            "checkinDate": checkin_date,
-                            "condition": asset_update.condition if asset_update and asset_update.condition else None,
-                            "notes": asset_update.notes if asset_update and asset_update.notes else None,
-                        },
-                        include={
-                            "asset": True,
-                            "employeeUser": True,
-                            "checkout": True
-                        }
-                    )
-
-                    checkin_records.append({
-                        "id": str(checkin.id),
-                        "assetId": str(checkin.assetId),
-                        "checkoutId": str(checkin.checkoutId),
-                        "employeeUserId": str(checkin.employeeUserId) if checkin.employeeUserId else None,
-                        "checkinDate": checkin.checkinDate.isoformat() if hasattr(checkin.checkinDate, 'isoformat') else str(checkin.checkinDate),
-                        "condition": checkin.condition,
-                        "notes": checkin.notes,
-                        "asset": {
-                            "id": str(checkin.asset.id),
-                            "assetTagId": str(checkin.asset.assetTagId),
-                            "description": str(checkin.asset.description)
-                        } if checkin.asset else None,
-                        "employeeUser": {
-                            "id": str(checkin.employeeUser.id),
-                            "name": str(checkin.employeeUser.name),
-                            "email": str(checkin.employeeUser.email)
-                        } if checkin.employeeUser else None
+                    checkin_rows.append({
+                        "assetId": asset_id,
+                        "checkoutId": checkout.id,
+                        "employeeUserId": checkout.employeeUserId,
+                        # Note: Prisma Python requires datetime objects, not date objects, even for Date fields
+                        "checkinDate": checkin_date,
+                        "condition": asset_update.condition if asset_update and asset_update.condition else None,
+                        "notes": asset_update.notes if asset_update and asset_update.notes else None,
                     })
 
+            await update_assets(transaction, asset_updates)
+            await create_history_logs(transaction, history_logs)
+            checkin_ids = await create_rows(transaction.assetscheckin, checkin_rows)
+
+            checkins = await fetch_rows_in_order(
+                transaction.assetscheckin,
+                checkin_ids,
+                include={
+                    "asset": True,
+                    "employeeUser": True
+                }
+            )
+
+            checkin_records = []
+            activity_entries = []
+            for checkin in checkins:
+                checkin_records.append({
+                    "id": str(checkin.id),
+                    "assetId": str(checkin.assetId),
+                    "checkoutId": str(checkin.checkoutId),
+                    "employeeUserId": str(checkin.employeeUserId) if checkin.employeeUserId else None,
+                    "checkinDate": checkin.checkinDate.isoformat() if hasattr(checkin.checkinDate, 'isoformat') else str(checkin.checkinDate),
+                    "condition": checkin.condition,
+                    "notes": checkin.notes,
+                    "asset": {
+                        "id": str(checkin.asset.id),
+                        "assetTagId": str(checkin.asset.assetTagId),
+                        "description": str(checkin.asset.description)
+                    } if checkin.asset else None,
+                    "employeeUser": {
+                        "id": str(checkin.employeeUser.id),
+                        "name": str(checkin.employeeUser.name),
+                        "email": str(checkin.employeeUser.email)
+                    } if checkin.employeeUser else None
+                })
+
+                activity_entries.append(activity(
+                    ACTIVITY_CHECKIN,
+                    checkin.id,
+                    checkin.assetId,
+                    checkin_date,
+                    actor=userName,
+                    employee_user_id=checkin.employeeUserId,
+                    details=f"Checked in from {checkin.employeeUser.name if checkin.employeeUser else 'Unknown'}"
+                ))
+
+            # Ledger rows commit with the checkins they describe
+            await record_activity(transaction, *activity_entries)
+
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS, TAG_CHECKIN, TAG_CHECKOUT)
+        # The return location is searchable text
+        await refresh_asset_search_index([
+            asset_id for asset_id, update_data in asset_updates.items() if "location" in update_data
+        ])
+
         return CheckinResponse(
             success=True,
             checkins=checkin_records,
@@ -251,6 +236,7 @@ async def create_checkin(
         raise HTTPException(status_code=500, detail=f"Failed to check in assets: {str(e)}")
 
 @router.get("/stats", response_model=CheckinStatsResponse)
+@cached_response("checkin.stats", tags=[TAG_CHECKIN], ttl=30)
 async def get_checkin_stats(
     auth: dict = Depends(verify_auth)
 ):
@@ -8,28 +8,18 @@ import logging
 
 from models.checkout import CheckoutCreate, CheckoutUpdate, CheckoutResponse, CheckoutStatsResponse, CheckoutDetailResponse, AssetUpdateInfo
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.asset_distinct import invalidate_distinct_asset_values
+from utils.response_cache import cached_response, invalidate_response_cache, TAG_ASSETS, TAG_CHECKOUT
+from utils.asset_search import refresh_asset_search_index
+from utils.activity_ledger import ACTIVITY_CHECKOUT, activity, record_activity
+from utils.bulk_transactions import create_history_logs, create_rows, fetch_assets_by_id, fetch_rows_in_order, history_log, unique_ids, update_assets
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/assets/checkout", tags=["checkout"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 def parse_date(date_str: str) -> datetime:
     """Parse date string to datetime"""
@@ -44,7 +34,8 @@ def parse_date(date_str: str) -> datetime:
 @router.post("", response_model=CheckoutResponse, status_code=status.HTTP_201_CREATED)
 async def create_checkout(
     checkout_data: CheckoutCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create checkout records for assets"""
     try:
@@ -53,7 +44,7 @@ async def create_checkout(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canCheckout")
+        has_permission = permissions.has("canCheckout")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -85,128 +76,73 @@ async def create_checkout(
         if checkout_data.expectedReturnDate:
             expected_return_date = parse_date(checkout_data.expectedReturnDate)
 
-        # Create checkout records and update assets in a transaction
-        checkout_records = []
+        asset_ids = unique_ids(checkout_data.assetIds)
         
-        # Use Prisma transaction
+        # Set-based: the batch is read and written with a fixed number of queries
         async with prisma.tx() as transaction:
-            for asset_id in checkout_data.assetIds:
-                asset_update = checkout_data.updates.get(asset_id) if checkout_data.updates else None
-                
-                # Get current asset
-                current_asset = await transaction.assets.find_unique(
-                    where={"id": asset_id}
-                )
+            assets_by_id = await fetch_assets_by_id(transaction, asset_ids)
+            
+            employee = await transaction.employeeuser.find_unique(
+                where={"id": checkout_data.employeeUserId}
+            )
+            employee_name = employee.name if employee else checkout_data.employeeUserId
 
-                if not current_asset:
-                    raise HTTPException(status_code=404, detail=f"Asset with ID {asset_id} not found")
+            asset_updates: Dict[str, Dict[str, Any]] = {}
+            history_logs = []
+            checkout_rows = []
 
-                # Prepare history logs
-                history_logs = []
+            for asset_id in asset_ids:
+                current_asset = assets_by_id[asset_id]
+                asset_update = checkout_data.updates.get(asset_id) if checkout_data.updates else None
 
-                # Prepare asset update data
+                # Only provided fields are written, so assets without updates share one update_many
                 update_data: Dict[str, Any] = {
                     "status": "Checked out"
                 }
 
                 # Log status change if different
                 if current_asset.status != "Checked out":
-                    history_logs.append({
-                        "field": "status",
-                        "changeFrom": current_asset.status or "",
-                        "changeTo": "Checked out"
-                    })
-
-                # Update department/site/location if provided
-                new_department = asset_update.department if asset_update and asset_update.department is not None else current_asset.department
-                new_site = asset_update.site if asset_update and asset_update.site is not None else current_asset.site
-                new_location = asset_update.location if asset_update and asset_update.location is not None else current_asset.location
-
-                update_data["department"] = new_department
-                update_data["site"] = new_site
-                update_data["location"] = new_location
-
-                # Log location changes
-                if new_location != current_asset.location:
-                    history_logs.append({
-                        "field": "location",
-                        "changeFrom": current_asset.location or "",
-                        "changeTo": new_location or ""
-                    })
-
-                # Log department changes
-                if new_department != current_asset.department:
-                    history_logs.append({
-                        "field": "department",
-                        "changeFrom": current_asset.department or "",
-                        "changeTo": new_department or ""
-                    })
-
-                # Log site changes
-                if new_site != current_asset.site:
-                    history_logs.append({
-                        "field": "site",
-                        "changeFrom": current_asset.site or "",
-                        "changeTo": new_site or ""
-                    })
-
-                # Update asset
-                await transaction.assets.update(
-                    where={"id": asset_id},
-                    data=update_data
-                )
+                    history_logs.append(history_log(asset_id, "status", current_asset.status or "", "Checked out", userName, checkout_date))
+
+                # Update department/site/location if provided, logging changes
+                for field in ("location", "department", "site"):
+                    new_value = getattr(asset_update, field) if asset_update else None
+                    if new_value is None:
+                        continue
+                    update_data[field] = new_value
+                    current_value = getattr(current_asset, field)
+                    if new_value != current_value:
+                        history_logs.append(history_log(asset_id, field, current_value or "", new_value or "", userName, checkout_date))
 
                 # Log assignedEmployee change
-                if checkout_data.employeeUserId:
-                    try:
-                        employee = await transaction.employeeuser.find_unique(
-                            where={"id": checkout_data.employeeUserId}
-                        )
-                        employee_name = employee.name if employee else checkout_data.employeeUserId
-                        
-                        history_logs.append({
-                            "field": "assignedEmployee",
-                            "changeFrom": "",
-                            "changeTo": employee_name
-                        })
-                    except Exception as e:
-                        logger.error(f"Error fetching employee for history log: {e}")
-                        history_logs.append({
-                            "field": "assignedEmployee",
-                            "changeFrom": "",
-                            "changeTo": checkout_data.employeeUserId
-                        })
+                history_logs.append(history_log(asset_id, "assignedEmployee", "", employee_name, userName, checkout_date))
 
-                # Create history logs
-                if history_logs:
-                    for log in history_logs:
-                        await transaction.assetshistorylogs.create(
-                            data={
-                                "assetId": asset_id,
-                                "eventType": "edited",
-                                "field": log["field"],
-                                "changeFrom": log["changeFrom"],
-                                "changeTo": log["changeTo"],
-                                "actionBy": userName,
-                                "eventDate": checkout_date
-                            }
-                        )
+                asset_updates[asset_id] = update_data
 
-                # Create checkout record
                 # Note: Prisma Python requires datetime objects, not date objects, even for Date fields
-                checkout = await transaction.assetscheckout.create(
-                    data={
-                        "assetId": asset_id,
-                        "employeeUserId": checkout_data.employeeUserId,
-                        "checkoutDate": checkout_date,
-                        "expectedReturnDate": expected_return_date
-                    },
-                    include={
-                        "asset": True,
-                        "employeeUser": True
-                    }
-                )
+                checkout_rows.append({
+                    "assetId": asset_id,
+                    "employeeUserId": checkout_data.employeeUserId,
+                    "checkoutDate": checkout_date,
+                    "expectedReturnDate": expected_return_date
+                })
+
+            await update_assets(transaction, asset_updates)
+            await create_history_logs(transaction, history_logs)
+            checkout_ids = await create_rows(transaction.assetscheckout, checkout_rows)
 
+            checkouts = await fetch_rows_in_order(
+                transaction.assetscheckout,
+                checkout_ids,
+                include={
+                    "asset": True,
+                    "employeeUser": True
+                }
+            )
+
+            checkout_records = []
+            activity_entries = []
+            for checkout in checkouts:
                 checkout_records.append({
                     "id": str(checkout.id),
                     "assetId": str(checkout.assetId),
@@ -225,6 +161,23 @@ async def create_checkout(
                     } if checkout.employeeUser else None
                 })
 
+                activity_entries.append(activity(
+                    ACTIVITY_CHECKOUT,
+                    checkout.id,
+                    checkout.assetId,
+                    checkout_date,
+                    actor=userName,
+                    employee_user_id=checkout_data.employeeUserId,
+                    details=f"Checked out to {checkout.employeeUser.name if checkout.employeeUser else 'Unknown'}"
+                ))
+
+            # Ledger rows commit with the checkouts they describe
+            await record_activity(transaction, *activity_entries)
+
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS, TAG_CHECKOUT)
+        await refresh_asset_search_index(asset_ids)
+
         return CheckoutResponse(
             success=True,
             checkouts=checkout_records,
@@ -238,6 +191,7 @@ async def create_checkout(
         raise HTTPException(status_code=500, detail=f"Failed to checkout assets: {str(e)}")
 
 @router.get("/stats", response_model=CheckoutStatsResponse)
+@cached_response("checkout.stats", tags=[TAG_CHECKOUT], ttl=30)
 async def get_checkout_stats(
     auth: dict = Depends(verify_auth)
 ):
@@ -342,7 +296,8 @@ async def get_checkout(
 async def update_checkout(
     checkout_id: str,
     checkout_data: CheckoutUpdate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Update a checkout record (e.g., assign employee, update dates)"""
     try:
@@ -351,7 +306,7 @@ async def update_checkout(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canCheckout")
+        has_permission = permissions.has("canCheckout")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -460,6 +415,10 @@ async def update_checkout(
                         logger.error(f"Error creating fallback history log: {type(fallback_error).__name__}: {str(fallback_error)}", exc_info=True)
                         # Don't fail the request if history logging fails
         
+        await invalidate_response_cache(TAG_ASSETS, TAG_CHECKOUT)
+        if old_employee_user_id != new_employee_user_id:
+            await refresh_asset_search_index([checkout.assetId])
+        
         # Convert to dict for response
         checkout_dict = {
             "id": str(checkout.id),
@@ -5,49 +5,22 @@ Singleton resource - only one company info record exists
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query
 from typing import Optional
 import logging
-import os
 from datetime import datetime
-from supabase import create_client, Client
 from models.company_info import (
     CompanyInfo,
     CompanyInfoCreate,
     CompanyInfoUpdate,
     CompanyInfoResponse
 )
-from auth import verify_auth, SUPABASE_URL
+from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.storage import get_storage_admin
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/company-info", tags=["company-info"])
 
-def get_supabase_admin_client() -> Client:
-    """Get Supabase admin client for storage operations"""
-    supabase_service_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    if not supabase_service_key:
-        raise HTTPException(
-            status_code=500,
-            detail="Supabase service role key not configured"
-        )
-    return create_client(SUPABASE_URL, supabase_service_key)
-
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
-
 @router.get("", response_model=CompanyInfoResponse)
 async def get_company_info(
     auth: dict = Depends(verify_auth)
@@ -86,7 +59,8 @@ async def get_company_info(
 @router.post("", response_model=CompanyInfoResponse)
 async def create_or_update_company_info(
     company_info_data: CompanyInfoCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create or update company information (upsert - singleton behavior)"""
     try:
@@ -95,7 +69,7 @@ async def create_or_update_company_info(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to create/update company info
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -196,7 +170,8 @@ async def update_company_info(
 async def upload_logo(
     file: UploadFile = File(...),
     logoType: str = Form(...),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Upload a company logo (primary or secondary)"""
     try:
@@ -205,7 +180,7 @@ async def upload_logo(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to upload logos
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -238,7 +213,7 @@ async def upload_logo(
             )
         
         # Create Supabase admin client
-        supabase_admin = get_supabase_admin_client()
+        storage_admin = get_storage_admin()
         
         # Generate unique file path
         timestamp = datetime.now().isoformat().replace(':', '-').replace('.', '-')
@@ -253,27 +228,27 @@ async def upload_logo(
         
         try:
             # Try assets bucket first
-            response = supabase_admin.storage.from_('assets').upload(
+            response = await storage_admin.from_('assets').upload(
                 file_path,
                 file_content,
                 file_options={"content-type": file.content_type or "image/png"}
             )
             
             if response:
-                url_data = supabase_admin.storage.from_('assets').get_public_url(file_path)
+                url_data = await storage_admin.from_('assets').get_public_url(file_path)
                 public_url = url_data.get('publicUrl', '') if isinstance(url_data, dict) else str(url_data)
         except Exception as upload_error:
             # If assets bucket doesn't exist, try file-history bucket
             error_msg = str(upload_error).lower()
             if 'bucket not found' in error_msg or 'not found' in error_msg:
                 try:
-                    response = supabase_admin.storage.from_('file-history').upload(
+                    response = await storage_admin.from_('file-history').upload(
                         file_path,
                         file_content,
                         file_options={"content-type": file.content_type or "image/png"}
                     )
                     if response:
-                        url_data = supabase_admin.storage.from_('file-history').get_public_url(file_path)
+                        url_data = await storage_admin.from_('file-history').get_public_url(file_path)
                         public_url = url_data.get('publicUrl', '') if isinstance(url_data, dict) else str(url_data)
                 except Exception as fallback_error:
                     logger.error(f"Storage upload error: {fallback_error}")
@@ -328,7 +303,8 @@ async def upload_logo(
 @router.delete("/delete-logo")
 async def delete_logo(
     logoUrl: str = Query(..., description="Logo URL to delete"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete a company logo from storage"""
     try:
@@ -337,7 +313,7 @@ async def delete_logo(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to delete logos
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -349,7 +325,7 @@ async def delete_logo(
         
         # Delete file from Supabase storage
         try:
-            supabase_admin = get_supabase_admin_client()
+            storage_admin = get_storage_admin()
             
             # Extract bucket and path from URL
             # URLs are like: https://[project].supabase.co/storage/v1/object/public/[bucket]/[path]
@@ -362,7 +338,7 @@ async def delete_logo(
                 
                 # Delete from storage
                 try:
-                    supabase_admin.storage.from_(bucket).remove([path])
+                    await storage_admin.from_(bucket).remove([path])
                 except Exception as delete_error:
                     logger.warning(f"Failed to delete logo from storage: {delete_error}")
                     # Continue even if storage deletion fails (file might not exist)
@@ -7,11 +7,17 @@ import logging
 import os
 import base64
 from datetime import datetime, timedelta, timezone
-import httpx
 
 from database import prisma
+from utils.asset_distinct import invalidate_distinct_asset_values
+from utils.response_cache import invalidate_response_cache, TAG_ASSETS
+from utils.asset_search import reconcile_asset_search_index
+from utils.dashboard_stats import refresh_dashboard_stats
+from utils.storage_usage import reconcile_storage_objects
+from utils.media_catalog import normalize_link_urls
 from utils.report_schedule import calculate_next_run_at, TIMEZONE_OFFSET_HOURS, LOCAL_TIMEZONE
-from utils.pdf_generator import generate_pdf_from_excel_data, is_pdf_available
+from utils.pdf_generator import is_pdf_available
+from utils.report_service import generate_report_file, is_report_type_supported
 
 # Default retention period for soft-deleted items (in days)
 DEFAULT_RETENTION_DAYS = 30
@@ -28,7 +34,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/cron", tags=["cron"])
 
-
 async def _generate_report_export(
     report_type: str,
     format: str,
@@ -36,111 +41,40 @@ async def _generate_report_export(
     include_list: bool,
     report_name: str
 ) -> Optional[Dict[str, Any]]:
-    """Generate report export by calling the export endpoint"""
+    """
+    Generate a report file in-process, with the same builders and writers as
+    the report export endpoints
+    """
     try:
-        # Determine if we need PDF conversion
-        needs_pdf_conversion = format == "pdf"
-        
-        # Export endpoints only support CSV and Excel, so always use Excel for PDF
-        export_format = "excel" if needs_pdf_conversion else format
-        
-        # Map report types to export endpoints
-        report_type_map = {
-            "assets": "assets",
-            "checkout": "checkout",
-            "location": "location",
-            "maintenance": "maintenance",
-            "audit": "audit",
-            "depreciation": "depreciation",
-            "lease": "lease",
-            "reservation": "reservation",
-            "transaction": "transaction"
-        }
-        
-        if report_type not in report_type_map:
+        if not is_report_type_supported(report_type):
             logger.warning(f"Unsupported report type: {report_type}")
             return None
         
-        endpoint_name = report_type_map[report_type]
-        
-        # Get base URL for FastAPI - use FASTAPI_BASE_URL environment variable
-        base_url = os.getenv("FASTAPI_BASE_URL", "http://localhost:8000")
+        if format == "pdf" and not is_pdf_available():
+            logger.warning("PDF library not available, falling back to Excel")
+            format = "excel"
         
-        export_url = f"{base_url}/api/reports/{endpoint_name}/export"
-        
-        logger.info(f"Generating report from: {export_url}")
-        
-        # Build query parameters
-        params: Dict[str, Any] = {"format": export_format}
-        
-        if filters:
-            for key, value in filters.items():
-                if value is not None and value != "":
-                    params[key] = str(value)
+        report_file = await generate_report_file(
+            report_type, format, filters, include_list, title=report_name
+        )
+        content = report_file.content
         
-        if include_list:
-            params["includeAssetList"] = "true"
+        safe_name = ''.join(c if c.isalnum() else '_' for c in report_name.lower())
         
-        logger.info(f"Report params: {params}")
+        # Use local timezone for date
+        now_utc = datetime.now(timezone.utc)
+        now_local = now_utc.astimezone(LOCAL_TIMEZONE)
+        date_str = now_local.strftime("%Y-%m-%d")
+        filename = f"{safe_name}_{date_str}.{report_file.extension}"
         
-        # Pass CRON_SECRET for internal authentication
-        cron_secret = os.getenv("CRON_SECRET")
-        headers = {}
-        if cron_secret:
-            headers["Authorization"] = f"Bearer {cron_secret}"
-            headers["X-Cron-Internal"] = "true"
+        content_length = len(content)
+        logger.info(f"Report generated successfully: {filename} ({content_length} bytes)")
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(export_url, params=params, headers=headers)
-            
-            if response.status_code != 200:
-                logger.error(f"Failed to generate report: {response.status_code} - {response.text[:500]}")
-                return None
-            
-            content = response.content
-            mime_type = response.headers.get("content-type", "application/octet-stream")
-            
-            # Convert to PDF if requested
-            if needs_pdf_conversion:
-                if is_pdf_available():
-                    logger.info(f"Converting Excel to PDF for report: {report_name}")
-                    pdf_content = generate_pdf_from_excel_data(
-                        excel_content=content,
-                        report_name=report_name,
-                        report_type=report_type
-                    )
-                    if pdf_content:
-                        content = pdf_content
-                        mime_type = "application/pdf"
-                        logger.info(f"PDF conversion successful: {len(content)} bytes")
-                    else:
-                        logger.warning(f"PDF conversion failed, falling back to Excel")
-                        # Fall back to Excel
-                        format = "excel"
-                else:
-                    logger.warning("PDF library not available, falling back to Excel")
-                    format = "excel"
-            
-            # Determine file extension based on actual format
-            extension_map = {"pdf": "pdf", "csv": "csv", "excel": "xlsx"}
-            extension = extension_map.get(format, "xlsx")
-            
-            safe_name = ''.join(c if c.isalnum() else '_' for c in report_name.lower())
-            
-            # Use local timezone for date
-            now_utc = datetime.now(timezone.utc)
-            now_local = now_utc.astimezone(LOCAL_TIMEZONE)
-            date_str = now_local.strftime("%Y-%m-%d")
-            filename = f"{safe_name}_{date_str}.{extension}"
-            
-            content_length = len(content)
-            logger.info(f"Report generated successfully: {filename} ({content_length} bytes)")
-            
-            return {
-                "filename": filename,
-                "content": content,
-                "mime_type": mime_type
-            }
+        return {
+            "filename": filename,
+            "content": content,
+            "mime_type": report_file.media_type
+        }
     
     except Exception as e:
         logger.error(f"Error generating report: {e}", exc_info=True)
@@ -415,6 +349,8 @@ async def cleanup_deleted_assets(
         result = await prisma.assets.delete_many(
             where={"id": {"in": asset_ids}}
         )
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS)
         
         logger.info(f"Successfully permanently deleted {result} expired assets")
         
@@ -523,3 +459,115 @@ async def cleanup_deleted_inventory(
         logger.error(f"Error cleaning up deleted inventory items: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+
+
+@router.get("/reindex-asset-search")
+async def reindex_asset_search(request: Request):
+    """
+    Cron job endpoint for reconciling the asset search index.
+    
+    Adds search documents for assets that have none and rebuilds documents that
+    are older than their asset, checkouts or assigned employees. Write paths keep
+    the index current; this catches anything they missed (bulk SQL, failed refreshes).
+    
+    Configure Railway/external cron to call this endpoint every 15 minutes.
+    Set CRON_SECRET environment variable for security.
+    
+    Example cron schedule: Every 15 minutes -> */15 * * * *
+    """
+    # Verify cron secret for security
+    auth_header = request.headers.get("authorization")
+    cron_secret = os.getenv("CRON_SECRET")
+    
+    if cron_secret and auth_header != f"Bearer {cron_secret}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    try:
+        reindexed = await reconcile_asset_search_index()
+        logger.info(f"Reindexed {reindexed} asset search document(s)")
+        
+        return {
+            "success": True,
+            "message": f"Reindexed {reindexed} asset search document(s)",
+            "reindexedCount": reindexed
+        }
+    
+    except Exception as e:
+        logger.error(f"Error reindexing asset search: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/refresh-dashboard-stats")
+async def refresh_dashboard_stats_job(request: Request):
+    """
+    Cron job endpoint for rebuilding the precomputed dashboard statistics.
+    
+    The dashboard reads its counts and sums from the dashboard_stats row; readers
+    rebuild it themselves once it is older than DASHBOARD_STATS_MAX_AGE_SECONDS,
+    this keeps it fresh so they rarely have to.
+    
+    Configure Railway/external cron to call this endpoint every minute.
+    Set CRON_SECRET environment variable for security.
+    
+    Example cron schedule: Every minute -> * * * * *
+    """
+    # Verify cron secret for security
+    auth_header = request.headers.get("authorization")
+    cron_secret = os.getenv("CRON_SECRET")
+    
+    if cron_secret and auth_header != f"Bearer {cron_secret}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    try:
+        stats = await refresh_dashboard_stats()
+        
+        return {
+            "success": True,
+            "message": "Dashboard statistics refreshed",
+            "refreshedAt": stats["refreshed_at"]
+        }
+    
+    except Exception as e:
+        logger.error(f"Error refreshing dashboard statistics: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/reconcile-storage")
+async def reconcile_storage(request: Request):
+    """
+    Cron job endpoint for reconciling storage usage accounting.
+    
+    Lists the storage buckets and corrects storage_objects (the per-object sizes
+    the storage quota checks sum). Uploads and deletes keep the table current;
+    this catches anything they missed (objects added or removed outside the app,
+    failed bookkeeping). Image and document rows stored under another URL form
+    are then pointed at their object's public URL for the media catalog.
+    
+    Configure Railway/external cron to call this endpoint every hour.
+    Set CRON_SECRET environment variable for security.
+    
+    Example cron schedule: Every hour -> 0 * * * *
+    """
+    # Verify cron secret for security
+    auth_header = request.headers.get("authorization")
+    cron_secret = os.getenv("CRON_SECRET")
+    
+    if cron_secret and auth_header != f"Bearer {cron_secret}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    try:
+        summary = await reconcile_storage_objects()
+        logger.info(f"Reconciled storage objects: {summary}")
+        normalized_links = await normalize_link_urls()
+        logger.info(f"Normalized media link URLs: {normalized_links}")
+        
+        return {
+            "success": True,
+            "message": f"Reconciled {len(summary)} storage scope(s)",
+            "scopes": summary,
+            "normalizedLinks": normalized_links
+        }
+    
+    except Exception as e:
+        logger.error(f"Error reconciling storage objects: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -2,15 +2,28 @@
 Dashboard API router
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from decimal import Decimal
 import logging
 import asyncio
 
-from models.dashboard import DashboardStatsResponse, AssetValueGroupedResponse, AssetValueGroupedItem
+from models.dashboard import DashboardStatsResponse, AssetValueGroupedResponse, AssetValueGroupedItem, ActivityItem, ActivityFeedResponse, ActivityPaginationInfo
 from auth import verify_auth
 from database import prisma
+from utils.activity_ledger import (
+    ACTIVITY_CHECKIN,
+    ACTIVITY_DISPOSE,
+    ACTIVITY_LEASE,
+    ACTIVITY_LEASE_RETURN,
+    ACTIVITY_MOVE,
+    ACTIVITY_RESERVE,
+    ACTIVITY_TYPES,
+    count_activity,
+    fetch_activity,
+)
+from utils.dashboard_stats import load_dashboard_stats
+from utils.pagination import decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +37,36 @@ def format_date_only(date_obj) -> str:
         return date_obj.isoformat().split('T')[0]
     return str(date_obj)
 
+def _ledger_datetime(value: Any) -> datetime:
+    """Raw query timestamps arrive as ISO strings"""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+
+def _ledger_asset(row: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "id": str(row["asset_id"]),
+        "assetTagId": str(row["asset_tag_id"]),
+        "description": str(row["asset_description"])
+    }
+
+def _ledger_employee(row: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    if not row["employee_user_id"]:
+        return None
+    return {
+        "id": str(row["employee_user_id"]),
+        "name": str(row["employee_name"]),
+        "email": str(row["employee_email"])
+    }
+
+async def _ledger_sources(model: Any, rows: List[Dict[str, Any]], include: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Source records of ledger rows by id, for the columns the ledger does not carry"""
+    source_ids = [row["source_id"] for row in rows]
+    if not source_ids:
+        return {}
+    records = await model.find_many(where={"id": {"in": source_ids}}, include=include)
+    return {str(record.id): record for record in records}
+
 @router.get("/asset-value-grouped", response_model=AssetValueGroupedResponse)
 async def get_asset_value_grouped(
     groupBy: str = Query(default="category", description="Group by: category, status, location, department, site"),
@@ -167,94 +210,36 @@ async def get_dashboard_stats(
     """Get dashboard statistics"""
     try:
         now = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        fiscal_year_start = datetime(now.year, 1, 1)
-        fiscal_year_end = datetime(now.year + 1, 1, 1)
         expiring_threshold = now + timedelta(days=90)
         thirty_days_ago = now - timedelta(days=30)
         
-        # Execute all queries in parallel (no transaction needed for read-only queries)
-        # Group queries that can run in parallel
+        # Counts and sums come from the precomputed dashboard_stats row and the
+        # "recent" feeds from the activity ledger (one (activity_type, activity_date)
+        # index range scan each); the rest is read live, in parallel
         (
-            assets_by_category_raw,
-            categories,
-            total_active_assets,
-            assets_for_sum,
-            checked_out_count,
-            available_count,
-            purchases_in_fiscal_year,
-            total_active_checkouts,
+            stats,
             active_checkouts,
-            total_checkins,
             recent_checkins,
-            total_assets_under_repair,
             assets_under_repair,
             leases_expiring,
             maintenance_due,
-            total_moves,
             recent_moves,
-            total_reserves,
             recent_reserves,
-            total_leases,
             recent_leases,
-            total_returns,
             recent_returns,
-            total_disposes,
             recent_disposes,
-            total_new_assets,
             recent_assets,
         ) = await asyncio.gather(
-            # Asset value by category
-            prisma.assets.group_by(
-                by=["categoryId"],
-                where={"isDeleted": False, "cost": {"not": None}},
-                sum={"cost": True}
-            ),
-            # Categories
-            prisma.category.find_many(),
-            # Summary statistics
-            prisma.assets.count(where={"isDeleted": False}),
-            # Assets for sum
-            prisma.assets.find_many(
-                where={"isDeleted": False, "cost": {"not": None}}
-            ),
-            # Status counts
-            prisma.assets.count(
-                where={"isDeleted": False, "status": {"equals": "Checked out", "mode": "insensitive"}}
-            ),
-            prisma.assets.count(
-                where={"isDeleted": False, "status": {"equals": "Available", "mode": "insensitive"}}
-            ),
-            # Fiscal year purchases
-            prisma.assets.count(
-                where={
-                    "isDeleted": False,
-                    "OR": [
-                        {"purchaseDate": {"gte": fiscal_year_start, "lt": fiscal_year_end}},
-                        {"dateAcquired": {"gte": fiscal_year_start, "lt": fiscal_year_end}}
-                    ]
-                }
-            ),
+            load_dashboard_stats(),
             # Checkout data
-            prisma.assetscheckout.count(
-                where={"checkins": {"none": {}}}
-            ),
             prisma.assetscheckout.find_many(
                 where={"checkins": {"none": {}}},
                 include={"asset": True, "employeeUser": True},
                 order={"checkoutDate": "desc"},
                 take=10
             ),
-            # Checkin data
-            prisma.assetscheckin.count(),
-            prisma.assetscheckin.find_many(
-                include={"asset": True, "checkout": {"include": {"employeeUser": True}}},
-                order={"checkinDate": "desc"},
-                take=10
-            ),
+            fetch_activity(take=10, activity_type=ACTIVITY_CHECKIN),
             # Maintenance data
-            prisma.assetsmaintenance.count(
-                where={"status": {"in": ["Scheduled", "In progress"]}}
-            ),
             prisma.assetsmaintenance.find_many(
                 where={"status": {"in": ["Scheduled", "In progress"]}},
                 include={"asset": True},
@@ -278,45 +263,12 @@ async def get_dashboard_stats(
                 include={"asset": True},
                 order={"dueDate": "asc"}
             ),
-            # Move data
-            prisma.assetsmove.count(),
-            prisma.assetsmove.find_many(
-                include={"asset": True, "employeeUser": True},
-                order={"createdAt": "desc"},
-                take=10
-            ),
-            # Reserve data
-            prisma.assetsreserve.count(),
-            prisma.assetsreserve.find_many(
-                include={"asset": True, "employeeUser": True},
-                order={"createdAt": "desc"},
-                take=10
-            ),
-            # Lease data
-            prisma.assetslease.count(),
-            prisma.assetslease.find_many(
-                include={"asset": True},
-                order={"createdAt": "desc"},
-                take=10
-            ),
-            # Return data
-            prisma.assetsleasereturn.count(),
-            prisma.assetsleasereturn.find_many(
-                include={"asset": True, "lease": True},
-                order={"createdAt": "desc"},
-                take=10
-            ),
-            # Dispose data
-            prisma.assetsdispose.count(),
-            prisma.assetsdispose.find_many(
-                include={"asset": True},
-                order={"createdAt": "desc"},
-                take=10
-            ),
+            fetch_activity(take=10, activity_type=ACTIVITY_MOVE),
+            fetch_activity(take=10, activity_type=ACTIVITY_RESERVE),
+            fetch_activity(take=10, activity_type=ACTIVITY_LEASE),
+            fetch_activity(take=10, activity_type=ACTIVITY_LEASE_RETURN),
+            fetch_activity(take=10, activity_type=ACTIVITY_DISPOSE),
             # New assets
-            prisma.assets.count(
-                where={"isDeleted": False, "createdAt": {"gte": thirty_days_ago}}
-            ),
             prisma.assets.find_many(
                 where={"isDeleted": False, "createdAt": {"gte": thirty_days_ago}},
                 order={"createdAt": "desc"},
@@ -324,27 +276,21 @@ async def get_dashboard_stats(
             ),
         )
         
-        # Calculate total value from fetched assets
-        total_value = sum(
-            float(asset.cost) if asset.cost is not None else 0.0
-            for asset in assets_for_sum
+        # Type-specific columns of the feed rows, by primary key. Ledger rows whose
+        # record was deleted since (e.g. a cancelled reservation) are left out.
+        moves, reserves, leases, returns, disposes = await asyncio.gather(
+            _ledger_sources(prisma.assetsmove, recent_moves),
+            _ledger_sources(prisma.assetsreserve, recent_reserves),
+            _ledger_sources(prisma.assetslease, recent_leases),
+            _ledger_sources(prisma.assetsleasereturn, recent_returns, include={"lease": True}),
+            _ledger_sources(prisma.assetsdispose, recent_disposes),
         )
         
-        # Process asset value by category
-        category_map = {cat.id: cat.name for cat in categories}
+        # Already sorted by value descending
         asset_value_by_category = [
-            AssetValueGroupedItem(
-                name=category_map.get(row['categoryId'], 'Uncategorized') if row.get('categoryId') else 'Uncategorized',
-                value=float(row['_sum']['cost']) if row.get('_sum') and row['_sum'].get('cost') else 0.0
-            )
-            for row in assets_by_category_raw
+            AssetValueGroupedItem(name=item["name"], value=item["value"])
+            for item in stats["value_by_category"]
         ]
-        # Sort by value descending
-        asset_value_by_category.sort(key=lambda x: x.value, reverse=True)
-        
-        # Calculate derived values
-        checked_out_and_available = checked_out_count + available_count
-        # total_value is already calculated above
         
         # Format responses
         return DashboardStatsResponse(
@@ -369,22 +315,14 @@ async def get_dashboard_stats(
             ],
             recentCheckins=[
                 {
-                    "id": str(checkin.id),
-                    "checkinDate": checkin.checkinDate.isoformat() if hasattr(checkin.checkinDate, 'isoformat') else str(checkin.checkinDate),
-                    "asset": {
-                        "id": str(checkin.asset.id),
-                        "assetTagId": str(checkin.asset.assetTagId),
-                        "description": str(checkin.asset.description)
-                    } if checkin.asset else None,
+                    "id": str(row["source_id"]),
+                    "checkinDate": _ledger_datetime(row["activity_date"]).isoformat(),
+                    "asset": _ledger_asset(row),
                     "checkout": {
-                        "employeeUser": {
-                            "id": str(checkin.checkout.employeeUser.id),
-                            "name": str(checkin.checkout.employeeUser.name),
-                            "email": str(checkin.checkout.employeeUser.email)
-                        } if checkin.checkout.employeeUser else {"id": "", "name": "", "email": ""}
-                    } if checkin.checkout else None
+                        "employeeUser": _ledger_employee(row) or {"id": "", "name": "", "email": ""}
+                    }
                 }
-                for checkin in recent_checkins
+                for row in recent_checkins
             ],
             assetsUnderRepair=[
                 {
@@ -402,82 +340,59 @@ async def get_dashboard_stats(
             ],
             recentMoves=[
                 {
-                    "id": str(move.id),
-                    "moveDate": move.moveDate.isoformat() if hasattr(move.moveDate, 'isoformat') else str(move.moveDate),
-                    "newLocation": move.moveType if hasattr(move, 'moveType') else None,
-                    "asset": {
-                        "id": str(move.asset.id),
-                        "assetTagId": str(move.asset.assetTagId),
-                        "description": str(move.asset.description)
-                    } if move.asset else None,
-                    "employeeUser": {
-                        "id": str(move.employeeUser.id),
-                        "name": str(move.employeeUser.name),
-                        "email": str(move.employeeUser.email)
-                    } if move.employeeUser else None
+                    "id": str(row["source_id"]),
+                    "moveDate": _ledger_datetime(row["activity_date"]).isoformat(),
+                    "newLocation": moves[row["source_id"]].moveType,
+                    "asset": _ledger_asset(row),
+                    "employeeUser": _ledger_employee(row)
                 }
-                for move in recent_moves
+                for row in recent_moves
+                if row["source_id"] in moves
             ],
             recentReserves=[
                 {
-                    "id": str(reserve.id),
-                    "reservationDate": reserve.reservationDate.isoformat() if hasattr(reserve.reservationDate, 'isoformat') else str(reserve.reservationDate),
-                    "reservationType": reserve.reservationType,
-                    "asset": {
-                        "id": str(reserve.asset.id),
-                        "assetTagId": str(reserve.asset.assetTagId),
-                        "description": str(reserve.asset.description)
-                    } if reserve.asset else None,
-                    "employeeUser": {
-                        "id": str(reserve.employeeUser.id),
-                        "name": str(reserve.employeeUser.name),
-                        "email": str(reserve.employeeUser.email)
-                    } if reserve.employeeUser else None
+                    "id": str(row["source_id"]),
+                    "reservationDate": _ledger_datetime(row["activity_date"]).isoformat(),
+                    "reservationType": reserves[row["source_id"]].reservationType,
+                    "asset": _ledger_asset(row),
+                    "employeeUser": _ledger_employee(row)
                 }
-                for reserve in recent_reserves
+                for row in recent_reserves
+                if row["source_id"] in reserves
             ],
             recentLeases=[
                 {
-                    "id": str(lease.id),
-                    "leaseStartDate": lease.leaseStartDate.isoformat() if hasattr(lease.leaseStartDate, 'isoformat') else str(lease.leaseStartDate),
-                    "leaseEndDate": format_date_only(lease.leaseEndDate),
-                    "lessee": lease.lessee,
-                    "asset": {
-                        "id": str(lease.asset.id),
-                        "assetTagId": str(lease.asset.assetTagId),
-                        "description": str(lease.asset.description)
-                    } if lease.asset else None
+                    "id": str(row["source_id"]),
+                    "leaseStartDate": _ledger_datetime(row["activity_date"]).isoformat(),
+                    "leaseEndDate": format_date_only(leases[row["source_id"]].leaseEndDate),
+                    "lessee": leases[row["source_id"]].lessee,
+                    "asset": _ledger_asset(row)
                 }
-                for lease in recent_leases
+                for row in recent_leases
+                if row["source_id"] in leases
             ],
             recentReturns=[
                 {
-                    "id": str(return_item.id),
-                    "returnDate": return_item.returnDate.isoformat() if hasattr(return_item.returnDate, 'isoformat') else str(return_item.returnDate),
-                    "asset": {
-                        "id": str(return_item.asset.id),
-                        "assetTagId": str(return_item.asset.assetTagId),
-                        "description": str(return_item.asset.description)
-                    } if return_item.asset else None,
+                    "id": str(row["source_id"]),
+                    "returnDate": _ledger_datetime(row["activity_date"]).isoformat(),
+                    "asset": _ledger_asset(row),
                     "lease": {
-                        "id": str(return_item.lease.id),
-                        "lessee": return_item.lease.lessee
-                    } if return_item.lease else None
+                        "id": str(returns[row["source_id"]].lease.id),
+                        "lessee": returns[row["source_id"]].lease.lessee
+                    } if returns[row["source_id"]].lease else None
                 }
-                for return_item in recent_returns
+                for row in recent_returns
+                if row["source_id"] in returns
             ],
             recentDisposes=[
                 {
-                    "id": str(dispose.id),
-                    "disposeDate": dispose.disposeDate.isoformat() if hasattr(dispose.disposeDate, 'isoformat') else str(dispose.disposeDate),
-                    "disposalMethod": dispose.disposalMethod,
-                    "asset": {
-                        "id": str(dispose.asset.id),
-                        "assetTagId": str(dispose.asset.assetTagId),
-                        "description": str(dispose.asset.description)
-                    } if dispose.asset else None
+                    "id": str(row["source_id"]),
+                    "disposeDate": _ledger_datetime(row["activity_date"]).isoformat(),
+                    "disposalMethod": disposes[row["source_id"]].disposalMethod,
+                    "asset": _ledger_asset(row)
                 }
-                for dispose in recent_disposes
+                for row in recent_disposes
+                if row["source_id"] in disposes
             ],
             recentAssets=[
                 {
@@ -493,23 +408,23 @@ async def get_dashboard_stats(
                 for asset in recent_assets
             ],
             feedCounts={
-                "totalActiveCheckouts": total_active_checkouts,
-                "totalCheckins": total_checkins,
-                "totalAssetsUnderRepair": total_assets_under_repair,
-                "totalMoves": total_moves,
-                "totalReserves": total_reserves,
-                "totalLeases": total_leases,
-                "totalReturns": total_returns,
-                "totalDisposes": total_disposes,
-                "totalNewAssets": total_new_assets
+                "totalActiveCheckouts": stats["total_active_checkouts"],
+                "totalCheckins": stats["total_checkins"],
+                "totalAssetsUnderRepair": stats["total_assets_under_repair"],
+                "totalMoves": stats["total_moves"],
+                "totalReserves": stats["total_reserves"],
+                "totalLeases": stats["total_leases"],
+                "totalReturns": stats["total_returns"],
+                "totalDisposes": stats["total_disposes"],
+                "totalNewAssets": stats["total_new_assets"]
             },
             summary={
-                "totalActiveAssets": total_active_assets,
-                "totalValue": total_value,
-                "purchasesInFiscalYear": purchases_in_fiscal_year,
-                "checkedOutCount": checked_out_count,
-                "availableCount": available_count,
-                "checkedOutAndAvailable": checked_out_and_available
+                "totalActiveAssets": stats["total_active_assets"],
+                "totalValue": stats["total_value"],
+                "purchasesInFiscalYear": stats["purchases_in_fiscal_year"],
+                "checkedOutCount": stats["checked_out_count"],
+                "availableCount": stats["available_count"],
+                "checkedOutAndAvailable": stats["checked_out_count"] + stats["available_count"]
             },
             calendar={
                 "leasesExpiring": [
@@ -545,3 +460,81 @@ async def get_dashboard_stats(
         logger.error(f"Error fetching dashboard statistics: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch dashboard statistics")
 
+@router.get("/activity", response_model=ActivityFeedResponse)
+async def get_activity_feed(
+    activityType: Optional[str] = Query(None, description="Filter by activity type (checkout, checkin, move, reserve, lease, lease_return, dispose, maintenance, audit)"),
+    assetId: Optional[str] = Query(None, description="Filter by asset ID"),
+    actor: Optional[str] = Query(None, description="Filter by the user who performed the action"),
+    startDate: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    endDate: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="pagination.nextCursor of the previous page; replaces page"),
+    auth: dict = Depends(verify_auth)
+):
+    """Asset activity across all transaction types, newest first, read from the activity ledger"""
+    try:
+        if activityType and activityType not in ACTIVITY_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid activityType. Must be one of: {', '.join(ACTIVITY_TYPES)}"
+            )
+
+        filters = {
+            "activity_type": activityType,
+            "asset_id": assetId,
+            "actor": actor,
+            "start_date": datetime.fromisoformat(startDate.replace('Z', '+00:00')) if startDate else None,
+            "end_date": datetime.fromisoformat(endDate.replace('Z', '+00:00')) if endDate else None,
+        }
+        after = decode_cursor(cursor, "activityDate") if cursor else None
+
+        # Fetch one extra row to know whether another page follows
+        total, rows = await asyncio.gather(
+            count_activity(**filters),
+            fetch_activity(take=pageSize + 1, skip=(page - 1) * pageSize, after=after, **filters),
+        )
+
+        next_cursor = None
+        if len(rows) > pageSize:
+            rows = rows[:pageSize]
+            last = rows[-1]
+            next_cursor = encode_cursor("activityDate", _ledger_datetime(last["activity_date"]), last["id"])
+
+        activities = [
+            ActivityItem(
+                id=row["id"],
+                activityType=row["activity_type"],
+                sourceId=row["source_id"],
+                activityDate=_ledger_datetime(row["activity_date"]).isoformat(),
+                actor=row["actor"],
+                details=row["details"],
+                assetId=row["asset_id"],
+                assetTagId=row["asset_tag_id"],
+                assetDescription=row["asset_description"],
+                employeeUserId=row["employee_user_id"],
+                employeeName=row["employee_name"],
+            )
+            for row in rows
+        ]
+
+        total_pages = (total + pageSize - 1) // pageSize if total > 0 else 0
+
+        return ActivityFeedResponse(
+            activities=activities,
+            pagination=ActivityPaginationInfo(
+                total=total,
+                page=page,
+                pageSize=pageSize,
+                totalPages=total_pages,
+                hasNextPage=next_cursor is not None,
+                hasPreviousPage=page > 1 or cursor is not None,
+                nextCursor=next_cursor,
+            )
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching activity feed: {type(e).__name__}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to fetch activity feed")
@@ -12,7 +12,9 @@ from models.departments import (
     DepartmentResponse
 )
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.response_cache import invalidate_response_cache, TAG_ASSETS
 from typing import List
 from pydantic import BaseModel
 
@@ -20,22 +22,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/departments", tags=["departments"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 class BulkDeleteRequest(BaseModel):
     ids: List[str]
@@ -94,7 +80,8 @@ async def get_departments(
 @router.post("", response_model=DepartmentResponse, status_code=201)
 async def create_department(
     department_data: DepartmentCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new department"""
     try:
@@ -103,7 +90,7 @@ async def create_department(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to create departments
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -154,7 +141,8 @@ async def create_department(
 async def update_department(
     department_id: str,
     department_data: DepartmentUpdate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Update an existing department"""
     try:
@@ -163,7 +151,7 @@ async def update_department(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to update departments
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -205,6 +193,7 @@ async def update_department(
                 "description": department_data.description.strip() if department_data.description else None
             }
         )
+        await invalidate_response_cache(TAG_ASSETS)
         
         department = Department(
             id=str(updated_department.id),
@@ -225,7 +214,8 @@ async def update_department(
 @router.delete("/bulk-delete")
 async def bulk_delete_departments(
     request: BulkDeleteRequest,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Bulk delete departments"""
     try:
@@ -234,7 +224,7 @@ async def bulk_delete_departments(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to delete departments
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -252,17 +242,20 @@ async def bulk_delete_departments(
         departments_with_assets: List[str] = []
         departments_to_delete: List[str] = []
         
-        # Check each department for associated assets
-        for department in departments:
-            assets_count = await prisma.assets.count(
+        # Names still used by an active asset, with one query for all departments
+        used_names = {
+            asset.department
+            for asset in await prisma.assets.find_many(
                 where={
-                    "department": department.name,
+                    "department": {"in": [department.name for department in departments]},
                     "isDeleted": False
                 },
-                take=1
+                distinct=["department"]
             )
-            
-            if assets_count > 0:
+        }
+        
+        for department in departments:
+            if department.name in used_names:
                 departments_with_assets.append(department.name)
             else:
                 departments_to_delete.append(department.id)
@@ -278,6 +271,7 @@ async def bulk_delete_departments(
         result = await prisma.assetsdepartment.delete_many(
             where={"id": {"in": departments_to_delete}}
         )
+        await invalidate_response_cache(TAG_ASSETS)
         
         return {
             "success": True,
@@ -300,7 +294,8 @@ async def bulk_delete_departments(
 @router.delete("/{department_id}")
 async def delete_department(
     department_id: str,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete a department"""
     try:
@@ -309,7 +304,7 @@ async def delete_department(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to delete departments
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -343,6 +338,7 @@ async def delete_department(
         await prisma.assetsdepartment.delete(
             where={"id": department_id}
         )
+        await invalidate_response_cache(TAG_ASSETS)
         
         return {"success": True}
     
@@ -9,28 +9,18 @@ import logging
 
 from models.dispose import DisposeCreate, DisposeResponse, DisposeStatsResponse, DisposeAssetUpdate
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.asset_distinct import invalidate_distinct_asset_values
+from utils.asset_search import refresh_asset_search_index
+from utils.response_cache import cached_response, invalidate_response_cache, TAG_ASSETS, TAG_CHECKIN, TAG_CHECKOUT, TAG_DISPOSE
+from utils.activity_ledger import ACTIVITY_CHECKIN, ACTIVITY_DISPOSE, activity, actor_name, record_activity
+from utils.bulk_transactions import create_rows, fetch_assets_by_id, fetch_rows_in_order, new_id, unique_ids, update_assets
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/assets/dispose", tags=["dispose"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 def parse_date(date_str: str) -> datetime:
     """Parse date string to datetime"""
@@ -45,7 +35,8 @@ def parse_date(date_str: str) -> datetime:
 @router.post("", response_model=DisposeResponse, status_code=status.HTTP_201_CREATED)
 async def create_dispose(
     dispose_data: DisposeCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create disposal records for assets"""
     try:
@@ -54,7 +45,7 @@ async def create_dispose(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canDispose")
+        has_permission = permissions.has("canDispose")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -84,30 +75,35 @@ async def create_dispose(
         # Parse date
         dispose_date = parse_date(dispose_data.disposeDate)
 
-        # Process disposals in a transaction
-        disposal_records = []
+        asset_ids = unique_ids(dispose_data.assetIds)
+        activity_entries = []
+        actor = actor_name(auth)
         
+        # Set-based: the batch is read and written with a fixed number of queries
         async with prisma.tx() as transaction:
-            for asset_id in dispose_data.assetIds:
-                # Check if asset exists and is not already disposed
-                asset = await transaction.assets.find_unique(
-                    where={"id": asset_id},
-                    include={
-                        "checkouts": {
-                            "where": {
-                                "checkins": {
-                                    "none": {}
-                                }
-                            },
-                            "include": {
-                                "employeeUser": True
+            # Check the assets exist and are not already disposed
+            assets_by_id = await fetch_assets_by_id(
+                transaction,
+                asset_ids,
+                include={
+                    "checkouts": {
+                        "where": {
+                            "checkins": {
+                                "none": {}
                             }
+                        },
+                        "include": {
+                            "employeeUser": True
                         }
                     }
-                )
+                },
+                not_found=lambda asset_id: f"Asset {asset_id} not found"
+            )
 
-                if not asset:
-                    raise HTTPException(status_code=404, detail=f"Asset {asset_id} not found")
+            checkin_rows = []
+            disposal_rows = []
+            for asset_id in asset_ids:
+                asset = assets_by_id[asset_id]
 
                 if asset.status == 'Disposed':
                     raise HTTPException(status_code=400, detail=f"Asset {asset_id} is already disposed")
@@ -119,44 +115,59 @@ async def create_dispose(
                 # End any active checkouts by creating checkin records
                 for active_checkout in asset.checkouts:
                     if active_checkout.employeeUserId:
-                        # Create checkin record to close the checkout
-                        await transaction.assetscheckin.create(
-                            data={
-                                "assetId": asset_id,
-                                "checkoutId": active_checkout.id,
-                                "employeeUserId": active_checkout.employeeUserId,
-                                "checkinDate": dispose_date,
-                                "condition": None,
-                                "notes": f"Asset disposed ({dispose_data.disposeReason})"
-                            }
-                        )
+                        checkin_row = {
+                            "id": new_id(),
+                            "assetId": asset_id,
+                            "checkoutId": active_checkout.id,
+                            "employeeUserId": active_checkout.employeeUserId,
+                            "checkinDate": dispose_date,
+                            "condition": None,
+                            "notes": f"Asset disposed ({dispose_data.disposeReason})"
+                        }
+                        checkin_rows.append(checkin_row)
+                        activity_entries.append(activity(
+                            ACTIVITY_CHECKIN,
+                            checkin_row["id"],
+                            asset_id,
+                            dispose_date,
+                            actor=actor,
+                            employee_user_id=active_checkout.employeeUserId,
+                            details=f"Checked in from {active_checkout.employeeUser.name if active_checkout.employeeUser else 'Unknown'}"
+                        ))
 
-                # Create disposal record
-                disposal = await transaction.assetsdispose.create(
-                    data={
-                        "assetId": asset_id,
-                        "disposeDate": dispose_date,
-                        "disposalMethod": dispose_data.disposeReason,
-                        "disposeReason": dispose_data.disposeReasonText,
-                        "disposeValue": Decimal(str(dispose_value_for_asset)) if dispose_data.disposeReason == 'Sold' and dispose_value_for_asset else None,
-                        "notes": asset_update.notes if asset_update and asset_update.notes else None
-                    },
-                    include={
-                        "asset": True
-                    }
-                )
+                disposal_rows.append({
+                    "assetId": asset_id,
+                    "disposeDate": dispose_date,
+                    "disposalMethod": dispose_data.disposeReason,
+                    "disposeReason": dispose_data.disposeReasonText,
+                    "disposeValue": Decimal(str(dispose_value_for_asset)) if dispose_data.disposeReason == 'Sold' and dispose_value_for_asset else None,
+                    "notes": asset_update.notes if asset_update and asset_update.notes else None
+                })
 
-                # Update asset status to the disposal method
-                await transaction.assets.update(
-                    where={"id": asset_id},
-                    data={
-                        "status": dispose_data.disposeReason,
-                        "location": None,
-                        "department": None,
-                        "site": None
-                    }
-                )
+            await create_rows(transaction.assetscheckin, checkin_rows)
+            disposal_ids = await create_rows(transaction.assetsdispose, disposal_rows)
+
+            # Update asset status to the disposal method
+            await update_assets(transaction, {
+                asset_id: {
+                    "status": dispose_data.disposeReason,
+                    "location": None,
+                    "department": None,
+                    "site": None
+                }
+                for asset_id in asset_ids
+            })
 
+            disposals = await fetch_rows_in_order(
+                transaction.assetsdispose,
+                disposal_ids,
+                include={
+                    "asset": True
+                }
+            )
+
+            disposal_records = []
+            for disposal in disposals:
                 # Format response
                 disposal_dict = {
                     "id": str(disposal.id),
@@ -175,6 +186,22 @@ async def create_dispose(
                 }
                 disposal_records.append(disposal_dict)
 
+                activity_entries.append(activity(
+                    ACTIVITY_DISPOSE,
+                    disposal.id,
+                    disposal.assetId,
+                    dispose_date,
+                    actor=actor,
+                    details=f"{disposal.disposalMethod}: {disposal.disposeReason}" if disposal.disposeReason else disposal.disposalMethod
+                ))
+
+            # Ledger rows commit with the disposals they describe
+            await record_activity(transaction, *activity_entries)
+
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS, TAG_DISPOSE, TAG_CHECKIN, TAG_CHECKOUT)
+        await refresh_asset_search_index(asset_ids)
+
         return DisposeResponse(
             success=True,
             disposals=disposal_records,
@@ -188,6 +215,7 @@ async def create_dispose(
         raise HTTPException(status_code=500, detail=f"Failed to dispose assets: {str(e)}")
 
 @router.get("/stats", response_model=DisposeStatsResponse)
+@cached_response("dispose.stats", tags=[TAG_DISPOSE], ttl=30)
 async def get_dispose_stats(
     auth: dict = Depends(verify_auth)
 ):
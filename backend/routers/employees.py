@@ -16,30 +16,18 @@ from models.employees import (
     AssetInfoForCheckout
 )
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.asset_search import refresh_asset_search_index_for_employee
+from utils.response_cache import cached_response, invalidate_response_cache, TAG_ASSETS, TAG_EMPLOYEES, TAG_FORMS
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/employees", tags=["employees"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 @router.get("", response_model=EmployeesResponse)
+@cached_response("employees.list", tags=[TAG_EMPLOYEES, TAG_ASSETS], ttl=30)
 async def get_employees(
     search: Optional[str] = Query(None),
     searchType: Optional[str] = Query("unified", description="Search type: unified, name, email, department"),
@@ -271,7 +259,8 @@ async def get_employee(
 @router.post("", response_model=EmployeeResponse, status_code=201)
 async def create_employee(
     employee_data: EmployeeCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new employee"""
     try:
@@ -280,7 +269,7 @@ async def create_employee(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageEmployees to create employees
-        has_permission = await check_permission(user_id, "canManageEmployees")
+        has_permission = permissions.has("canManageEmployees")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -319,6 +308,7 @@ async def create_employee(
             createdAt=new_employee.createdAt,
             updatedAt=new_employee.updatedAt
         )
+        await invalidate_response_cache(TAG_EMPLOYEES, TAG_ASSETS, TAG_FORMS)
         
         return EmployeeResponse(employee=employee)
     
@@ -332,7 +322,8 @@ async def create_employee(
 async def update_employee(
     employee_id: str,
     employee_data: EmployeeUpdate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Update an existing employee"""
     try:
@@ -341,7 +332,7 @@ async def update_employee(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageEmployees to update employees
-        has_permission = await check_permission(user_id, "canManageEmployees")
+        has_permission = permissions.has("canManageEmployees")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -384,6 +375,9 @@ async def update_employee(
             }
         )
         
+        if updated_employee.name != existing.name or updated_employee.email != existing.email:
+            await refresh_asset_search_index_for_employee(employee_id)
+        
         employee = Employee(
             id=str(updated_employee.id),
             name=str(updated_employee.name),
@@ -392,6 +386,7 @@ async def update_employee(
             createdAt=updated_employee.createdAt,
             updatedAt=updated_employee.updatedAt
         )
+        await invalidate_response_cache(TAG_EMPLOYEES, TAG_ASSETS, TAG_FORMS)
         
         return EmployeeResponse(employee=employee)
     
@@ -404,7 +399,8 @@ async def update_employee(
 @router.delete("/{employee_id}")
 async def delete_employee(
     employee_id: str,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete an employee"""
     try:
@@ -413,7 +409,7 @@ async def delete_employee(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageEmployees to delete employees
-        has_permission = await check_permission(user_id, "canManageEmployees")
+        has_permission = permissions.has("canManageEmployees")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -447,6 +443,7 @@ async def delete_employee(
         await prisma.employeeuser.delete(
             where={"id": employee_id}
         )
+        await invalidate_response_cache(TAG_EMPLOYEES, TAG_ASSETS, TAG_FORMS)
         
         return {"success": True}
     
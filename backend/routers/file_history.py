@@ -9,7 +9,6 @@ import logging
 import os
 import json
 import asyncio
-from supabase import create_client, Client
 
 from models.file_history import (
     FileHistoryCreate,
@@ -18,38 +17,33 @@ from models.file_history import (
     FileUploadResponse
 )
 from auth import verify_auth, SUPABASE_URL
+from permissions import get_asset_user
 from database import prisma
+from utils.storage import get_storage_admin
+from http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/file-history", tags=["file-history"])
 
-def get_supabase_admin_client() -> Client:
-    """Get Supabase admin client for storage operations"""
+async def get_auth_user_email(user_id: str) -> Optional[str]:
+    """Email of a Supabase Auth user (admin API, through the shared async HTTP client)"""
     supabase_service_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    if not supabase_service_key:
-        raise HTTPException(
-            status_code=500,
-            detail="Supabase service role key not configured"
-        )
-    return create_client(SUPABASE_URL, supabase_service_key)
+    if not SUPABASE_URL or not supabase_service_key:
+        return None
+    
+    response = await get_http_client().get(
+        f"{SUPABASE_URL}/auth/v1/admin/users/{user_id}",
+        headers={
+            "Authorization": f"Bearer {supabase_service_key}",
+            "apikey": supabase_service_key,
+        },
+        timeout=10.0
+    )
+    if response.status_code != 200:
+        return None
+    return response.json().get("email")
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission"""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 @router.get("", response_model=FileHistoryListResponse)
 async def get_file_history(
@@ -65,9 +59,7 @@ async def get_file_history(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Fetch user permissions from database
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
+        asset_user = await get_asset_user(user_id)
         
         if not asset_user or not asset_user.isActive:
             raise HTTPException(status_code=403, detail="User not found or inactive")
@@ -116,19 +108,15 @@ async def get_file_history(
         unique_user_ids = list(set([h.userId for h in file_history_data]))
         user_email_map: Dict[str, str] = {}
         
-        try:
-            supabase_admin = get_supabase_admin_client()
-            for uid in unique_user_ids:
-                try:
-                    auth_user = supabase_admin.auth.admin.get_user_by_id(uid)
-                    if auth_user and hasattr(auth_user, 'user') and auth_user.user:
-                        email = getattr(auth_user.user, 'email', None)
-                        if email:
-                            user_email_map[uid] = email
-                except Exception as e:
-                    logger.error(f"Failed to fetch user email for {uid}: {e}")
-        except Exception as e:
-            logger.error(f"Failed to create Supabase admin client: {e}")
+        emails = await asyncio.gather(
+            *[get_auth_user_email(uid) for uid in unique_user_ids],
+            return_exceptions=True
+        )
+        for uid, email in zip(unique_user_ids, emails):
+            if isinstance(email, Exception):
+                logger.error(f"Failed to fetch user email for {uid}: {email}")
+            elif email:
+                user_email_map[uid] = email
         
         # Format response
         file_history_list = []
@@ -257,7 +245,7 @@ async def upload_file(
         
         # Create Supabase admin client
         try:
-            supabase_admin = get_supabase_admin_client()
+            storage_admin = get_storage_admin()
         except Exception as client_error:
             logger.error(f"Failed to create Supabase admin client: {client_error}")
             raise HTTPException(status_code=503, detail="Storage service unavailable")
@@ -273,7 +261,7 @@ async def upload_file(
         
         # Upload to Supabase storage bucket 'file-history'
         try:
-            upload_response = supabase_admin.storage.from_("file-history").upload(
+            upload_response = await storage_admin.from_("file-history").upload(
                 file_path,
                 file_content,
                 file_options={
@@ -297,7 +285,7 @@ async def upload_file(
             )
         
         # Get public URL
-        url_data = supabase_admin.storage.from_("file-history").get_public_url(file_path)
+        url_data = await storage_admin.from_("file-history").get_public_url(file_path)
         public_url = url_data.get("publicUrl") if isinstance(url_data, dict) else (str(url_data) if url_data else None)
         
         return FileUploadResponse(
@@ -339,10 +327,7 @@ async def get_file_history_by_id(
         # Fetch user email
         user_email = None
         try:
-            supabase_admin = get_supabase_admin_client()
-            auth_user = supabase_admin.auth.admin.get_user_by_id(file_history.userId)
-            if auth_user and hasattr(auth_user, 'user') and auth_user.user:
-                user_email = getattr(auth_user.user, 'email', None)
+            user_email = await get_auth_user_email(file_history.userId)
         except Exception:
             pass
         
@@ -386,9 +371,7 @@ async def delete_file_history(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Fetch user permissions from database
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
+        asset_user = await get_asset_user(user_id)
         
         if not asset_user or not asset_user.isActive:
             raise HTTPException(status_code=403, detail="User not found or inactive")
@@ -415,8 +398,8 @@ async def delete_file_history(
         # Delete file from Supabase storage if it exists
         if file_history.filePath:
             try:
-                supabase_admin = get_supabase_admin_client()
-                delete_response = supabase_admin.storage.from_("file-history").remove([file_history.filePath])
+                storage_admin = get_storage_admin()
+                delete_response = await storage_admin.from_("file-history").remove([file_history.filePath])
                 if delete_response and isinstance(delete_response, dict) and delete_response.get("error"):
                     logger.error(f"Failed to delete file from storage: {delete_response.get('error')}")
             except Exception as storage_error:
@@ -454,9 +437,7 @@ async def download_file(
             raise HTTPException(status_code=404, detail="File history not found")
         
         # Fetch user permissions from database
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
+        asset_user = await get_asset_user(user_id)
         
         if not asset_user or not asset_user.isActive:
             raise HTTPException(status_code=403, detail="User not found or inactive")
@@ -483,14 +464,14 @@ async def download_file(
         
         # Create Supabase admin client
         try:
-            supabase_admin = get_supabase_admin_client()
+            storage_admin = get_storage_admin()
         except Exception as client_error:
             logger.error(f"Failed to create Supabase admin client: {client_error}")
             raise HTTPException(status_code=503, detail="Storage service unavailable")
         
         # Download file from storage
         try:
-            download_response = supabase_admin.storage.from_("file-history").download(file_history.filePath)
+            download_response = await storage_admin.from_("file-history").download(file_history.filePath)
             
             if not download_response:
                 raise HTTPException(status_code=500, detail="Failed to download file from storage")
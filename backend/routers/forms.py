@@ -23,29 +23,14 @@ from models.forms import (
     EmployeeInfo,
 )
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.response_cache import cached_response, invalidate_response_cache, TAG_FORMS
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/forms", tags=["forms"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
-
 
 def accountability_form_to_response(db_form) -> AccountabilityForm:
     """Convert database accountability form to response model"""
@@ -113,7 +98,8 @@ def return_form_to_response(db_form) -> ReturnForm:
 @router.get("/accountability-form", response_model=AccountabilityFormsResponse)
 async def get_accountability_forms(
     employeeId: Optional[str] = Query(None, description="Filter by employee ID"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Get all accountability forms"""
     try:
@@ -122,7 +108,7 @@ async def get_accountability_forms(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canViewAccountabilityForms to view forms
-        has_permission = await check_permission(user_id, "canViewAccountabilityForms")
+        has_permission = permissions.has("canViewAccountabilityForms")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -153,7 +139,8 @@ async def get_accountability_forms(
 @router.post("/accountability-form", response_model=AccountabilityFormResponse, status_code=201)
 async def create_accountability_form(
     request: CreateAccountabilityFormRequest = Body(...),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new accountability form"""
     try:
@@ -162,7 +149,7 @@ async def create_accountability_form(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageAccountabilityForms to create forms
-        has_permission = await check_permission(user_id, "canManageAccountabilityForms")
+        has_permission = permissions.has("canManageAccountabilityForms")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -185,6 +172,7 @@ async def create_accountability_form(
             },
             include={"employeeUser": True},
         )
+        await invalidate_response_cache(TAG_FORMS)
         
         return AccountabilityFormResponse(accountabilityForm=accountability_form_to_response(db_form))
     
@@ -198,7 +186,8 @@ async def create_accountability_form(
 @router.get("/return-form", response_model=ReturnFormsResponse)
 async def get_return_forms(
     employeeId: Optional[str] = Query(None, description="Filter by employee ID"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Get all return forms"""
     try:
@@ -207,7 +196,7 @@ async def get_return_forms(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canViewReturnForms to view forms
-        has_permission = await check_permission(user_id, "canViewReturnForms")
+        has_permission = permissions.has("canViewReturnForms")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -238,7 +227,8 @@ async def get_return_forms(
 @router.post("/return-form", response_model=ReturnFormResponse, status_code=201)
 async def create_return_form(
     request: CreateReturnFormRequest = Body(...),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new return form"""
     try:
@@ -247,7 +237,7 @@ async def create_return_form(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageReturnForms to create forms
-        has_permission = await check_permission(user_id, "canManageReturnForms")
+        has_permission = permissions.has("canManageReturnForms")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -271,6 +261,7 @@ async def create_return_form(
             },
             include={"employeeUser": True},
         )
+        await invalidate_response_cache(TAG_FORMS)
         
         return ReturnFormResponse(returnForm=return_form_to_response(db_form))
     
@@ -282,6 +273,7 @@ async def create_return_form(
 
 
 @router.get("/history", response_model=FormHistoryResponse)
+@cached_response("forms.history", tags=[TAG_FORMS], ttl=15)
 async def get_form_history(
     formType: str = Query("accountability", description="Form type: accountability or return"),
     search: Optional[str] = Query(None, description="Search term"),
@@ -418,7 +410,8 @@ async def get_form_history(
 async def get_form_by_id(
     form_id: str = Path(..., description="Form ID"),
     formType: str = Query("accountability", description="Form type: accountability or return"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Get a single form by ID"""
     try:
@@ -428,14 +421,14 @@ async def get_form_by_id(
         
         # Check permission based on form type
         if formType == "return":
-            has_permission = await check_permission(user_id, "canViewReturnForms")
+            has_permission = permissions.has("canViewReturnForms")
             if not has_permission:
                 raise HTTPException(
                     status_code=403,
                     detail="You do not have permission to view return forms"
                 )
         else:
-            has_permission = await check_permission(user_id, "canViewAccountabilityForms")
+            has_permission = permissions.has("canViewAccountabilityForms")
             if not has_permission:
                 raise HTTPException(
                     status_code=403,
@@ -524,7 +517,8 @@ async def get_form_by_id(
 async def delete_form(
     form_id: str = Path(..., description="Form ID"),
     formType: str = Query("accountability", description="Form type: accountability or return"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete a form"""
     try:
@@ -534,14 +528,14 @@ async def delete_form(
         
         # Check permission based on form type
         if formType == "return":
-            has_permission = await check_permission(user_id, "canManageReturnForms")
+            has_permission = permissions.has("canManageReturnForms")
             if not has_permission:
                 raise HTTPException(
                     status_code=403,
                     detail="You do not have permission to delete return forms"
                 )
         else:
-            has_permission = await check_permission(user_id, "canManageAccountabilityForms")
+            has_permission = permissions.has("canManageAccountabilityForms")
             if not has_permission:
                 raise HTTPException(
                     status_code=403,
@@ -556,6 +550,7 @@ async def delete_form(
             
             # Delete the form
             await prisma.returnform.delete(where={"id": form_id})
+            await invalidate_response_cache(TAG_FORMS)
             
             return DeleteFormResponse(message="Return form deleted successfully")
         else:
@@ -566,6 +561,7 @@ async def delete_form(
             
             # Delete the form
             await prisma.accountabilityform.delete(where={"id": form_id})
+            await invalidate_response_cache(TAG_FORMS)
             
             return DeleteFormResponse(message="Accountability form deleted successfully")
     
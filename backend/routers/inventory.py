@@ -2,13 +2,12 @@
 Inventory API router
 """
 from fastapi import APIRouter, HTTPException, Query, Depends, Path, Body
-from fastapi.responses import StreamingResponse, Response
+from fastapi.responses import Response
 from typing import Optional
 import logging
 from decimal import Decimal
 import re
 from datetime import datetime
-import io
 from models.inventory import (
     InventoryItem,
     InventoryItemCreate,
@@ -33,29 +32,18 @@ from models.inventory import (
     CheckItemCodesResponse,
 )
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
 from utils.pdf_generator import ReportPDF, PDF_AVAILABLE
+from utils.pagination import decode_cursor, keyset_order, keyset_where, split_page
+from utils.relation_counts import count_by
+from utils.export_stream import iter_chunks, iter_rows, rows_from, stream_xlsx
+from utils.response_cache import cached_response, invalidate_response_cache, TAG_INVENTORY
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/inventory", tags=["inventory"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 def is_uuid(value: str) -> bool:
     """Check if a string is a UUID"""
@@ -213,7 +201,8 @@ async def export_inventory(
     includeLowStock: bool = Query(False, description="Include low stock items sheet"),
     includeItemList: bool = Query(False, description="Include item list sheet"),
     itemFields: Optional[str] = Query(None, description="Comma-separated item fields to include"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Export inventory data to Excel or PDF"""
     try:
@@ -222,7 +211,7 @@ async def export_inventory(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageInventory to export inventory
-        has_permission = await check_permission(user_id, "canManageInventory")
+        has_permission = permissions.has("canManageInventory")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -235,15 +224,6 @@ async def export_inventory(
         if format == "pdf" and not PDF_AVAILABLE:
             raise HTTPException(status_code=500, detail="PDF export not available - fpdf2 not installed")
         
-        # Import openpyxl for Excel generation
-        try:
-            from openpyxl import Workbook  # type: ignore
-        except ImportError:
-            raise HTTPException(
-                status_code=500, 
-                detail="Excel export not available - openpyxl not installed"
-            )
-        
         # Build where clause
         where_clause = {"isDeleted": False}
         
@@ -261,20 +241,15 @@ async def export_inventory(
         if category:
             where_clause["category"] = category
         
-        # Fetch all items
-        items = await prisma.inventoryitem.find_many(
-            where=where_clause,
-            order={"createdAt": "desc"}
-        )
-        
-        # Filter low stock items if requested
-        filtered_items = items
-        if lowStock:
-            filtered_items = [
-                item for item in items
-                if item.minStockLevel is not None 
-                and float(item.currentStock) <= float(item.minStockLevel)
-            ]
+        async def filtered_items():
+            # Items in keyset chunks, low stock filter applied per chunk
+            async for item in iter_rows(iter_chunks(prisma.inventoryitem, where=where_clause)):
+                if lowStock and not (
+                    item.minStockLevel is not None
+                    and float(item.currentStock) <= float(item.minStockLevel)
+                ):
+                    continue
+                yield item
         
         # Helper function to format numbers
         def format_number(value) -> str:
@@ -282,29 +257,29 @@ async def export_inventory(
                 return ''
             return f"{float(value):,.2f}"
         
-        # Calculate summary data
-        total_items = len(filtered_items)
-        total_stock = sum(float(item.currentStock) for item in filtered_items)
-        total_cost = sum(
-            float(item.currentStock) * (float(item.unitCost) if item.unitCost else 0)
-            for item in filtered_items
-        )
-        
-        # Group by category
+        # Summary data, category/status groups and low stock items in one pass
+        total_items = 0
+        total_stock = 0.0
+        total_cost = 0.0
         by_category = {}
-        for item in filtered_items:
+        by_status = {}
+        low_stock_items = []
+        async for item in filtered_items():
+            stock = float(item.currentStock)
+            cost = float(item.unitCost) if item.unitCost else 0
+            total_items += 1
+            total_stock += stock
+            total_cost += stock * cost
+            
+            # Group by category
             cat = item.category or 'Uncategorized'
             if cat not in by_category:
                 by_category[cat] = {'count': 0, 'totalStock': 0, 'totalCost': 0}
             by_category[cat]['count'] += 1
-            by_category[cat]['totalStock'] += float(item.currentStock)
-            cost = float(item.unitCost) if item.unitCost else 0
-            by_category[cat]['totalCost'] += float(item.currentStock) * cost
-        
-        # Group by status
-        by_status = {}
-        for item in filtered_items:
-            stock = float(item.currentStock)
+            by_category[cat]['totalStock'] += stock
+            by_category[cat]['totalCost'] += stock * cost
+            
+            # Group by status
             min_level = float(item.minStockLevel) if item.minStockLevel else None
             if stock == 0:
                 status = 'Out of Stock'
@@ -317,133 +292,11 @@ async def export_inventory(
                 by_status[status] = {'count': 0, 'totalStock': 0, 'totalCost': 0}
             by_status[status]['count'] += 1
             by_status[status]['totalStock'] += stock
-            cost = float(item.unitCost) if item.unitCost else 0
             by_status[status]['totalCost'] += stock * cost
-        
-        # Low stock items
-        low_stock_items = [
-            item for item in filtered_items
-            if item.minStockLevel is not None 
-            and float(item.currentStock) <= float(item.minStockLevel)
-        ]
-        
-        # Create workbook
-        wb = Workbook()
-        # Remove default sheet
-        wb.remove(wb.active)
-        
-        # Create Summary sheet
-        if includeSummary:
-            ws = wb.create_sheet("Summary")
-            ws.append(["Metric", "Value"])
-            ws.append(["Total Items", total_items])
-            ws.append(["Total Stock", int(total_stock)])
-            ws.append(["Total Cost", format_number(total_cost)])
-        
-        # Create By Category sheet
-        if includeByCategory and by_category:
-            ws = wb.create_sheet("By Category")
-            ws.append(["Category", "Item Count", "Total Stock", "Total Cost"])
-            for cat, data in by_category.items():
-                ws.append([cat, data['count'], int(data['totalStock']), format_number(data['totalCost'])])
-        
-        # Create By Status sheet
-        if includeByStatus and by_status:
-            ws = wb.create_sheet("By Status")
-            ws.append(["Status", "Item Count", "Total Stock", "Total Cost"])
-            for status, data in by_status.items():
-                ws.append([status, data['count'], int(data['totalStock']), format_number(data['totalCost'])])
-        
-        # Create Total Cost sheet
-        if includeTotalCost:
-            ws = wb.create_sheet("Total Cost")
-            ws.append(["Description", "Amount"])
-            ws.append(["Total Inventory Value", format_number(total_cost)])
-        
-        # Create Low Stock Items sheet
-        if includeLowStock and low_stock_items:
-            ws = wb.create_sheet("Low Stock Items")
-            ws.append(["Item Code", "Name", "Current Stock", "Min Level"])
-            for item in low_stock_items:
-                ws.append([
-                    item.itemCode,
-                    item.name,
-                    int(float(item.currentStock)),
-                    int(float(item.minStockLevel)) if item.minStockLevel else ''
-                ])
-        
-        # Create Item List sheet
-        if includeItemList and itemFields:
-            field_list = [f.strip() for f in itemFields.split(',') if f.strip()]
-            if field_list:
-                field_labels = {
-                    'itemCode': 'Item Code',
-                    'name': 'Name',
-                    'description': 'Description',
-                    'category': 'Category',
-                    'unit': 'Unit',
-                    'currentStock': 'Current Stock',
-                    'minStockLevel': 'Min Stock Level',
-                    'maxStockLevel': 'Max Stock Level',
-                    'unitCost': 'Unit Cost',
-                    'location': 'Location',
-                    'supplier': 'Supplier',
-                    'brand': 'Brand',
-                    'model': 'Model',
-                    'sku': 'SKU',
-                    'barcode': 'Barcode',
-                    'remarks': 'Remarks',
-                }
-                
-                ws = wb.create_sheet("Item List")
-                # Header row
-                headers = [field_labels.get(f, f) for f in field_list]
-                ws.append(headers)
-                
-                # Data rows
-                for item in filtered_items:
-                    row = []
-                    for field in field_list:
-                        if field == 'itemCode':
-                            row.append(item.itemCode)
-                        elif field == 'name':
-                            row.append(item.name)
-                        elif field == 'description':
-                            row.append(item.description or '')
-                        elif field == 'category':
-                            row.append(item.category or '')
-                        elif field == 'unit':
-                            row.append(item.unit or '')
-                        elif field == 'currentStock':
-                            row.append(int(float(item.currentStock)))
-                        elif field == 'minStockLevel':
-                            row.append(int(float(item.minStockLevel)) if item.minStockLevel else '')
-                        elif field == 'maxStockLevel':
-                            row.append(int(float(item.maxStockLevel)) if item.maxStockLevel else '')
-                        elif field == 'unitCost':
-                            row.append(format_number(item.unitCost) if item.unitCost else '')
-                        elif field == 'location':
-                            row.append(item.location or '')
-                        elif field == 'supplier':
-                            row.append(item.supplier or '')
-                        elif field == 'brand':
-                            row.append(item.brand or '')
-                        elif field == 'model':
-                            row.append(item.model or '')
-                        elif field == 'sku':
-                            row.append(item.sku or '')
-                        elif field == 'barcode':
-                            row.append(item.barcode or '')
-                        elif field == 'remarks':
-                            row.append(item.remarks or '')
-                        else:
-                            row.append('')
-                    ws.append(row)
-        
-        # If no sheets were created, add a default empty sheet
-        if len(wb.sheetnames) == 0:
-            ws = wb.create_sheet("Inventory")
-            ws.append(["No data selected for export"])
+            
+            # Low stock items
+            if item.minStockLevel is not None and stock <= float(item.minStockLevel):
+                low_stock_items.append(item)
         
         # Generate output based on format
         if format == "pdf":
@@ -503,7 +356,7 @@ async def export_inventory(
             # Item List section
             if includeItemList and itemFields:
                 field_list = [f.strip() for f in itemFields.split(',') if f.strip()]
-                if field_list and filtered_items:
+                if field_list and total_items:
                     field_labels = {
                         'itemCode': 'Item Code',
                         'name': 'Name',
@@ -523,11 +376,11 @@ async def export_inventory(
                         'remarks': 'Remarks',
                     }
                     
-                    pdf.add_section_title(f"Item List ({len(filtered_items)} items)")
+                    pdf.add_section_title(f"Item List ({total_items} items)")
                     headers = [field_labels.get(f, f) for f in field_list]
                     
                     item_rows = []
-                    for item in filtered_items:
+                    async for item in filtered_items():
                         row = []
                         for field in field_list:
                             if field == 'itemCode':
@@ -582,20 +435,128 @@ async def export_inventory(
             )
         
         else:  # Excel format
-            # Save to buffer
-            buffer = io.BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
+            sheets = []
             
-            filename = f"inventory-export-{datetime.now().strftime('%Y-%m-%d')}.xlsx"
+            # Summary sheet
+            if includeSummary:
+                sheets.append(("Summary", rows_from([
+                    ["Metric", "Value"],
+                    ["Total Items", total_items],
+                    ["Total Stock", int(total_stock)],
+                    ["Total Cost", format_number(total_cost)],
+                ])))
             
-            return StreamingResponse(
-                buffer,
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
+            # By Category sheet
+            if includeByCategory and by_category:
+                sheets.append(("By Category", rows_from([
+                    ["Category", "Item Count", "Total Stock", "Total Cost"],
+                    *[[cat, data['count'], int(data['totalStock']), format_number(data['totalCost'])] for cat, data in by_category.items()],
+                ])))
+            
+            # By Status sheet
+            if includeByStatus and by_status:
+                sheets.append(("By Status", rows_from([
+                    ["Status", "Item Count", "Total Stock", "Total Cost"],
+                    *[[status, data['count'], int(data['totalStock']), format_number(data['totalCost'])] for status, data in by_status.items()],
+                ])))
+            
+            # Total Cost sheet
+            if includeTotalCost:
+                sheets.append(("Total Cost", rows_from([
+                    ["Description", "Amount"],
+                    ["Total Inventory Value", format_number(total_cost)],
+                ])))
+            
+            # Low Stock Items sheet
+            if includeLowStock and low_stock_items:
+                sheets.append(("Low Stock Items", rows_from([
+                    ["Item Code", "Name", "Current Stock", "Min Level"],
+                    *[
+                        [
+                            item.itemCode,
+                            item.name,
+                            int(float(item.currentStock)),
+                            int(float(item.minStockLevel)) if item.minStockLevel else ''
+                        ]
+                        for item in low_stock_items
+                    ],
+                ])))
+            
+            # Item List sheet
+            field_list = [f.strip() for f in itemFields.split(',') if f.strip()] if itemFields else []
+            if includeItemList and field_list:
+                field_labels = {
+                    'itemCode': 'Item Code',
+                    'name': 'Name',
+                    'description': 'Description',
+                    'category': 'Category',
+                    'unit': 'Unit',
+                    'currentStock': 'Current Stock',
+                    'minStockLevel': 'Min Stock Level',
+                    'maxStockLevel': 'Max Stock Level',
+                    'unitCost': 'Unit Cost',
+                    'location': 'Location',
+                    'supplier': 'Supplier',
+                    'brand': 'Brand',
+                    'model': 'Model',
+                    'sku': 'SKU',
+                    'barcode': 'Barcode',
+                    'remarks': 'Remarks',
                 }
-            )
+                
+                async def item_list_rows():
+                    # Header row
+                    yield [field_labels.get(f, f) for f in field_list]
+                    
+                    # Data rows
+                    async for item in filtered_items():
+                        row = []
+                        for field in field_list:
+                            if field == 'itemCode':
+                                row.append(item.itemCode)
+                            elif field == 'name':
+                                row.append(item.name)
+                            elif field == 'description':
+                                row.append(item.description or '')
+                            elif field == 'category':
+                                row.append(item.category or '')
+                            elif field == 'unit':
+                                row.append(item.unit or '')
+                            elif field == 'currentStock':
+                                row.append(int(float(item.currentStock)))
+                            elif field == 'minStockLevel':
+                                row.append(int(float(item.minStockLevel)) if item.minStockLevel else '')
+                            elif field == 'maxStockLevel':
+                                row.append(int(float(item.maxStockLevel)) if item.maxStockLevel else '')
+                            elif field == 'unitCost':
+                                row.append(format_number(item.unitCost) if item.unitCost else '')
+                            elif field == 'location':
+                                row.append(item.location or '')
+                            elif field == 'supplier':
+                                row.append(item.supplier or '')
+                            elif field == 'brand':
+                                row.append(item.brand or '')
+                            elif field == 'model':
+                                row.append(item.model or '')
+                            elif field == 'sku':
+                                row.append(item.sku or '')
+                            elif field == 'barcode':
+                                row.append(item.barcode or '')
+                            elif field == 'remarks':
+                                row.append(item.remarks or '')
+                            else:
+                                row.append('')
+                        yield row
+                
+                sheets.append(("Item List", item_list_rows()))
+            
+            # If no sheets were selected, add a default sheet
+            if not sheets:
+                sheets.append(("Inventory", rows_from([["No data selected for export"]])))
+            
+            filename = f"inventory-export-{datetime.now().strftime('%Y-%m-%d')}.xlsx"
+            
+            return await stream_xlsx(sheets, filename)
     
     except HTTPException:
         raise
@@ -605,7 +566,8 @@ async def export_inventory(
 
 
 @router.delete("/trash/empty", response_model=EmptyTrashResponse)
-async def empty_inventory_trash(auth: dict = Depends(verify_auth)):
+async def empty_inventory_trash(auth: dict = Depends(verify_auth),
+                                permissions: PermissionSet = Depends(get_user_permissions)):
     """Permanently delete all soft-deleted inventory items"""
     try:
         user_id = auth.get("user", {}).get("id")
@@ -613,7 +575,7 @@ async def empty_inventory_trash(auth: dict = Depends(verify_auth)):
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageTrash to empty trash
-        has_permission = await check_permission(user_id, "canManageTrash")
+        has_permission = permissions.has("canManageTrash")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -645,6 +607,7 @@ async def empty_inventory_trash(auth: dict = Depends(verify_auth)):
             where={"isDeleted": True}
         )
         
+        await invalidate_response_cache(TAG_INVENTORY)
         return EmptyTrashResponse(
             success=True,
             message=f"Permanently deleted {result} item(s)",
@@ -661,7 +624,8 @@ async def empty_inventory_trash(auth: dict = Depends(verify_auth)):
 @router.delete("/bulk-delete", response_model=BulkDeleteItemsResponse)
 async def bulk_delete_inventory_items(
     request: BulkDeleteItemsRequest = Body(...),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Bulk delete multiple inventory items (permanently or soft delete)"""
     try:
@@ -670,7 +634,7 @@ async def bulk_delete_inventory_items(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageInventory to delete items
-        has_permission = await check_permission(user_id, "canManageInventory")
+        has_permission = permissions.has("canManageInventory")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -694,6 +658,7 @@ async def bulk_delete_inventory_items(
                 where={"id": {"in": request.ids}}
             )
             
+            await invalidate_response_cache(TAG_INVENTORY)
             return BulkDeleteItemsResponse(
                 success=True,
                 deletedCount=result,
@@ -709,6 +674,7 @@ async def bulk_delete_inventory_items(
                 }
             )
             
+            await invalidate_response_cache(TAG_INVENTORY)
             return BulkDeleteItemsResponse(
                 success=True,
                 deletedCount=result,
@@ -723,6 +689,7 @@ async def bulk_delete_inventory_items(
 
 
 @router.get("", response_model=InventoryItemsResponse)
+@cached_response("inventory.list", tags=[TAG_INVENTORY], ttl=15)
 async def get_inventory_items(
     search: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
@@ -730,6 +697,7 @@ async def get_inventory_items(
     page: int = Query(1, ge=1),
     pageSize: int = Query(50, ge=1, le=10000),
     lowStock: Optional[bool] = Query(False),
+    cursor: Optional[str] = Query(None, description="pagination.nextCursor of the previous page; replaces page"),
     auth: dict = Depends(verify_auth)
 ):
     """Get all inventory items with optional filters and pagination"""
@@ -758,11 +726,13 @@ async def get_inventory_items(
         # Note: Low stock filtering is done in memory since Prisma doesn't support field comparison in where clause
         total_count = await prisma.inventoryitem.count(where=where_clause)
         
+        # Page by cursor when given, else by page number; one extra row tells whether
+        # there is a next page to issue a cursor for
         items_data = await prisma.inventoryitem.find_many(
-            where=where_clause,
-            order={"createdAt": "desc"},
-            skip=0 if lowStock else (page - 1) * pageSize,
-            take=None if lowStock else pageSize,
+            where=where_clause if lowStock else keyset_where(where_clause, cursor),
+            order=keyset_order(),
+            skip=0 if lowStock or cursor else (page - 1) * pageSize,
+            take=None if lowStock else pageSize + 1,
         )
         
         # Filter low stock items if requested
@@ -777,22 +747,21 @@ async def get_inventory_items(
             items_data = filtered_items
             total_count = len(filtered_items)
             # Apply pagination after filtering
-            items_data = items_data[(page - 1) * pageSize:page * pageSize]
-        
-        # Fetch transaction counts for all items in one query
-        item_ids = [str(item.id) for item in items_data]
-        transaction_counts = {}
-        if item_ids:
-            # Fetch all transactions for these items (Prisma Python doesn't support select)
-            transactions_data = await prisma.inventorytransaction.find_many(
-                where={
-                    "inventoryItemId": {"in": item_ids}
-                }
-            )
-            # Count transactions per item
-            for transaction in transactions_data:
-                item_id = str(transaction.inventoryItemId)
-                transaction_counts[item_id] = transaction_counts.get(item_id, 0) + 1
+            if cursor:
+                cursor_created_at, cursor_id = decode_cursor(cursor, "createdAt")
+                items_data = [
+                    item for item in items_data
+                    if (item.createdAt, item.id) < (cursor_created_at, cursor_id)
+                ][:pageSize + 1]
+            else:
+                items_data = items_data[(page - 1) * pageSize:page * pageSize + 1]
+        
+        items_data, next_cursor = split_page(items_data, pageSize)
+        
+        # Fetch transaction counts for all items in one grouped count query
+        transaction_counts = await count_by(
+            prisma.inventorytransaction, "inventoryItemId", [str(item.id) for item in items_data]
+        )
         
         # Convert to Pydantic models
         items = []
@@ -839,12 +808,15 @@ async def get_inventory_items(
             page=page,
             pageSize=pageSize,
             totalPages=total_pages,
-            hasNextPage=page < total_pages,
-            hasPreviousPage=page > 1
+            hasNextPage=next_cursor is not None,
+            hasPreviousPage=page > 1 or cursor is not None,
+            nextCursor=next_cursor
         )
         
         return InventoryItemsResponse(items=items, pagination=pagination)
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching inventory items: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch inventory items")
@@ -852,7 +824,8 @@ async def get_inventory_items(
 @router.post("", response_model=InventoryItemResponse, status_code=201)
 async def create_inventory_item(
     item_data: InventoryItemCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new inventory item"""
     try:
@@ -862,7 +835,7 @@ async def create_inventory_item(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageInventory to create items
-        has_permission = await check_permission(user_id, "canManageInventory")
+        has_permission = permissions.has("canManageInventory")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -966,6 +939,7 @@ async def create_inventory_item(
             _count=count_dict
         )
         
+        await invalidate_response_cache(TAG_INVENTORY)
         return InventoryItemResponse(item=item)
     
     except HTTPException:
@@ -1101,7 +1075,8 @@ async def get_inventory_item(
 async def update_inventory_item(
     item_id: str = Path(..., description="Inventory item ID"),
     item_data: InventoryItemUpdate = None,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Update an existing inventory item"""
     try:
@@ -1111,7 +1086,7 @@ async def update_inventory_item(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageInventory to update items
-        has_permission = await check_permission(user_id, "canManageInventory")
+        has_permission = permissions.has("canManageInventory")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -1203,6 +1178,7 @@ async def update_inventory_item(
             _count=count_dict
         )
         
+        await invalidate_response_cache(TAG_INVENTORY)
         return InventoryItemResponse(item=item)
     
     except HTTPException:
@@ -1215,7 +1191,8 @@ async def update_inventory_item(
 async def delete_inventory_item(
     item_id: str = Path(..., description="Inventory item ID"),
     permanent: bool = Query(False, description="Permanently delete the item"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete an inventory item (soft delete by default, permanent if specified)"""
     try:
@@ -1225,7 +1202,7 @@ async def delete_inventory_item(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageInventory to delete items
-        has_permission = await check_permission(user_id, "canManageInventory")
+        has_permission = permissions.has("canManageInventory")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -1235,6 +1212,7 @@ async def delete_inventory_item(
         if permanent:
             # Hard delete
             await prisma.inventoryitem.delete(where={"id": item_id})
+            await invalidate_response_cache(TAG_INVENTORY)
             return {"success": True, "message": "Item permanently deleted"}
         else:
             # Soft delete
@@ -1245,6 +1223,7 @@ async def delete_inventory_item(
                     "isDeleted": True,
                 }
             )
+            await invalidate_response_cache(TAG_INVENTORY)
             return {
                 "success": True,
                 "message": "Item archived. It will be permanently deleted after 30 days."
@@ -1259,7 +1238,8 @@ async def delete_inventory_item(
 @router.post("/{item_id}/restore", response_model=RestoreResponse)
 async def restore_inventory_item(
     item_id: str = Path(..., description="Inventory item ID"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Restore a soft-deleted inventory item"""
     try:
@@ -1269,7 +1249,7 @@ async def restore_inventory_item(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageInventory to restore items
-        has_permission = await check_permission(user_id, "canManageInventory")
+        has_permission = permissions.has("canManageInventory")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -1323,6 +1303,7 @@ async def restore_inventory_item(
             _count=count_dict
         )
         
+        await invalidate_response_cache(TAG_INVENTORY)
         return RestoreResponse(
             success=True,
             message="Item restored successfully",
@@ -1338,7 +1319,8 @@ async def restore_inventory_item(
 @router.post("/bulk-restore", response_model=BulkRestoreResponse)
 async def bulk_restore_inventory_items(
     request: BulkRestoreRequest,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Bulk restore multiple soft-deleted inventory items"""
     try:
@@ -1347,7 +1329,7 @@ async def bulk_restore_inventory_items(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageInventory to restore items
-        has_permission = await check_permission(user_id, "canManageInventory")
+        has_permission = permissions.has("canManageInventory")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -1360,20 +1342,20 @@ async def bulk_restore_inventory_items(
                 detail="Invalid request. Expected an array of item IDs."
             )
         
-        # Restore all items in a transaction
-        async with prisma.tx() as transaction:
-            # Update all items to restore them
-            result = await transaction.inventoryitem.update_many(
-                where={
-                    "id": {"in": request.ids},
-                    "isDeleted": True  # Only restore items that are actually deleted
-                },
-                data={
-                    "deletedAt": None,
-                    "isDeleted": False
-                }
-            )
+        # Restore all items with one statement (atomic on its own, so no
+        # interactive transaction and its extra engine round-trips)
+        result = await prisma.inventoryitem.update_many(
+            where={
+                "id": {"in": request.ids},
+                "isDeleted": True  # Only restore items that are actually deleted
+            },
+            data={
+                "deletedAt": None,
+                "isDeleted": False
+            }
+        )
         
+        await invalidate_response_cache(TAG_INVENTORY)
         return BulkRestoreResponse(
             success=True,
             restoredCount=result,
@@ -1519,7 +1501,8 @@ async def get_inventory_transactions(
 async def create_inventory_transaction(
     item_id: str = Path(..., description="Inventory item ID or itemCode"),
     transaction_data: InventoryTransactionCreate = None,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new inventory transaction"""
     try:
@@ -1529,7 +1512,7 @@ async def create_inventory_transaction(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageInventory to create transactions
-        has_permission = await check_permission(user_id, "canManageInventory")
+        has_permission = permissions.has("canManageInventory")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -1787,6 +1770,7 @@ async def create_inventory_transaction(
             inventoryItem=related_item_info
         )
         
+        await invalidate_response_cache(TAG_INVENTORY)
         return InventoryTransactionResponse(transaction=transaction)
     
     except HTTPException:
@@ -1799,7 +1783,8 @@ async def create_inventory_transaction(
 async def bulk_delete_transactions(
     item_id: str = Path(..., description="Inventory item ID or itemCode"),
     request: BulkDeleteTransactionsRequest = Body(...),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Bulk delete transactions for an inventory item"""
     try:
@@ -1809,7 +1794,7 @@ async def bulk_delete_transactions(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageInventory to delete transactions
-        has_permission = await check_permission(user_id, "canManageInventory")
+        has_permission = permissions.has("canManageInventory")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -1862,6 +1847,7 @@ async def bulk_delete_transactions(
             }
         )
         
+        await invalidate_response_cache(TAG_INVENTORY)
         return BulkDeleteTransactionsResponse(
             success=True,
             deletedCount=deleted_count,
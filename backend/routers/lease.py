@@ -8,28 +8,16 @@ import logging
 
 from models.lease import LeaseCreate, LeaseResponse, LeaseStatsResponse
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.asset_distinct import invalidate_distinct_asset_values
+from utils.response_cache import cached_response, invalidate_response_cache, TAG_ASSETS, TAG_LEASE
+from utils.activity_ledger import ACTIVITY_LEASE, activity, actor_name, record_activity
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/assets/lease", tags=["lease"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 def parse_date(date_str: str) -> datetime:
     """Parse date string to datetime"""
@@ -44,7 +32,8 @@ def parse_date(date_str: str) -> datetime:
 @router.post("", response_model=LeaseResponse, status_code=status.HTTP_201_CREATED)
 async def create_lease(
     lease_data: LeaseCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a lease for an asset"""
     try:
@@ -53,7 +42,7 @@ async def create_lease(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canLease")
+        has_permission = permissions.has("canLease")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -133,6 +122,15 @@ async def create_lease(
                 data={"status": "Leased"}
             )
 
+            await record_activity(transaction, activity(
+                ACTIVITY_LEASE,
+                lease.id,
+                lease_data.assetId,
+                lease_start_date,
+                actor=actor_name(auth),
+                details=f"Leased to {lease.lessee}"
+            ))
+
             # Format response
             lease_dict = {
                 "id": str(lease.id),
@@ -150,10 +148,13 @@ async def create_lease(
                 } if lease.asset else None
             }
 
-            return LeaseResponse(
-                success=True,
-                lease=lease_dict
-            )
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS, TAG_LEASE)
+
+        return LeaseResponse(
+            success=True,
+            lease=lease_dict
+        )
 
     except HTTPException:
         raise
@@ -162,6 +163,7 @@ async def create_lease(
         raise HTTPException(status_code=500, detail=f"Failed to create lease: {str(e)}")
 
 @router.get("/stats", response_model=LeaseStatsResponse)
+@cached_response("lease.stats", tags=[TAG_LEASE], ttl=30)
 async def get_lease_stats(
     auth: dict = Depends(verify_auth)
 ):
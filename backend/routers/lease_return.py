@@ -9,26 +9,15 @@ import re
 
 from models.lease_return import LeaseReturnCreate, LeaseReturnResponse, LeaseReturnStatsResponse, LeaseReturnAssetUpdate
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.asset_distinct import invalidate_distinct_asset_values
+from utils.response_cache import cached_response, invalidate_response_cache, TAG_ASSETS, TAG_LEASE, TAG_LEASE_RETURN
+from utils.activity_ledger import ACTIVITY_LEASE_RETURN, activity, actor_name, record_activity
+from utils.bulk_transactions import create_rows, fetch_rows_in_order, unique_ids, update_assets
 
 logger = logging.getLogger(__name__)
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 def is_uuid(value: str) -> bool:
     """Check if a string is a UUID"""
@@ -50,7 +39,8 @@ def parse_date(date_str: str) -> datetime:
 @router.post("", response_model=LeaseReturnResponse, status_code=status.HTTP_201_CREATED)
 async def create_lease_return(
     return_data: LeaseReturnCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create lease return records for assets"""
     try:
@@ -59,7 +49,7 @@ async def create_lease_return(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission (lease return is part of lease operations)
-        has_permission = await check_permission(user_id, "canLease")
+        has_permission = permissions.has("canLease")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -75,39 +65,59 @@ async def create_lease_return(
         # Parse date
         return_date = parse_date(return_data.returnDate)
 
-        # Process lease returns in a transaction
-        return_records = []
+        requested_ids = unique_ids(return_data.assetIds)
+        actor = actor_name(auth)
         
+        # Set-based: the batch is read and written with a fixed number of queries
         async with prisma.tx() as transaction:
-            for asset_id in return_data.assetIds:
-                # First get the asset (support both UUID and assetTagId)
-                if is_uuid(asset_id):
-                    asset = await transaction.assets.find_unique(where={"id": asset_id})
-                else:
-                    asset = await transaction.assets.find_first(where={"assetTagId": asset_id, "isDeleted": False})
+            # Get the assets (support both UUID and assetTagId)
+            uuid_ids = [asset_id for asset_id in requested_ids if is_uuid(asset_id)]
+            tag_ids = [asset_id for asset_id in requested_ids if not is_uuid(asset_id)]
+            asset_filters = []
+            if uuid_ids:
+                asset_filters.append({"id": {"in": uuid_ids}})
+            if tag_ids:
+                asset_filters.append({"assetTagId": {"in": tag_ids}, "isDeleted": False})
+            assets = await transaction.assets.find_many(where={"OR": asset_filters})
+            assets_by_id = {asset.id: asset for asset in assets}
+            assets_by_tag = {asset.assetTagId: asset for asset in assets if not asset.isDeleted}
 
+            # Resolve requested ids to assets, processing each asset once
+            batch = []
+            seen_asset_ids = set()
+            for asset_id in requested_ids:
+                asset = assets_by_id.get(asset_id) if is_uuid(asset_id) else assets_by_tag.get(asset_id)
                 if not asset:
                     raise HTTPException(
                         status_code=404,
                         detail=f"Asset not found: {asset_id}"
                     )
+                if asset.id not in seen_asset_ids:
+                    seen_asset_ids.add(asset.id)
+                    batch.append((asset_id, asset))
 
+            # Most recent unreturned lease per asset
+            # We don't filter by leaseEndDate because late returns are allowed
+            open_leases = await transaction.assetslease.find_many(
+                where={
+                    "assetId": {"in": [asset.id for _, asset in batch]},
+                    "returns": {
+                        "none": {}  # Exclude leases that have already been returned
+                    }
+                },
+                order={"leaseStartDate": "desc"}
+            )
+            active_leases: Dict[str, Any] = {}
+            for lease in open_leases:
+                active_leases.setdefault(lease.assetId, lease)
+
+            return_rows = []
+            for asset_id, asset in batch:
                 # Use actual UUID for database operations
                 actual_asset_id = asset.id
                 asset_tag_id = asset.assetTagId or asset_id
 
-                # Find the most recent unreturned lease for this asset
-                # We don't filter by leaseEndDate because late returns are allowed
-                active_lease = await transaction.assetslease.find_first(
-                    where={
-                        "assetId": actual_asset_id,
-                        "returns": {
-                            "none": {}  # Exclude leases that have already been returned
-                        }
-                    },
-                    order={"leaseStartDate": "desc"}
-                )
-
+                active_lease = active_leases.get(actual_asset_id)
                 if not active_lease:
                     raise HTTPException(
                         status_code=404,
@@ -119,27 +129,34 @@ async def create_lease_return(
                 if return_data.updates:
                     asset_update = return_data.updates.get(asset_id) or return_data.updates.get(actual_asset_id)
 
-                # Create lease return record
-                lease_return = await transaction.assetsleasereturn.create(
-                    data={
-                        "assetId": actual_asset_id,
-                        "leaseId": active_lease.id,
-                        "returnDate": return_date,
-                        "condition": asset_update.condition if asset_update and asset_update.condition else None,
-                        "notes": asset_update.notes if asset_update and asset_update.notes else None
-                    },
-                    include={
-                        "asset": True,
-                        "lease": True
-                    }
-                )
+                return_rows.append({
+                    "assetId": actual_asset_id,
+                    "leaseId": active_lease.id,
+                    "returnDate": return_date,
+                    "condition": asset_update.condition if asset_update and asset_update.condition else None,
+                    "notes": asset_update.notes if asset_update and asset_update.notes else None
+                })
+
+            return_ids = await create_rows(transaction.assetsleasereturn, return_rows)
 
-                # Update asset status back to Available
-                await transaction.assets.update(
-                    where={"id": actual_asset_id},
-                    data={"status": "Available"}
-                )
+            # Update asset status back to Available
+            await update_assets(transaction, {
+                asset.id: {"status": "Available"}
+                for _, asset in batch
+            })
+
+            lease_returns = await fetch_rows_in_order(
+                transaction.assetsleasereturn,
+                return_ids,
+                include={
+                    "asset": True,
+                    "lease": True
+                }
+            )
 
+            return_records = []
+            activity_entries = []
+            for lease_return in lease_returns:
                 # Format response
                 return_dict = {
                     "id": str(lease_return.id),
@@ -162,6 +179,21 @@ async def create_lease_return(
                 }
                 return_records.append(return_dict)
 
+                activity_entries.append(activity(
+                    ACTIVITY_LEASE_RETURN,
+                    lease_return.id,
+                    lease_return.assetId,
+                    return_date,
+                    actor=actor,
+                    details=f"Returned from {lease_return.lease.lessee if lease_return.lease else 'Unknown'}"
+                ))
+
+            # Ledger rows commit with the returns they describe
+            await record_activity(transaction, *activity_entries)
+
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS, TAG_LEASE_RETURN, TAG_LEASE)
+
         return LeaseReturnResponse(
             success=True,
             returns=return_records,
@@ -175,6 +207,7 @@ async def create_lease_return(
         raise HTTPException(status_code=500, detail=f"Failed to return leased assets: {str(e)}")
 
 @router.get("/stats", response_model=LeaseReturnStatsResponse)
+@cached_response("lease_return.stats", tags=[TAG_LEASE_RETURN], ttl=30)
 async def get_lease_return_stats(
     auth: dict = Depends(verify_auth)
 ):
@@ -12,7 +12,9 @@ from models.locations import (
     LocationResponse
 )
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.response_cache import invalidate_response_cache, TAG_ASSETS
 from typing import List
 from pydantic import BaseModel
 
@@ -20,22 +22,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/locations", tags=["locations"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 class BulkDeleteRequest(BaseModel):
     ids: List[str]
@@ -94,7 +80,8 @@ async def get_locations(
 @router.post("", response_model=LocationResponse, status_code=201)
 async def create_location(
     location_data: LocationCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new location"""
     try:
@@ -103,7 +90,7 @@ async def create_location(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to create locations
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -154,7 +141,8 @@ async def create_location(
 async def update_location(
     location_id: str,
     location_data: LocationUpdate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Update an existing location"""
     try:
@@ -163,7 +151,7 @@ async def update_location(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to update locations
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -205,6 +193,7 @@ async def update_location(
                 "description": location_data.description.strip() if location_data.description else None
             }
         )
+        await invalidate_response_cache(TAG_ASSETS)
         
         location = Location(
             id=updated_location.id,
@@ -225,7 +214,8 @@ async def update_location(
 @router.delete("/bulk-delete")
 async def bulk_delete_locations(
     request: BulkDeleteRequest,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Bulk delete locations"""
     try:
@@ -234,7 +224,7 @@ async def bulk_delete_locations(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to delete locations
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -252,17 +242,20 @@ async def bulk_delete_locations(
         locations_with_assets: List[str] = []
         locations_to_delete: List[str] = []
         
-        # Check each location for associated assets
-        for location in locations:
-            assets_count = await prisma.assets.count(
+        # Names still used by an active asset, with one query for all locations
+        used_names = {
+            asset.location
+            for asset in await prisma.assets.find_many(
                 where={
-                    "location": location.name,
+                    "location": {"in": [location.name for location in locations]},
                     "isDeleted": False
                 },
-                take=1
+                distinct=["location"]
             )
-            
-            if assets_count > 0:
+        }
+        
+        for location in locations:
+            if location.name in used_names:
                 locations_with_assets.append(location.name)
             else:
                 locations_to_delete.append(location.id)
@@ -278,6 +271,7 @@ async def bulk_delete_locations(
         result = await prisma.assetslocation.delete_many(
             where={"id": {"in": locations_to_delete}}
         )
+        await invalidate_response_cache(TAG_ASSETS)
         
         return {
             "success": True,
@@ -300,7 +294,8 @@ async def bulk_delete_locations(
 @router.delete("/{location_id}")
 async def delete_location(
     location_id: str,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete a location"""
     try:
@@ -309,7 +304,7 @@ async def delete_location(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to delete locations
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -343,6 +338,7 @@ async def delete_location(
         await prisma.assetslocation.delete(
             where={"id": location_id}
         )
+        await invalidate_response_cache(TAG_ASSETS)
         
         return {"success": True}
     
@@ -10,7 +10,11 @@ import re
 
 from models.maintenance import MaintenanceCreate, MaintenanceUpdate, MaintenanceResponse, MaintenancesListResponse, MaintenanceDeleteResponse, MaintenanceStatsResponse, MaintenanceInventoryItem
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.asset_distinct import invalidate_distinct_asset_values
+from utils.response_cache import cached_response, invalidate_response_cache, TAG_ASSETS, TAG_INVENTORY, TAG_MAINTENANCE
+from utils.activity_ledger import ACTIVITY_MAINTENANCE, activity, record_activity
 
 logger = logging.getLogger(__name__)
 
@@ -22,24 +26,6 @@ def is_uuid(value: str) -> bool:
 router = APIRouter(prefix="/api/assets/maintenance", tags=["maintenance"])
 
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission"""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
-
-
 @router.get("", response_model=MaintenancesListResponse)
 async def list_maintenances(
     assetId: Optional[str] = Query(None, description="Filter by asset ID (UUID) or assetTagId"),
@@ -203,6 +189,7 @@ async def list_maintenances(
 
 
 @router.get("/stats", response_model=MaintenanceStatsResponse)
+@cached_response("maintenance.stats", tags=[TAG_MAINTENANCE], ttl=30)
 async def get_maintenance_stats(
     auth: dict = Depends(verify_auth)
 ):
@@ -283,7 +270,8 @@ async def get_maintenance_stats(
 @router.delete("/{maintenance_id}", response_model=MaintenanceDeleteResponse)
 async def delete_maintenance(
     maintenance_id: str,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete a maintenance record"""
     try:
@@ -292,7 +280,7 @@ async def delete_maintenance(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canManageMaintenance")
+        has_permission = permissions.has("canManageMaintenance")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -311,6 +299,7 @@ async def delete_maintenance(
         await prisma.assetsmaintenance.delete(
             where={"id": maintenance_id}
         )
+        await invalidate_response_cache(TAG_ASSETS, TAG_MAINTENANCE, TAG_INVENTORY)
         
         return MaintenanceDeleteResponse(success=True, message="Maintenance record deleted successfully")
     
@@ -358,7 +347,8 @@ async def get_maintenance(
 @router.put("", response_model=MaintenanceResponse)
 async def update_maintenance(
     data: MaintenanceUpdate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Update a maintenance record"""
     try:
@@ -367,7 +357,7 @@ async def update_maintenance(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canManageMaintenance")
+        has_permission = permissions.has("canManageMaintenance")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -502,6 +492,7 @@ async def update_maintenance(
         
         # Convert to dict for response
         maintenance_dict = maintenance.model_dump() if hasattr(maintenance, 'model_dump') else maintenance.__dict__.copy()
+        await invalidate_response_cache(TAG_ASSETS, TAG_MAINTENANCE, TAG_INVENTORY)
         
         return MaintenanceResponse(success=True, maintenance=maintenance_dict)
     
@@ -525,7 +516,8 @@ def parse_date(date_str: str) -> datetime:
 @router.post("", response_model=MaintenanceResponse, status_code=status.HTTP_201_CREATED)
 async def create_maintenance(
     maintenance_data: MaintenanceCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a maintenance record"""
     try:
@@ -534,7 +526,7 @@ async def create_maintenance(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canManageMaintenance")
+        has_permission = permissions.has("canManageMaintenance")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -671,6 +663,15 @@ async def create_maintenance(
                             }
                         )
             
+            await record_activity(transaction, activity(
+                ACTIVITY_MAINTENANCE,
+                maintenance.id,
+                actual_asset_id,
+                maintenance.createdAt,
+                actor=user_name,
+                details=maintenance.title
+            ))
+            
             # Update asset status based on maintenance status
             new_asset_status = None
             if maintenance_data.status == 'Completed' or maintenance_data.status == 'Cancelled':
@@ -747,10 +748,13 @@ async def create_maintenance(
                 ] if maintenance_with_items.inventoryItems else []
             }
             
-            return MaintenanceResponse(
-                success=True,
-                maintenance=maintenance_dict
-            )
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS, TAG_MAINTENANCE, TAG_INVENTORY)
+        
+        return MaintenanceResponse(
+            success=True,
+            maintenance=maintenance_dict
+        )
     
     except HTTPException:
         raise
@@ -8,28 +8,17 @@ import logging
 
 from models.move import MoveCreate, MoveResponse, MoveStatsResponse
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.asset_distinct import invalidate_distinct_asset_values
+from utils.response_cache import cached_response, invalidate_response_cache, TAG_ASSETS, TAG_MOVE
+from utils.activity_ledger import ACTIVITY_MOVE, activity, record_activity
+from utils.asset_search import refresh_asset_search_index
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/assets/move", tags=["move"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 def parse_date(date_str: str) -> datetime:
     """Parse date string to datetime"""
@@ -44,7 +33,8 @@ def parse_date(date_str: str) -> datetime:
 @router.post("", response_model=MoveResponse, status_code=status.HTTP_201_CREATED)
 async def create_move(
     move_data: MoveCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a move record for an asset"""
     try:
@@ -53,7 +43,7 @@ async def create_move(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canMove")
+        has_permission = permissions.has("canMove")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -281,6 +271,16 @@ async def create_move(
                 }
             )
 
+            await record_activity(transaction, activity(
+                ACTIVITY_MOVE,
+                move.id,
+                move_data.assetId,
+                move_date,
+                actor=userName,
+                employee_user_id=move.employeeUserId,
+                details=f"{move.moveType}: {move.reason or 'No reason provided'}"
+            ))
+
             move_dict = {
                 "id": str(move.id),
                 "assetId": str(move.assetId),
@@ -302,10 +302,15 @@ async def create_move(
                 } if move.employeeUser else None
             }
 
-            return MoveResponse(
-                success=True,
-                move=move_dict
-            )
+            invalidate_distinct_asset_values()
+
+        await invalidate_response_cache(TAG_ASSETS, TAG_MOVE)
+        await refresh_asset_search_index([move_data.assetId])
+
+        return MoveResponse(
+            success=True,
+            move=move_dict
+        )
 
     except HTTPException:
         raise
@@ -314,6 +319,7 @@ async def create_move(
         raise HTTPException(status_code=500, detail=f"Failed to move asset: {str(e)}")
 
 @router.get("/stats", response_model=MoveStatsResponse)
+@cached_response("move.stats", tags=[TAG_MOVE], ttl=30)
 async def get_move_stats(
     auth: dict = Depends(verify_auth)
 ):
@@ -2,18 +2,18 @@
 Reports API router
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
-from fastapi.responses import StreamingResponse, Response
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone, timedelta
 import logging
-import io
-import csv
 import asyncio
 
 from models.reports import ReportDataResponse, ReportSummary, StatusGroup, CategoryGroup, LocationGroup, SiteGroup, RecentAsset, AuditReportResponse, AuditItem, PaginationInfo
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
-from utils.pdf_generator import is_pdf_available, ReportPDF, PDF_AVAILABLE
+from utils.pdf_generator import is_pdf_available
+from utils.export_stream import iter_chunks, iter_rows, rows_from, with_header
+from utils.report_export import ReportExport, ReportSection, check_export_format, export_response
 
 # Timezone for PDF generation (UTC+8 for Philippines)
 TIMEZONE_OFFSET_HOURS = 8
@@ -23,22 +23,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/reports/assets", tags=["reports"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 def format_number(value: Optional[float]) -> str:
     """Format number with commas and 2 decimal places"""
@@ -108,21 +92,6 @@ async def get_assets_summary(
             if date_filters:
                 where_clause["OR"] = date_filters
 
-        # Get total assets count and fetch assets for sum calculation
-        # Prisma Client Python doesn't have aggregate, so we fetch and sum in Python
-        total_assets, assets_for_sum = await asyncio.gather(
-            prisma.assets.count(where=where_clause),
-            prisma.assets.find_many(
-                where={**where_clause, "cost": {"not": None}}
-            )
-        )
-
-        # Calculate total value
-        total_value = sum(
-            float(asset.cost) if asset.cost is not None else 0.0
-            for asset in assets_for_sum
-        )
-
         # Get assets by status
         status_groups_raw = await prisma.assets.group_by(
             by=["status"],
@@ -140,6 +109,10 @@ async def get_assets_summary(
             for row in status_groups_raw
         ]
 
+        # Totals come from the status groups - no need to load every asset row
+        total_assets = sum(group.count for group in by_status)
+        total_value = sum(group.value for group in by_status)
+
         # Get assets by category
         category_groups_raw = await prisma.assets.group_by(
             by=["categoryId"],
@@ -246,6 +219,248 @@ async def get_assets_summary(
         logger.error(f"Error generating summary report: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to generate summary report")
 
+ASSET_LIST_HEADERS = [
+    "Asset Tag ID", "Description", "Purchased From", "Purchase Date", "Brand", "Cost", "Model",
+    "Serial No", "Additional Information", "Xero Asset No.", "Owner", "Sub Category", "PBI Number",
+    "Status", "Issued To", "PO Number", "Payment Voucher Number", "Asset Type", "Delivery Date",
+    "Unaccounted Inventory", "Remarks", "QR", "Old Asset Tag", "Depreciable Asset", "Depreciable Cost",
+    "Salvage Value", "Asset Life (months)", "Depreciation Method", "Date Acquired", "Category",
+    "Department", "Site", "Location", "Created At",
+]
+
+
+def _date_only(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat().split('T')[0] if value else None
+
+
+def _asset_list_row(asset) -> List[Any]:
+    """One asset as a row of ASSET_LIST_HEADERS values"""
+    return [
+        asset.assetTagId,
+        asset.description,
+        asset.purchasedFrom,
+        _date_only(asset.purchaseDate),
+        asset.brand,
+        format_number(float(asset.cost) if asset.cost else 0),
+        asset.model,
+        asset.serialNo,
+        asset.additionalInformation,
+        asset.xeroAssetNo,
+        asset.owner,
+        asset.subCategory.name if asset.subCategory else None,
+        asset.pbiNumber,
+        asset.status,
+        asset.issuedTo,
+        asset.poNumber,
+        asset.paymentVoucherNumber,
+        asset.assetType,
+        _date_only(asset.deliveryDate),
+        asset.unaccountedInventory,
+        asset.remarks,
+        asset.qr,
+        asset.oldAssetTag,
+        asset.depreciableAsset,
+        format_number(float(asset.depreciableCost) if asset.depreciableCost else None),
+        format_number(float(asset.salvageValue) if asset.salvageValue else None),
+        str(asset.assetLifeMonths) if asset.assetLifeMonths else "",
+        asset.depreciationMethod,
+        _date_only(asset.dateAcquired),
+        asset.category.name if asset.category else None,
+        asset.department,
+        asset.site,
+        asset.location,
+        _date_only(asset.createdAt),
+    ]
+
+
+async def _export_groups(where_clause: Dict[str, Any]):
+    """
+    Asset count and value per status and per category name, largest first,
+    computed with group_by instead of loading the assets
+    """
+    status_rows, category_rows = await asyncio.gather(
+        prisma.assets.group_by(by=["status"], where=where_clause, count=True, sum={"cost": True}),
+        prisma.assets.group_by(by=["categoryId"], where=where_clause, count=True, sum={"cost": True}),
+    )
+
+    category_ids = [row.get("categoryId") for row in category_rows if row.get("categoryId")]
+    categories = await prisma.category.find_many(where={"id": {"in": category_ids}}) if category_ids else []
+    category_map = {cat.id: cat.name for cat in categories}
+
+    def fold(rows, label_of) -> List[Dict[str, Any]]:
+        groups: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            label = label_of(row)
+            group = groups.setdefault(label, {"label": label, "count": 0, "totalValue": 0.0})
+            group["count"] += row.get("_count", {}).get("_all", 0)
+            group["totalValue"] += float(row.get("_sum", {}).get("cost") or 0)
+        return sorted(groups.values(), key=lambda g: g["count"], reverse=True)
+
+    status_groups = fold(status_rows, lambda row: row.get("status") or "Unknown")
+    category_groups = fold(category_rows, lambda row: category_map.get(row.get("categoryId")) or "Uncategorized")
+    return status_groups, category_groups
+
+
+async def build_assets_export(
+    reportType: str = "summary",
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    site: Optional[str] = None,
+    department: Optional[str] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    includeAssetList: Optional[bool] = False
+) -> ReportExport:
+    """
+    Assets report export. Group figures come from group_by; the asset list is
+    read in keyset chunks as it is written.
+    """
+    # Build where clause
+    where_clause: Dict[str, Any] = {
+        "isDeleted": False,
+    }
+
+    if status:
+        where_clause["status"] = status
+    if category:
+        where_clause["categoryId"] = category
+    if location:
+        where_clause["location"] = location
+    if site:
+        where_clause["site"] = site
+    if department:
+        where_clause["department"] = department
+    if startDate or endDate:
+        created_at_filter: Dict[str, Any] = {}
+        if startDate:
+            created_at_filter["gte"] = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
+        if endDate:
+            created_at_filter["lte"] = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
+        if created_at_filter:
+            where_clause["createdAt"] = created_at_filter
+
+    status_groups, category_groups = await _export_groups(where_clause)
+    total_assets = sum(group["count"] for group in status_groups)
+    total_value = sum(group["totalValue"] for group in status_groups)
+
+    def group_row(label: str, group: Dict[str, Any], keys: List[str]) -> Dict[str, Any]:
+        # keys: label, count, total value, average value and percentage column names
+        return dict(zip(keys, [
+            label,
+            str(group["count"]),
+            format_number(group["totalValue"]),
+            format_number(group["totalValue"] / group["count"] if group["count"] > 0 else 0),
+            f"{(group['count'] / total_assets * 100):.1f}%" if total_assets > 0 else "0%",
+        ]))
+
+    summary_keys = ["Metric", "Value", "Total Value", "Average Value", "Percentage"]
+
+    # Prepare export data based on report type
+    export_data: List[Dict[str, Any]] = []
+    report_type_label = "Summary" if reportType == "summary" else ("Status" if reportType == "status" else "Category")
+    with_asset_list = reportType not in ("status", "category") and bool(includeAssetList)
+
+    if reportType == "status":
+        export_data = [
+            group_row(group["label"], group, ["Status", "Asset Count", "Total Value", "Average Value", "Percentage of Total"])
+            for group in status_groups
+        ]
+
+    elif reportType == "category":
+        export_data = [
+            group_row(group["label"], group, ["Category", "Asset Count", "Total Value", "Average Value", "Percentage of Total"])
+            for group in category_groups
+        ]
+
+    else:  # summary
+        separator = {"Metric": "---", "Value": "---", "Total Value": "---", "Average Value": "---", "Percentage": "---"}
+        export_data = [
+            {
+                "Metric": "Total Assets",
+                "Value": str(total_assets),
+                "Total Value": format_number(total_value),
+                "Average Value": format_number(total_value / total_assets if total_assets > 0 else 0),
+                "Percentage": "100%",
+            },
+            separator,
+            {"Metric": "ASSETS BY STATUS", "Value": "", "Total Value": "", "Average Value": "", "Percentage": ""},
+            *[group_row(f"Status: {group['label']}", group, summary_keys) for group in status_groups],
+            separator,
+            {"Metric": "ASSETS BY CATEGORY", "Value": "", "Total Value": "", "Average Value": "", "Percentage": ""},
+            *[group_row(f"Category: {group['label']}", group, summary_keys) for group in category_groups],
+        ]
+
+    if not export_data:
+        raise HTTPException(status_code=400, detail="No data to export")
+
+    def table(data: List[Dict[str, Any]]) -> List[List[Any]]:
+        headers = list(data[0].keys())
+        return [headers, *[[row.get(header, "") for header in headers] for row in data]]
+
+    async def asset_list_rows():
+        async for asset in iter_rows(iter_chunks(
+            prisma.assets,
+            where=where_clause,
+            include={"category": True, "subCategory": True}
+        )):
+            yield _asset_list_row(asset)
+
+    async def csv_rows():
+        if with_asset_list:
+            yield ["=== SUMMARY STATISTICS ==="]
+        for row in table(export_data):
+            yield row
+        if with_asset_list:
+            yield []
+            yield ["=== ASSET LIST ==="]
+            async for row in with_header(ASSET_LIST_HEADERS, asset_list_rows()):
+                yield row
+
+    def sheets():
+        if not with_asset_list:
+            return [(f"Assets by {report_type_label}", rows_from(table(export_data)))]
+        status_data = [row for row in export_data if row.get("Metric", "").startswith("Status:")]
+        category_data = [row for row in export_data if row.get("Metric", "").startswith("Category:")]
+        tables = [("Summary", rows_from(table(export_data)))]
+        if status_data:
+            tables.append(("By Status", rows_from(table(status_data))))
+        if category_data:
+            tables.append(("By Category", rows_from(table(category_data))))
+        tables.append(("Asset List", with_header(ASSET_LIST_HEADERS, asset_list_rows())))
+        return tables
+
+    async def pdf_sections():
+        headers, *rows = table(export_data)
+        if not with_asset_list:
+            # Single section export
+            yield ReportSection(f"Assets by {report_type_label}", headers, rows_from(rows))
+            return
+
+        yield ReportSection("Summary Statistics", headers, rows_from(rows))
+
+        # Asset List section - simplified columns for PDF to fit better
+        simplified_headers = ["Asset Tag ID", "Description", "Category", "Status", "Cost", "Location", "Site", "Department"]
+        column_indexes = [ASSET_LIST_HEADERS.index(header) for header in simplified_headers]
+
+        async def asset_list():
+            async for row in asset_list_rows():
+                values = [row[index] for index in column_indexes]
+                values[1] = (values[1] or "")[:50]  # Truncate long descriptions
+                yield values
+
+        yield ReportSection("Asset List ({count} assets)", simplified_headers, asset_list())
+
+    return ReportExport(
+        filename=f"asset-report-{reportType}-{datetime.now().strftime('%Y-%m-%d')}",
+        title=f"Asset Report - {report_type_label}",
+        report_type="Assets",
+        csv_rows=csv_rows,
+        sheets=sheets,
+        pdf_sections=pdf_sections,
+    )
+
+
 @router.get("/export")
 async def export_assets_report(
     format: str = Query("csv", description="Export format: csv, excel, or pdf"),
@@ -258,474 +473,43 @@ async def export_assets_report(
     startDate: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     endDate: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     includeAssetList: Optional[bool] = Query(False, description="Include asset list in summary report"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
-    """Export assets report to CSV, Excel, or PDF"""
+    """
+    Export assets report to CSV, Excel, or PDF.
+    The asset list is streamed (CSV) or written to a spooled write-only workbook (Excel).
+    """
     try:
         user_id = auth.get("user_id")
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageReports to export reports
-        has_permission = await check_permission(user_id, "canManageReports")
+        has_permission = permissions.has("canManageReports")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
                 detail="You do not have permission to export reports"
             )
 
-        if format not in ["csv", "excel", "pdf"]:
-            raise HTTPException(status_code=400, detail="Invalid format. Use csv, excel, or pdf.")
-        
-        if format == "pdf" and not PDF_AVAILABLE:
-            raise HTTPException(status_code=500, detail="PDF export not available - fpdf2 not installed")
-
-        # Build where clause
-        where_clause: Dict[str, Any] = {
-            "isDeleted": False,
-        }
-
-        if status:
-            where_clause["status"] = status
-        if category:
-            where_clause["categoryId"] = category
-        if location:
-            where_clause["location"] = location
-        if site:
-            where_clause["site"] = site
-        if department:
-            where_clause["department"] = department
-        if startDate or endDate:
-            created_at_filter: Dict[str, Any] = {}
-            if startDate:
-                created_at_filter["gte"] = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
-            if endDate:
-                created_at_filter["lte"] = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
-            if created_at_filter:
-                where_clause["createdAt"] = created_at_filter
-
-        # Fetch assets
-        assets_raw = await prisma.assets.find_many(
-            where=where_clause,
-            include={"category": True},
-            order={"createdAt": "desc"}
+        check_export_format(format)
+
+        export = await build_assets_export(
+            reportType=reportType,
+            status=status,
+            category=category,
+            location=location,
+            site=site,
+            department=department,
+            startDate=startDate,
+            endDate=endDate,
+            includeAssetList=includeAssetList,
         )
-
-        # Convert to list of dicts for easier processing
-        assets = [
-            {
-                "id": asset.id,
-                "assetTagId": asset.assetTagId,
-                "description": asset.description,
-                "status": asset.status,
-                "cost": float(asset.cost) if asset.cost else 0,
-                "category": asset.category.name if asset.category else None,
-                "purchasedFrom": asset.purchasedFrom,
-                "purchaseDate": asset.purchaseDate.isoformat().split('T')[0] if asset.purchaseDate else None,
-                "brand": asset.brand,
-                "model": asset.model,
-                "serialNo": asset.serialNo,
-                "additionalInformation": asset.additionalInformation,
-                "xeroAssetNo": asset.xeroAssetNo,
-                "owner": asset.owner,
-                "subCategory": asset.subCategory,
-                "pbiNumber": asset.pbiNumber,
-                "issuedTo": asset.issuedTo,
-                "poNumber": asset.poNumber,
-                "paymentVoucherNumber": asset.paymentVoucherNumber,
-                "assetType": asset.assetType,
-                "deliveryDate": asset.deliveryDate.isoformat().split('T')[0] if asset.deliveryDate else None,
-                "unaccountedInventory": asset.unaccountedInventory,
-                "remarks": asset.remarks,
-                "qr": asset.qr,
-                "oldAssetTag": asset.oldAssetTag,
-                "depreciableAsset": asset.depreciableAsset,
-                "depreciableCost": float(asset.depreciableCost) if asset.depreciableCost else None,
-                "salvageValue": float(asset.salvageValue) if asset.salvageValue else None,
-                "assetLifeMonths": asset.assetLifeMonths,
-                "depreciationMethod": asset.depreciationMethod,
-                "dateAcquired": asset.dateAcquired.isoformat().split('T')[0] if asset.dateAcquired else None,
-                "department": asset.department,
-                "site": asset.site,
-                "location": asset.location,
-                "createdAt": asset.createdAt.isoformat().split('T')[0],
-            }
-            for asset in assets_raw
-        ]
-
-        # Prepare export data based on report type
-        export_data: Any = []
-        report_type_label = "Summary" if reportType == "summary" else ("Status" if reportType == "status" else "Category")
-
-        if reportType == "status":
-            # Group by status
-            status_groups: Dict[str, Dict[str, Any]] = {}
-            for asset in assets:
-                status_key = asset["status"] or "Unknown"
-                if status_key not in status_groups:
-                    status_groups[status_key] = {"count": 0, "totalValue": 0, "assets": []}
-                status_groups[status_key]["count"] += 1
-                status_groups[status_key]["totalValue"] += asset["cost"]
-                status_groups[status_key]["assets"].append(asset)
-
-            export_data = [
-                {
-                    "Status": status,
-                    "Asset Count": str(data["count"]),
-                    "Total Value": format_number(data["totalValue"]),
-                    "Average Value": format_number(data["totalValue"] / data["count"] if data["count"] > 0 else 0),
-                    "Percentage of Total": f"{(data['count'] / len(assets) * 100):.1f}%" if len(assets) > 0 else "0%",
-                }
-                for status, data in sorted(status_groups.items(), key=lambda x: x[1]["count"], reverse=True)
-            ]
-
-        elif reportType == "category":
-            # Group by category
-            category_groups: Dict[str, Dict[str, Any]] = {}
-            for asset in assets:
-                category_key = asset["category"] or "Uncategorized"
-                if category_key not in category_groups:
-                    category_groups[category_key] = {"count": 0, "totalValue": 0, "assets": []}
-                category_groups[category_key]["count"] += 1
-                category_groups[category_key]["totalValue"] += asset["cost"]
-                category_groups[category_key]["assets"].append(asset)
-
-            export_data = [
-                {
-                    "Category": category,
-                    "Asset Count": str(data["count"]),
-                    "Total Value": format_number(data["totalValue"]),
-                    "Average Value": format_number(data["totalValue"] / data["count"] if data["count"] > 0 else 0),
-                    "Percentage of Total": f"{(data['count'] / len(assets) * 100):.1f}%" if len(assets) > 0 else "0%",
-                }
-                for category, data in sorted(category_groups.items(), key=lambda x: x[1]["count"], reverse=True)
-            ]
-
-        else:  # summary
-            # Calculate totals and groups
-            total_assets = len(assets)
-            total_value = sum(asset["cost"] for asset in assets)
-
-            # Group by status
-            status_groups: Dict[str, Dict[str, Any]] = {}
-            for asset in assets:
-                status_key = asset["status"] or "Unknown"
-                if status_key not in status_groups:
-                    status_groups[status_key] = {"count": 0, "totalValue": 0}
-                status_groups[status_key]["count"] += 1
-                status_groups[status_key]["totalValue"] += asset["cost"]
-
-            # Group by category
-            category_groups: Dict[str, Dict[str, Any]] = {}
-            for asset in assets:
-                category_key = asset["category"] or "Uncategorized"
-                if category_key not in category_groups:
-                    category_groups[category_key] = {"count": 0, "totalValue": 0}
-                category_groups[category_key]["count"] += 1
-                category_groups[category_key]["totalValue"] += asset["cost"]
-
-            # Build summary statistics data
-            summary_data = [
-                {
-                    "Metric": "Total Assets",
-                    "Value": str(total_assets),
-                    "Total Value": format_number(total_value),
-                    "Average Value": format_number(total_value / total_assets if total_assets > 0 else 0),
-                    "Percentage": "100%",
-                },
-                {
-                    "Metric": "---",
-                    "Value": "---",
-                    "Total Value": "---",
-                    "Average Value": "---",
-                    "Percentage": "---",
-                },
-                {
-                    "Metric": "ASSETS BY STATUS",
-                    "Value": "",
-                    "Total Value": "",
-                    "Average Value": "",
-                    "Percentage": "",
-                },
-                *[
-                    {
-                        "Metric": f"Status: {status}",
-                        "Value": str(data["count"]),
-                        "Total Value": format_number(data["totalValue"]),
-                        "Average Value": format_number(data["totalValue"] / data["count"] if data["count"] > 0 else 0),
-                        "Percentage": f"{(data['count'] / total_assets * 100):.1f}%" if total_assets > 0 else "0%",
-                    }
-                    for status, data in sorted(status_groups.items(), key=lambda x: x[1]["count"], reverse=True)
-                ],
-                {
-                    "Metric": "---",
-                    "Value": "---",
-                    "Total Value": "---",
-                    "Average Value": "---",
-                    "Percentage": "---",
-                },
-                {
-                    "Metric": "ASSETS BY CATEGORY",
-                    "Value": "",
-                    "Total Value": "",
-                    "Average Value": "",
-                    "Percentage": "",
-                },
-                *[
-                    {
-                        "Metric": f"Category: {category}",
-                        "Value": str(data["count"]),
-                        "Total Value": format_number(data["totalValue"]),
-                        "Average Value": format_number(data["totalValue"] / data["count"] if data["count"] > 0 else 0),
-                        "Percentage": f"{(data['count'] / total_assets * 100):.1f}%" if total_assets > 0 else "0%",
-                    }
-                    for category, data in sorted(category_groups.items(), key=lambda x: x[1]["count"], reverse=True)
-                ],
-            ]
-
-            if includeAssetList:
-                # Full asset export with all fields + summary
-                asset_list_data = [
-                    {
-                        "Asset Tag ID": asset.get("assetTagId", ""),
-                        "Description": asset.get("description", ""),
-                        "Purchased From": asset.get("purchasedFrom", ""),
-                        "Purchase Date": asset.get("purchaseDate", ""),
-                        "Brand": asset.get("brand", ""),
-                        "Cost": format_number(asset.get("cost")),
-                        "Model": asset.get("model", ""),
-                        "Serial No": asset.get("serialNo", ""),
-                        "Additional Information": asset.get("additionalInformation", ""),
-                        "Xero Asset No.": asset.get("xeroAssetNo", ""),
-                        "Owner": asset.get("owner", ""),
-                        "Sub Category": asset.get("subCategory", ""),
-                        "PBI Number": asset.get("pbiNumber", ""),
-                        "Status": asset.get("status", ""),
-                        "Issued To": asset.get("issuedTo", ""),
-                        "PO Number": asset.get("poNumber", ""),
-                        "Payment Voucher Number": asset.get("paymentVoucherNumber", ""),
-                        "Asset Type": asset.get("assetType", ""),
-                        "Delivery Date": asset.get("deliveryDate", ""),
-                        "Unaccounted Inventory": asset.get("unaccountedInventory", ""),
-                        "Remarks": asset.get("remarks", ""),
-                        "QR": asset.get("qr", ""),
-                        "Old Asset Tag": asset.get("oldAssetTag", ""),
-                        "Depreciable Asset": asset.get("depreciableAsset", ""),
-                        "Depreciable Cost": format_number(asset.get("depreciableCost")),
-                        "Salvage Value": format_number(asset.get("salvageValue")),
-                        "Asset Life (months)": str(asset.get("assetLifeMonths", "")) if asset.get("assetLifeMonths") else "",
-                        "Depreciation Method": asset.get("depreciationMethod", ""),
-                        "Date Acquired": asset.get("dateAcquired", ""),
-                        "Category": asset.get("category", ""),
-                        "Department": asset.get("department", ""),
-                        "Site": asset.get("site", ""),
-                        "Location": asset.get("location", ""),
-                        "Created At": asset.get("createdAt", ""),
-                    }
-                    for asset in assets
-                ]
-
-                export_data = {"summary": summary_data, "assetList": asset_list_data}
-            else:
-                export_data = summary_data
-
-        # Generate file
-        filename = f"asset-report-{reportType}-{datetime.now().strftime('%Y-%m-%d')}"
-
-        if format == "csv":
-            # Generate CSV
-            if isinstance(export_data, dict):
-                # Summary report with asset list
-                summary_data = export_data["summary"]
-                asset_list_data = export_data["assetList"]
-
-                # Create CSV content
-                output = io.StringIO()
-                writer = csv.writer(output)
-
-                # Summary section
-                writer.writerow(["=== SUMMARY STATISTICS ==="])
-                if summary_data:
-                    summary_headers = list(summary_data[0].keys())
-                    writer.writerow(summary_headers)
-                    for row in summary_data:
-                        writer.writerow([row.get(header, "") for header in summary_headers])
-                
-                writer.writerow([])
-                writer.writerow(["=== ASSET LIST ==="])
-                
-                # Asset list section
-                if asset_list_data:
-                    asset_headers = list(asset_list_data[0].keys())
-                    writer.writerow(asset_headers)
-                    for row in asset_list_data:
-                        writer.writerow([row.get(header, "") for header in asset_headers])
-
-                csv_content = output.getvalue()
-                output.close()
-            else:
-                # Single section export
-                if not export_data:
-                    raise HTTPException(status_code=400, detail="No data to export")
-
-                output = io.StringIO()
-                writer = csv.writer(output)
-
-                headers = list(export_data[0].keys())
-                writer.writerow(headers)
-                for row in export_data:
-                    writer.writerow([row.get(header, "") for header in headers])
-
-                csv_content = output.getvalue()
-                output.close()
-
-            filename += ".csv"
-            return Response(
-                content=csv_content,
-                media_type="text/csv",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
-                }
-            )
-
-        elif format == "excel":
-            # Import openpyxl for Excel generation
-            try:
-                from openpyxl import Workbook  # type: ignore
-            except ImportError:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Excel export not available - openpyxl not installed"
-                )
-
-            wb = Workbook()
-            wb.remove(wb.active)  # Remove default sheet
-
-            if isinstance(export_data, dict):
-                # Summary report with asset list - multiple sheets
-                summary_data = export_data["summary"]
-                asset_list_data = export_data["assetList"]
-
-                # Summary sheet
-                if summary_data:
-                    summary_ws = wb.create_sheet("Summary")
-                    summary_headers = list(summary_data[0].keys())
-                    summary_ws.append(summary_headers)
-                    for row in summary_data:
-                        summary_ws.append([row.get(header, "") for header in summary_headers])
-
-                # Assets by Status sheet
-                status_data = [row for row in summary_data if row.get("Metric", "").startswith("Status:")]
-                if status_data:
-                    status_ws = wb.create_sheet("By Status")
-                    status_headers = list(status_data[0].keys())
-                    status_ws.append(status_headers)
-                    for row in status_data:
-                        status_ws.append([row.get(header, "") for header in status_headers])
-
-                # Assets by Category sheet
-                category_data = [row for row in summary_data if row.get("Metric", "").startswith("Category:")]
-                if category_data:
-                    category_ws = wb.create_sheet("By Category")
-                    category_headers = list(category_data[0].keys())
-                    category_ws.append(category_headers)
-                    for row in category_data:
-                        category_ws.append([row.get(header, "") for header in category_headers])
-
-                # Asset List sheet
-                if asset_list_data:
-                    asset_list_ws = wb.create_sheet("Asset List")
-                    asset_headers = list(asset_list_data[0].keys())
-                    asset_list_ws.append(asset_headers)
-                    for row in asset_list_data:
-                        asset_list_ws.append([row.get(header, "") for header in asset_headers])
-            else:
-                # Single sheet export
-                if not export_data:
-                    raise HTTPException(status_code=400, detail="No data to export")
-
-                ws = wb.create_sheet(f"Assets by {report_type_label}")
-                headers = list(export_data[0].keys())
-                ws.append(headers)
-                for row in export_data:
-                    ws.append([row.get(header, "") for header in headers])
-
-            # Save to buffer
-            buffer = io.BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
-            filename += ".xlsx"
-            return StreamingResponse(
-                buffer,
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
-                }
-            )
-
-        else:  # pdf
-            # Generate PDF using fpdf2
-            report_name = f"Asset Report - {report_type_label}"
-            pdf = ReportPDF(report_name, "Assets")
-            pdf.add_page()
-
-            if isinstance(export_data, dict):
-                # Summary report with asset list
-                summary_data_pdf = export_data["summary"]
-                asset_list_data_pdf = export_data["assetList"]
-
-                # Summary section
-                pdf.add_section_title("Summary Statistics")
-                if summary_data_pdf:
-                    headers = list(summary_data_pdf[0].keys())
-                    rows = [[str(row.get(h, '')) for h in headers] for row in summary_data_pdf]
-                    pdf.add_table(headers, rows)
-                
-                pdf.ln(10)
-
-                # Asset List section
-                if asset_list_data_pdf and includeAssetList:
-                    pdf.add_section_title(f"Asset List ({len(asset_list_data_pdf)} assets)")
-                    # Use simplified columns for PDF to fit better
-                    simplified_headers = ["Asset Tag ID", "Description", "Category", "Status", "Cost", "Location", "Site", "Department"]
-                    simplified_rows = [
-                        [
-                            str(row.get("Asset Tag ID", "")),
-                            str(row.get("Description", ""))[:50],  # Truncate long descriptions
-                            str(row.get("Category", "")),
-                            str(row.get("Status", "")),
-                            str(row.get("Cost", "")),
-                            str(row.get("Location", "")),
-                            str(row.get("Site", "")),
-                            str(row.get("Department", "")),
-                        ]
-                        for row in asset_list_data_pdf
-                    ]
-                    pdf.add_table(simplified_headers, simplified_rows)
-            else:
-                # Single section export
-                if export_data:
-                    pdf.add_section_title(f"Assets by {report_type_label}")
-                    headers = list(export_data[0].keys())
-                    rows = [[str(row.get(h, '')) for h in headers] for row in export_data]
-                    pdf.add_table(headers, rows)
-
-            # Generate PDF bytes
-            pdf_content = bytes(pdf.output())
-            
-            filename += ".pdf"
-            return Response(
-                content=pdf_content,
-                media_type="application/pdf",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
-                }
-            )
+        return await export_response(export, format)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error exporting report: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to export report")
-
@@ -2,38 +2,23 @@
 Audit Reports API router
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
-from fastapi.responses import StreamingResponse, Response
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import logging
-import io
-import csv
+import asyncio
 
 from models.reports import AuditReportResponse, AuditItem, PaginationInfo
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
-from utils.pdf_generator import ReportPDF, PDF_AVAILABLE
+from utils.pagination import keyset_order, keyset_where, split_page
+from utils.export_stream import iter_chunks, iter_rows, rows_from, with_header
+from utils.report_export import ReportExport, ReportSection, check_export_format, export_response
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/reports/audit", tags=["reports"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 @router.get("", response_model=AuditReportResponse)
 async def get_audit_reports(
@@ -46,6 +31,7 @@ async def get_audit_reports(
     endDate: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     page: int = Query(1, ge=1),
     pageSize: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="pagination.nextCursor of the previous page; replaces page"),
     auth: dict = Depends(verify_auth)
 ):
     """Get audit reports with optional filters and pagination"""
@@ -112,12 +98,13 @@ async def get_audit_reports(
 
         # Get paginated audit records
         audits_raw = await prisma.assetsaudithistory.find_many(
-            where=where_clause,
+            where=keyset_where(where_clause, cursor, "auditDate"),
             include={"asset": {"include": {"category": True, "subCategory": True}}},
-            order={"auditDate": "desc"},
-            skip=skip,
-            take=pageSize
+            order=keyset_order("auditDate"),
+            skip=0 if cursor else skip,
+            take=pageSize + 1
         )
+        audits_raw, next_cursor = split_page(audits_raw, pageSize, "auditDate")
 
         # Format the response
         formatted_audits = [
@@ -144,8 +131,9 @@ async def get_audit_reports(
                 page=page,
                 pageSize=pageSize,
                 totalPages=total_pages,
-                hasNextPage=page < total_pages,
-                hasPreviousPage=page > 1,
+                hasNextPage=next_cursor is not None,
+                hasPreviousPage=page > 1 or cursor is not None,
+                nextCursor=next_cursor,
             )
         )
 
@@ -155,9 +143,146 @@ async def get_audit_reports(
         logger.error(f"Error fetching audit reports: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch audit reports")
 
+
+async def build_audit_export(
+    category: Optional[str] = None,
+    auditType: Optional[str] = None,
+    location: Optional[str] = None,
+    site: Optional[str] = None,
+    auditor: Optional[str] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    includeAuditList: Optional[bool] = False
+) -> ReportExport:
+    """Audit report export: summary from the database, audit records read in keyset chunks"""
+    # Build where clause (same as main route)
+    where_clause: Dict[str, Any] = {
+        "asset": {
+            "isDeleted": False,
+        }
+    }
+
+    if category:
+        where_clause["asset"] = {
+            **where_clause["asset"],
+            "category": {
+                "name": category
+            }
+        }
+
+    if auditType:
+        where_clause["auditType"] = auditType
+
+    if location:
+        where_clause["asset"] = {
+            **where_clause["asset"],
+            "location": location
+        }
+
+    if site:
+        where_clause["asset"] = {
+            **where_clause["asset"],
+            "site": site
+        }
+
+    if auditor:
+        where_clause["auditor"] = {
+            "contains": auditor,
+            "mode": "insensitive"
+        }
+
+    if startDate or endDate:
+        audit_date_filter: Dict[str, Any] = {}
+        if startDate:
+            audit_date_filter["gte"] = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
+        if endDate:
+            audit_date_filter["lte"] = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
+        if audit_date_filter:
+            where_clause["auditDate"] = audit_date_filter
+
+    # Summary statistics from the database instead of the loaded rows
+    total_audits, type_groups = await asyncio.gather(
+        prisma.assetsaudithistory.count(where=where_clause),
+        prisma.assetsaudithistory.group_by(by=["auditType"], where=where_clause, count=True),
+    )
+    audits_by_type = sorted(
+        [
+            {"auditType": row.get("auditType"), "count": row.get("_count", {}).get("_all", 0)}
+            for row in type_groups
+        ],
+        key=lambda item: item["count"],
+        reverse=True
+    )
+
+    audit_headers = ["Asset Tag ID", "Category", "Sub-Category", "Audit Type", "Audited to Site", "Audited to Location", "Last Audit Date", "Audit By"]
+
+    async def audit_rows():
+        # Audit records in keyset chunks, formatted as they are read
+        async for audit in iter_rows(iter_chunks(
+            prisma.assetsaudithistory,
+            where=where_clause,
+            include={"asset": {"include": {"category": True, "subCategory": True}}},
+            sort_field="auditDate"
+        )):
+            yield [
+                audit.asset.assetTagId,
+                audit.asset.category.name if audit.asset.category else "N/A",
+                audit.asset.subCategory.name if audit.asset.subCategory else "N/A",
+                audit.auditType,
+                audit.asset.site or "N/A",
+                audit.asset.location or "N/A",
+                audit.auditDate.isoformat().split('T')[0],
+                audit.auditor or "N/A",
+            ]
+
+    summary_rows = [
+        ["AUDIT REPORT SUMMARY"],
+        ["Total Audits", total_audits],
+        ["Unique Audit Types", len(audits_by_type)],
+        [],
+        ["AUDITS BY TYPE"],
+        ["Audit Type", "Count"],
+        *[[item["auditType"], item["count"]] for item in audits_by_type],
+    ]
+
+    async def csv_rows():
+        for row in summary_rows:
+            yield row
+        if includeAuditList:
+            yield []
+            yield ["AUDIT RECORDS"]
+            async for row in with_header(audit_headers, audit_rows()):
+                yield row
+
+    def sheets():
+        tables = [("Summary", rows_from(summary_rows))]
+        if includeAuditList:
+            tables.append(("Audit List", with_header(audit_headers, audit_rows())))
+        return tables
+
+    async def pdf_sections():
+        pdf_summary_rows = [
+            ["Total Audits", total_audits],
+            ["Unique Audit Types", len(audits_by_type)],
+            *[[f"Type: {item['auditType']}", item["count"]] for item in audits_by_type],
+        ]
+        yield ReportSection("Summary Statistics", ["Metric", "Value"], rows_from(pdf_summary_rows))
+        if includeAuditList:
+            yield ReportSection("Audit List ({count} audits)", audit_headers, audit_rows())
+
+    return ReportExport(
+        filename=f"audit-report-{datetime.now().strftime('%Y-%m-%d')}",
+        title="Audit Report",
+        report_type="Audit",
+        csv_rows=csv_rows,
+        sheets=sheets,
+        pdf_sections=pdf_sections,
+    )
+
+
 @router.get("/export")
 async def export_audit_reports(
-    format: str = Query("csv", description="Export format: csv or excel"),
+    format: str = Query("csv", description="Export format: csv, excel, or pdf"),
     category: Optional[str] = Query(None, description="Filter by category name"),
     auditType: Optional[str] = Query(None, description="Filter by audit type"),
     location: Optional[str] = Query(None, description="Filter by location"),
@@ -166,251 +291,39 @@ async def export_audit_reports(
     startDate: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     endDate: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     includeAuditList: Optional[bool] = Query(False, description="Include audit list in export"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
-    """Export audit reports to CSV or Excel"""
+    """Export audit reports to CSV, Excel, or PDF"""
     try:
         user_id = auth.get("user_id")
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageReports to export reports
-        has_permission = await check_permission(user_id, "canManageReports")
+        has_permission = permissions.has("canManageReports")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
                 detail="You do not have permission to export reports"
             )
 
-        if format not in ["csv", "excel", "pdf"]:
-            raise HTTPException(status_code=400, detail="Invalid format. Use csv, excel, or pdf.")
-        
-        if format == "pdf" and not PDF_AVAILABLE:
-            raise HTTPException(status_code=500, detail="PDF export not available - fpdf2 not installed")
-
-        # Build where clause (same as main route)
-        where_clause: Dict[str, Any] = {
-            "asset": {
-                "isDeleted": False,
-            }
-        }
-
-        if category:
-            where_clause["asset"] = {
-                **where_clause["asset"],
-                "category": {
-                    "name": category
-                }
-            }
-
-        if auditType:
-            where_clause["auditType"] = auditType
-
-        if location:
-            where_clause["asset"] = {
-                **where_clause["asset"],
-                "location": location
-            }
-
-        if site:
-            where_clause["asset"] = {
-                **where_clause["asset"],
-                "site": site
-            }
-
-        if auditor:
-            where_clause["auditor"] = {
-                "contains": auditor,
-                "mode": "insensitive"
-            }
-
-        if startDate or endDate:
-            audit_date_filter: Dict[str, Any] = {}
-            if startDate:
-                audit_date_filter["gte"] = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
-            if endDate:
-                audit_date_filter["lte"] = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
-            if audit_date_filter:
-                where_clause["auditDate"] = audit_date_filter
-
-        # Fetch all audits (or limited if not including list)
-        page_size = 10000 if includeAuditList else 1
-        audits_raw = await prisma.assetsaudithistory.find_many(
-            where=where_clause,
-            include={"asset": {"include": {"category": True, "subCategory": True}}},
-            order={"auditDate": "desc"},
-            take=page_size
+        check_export_format(format)
+
+        export = await build_audit_export(
+            category=category,
+            auditType=auditType,
+            location=location,
+            site=site,
+            auditor=auditor,
+            startDate=startDate,
+            endDate=endDate,
+            includeAuditList=includeAuditList,
         )
-
-        # Calculate summary statistics
-        total_audits = len(audits_raw)
-        unique_audit_types = set(audit.auditType for audit in audits_raw)
-        audits_by_type = [
-            {
-                "auditType": audit_type,
-                "count": sum(1 for audit in audits_raw if audit.auditType == audit_type)
-            }
-            for audit_type in unique_audit_types
-        ]
-
-        # Format audit data
-        formatted_audits = [
-            {
-                "Asset Tag ID": audit.asset.assetTagId,
-                "Category": audit.asset.category.name if audit.asset.category else "N/A",
-                "Sub-Category": audit.asset.subCategory.name if audit.asset.subCategory else "N/A",
-                "Audit Type": audit.auditType,
-                "Audited to Site": audit.asset.site or "N/A",
-                "Audited to Location": audit.asset.location or "N/A",
-                "Last Audit Date": audit.auditDate.isoformat().split('T')[0],
-                "Audit By": audit.auditor or "N/A",
-            }
-            for audit in audits_raw
-        ]
-
-        filename = f"audit-report-{datetime.now().strftime('%Y-%m-%d')}"
-
-        if format == "csv":
-            # Generate CSV
-            output = io.StringIO()
-            writer = csv.writer(output)
-
-            if includeAuditList:
-                # Include summary and audit list
-                writer.writerow(["AUDIT REPORT SUMMARY"])
-                writer.writerow(["Total Audits", total_audits])
-                writer.writerow(["Unique Audit Types", len(unique_audit_types)])
-                writer.writerow([])
-                
-                writer.writerow(["AUDITS BY TYPE"])
-                writer.writerow(["Audit Type", "Count"])
-                for item in audits_by_type:
-                    writer.writerow([item["auditType"], item["count"]])
-                writer.writerow([])
-                
-                writer.writerow(["AUDIT RECORDS"])
-                if formatted_audits:
-                    headers = list(formatted_audits[0].keys())
-                    writer.writerow(headers)
-                    for audit in formatted_audits:
-                        writer.writerow([audit.get(header, "") for header in headers])
-            else:
-                # Summary only
-                writer.writerow(["AUDIT REPORT SUMMARY"])
-                writer.writerow(["Total Audits", total_audits])
-                writer.writerow(["Unique Audit Types", len(unique_audit_types)])
-                writer.writerow([])
-                writer.writerow(["AUDITS BY TYPE"])
-                writer.writerow(["Audit Type", "Count"])
-                for item in audits_by_type:
-                    writer.writerow([item["auditType"], item["count"]])
-
-            csv_content = output.getvalue()
-            output.close()
-
-            filename += ".csv"
-            return Response(
-                content=csv_content,
-                media_type="text/csv",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
-                }
-            )
-
-        elif format == "excel":
-            # Import openpyxl for Excel generation
-            try:
-                from openpyxl import Workbook  # type: ignore
-            except ImportError:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Excel export not available - openpyxl not installed"
-                )
-
-            wb = Workbook()
-            wb.remove(wb.active)  # Remove default sheet
-
-            # Summary sheet
-            summary_data = [
-                ["AUDIT REPORT SUMMARY"],
-                ["Total Audits", total_audits],
-                ["Unique Audit Types", len(unique_audit_types)],
-                [],
-                ["AUDITS BY TYPE"],
-                ["Audit Type", "Count"],
-                *[[item["auditType"], item["count"]] for item in audits_by_type],
-            ]
-            summary_ws = wb.create_sheet("Summary")
-            for row in summary_data:
-                summary_ws.append(row)
-
-            if includeAuditList:
-                # Audit list sheet
-                if formatted_audits:
-                    audit_ws = wb.create_sheet("Audit List")
-                    headers = list(formatted_audits[0].keys())
-                    audit_ws.append(headers)
-                    for audit in formatted_audits:
-                        audit_ws.append([audit.get(header, "") for header in headers])
-
-            # Save to buffer
-            buffer = io.BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
-            filename += ".xlsx"
-            return StreamingResponse(
-                buffer,
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
-                }
-            )
-
-        else:  # pdf
-            pdf = ReportPDF("Audit Report", "Audit")
-            pdf.add_page()
-
-            pdf.add_section_title("Summary Statistics")
-            summary_rows = [
-                ["Total Audits", str(total_audits)],
-                ["Unique Audit Types", str(len(unique_audit_types))],
-            ]
-            # Add audits by type
-            for item in audits_by_type:
-                summary_rows.append([f"Type: {item['auditType']}", str(item['count'])])
-            
-            if summary_rows:
-                headers = ["Metric", "Value"]
-                pdf.add_table(headers, summary_rows)
-            
-            pdf.ln(10)
-
-            if formatted_audits and includeAuditList:
-                pdf.add_section_title(f"Audit List ({len(formatted_audits)} audits)")
-                simplified_headers = ["Asset Tag ID", "Category", "Sub-Category", "Audit Type", "Audited to Site", "Audited to Location", "Last Audit Date", "Audit By"]
-                simplified_rows = [
-                    [
-                        str(a.get("Asset Tag ID", "")),
-                        str(a.get("Category", "")),
-                        str(a.get("Sub-Category", "")),
-                        str(a.get("Audit Type", "")),
-                        str(a.get("Audited to Site", "")),
-                        str(a.get("Audited to Location", "")),
-                        str(a.get("Last Audit Date", "")),
-                        str(a.get("Audit By", "")),
-                    ]
-                    for a in formatted_audits
-                ]
-                pdf.add_table(simplified_headers, simplified_rows)
-
-            pdf_content = bytes(pdf.output())
-            filename += ".pdf"
-            return Response(content=pdf_content, media_type="application/pdf", headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+        return await export_response(export, format)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error exporting audit reports: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to export audit reports")
-
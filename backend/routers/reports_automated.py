@@ -16,6 +16,7 @@ from models.automated_reports import (
     AutomatedReportSchedule
 )
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
 from utils.report_schedule import calculate_next_run_at
 from prisma_client._fields import Json as PrismaJson
@@ -24,22 +25,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/reports/automated", tags=["reports"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 @router.get("", response_model=AutomatedReportScheduleListResponse)
 async def get_automated_reports(
@@ -89,7 +74,8 @@ async def get_automated_reports(
 @router.post("", response_model=AutomatedReportScheduleResponse, status_code=201)
 async def create_automated_report(
     data: AutomatedReportScheduleCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new automated report schedule"""
     try:
@@ -98,7 +84,7 @@ async def create_automated_report(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageReports to create automated reports
-        has_permission = await check_permission(user_id, "canManageReports")
+        has_permission = permissions.has("canManageReports")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -249,7 +235,8 @@ async def get_automated_report(
 async def update_automated_report(
     schedule_id: str = Path(..., description="Schedule ID"),
     data: AutomatedReportScheduleUpdate = ...,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Update an automated report schedule"""
     try:
@@ -258,7 +245,7 @@ async def update_automated_report(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageReports to update automated reports
-        has_permission = await check_permission(user_id, "canManageReports")
+        has_permission = permissions.has("canManageReports")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -368,7 +355,8 @@ async def update_automated_report(
 @router.delete("/{schedule_id}", response_model=AutomatedReportScheduleDeleteResponse)
 async def delete_automated_report(
     schedule_id: str = Path(..., description="Schedule ID"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete an automated report schedule"""
     try:
@@ -377,7 +365,7 @@ async def delete_automated_report(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageReports to delete automated reports
-        has_permission = await check_permission(user_id, "canManageReports")
+        has_permission = permissions.has("canManageReports")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
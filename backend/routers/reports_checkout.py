@@ -2,38 +2,23 @@
 Checkout Reports API router
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
-from fastapi.responses import StreamingResponse, Response
 from typing import Optional, Dict, Any, List
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
-import io
-import csv
+import asyncio
 
 from models.reports import CheckoutReportResponse, CheckoutItem, CheckoutSummary, EmployeeGroup, DepartmentGroup, PaginationInfo
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
-from utils.pdf_generator import ReportPDF, PDF_AVAILABLE
+from utils.pagination import keyset_order
+from utils.export_stream import iter_chunks, iter_rows, rows_from, with_header
+from utils.report_export import ReportExport, ReportSection, check_export_format, export_response
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/reports/checkout", tags=["reports"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 def format_number(value: Optional[float]) -> str:
     """Format number with commas and 2 decimal places"""
@@ -41,6 +26,198 @@ def format_number(value: Optional[float]) -> str:
         return '0.00'
     return f"{float(value):,.2f}"
 
+def _build_checkout_where(
+    employeeId: Optional[str],
+    department: Optional[str],
+    startDate: Optional[str],
+    endDate: Optional[str]
+) -> Dict[str, Any]:
+    """Where clause for all checkouts (active and historical) the summary is computed over"""
+    where_clause: Dict[str, Any] = {}
+
+    # Date range filter
+    if startDate or endDate:
+        checkout_date_filter: Dict[str, Any] = {}
+        if startDate:
+            checkout_date_filter["gte"] = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
+        if endDate:
+            checkout_date_filter["lte"] = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
+        if checkout_date_filter:
+            where_clause["checkoutDate"] = checkout_date_filter
+
+    # Employee filter
+    if employeeId:
+        where_clause["employeeUserId"] = employeeId
+
+    # Department filter (through employee)
+    if department:
+        where_clause["employeeUser"] = {
+            "department": department
+        }
+
+    return where_clause
+
+
+def _active_where(where_clause: Dict[str, Any], **filters: Any) -> Dict[str, Any]:
+    """Restrict where_clause to active checkouts (those without checkin), plus extra filters"""
+    return {"AND": [where_clause, {"checkins": {"none": {}}, **filters}]}
+
+
+def _build_checkout_list_where(
+    where_clause: Dict[str, Any],
+    today: datetime,
+    isOverdue: Optional[bool],
+    assetTagId: Optional[str],
+    dueDate: Optional[str],
+    location: Optional[str],
+    site: Optional[str]
+) -> Dict[str, Any]:
+    """Where clause for the listed checkouts: active checkouts narrowed by the list filters"""
+    filters: Dict[str, Any] = {}
+
+    # Overdue filter
+    if isOverdue:
+        filters["expectedReturnDate"] = {"lt": today}
+
+    # Due date filter (whole day)
+    if dueDate:
+        due_date_obj = datetime.fromisoformat(dueDate.replace('Z', '+00:00')).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+        filters["AND"] = [{"expectedReturnDate": {"gte": due_date_obj, "lt": due_date_obj + timedelta(days=1)}}]
+
+    # Asset filters
+    asset_filter: Dict[str, Any] = {}
+    if assetTagId:
+        asset_filter["assetTagId"] = {"contains": assetTagId, "mode": "insensitive"}
+    if location:
+        asset_filter["location"] = location
+    if site:
+        asset_filter["site"] = site
+    if asset_filter:
+        filters["asset"] = asset_filter
+
+    return _active_where(where_clause, **filters)
+
+
+async def _checkout_summary(where_clause: Dict[str, Any], today: datetime) -> CheckoutSummary:
+    """
+    Active, overdue and historical counts and the per employee/department
+    breakdown of active checkouts, from counts and group_bys on employeeUserId
+    """
+    active_where = _active_where(where_clause)
+    overdue_where = _active_where(where_clause, expectedReturnDate={"lt": today})
+    total_count, active_groups, overdue_groups = await asyncio.gather(
+        prisma.assetscheckout.count(where=where_clause),
+        prisma.assetscheckout.group_by(by=["employeeUserId"], where=active_where, count=True),
+        prisma.assetscheckout.group_by(by=["employeeUserId"], where=overdue_where, count=True),
+    )
+    active_counts = {row.get("employeeUserId"): row.get("_count", {}).get("_all", 0) for row in active_groups}
+    overdue_counts = {row.get("employeeUserId"): row.get("_count", {}).get("_all", 0) for row in overdue_groups}
+
+    employee_ids = [employee_id for employee_id in active_counts if employee_id]
+    employees = await prisma.employeeuser.find_many(
+        where={"id": {"in": employee_ids}}
+    ) if employee_ids else []
+    employees_by_id = {employee.id: employee for employee in employees}
+
+    # Group by employee
+    by_employee = []
+    for employee_id, count in active_counts.items():
+        employee = employees_by_id.get(employee_id)
+        by_employee.append(EmployeeGroup(
+            employeeId=employee_id or 'unknown',
+            employeeName=employee.name if employee else 'Unknown',
+            employeeEmail=employee.email if employee else '',
+            department=employee.department if employee else None,
+            count=count,
+            overdueCount=overdue_counts.get(employee_id, 0),
+        ))
+
+    # Group by department
+    by_department_map: Dict[str, Dict[str, Any]] = {}
+    for employee_id, count in active_counts.items():
+        employee = employees_by_id.get(employee_id)
+        dept = employee.department if employee and employee.department else 'Unassigned'
+        if dept not in by_department_map:
+            by_department_map[dept] = {
+                "department": dept,
+                "count": 0,
+                "overdueCount": 0,
+                "employees": set(),
+            }
+        by_department_map[dept]["count"] += count
+        by_department_map[dept]["overdueCount"] += overdue_counts.get(employee_id, 0)
+        if employee_id:
+            by_department_map[dept]["employees"].add(employee_id)
+
+    by_department = [
+        DepartmentGroup(
+            department=data["department"],
+            count=data["count"],
+            overdueCount=data["overdueCount"],
+            employeeCount=len(data["employees"])
+        )
+        for data in by_department_map.values()
+    ]
+
+    total_active = sum(active_counts.values())
+    return CheckoutSummary(
+        totalActive=total_active,
+        totalOverdue=sum(overdue_counts.values()),
+        totalHistorical=total_count - total_active,
+        byEmployee=by_employee,
+        byDepartment=by_department,
+    )
+
+
+_CHECKOUT_INCLUDE: Dict[str, Any] = {
+    "asset": {
+        "include": {
+            "category": True,
+            "subCategory": True
+        }
+    },
+    "employeeUser": True,
+    "checkins": True
+}
+
+
+def _checkout_item(checkout: Any, today: datetime) -> CheckoutItem:
+    """Format a checkout row (with _CHECKOUT_INCLUDE relations) relative to today"""
+    expected_return_date = None
+    if checkout.expectedReturnDate:
+        expected_return_date = checkout.expectedReturnDate.isoformat().split('T')[0]
+
+    # Latest checkin only
+    checkin_dates = [checkin.checkinDate for checkin in checkout.checkins or [] if checkin.checkinDate]
+    return_date = max(checkin_dates).isoformat().split('T')[0] if checkin_dates else None
+
+    is_overdue = False
+    if checkout.expectedReturnDate:
+        expected_return = datetime.fromisoformat(checkout.expectedReturnDate.isoformat()).replace(hour=0, minute=0, second=0, microsecond=0)
+        is_overdue = expected_return < today
+
+    return CheckoutItem(
+        id=checkout.id,
+        assetId=checkout.assetId,
+        assetTagId=checkout.asset.assetTagId,
+        assetDescription=checkout.asset.description,
+        assetStatus=checkout.asset.status,
+        assetCost=float(checkout.asset.cost) if checkout.asset.cost else None,
+        category=checkout.asset.category.name if checkout.asset.category else None,
+        subCategory=checkout.asset.subCategory.name if checkout.asset.subCategory else None,
+        checkoutDate=checkout.checkoutDate.isoformat().split('T')[0],
+        expectedReturnDate=expected_return_date,
+        returnDate=return_date,
+        isOverdue=is_overdue,
+        employeeId=checkout.employeeUserId,
+        employeeName=checkout.employeeUser.name if checkout.employeeUser else 'Unknown',
+        employeeEmail=checkout.employeeUser.email if checkout.employeeUser else '',
+        employeeDepartment=checkout.employeeUser.department if checkout.employeeUser else None,
+        location=checkout.asset.location,
+        site=checkout.asset.site,
+    )
+
+
 async def _fetch_checkout_data(
     employeeId: Optional[str] = Query(None, description="Filter by employee ID"),
     assetTagId: Optional[str] = Query(None, description="Filter by asset tag ID"),
@@ -62,227 +239,33 @@ async def _fetch_checkout_data(
             raise HTTPException(status_code=401, detail="Unauthorized")
 
         skip = (page - 1) * pageSize
-
-        # Build where clause for checkouts
-        where_clause: Dict[str, Any] = {}
-
-        # Date range filter
-        if startDate or endDate:
-            checkout_date_filter: Dict[str, Any] = {}
-            if startDate:
-                checkout_date_filter["gte"] = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
-            if endDate:
-                checkout_date_filter["lte"] = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
-            if checkout_date_filter:
-                where_clause["checkoutDate"] = checkout_date_filter
-
-        # Employee filter
-        if employeeId:
-            where_clause["employeeUserId"] = employeeId
-
-        # Department filter (through employee)
-        if department:
-            where_clause["employeeUser"] = {
-                "department": department
-            }
-
-        # Get all checkouts (including active and historical)
-        checkouts_raw = await prisma.assetscheckout.find_many(
-            where=where_clause,
-            include={
-                "asset": {
-                    "include": {
-                        "category": True,
-                        "subCategory": True
-                    }
-                },
-                "employeeUser": True,
-                "checkins": True
-            },
-            order={"checkoutDate": "desc"}
-        )
-        
-        # Sort checkins by date descending and take only the first one for each checkout
-        for checkout in checkouts_raw:
-            if checkout.checkins:
-                checkout.checkins = sorted(
-                    checkout.checkins,
-                    key=lambda c: c.checkinDate if c.checkinDate else datetime.min,
-                    reverse=True
-                )[:1]
-
-        # Filter active checkouts (those without checkin)
-        active_checkouts = [c for c in checkouts_raw if len(c.checkins) == 0]
-
-        # Filter overdue checkouts
         today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        overdue_checkouts = [
-            c for c in active_checkouts
-            if c.expectedReturnDate and datetime.fromisoformat(c.expectedReturnDate.isoformat()).replace(hour=0, minute=0, second=0, microsecond=0) < today
-        ]
 
-        # Group by employee
-        by_employee_map: Dict[str, Dict[str, Any]] = {}
-        for checkout in active_checkouts:
-            employee_id = checkout.employeeUserId or 'unknown'
-            employee_name = checkout.employeeUser.name if checkout.employeeUser else 'Unknown'
-            employee_email = checkout.employeeUser.email if checkout.employeeUser else ''
-            employee_dept = checkout.employeeUser.department if checkout.employeeUser else None
-
-            if employee_id not in by_employee_map:
-                by_employee_map[employee_id] = {
-                    "employeeId": employee_id,
-                    "employeeName": employee_name,
-                    "employeeEmail": employee_email,
-                    "department": employee_dept,
-                    "count": 0,
-                    "overdueCount": 0,
-                }
-
-            by_employee_map[employee_id]["count"] += 1
-
-            # Check if overdue
-            if checkout.expectedReturnDate:
-                expected_return = datetime.fromisoformat(checkout.expectedReturnDate.isoformat()).replace(hour=0, minute=0, second=0, microsecond=0)
-                if expected_return < today:
-                    by_employee_map[employee_id]["overdueCount"] += 1
-
-        by_employee = [EmployeeGroup(**data) for data in by_employee_map.values()]
-
-        # Group by department
-        by_department_map: Dict[str, Dict[str, Any]] = {}
-        for checkout in active_checkouts:
-            dept = checkout.employeeUser.department if checkout.employeeUser and checkout.employeeUser.department else 'Unassigned'
-            employee_id = checkout.employeeUserId
-
-            if dept not in by_department_map:
-                by_department_map[dept] = {
-                    "department": dept,
-                    "count": 0,
-                    "overdueCount": 0,
-                    "employees": set(),
-                }
-
-            by_department_map[dept]["count"] += 1
-            if employee_id:
-                by_department_map[dept]["employees"].add(employee_id)
-
-            # Check if overdue
-            if checkout.expectedReturnDate:
-                expected_return = datetime.fromisoformat(checkout.expectedReturnDate.isoformat()).replace(hour=0, minute=0, second=0, microsecond=0)
-                if expected_return < today:
-                    by_department_map[dept]["overdueCount"] += 1
-
-        by_department = [
-            DepartmentGroup(
-                department=data["department"],
-                count=data["count"],
-                overdueCount=data["overdueCount"],
-                employeeCount=len(data["employees"])
+        where_clause = _build_checkout_where(employeeId, department, startDate, endDate)
+        list_where = _build_checkout_list_where(where_clause, today, isOverdue, assetTagId, dueDate, location, site)
+
+        # Summary, list total and the requested page of active checkouts
+        summary, total, checkouts_raw = await asyncio.gather(
+            _checkout_summary(where_clause, today),
+            prisma.assetscheckout.count(where=list_where),
+            prisma.assetscheckout.find_many(
+                where=list_where,
+                include=_CHECKOUT_INCLUDE,
+                order=keyset_order("checkoutDate"),
+                skip=skip,
+                take=pageSize
             )
-            for data in by_department_map.values()
-        ]
-
-        # Apply filters to active checkouts
-        filtered_checkouts = active_checkouts
-
-        # Apply overdue filter
-        if isOverdue:
-            filtered_checkouts = overdue_checkouts
-
-        # Apply department filter
-        if department:
-            filtered_checkouts = [
-                c for c in filtered_checkouts
-                if c.employeeUser and c.employeeUser.department == department
-            ]
-
-        # Apply asset tag filter
-        if assetTagId:
-            asset_tag_lower = assetTagId.lower()
-            filtered_checkouts = [
-                c for c in filtered_checkouts
-                if c.asset.assetTagId.lower().find(asset_tag_lower) != -1
-            ]
-
-        # Apply due date filter
-        if dueDate:
-            due_date_obj = datetime.fromisoformat(dueDate.replace('Z', '+00:00')).replace(hour=0, minute=0, second=0, microsecond=0)
-            filtered_checkouts = [
-                c for c in filtered_checkouts
-                if c.expectedReturnDate and datetime.fromisoformat(c.expectedReturnDate.isoformat()).replace(hour=0, minute=0, second=0, microsecond=0) == due_date_obj
-            ]
-
-        # Apply location filter
-        if location:
-            filtered_checkouts = [
-                c for c in filtered_checkouts
-                if c.asset.location == location
-            ]
-
-        # Apply site filter
-        if site:
-            filtered_checkouts = [
-                c for c in filtered_checkouts
-                if c.asset.site == site
-            ]
+        )
 
         # Calculate pagination
-        total = len(filtered_checkouts)
         total_pages = (total + pageSize - 1) // pageSize if total > 0 else 0
 
-        # Apply pagination
-        paginated_checkouts = filtered_checkouts[skip:skip + pageSize]
-
         # Format checkouts
-        formatted_checkouts = []
-        for checkout in paginated_checkouts:
-            expected_return_date = None
-            if checkout.expectedReturnDate:
-                expected_return_date = checkout.expectedReturnDate.isoformat().split('T')[0]
-
-            return_date = None
-            if checkout.checkins and len(checkout.checkins) > 0 and checkout.checkins[0].checkinDate:
-                return_date = checkout.checkins[0].checkinDate.isoformat().split('T')[0]
-
-            is_overdue = False
-            if checkout.expectedReturnDate:
-                expected_return = datetime.fromisoformat(checkout.expectedReturnDate.isoformat()).replace(hour=0, minute=0, second=0, microsecond=0)
-                is_overdue = expected_return < today
-
-            formatted_checkouts.append(
-                CheckoutItem(
-                    id=checkout.id,
-                    assetId=checkout.assetId,
-                    assetTagId=checkout.asset.assetTagId,
-                    assetDescription=checkout.asset.description,
-                    assetStatus=checkout.asset.status,
-                    assetCost=float(checkout.asset.cost) if checkout.asset.cost else None,
-                    category=checkout.asset.category.name if checkout.asset.category else None,
-                    subCategory=checkout.asset.subCategory.name if checkout.asset.subCategory else None,
-                    checkoutDate=checkout.checkoutDate.isoformat().split('T')[0],
-                    expectedReturnDate=expected_return_date,
-                    returnDate=return_date,
-                    isOverdue=is_overdue,
-                    employeeId=checkout.employeeUserId,
-                    employeeName=checkout.employeeUser.name if checkout.employeeUser else 'Unknown',
-                    employeeEmail=checkout.employeeUser.email if checkout.employeeUser else '',
-                    employeeDepartment=checkout.employeeUser.department if checkout.employeeUser else None,
-                    location=checkout.asset.location,
-                    site=checkout.asset.site,
-                )
-            )
+        formatted_checkouts = [_checkout_item(checkout, today) for checkout in checkouts_raw]
 
         return {
-            "summary": CheckoutSummary(
-                totalActive=len(active_checkouts),
-                totalOverdue=len(overdue_checkouts),
-                totalHistorical=len(checkouts_raw) - len(active_checkouts),
-                byEmployee=by_employee,
-                byDepartment=by_department,
-            ),
+            "summary": summary,
             "checkouts": formatted_checkouts,
-            "all_checkouts": filtered_checkouts,  # Return all filtered checkouts for export
             "pagination": PaginationInfo(
                 total=total,
                 page=page,
@@ -337,9 +320,169 @@ async def get_checkout_reports(
         pagination=data["pagination"]
     )
 
+
+async def build_checkout_export(
+    employeeId: Optional[str] = None,
+    assetTagId: Optional[str] = None,
+    dueDate: Optional[str] = None,
+    isOverdue: Optional[bool] = None,
+    location: Optional[str] = None,
+    site: Optional[str] = None,
+    department: Optional[str] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    includeCheckoutList: Optional[bool] = False
+) -> ReportExport:
+    """Checkout report export: summary from the database, checkouts read in keyset chunks"""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    where_clause = _build_checkout_where(employeeId, department, startDate, endDate)
+    list_where = _build_checkout_list_where(where_clause, today, isOverdue, assetTagId, dueDate, location, site)
+    summary = await _checkout_summary(where_clause, today)
+
+    async def checkout_items():
+        async for checkout in iter_rows(iter_chunks(
+            prisma.assetscheckout,
+            where=list_where,
+            include=_CHECKOUT_INCLUDE,
+            sort_field="checkoutDate"
+        )):
+            yield _checkout_item(checkout, today)
+
+    # Asset values of the listed checkouts in one pass over the chunks
+    total_value = 0.0
+    value_by_employee: Dict[str, float] = {}
+    value_by_department: Dict[Optional[str], float] = {}
+    async for c in checkout_items():
+        total_value += c.assetCost or 0
+        value_by_employee[c.employeeName] = value_by_employee.get(c.employeeName, 0.0) + (c.assetCost or 0)
+        value_by_department[c.employeeDepartment] = value_by_department.get(c.employeeDepartment, 0.0) + (c.assetCost or 0)
+
+    # Build summary data
+    summary_data = [
+        {
+            "Metric": "Total Active Checkouts",
+            "Value": str(summary.totalActive),
+            "Overdue": str(summary.totalOverdue),
+            "Historical": str(summary.totalHistorical),
+            "Total Value": format_number(total_value),
+        },
+        {
+            "Metric": "---",
+            "Value": "---",
+            "Overdue": "---",
+            "Historical": "---",
+            "Total Value": "---",
+        },
+        {
+            "Metric": "CHECKOUTS BY EMPLOYEE",
+            "Value": "",
+            "Overdue": "",
+            "Historical": "",
+            "Total Value": "",
+        },
+        *[
+            {
+                "Metric": f"Employee: {emp.employeeName or 'Unknown'}",
+                "Value": str(emp.count),
+                "Overdue": str(emp.overdueCount),
+                "Historical": str(emp.count - emp.overdueCount),
+                "Total Value": format_number(value_by_employee.get(emp.employeeName, 0.0)),
+            }
+            for emp in summary.byEmployee
+        ],
+        {
+            "Metric": "---",
+            "Value": "---",
+            "Overdue": "---",
+            "Historical": "---",
+            "Total Value": "---",
+        },
+        {
+            "Metric": "CHECKOUTS BY DEPARTMENT",
+            "Value": "",
+            "Overdue": "",
+            "Historical": "",
+            "Total Value": "",
+        },
+        *[
+            {
+                "Metric": f"Department: {dept.department or 'Unknown'}",
+                "Value": str(dept.count),
+                "Overdue": str(dept.overdueCount),
+                "Historical": str(dept.count - dept.overdueCount),
+                "Total Value": format_number(value_by_department.get(dept.department, 0.0)),
+            }
+            for dept in summary.byDepartment
+        ],
+    ]
+    summary_headers = list(summary_data[0].keys())
+    summary_rows = [[row.get(header, "") for header in summary_headers] for row in summary_data]
+
+    checkout_headers = ["Asset Tag ID", "Description", "Category", "SUB-CATEGORY", "Check-out Date", "Due date", "Return Date", "Department", "Cost", "Employee"]
+
+    async def checkout_rows():
+        async for c in checkout_items():
+            yield [
+                c.assetTagId or "",
+                c.assetDescription or "",
+                c.category or "",
+                c.subCategory or "",
+                c.checkoutDate or "",
+                c.expectedReturnDate or "",
+                c.returnDate or "",
+                c.employeeDepartment or "",
+                format_number(c.assetCost) if c.assetCost else "",
+                c.employeeName or "",
+            ]
+
+    async def csv_rows():
+        if includeCheckoutList:
+            yield ["=== SUMMARY STATISTICS ==="]
+        yield summary_headers
+        for row in summary_rows:
+            yield row
+        if includeCheckoutList:
+            yield []
+            yield ["=== CHECKOUT LIST ==="]
+            async for row in with_header(checkout_headers, checkout_rows()):
+                yield row
+
+    def sheets():
+        if not includeCheckoutList:
+            # Single sheet export
+            return [("Checkout Report", rows_from([summary_headers, *summary_rows]))]
+        # Multiple sheets: Summary, By Employee, By Department, Checkout List
+        employee_rows = [row for row in summary_rows if str(row[0]).startswith("Employee:")]
+        department_rows = [row for row in summary_rows if str(row[0]).startswith("Department:")]
+        return [
+            ("Summary", rows_from([summary_headers, *summary_rows])),
+            ("By Employee", with_header(summary_headers, rows_from(employee_rows))),
+            ("By Department", with_header(summary_headers, rows_from(department_rows))),
+            ("Checkout List", with_header(checkout_headers, checkout_rows())),
+        ]
+
+    async def pdf_sections():
+        yield ReportSection("Summary Statistics", summary_headers, rows_from(summary_rows))
+        if includeCheckoutList:
+            async def checkout_list():
+                async for row in checkout_rows():
+                    yield [row[0], str(row[1])[:50], *row[2:]]
+
+            yield ReportSection("Checkout List ({count} checkouts)", checkout_headers, checkout_list())
+
+    return ReportExport(
+        filename=f"checkout-report-{datetime.now().strftime('%Y-%m-%d')}",
+        title="Checkout Report",
+        report_type="Checkout",
+        csv_rows=csv_rows,
+        sheets=sheets,
+        pdf_sections=pdf_sections,
+    )
+
+
 @router.get("/export")
 async def export_checkout_reports(
-    format: str = Query("csv", description="Export format: csv or excel"),
+    format: str = Query("csv", description="Export format: csv, excel, or pdf"),
     employeeId: Optional[str] = Query(None, description="Filter by employee ID"),
     assetTagId: Optional[str] = Query(None, description="Filter by asset tag ID"),
     dueDate: Optional[str] = Query(None, description="Filter by due date (YYYY-MM-DD)"),
@@ -350,32 +493,26 @@ async def export_checkout_reports(
     startDate: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     endDate: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     includeCheckoutList: Optional[bool] = Query(False, description="Include checkout list in export"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
-    """Export checkout reports to CSV or Excel"""
+    """Export checkout reports to CSV, Excel, or PDF"""
     try:
         user_id = auth.get("user_id")
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageReports to export reports
-        has_permission = await check_permission(user_id, "canManageReports")
+        has_permission = permissions.has("canManageReports")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
                 detail="You do not have permission to export reports"
             )
 
-        if format not in ["csv", "excel", "pdf"]:
-            raise HTTPException(status_code=400, detail="Invalid format. Use csv, excel, or pdf.")
-        
-        if format == "pdf" and not PDF_AVAILABLE:
-            raise HTTPException(status_code=500, detail="PDF export not available - fpdf2 not installed")
+        check_export_format(format)
 
-        # Fetch checkout report data (same logic as main endpoint)
-        # We'll reuse the helper function but fetch all data if includeCheckoutList is True
-        page_size = 10000 if includeCheckoutList else 1
-        data = await _fetch_checkout_data(
+        export = await build_checkout_export(
             employeeId=employeeId,
             assetTagId=assetTagId,
             dueDate=dueDate,
@@ -385,301 +522,12 @@ async def export_checkout_reports(
             department=department,
             startDate=startDate,
             endDate=endDate,
-            page=1,
-            pageSize=page_size,
-            auth=auth
+            includeCheckoutList=includeCheckoutList,
         )
-
-        summary = data["summary"]
-        
-        # For export, we need to format all checkouts, not just paginated ones
-        all_filtered_checkouts = data["all_checkouts"]
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # Format all checkouts for export
-        all_formatted_checkouts = []
-        for checkout in all_filtered_checkouts:
-            expected_return_date = None
-            if checkout.expectedReturnDate:
-                expected_return_date = checkout.expectedReturnDate.isoformat().split('T')[0]
-
-            return_date = None
-            if checkout.checkins and len(checkout.checkins) > 0 and checkout.checkins[0].checkinDate:
-                return_date = checkout.checkins[0].checkinDate.isoformat().split('T')[0]
-
-            is_overdue = False
-            if checkout.expectedReturnDate:
-                expected_return = datetime.fromisoformat(checkout.expectedReturnDate.isoformat()).replace(hour=0, minute=0, second=0, microsecond=0)
-                is_overdue = expected_return < today
-
-            all_formatted_checkouts.append(
-                CheckoutItem(
-                    id=checkout.id,
-                    assetId=checkout.assetId,
-                    assetTagId=checkout.asset.assetTagId,
-                    assetDescription=checkout.asset.description,
-                    assetStatus=checkout.asset.status,
-                    assetCost=float(checkout.asset.cost) if checkout.asset.cost else None,
-                    category=checkout.asset.category.name if checkout.asset.category else None,
-                    subCategory=checkout.asset.subCategory.name if checkout.asset.subCategory else None,
-                    checkoutDate=checkout.checkoutDate.isoformat().split('T')[0],
-                    expectedReturnDate=expected_return_date,
-                    returnDate=return_date,
-                    isOverdue=is_overdue,
-                    employeeId=checkout.employeeUserId,
-                    employeeName=checkout.employeeUser.name if checkout.employeeUser else 'Unknown',
-                    employeeEmail=checkout.employeeUser.email if checkout.employeeUser else '',
-                    employeeDepartment=checkout.employeeUser.department if checkout.employeeUser else None,
-                    location=checkout.asset.location,
-                    site=checkout.asset.site,
-                )
-            )
-        
-        checkouts = all_formatted_checkouts if includeCheckoutList else data["checkouts"]
-
-        # Calculate total value
-        total_value = sum(c.assetCost or 0 for c in checkouts)
-
-        # Build summary data
-        summary_data = [
-            {
-                "Metric": "Total Active Checkouts",
-                "Value": str(summary.totalActive),
-                "Overdue": str(summary.totalOverdue),
-                "Historical": str(summary.totalHistorical),
-                "Total Value": format_number(total_value),
-            },
-            {
-                "Metric": "---",
-                "Value": "---",
-                "Overdue": "---",
-                "Historical": "---",
-                "Total Value": "---",
-            },
-            {
-                "Metric": "CHECKOUTS BY EMPLOYEE",
-                "Value": "",
-                "Overdue": "",
-                "Historical": "",
-                "Total Value": "",
-            },
-            *[
-                {
-                    "Metric": f"Employee: {emp.employeeName or 'Unknown'}",
-                    "Value": str(emp.count),
-                    "Overdue": str(emp.overdueCount),
-                    "Historical": str(emp.count - emp.overdueCount),
-                    "Total Value": format_number(sum(c.assetCost or 0 for c in checkouts if c.employeeName == emp.employeeName)),
-                }
-                for emp in summary.byEmployee
-            ],
-            {
-                "Metric": "---",
-                "Value": "---",
-                "Overdue": "---",
-                "Historical": "---",
-                "Total Value": "---",
-            },
-            {
-                "Metric": "CHECKOUTS BY DEPARTMENT",
-                "Value": "",
-                "Overdue": "",
-                "Historical": "",
-                "Total Value": "",
-            },
-            *[
-                {
-                    "Metric": f"Department: {dept.department or 'Unknown'}",
-                    "Value": str(dept.count),
-                    "Overdue": str(dept.overdueCount),
-                    "Historical": str(dept.count - dept.overdueCount),
-                    "Total Value": format_number(sum(c.assetCost or 0 for c in checkouts if c.employeeDepartment == dept.department)),
-                }
-                for dept in summary.byDepartment
-            ],
-        ]
-
-        # Prepare checkout list data
-        checkout_list_data = [
-            {
-                "Asset Tag ID": c.assetTagId or "",
-                "Description": c.assetDescription or "",
-                "Category": c.category or "",
-                "SUB-CATEGORY": c.subCategory or "",
-                "Check-out Date": c.checkoutDate or "",
-                "Due date": c.expectedReturnDate or "",
-                "Return Date": c.returnDate or "",
-                "Department": c.employeeDepartment or "",
-                "Cost": format_number(c.assetCost) if c.assetCost else "",
-                "Employee": c.employeeName or "",
-            }
-            for c in checkouts
-        ]
-
-        filename = f"checkout-report-{datetime.now().strftime('%Y-%m-%d')}"
-
-        if format == "csv":
-            # Generate CSV
-            output = io.StringIO()
-            writer = csv.writer(output)
-
-            if includeCheckoutList:
-                # Include summary and checkout list
-                writer.writerow(["=== SUMMARY STATISTICS ==="])
-                if summary_data:
-                    summary_headers = list(summary_data[0].keys())
-                    writer.writerow(summary_headers)
-                    for row in summary_data:
-                        writer.writerow([row.get(header, "") for header in summary_headers])
-                
-                writer.writerow([])
-                writer.writerow(["=== CHECKOUT LIST ==="])
-                
-                if checkout_list_data:
-                    checkout_headers = list(checkout_list_data[0].keys())
-                    writer.writerow(checkout_headers)
-                    for row in checkout_list_data:
-                        writer.writerow([row.get(header, "") for header in checkout_headers])
-            else:
-                # Summary only
-                if summary_data:
-                    summary_headers = list(summary_data[0].keys())
-                    writer.writerow(summary_headers)
-                    for row in summary_data:
-                        writer.writerow([row.get(header, "") for header in summary_headers])
-
-            csv_content = output.getvalue()
-            output.close()
-
-            filename += ".csv"
-            return Response(
-                content=csv_content,
-                media_type="text/csv",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
-                }
-            )
-
-        elif format == "excel":
-            # Import openpyxl for Excel generation
-            try:
-                from openpyxl import Workbook  # type: ignore
-            except ImportError:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Excel export not available - openpyxl not installed"
-                )
-
-            wb = Workbook()
-            wb.remove(wb.active)  # Remove default sheet
-
-            if includeCheckoutList:
-                # Multiple sheets: Summary, By Employee, By Department, Checkout List
-                # Summary sheet
-                if summary_data:
-                    summary_ws = wb.create_sheet("Summary")
-                    summary_headers = list(summary_data[0].keys())
-                    summary_ws.append(summary_headers)
-                    for row in summary_data:
-                        summary_ws.append([row.get(header, "") for header in summary_headers])
-
-                # By Employee sheet
-                employee_data = [row for row in summary_data if row.get("Metric", "").startswith("Employee:")]
-                if employee_data:
-                    employee_ws = wb.create_sheet("By Employee")
-                    employee_headers = list(employee_data[0].keys())
-                    employee_ws.append(employee_headers)
-                    for row in employee_data:
-                        employee_ws.append([row.get(header, "") for header in employee_headers])
-
-                # By Department sheet
-                department_data = [row for row in summary_data if row.get("Metric", "").startswith("Department:")]
-                if department_data:
-                    department_ws = wb.create_sheet("By Department")
-                    department_headers = list(department_data[0].keys())
-                    department_ws.append(department_headers)
-                    for row in department_data:
-                        department_ws.append([row.get(header, "") for header in department_headers])
-
-                # Checkout List sheet
-                if checkout_list_data:
-                    checkout_list_ws = wb.create_sheet("Checkout List")
-                    checkout_headers = list(checkout_list_data[0].keys())
-                    checkout_list_ws.append(checkout_headers)
-                    for row in checkout_list_data:
-                        checkout_list_ws.append([row.get(header, "") for header in checkout_headers])
-            else:
-                # Single sheet export
-                if summary_data:
-                    ws = wb.create_sheet("Checkout Report")
-                    summary_headers = list(summary_data[0].keys())
-                    ws.append(summary_headers)
-                    for row in summary_data:
-                        ws.append([row.get(header, "") for header in summary_headers])
-
-            # Save to buffer
-            buffer = io.BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
-            filename += ".xlsx"
-            return StreamingResponse(
-                buffer,
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
-                }
-            )
-
-        else:  # pdf
-            # Generate PDF using fpdf2
-            pdf = ReportPDF("Checkout Report", "Checkout")
-            pdf.add_page()
-
-            # Summary section
-            pdf.add_section_title("Summary Statistics")
-            if summary_data:
-                headers = list(summary_data[0].keys())
-                rows = [[str(row.get(h, '')) for h in headers] for row in summary_data]
-                pdf.add_table(headers, rows)
-            
-            pdf.ln(10)
-
-            # Checkout List section
-            if checkout_list_data and includeCheckoutList:
-                pdf.add_section_title(f"Checkout List ({len(checkout_list_data)} checkouts)")
-                simplified_headers = ["Asset Tag ID", "Description", "Category", "SUB-CATEGORY", "Check-out Date", "Due date", "Return Date", "Department", "Cost", "Employee"]
-                simplified_rows = [
-                    [
-                        str(row.get("Asset Tag ID", "")),
-                        str(row.get("Description", ""))[:50],
-                        str(row.get("Category", "")),
-                        str(row.get("SUB-CATEGORY", "")),
-                        str(row.get("Check-out Date", "")),
-                        str(row.get("Due date", "")),
-                        str(row.get("Return Date", "")),
-                        str(row.get("Department", "")),
-                        str(row.get("Cost", "")),
-                        str(row.get("Employee", "")),
-                    ]
-                    for row in checkout_list_data
-                ]
-                pdf.add_table(simplified_headers, simplified_rows)
-
-            pdf_content = bytes(pdf.output())
-            
-            filename += ".pdf"
-            return Response(
-                content=pdf_content,
-                media_type="application/pdf",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
-                }
-            )
+        return await export_response(export, format)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error exporting checkout reports: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to export checkout reports")
-
@@ -2,38 +2,21 @@
 Depreciation Reports API router
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
-from fastapi.responses import StreamingResponse, Response
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import logging
-import io
-import csv
 
 from models.reports import DepreciationReportResponse, DepreciationAsset, PaginationInfo
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
-from utils.pdf_generator import ReportPDF, PDF_AVAILABLE
+from utils.export_stream import iter_chunks, iter_rows, rows_from, with_header
+from utils.report_export import ReportExport, ReportSection, check_export_format, export_response
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/reports/depreciation", tags=["reports"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 def format_number(value: Optional[float]) -> str:
     """Format number with commas and 2 decimal places"""
@@ -108,6 +91,98 @@ def calculate_depreciation(
         "depreciationMonths": depreciation_months,
     }
 
+
+def _build_depreciation_where(
+    category: Optional[str],
+    depreciationMethod: Optional[str],
+    location: Optional[str],
+    site: Optional[str],
+    isDepreciable: Optional[bool],
+    startDate: Optional[str],
+    endDate: Optional[str]
+) -> Dict[str, Any]:
+    """Where clause for assets shared by the list and export routes"""
+    # Build where clause
+    where_clause: Dict[str, Any] = {
+        "isDeleted": False,
+    }
+
+    # Category filter
+    if category:
+        where_clause["category"] = {
+            "name": category
+        }
+
+    # Depreciation method filter
+    if depreciationMethod:
+        where_clause["depreciationMethod"] = depreciationMethod
+
+    # Location filter
+    if location:
+        where_clause["location"] = location
+
+    # Site filter
+    if site:
+        where_clause["site"] = site
+
+    # Depreciable asset filter
+    if isDepreciable is not None:
+        where_clause["depreciableAsset"] = isDepreciable
+
+    # Date range filter (dateAcquired)
+    if startDate or endDate:
+        date_acquired_filter: Dict[str, Any] = {}
+        if startDate:
+            date_acquired_filter["gte"] = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
+        if endDate:
+            date_acquired_filter["lte"] = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
+        if date_acquired_filter:
+            where_clause["dateAcquired"] = date_acquired_filter
+
+    return where_clause
+
+
+_DEPRECIATION_INCLUDE: Dict[str, Any] = {
+    "category": True,
+    "subCategory": True
+}
+
+
+def _depreciation_asset(asset: Any) -> DepreciationAsset:
+    """Format an asset row (with _DEPRECIATION_INCLUDE relations) with its depreciation figures"""
+    dep_values = calculate_depreciation(
+        depreciable_asset=asset.depreciableAsset or False,
+        depreciable_cost=float(asset.depreciableCost) if asset.depreciableCost else None,
+        salvage_value=float(asset.salvageValue) if asset.salvageValue else None,
+        asset_life_months=asset.assetLifeMonths,
+        depreciation_method=asset.depreciationMethod,
+        date_acquired=asset.dateAcquired
+    )
+
+    return DepreciationAsset(
+        id=asset.id,
+        assetTagId=asset.assetTagId,
+        description=asset.description,
+        category=asset.category.name if asset.category else None,
+        subCategory=asset.subCategory.name if asset.subCategory else None,
+        originalCost=float(asset.cost) if asset.cost else None,
+        depreciableCost=float(asset.depreciableCost) if asset.depreciableCost else None,
+        salvageValue=float(asset.salvageValue) if asset.salvageValue else None,
+        assetLifeMonths=asset.assetLifeMonths,
+        depreciationMethod=asset.depreciationMethod,
+        dateAcquired=asset.dateAcquired.isoformat() if asset.dateAcquired else None,
+        location=asset.location,
+        site=asset.site,
+        isDepreciable=asset.depreciableAsset or False,
+        monthlyDepreciation=dep_values["monthlyDepreciation"],
+        annualDepreciation=dep_values["annualDepreciation"],
+        accumulatedDepreciation=dep_values["accumulatedDepreciation"],
+        currentValue=dep_values["currentValue"],
+        depreciationYears=dep_values["depreciationYears"],
+        depreciationMonths=dep_values["depreciationMonths"],
+    )
+
+
 @router.get("", response_model=DepreciationReportResponse)
 async def get_depreciation_reports(
     category: Optional[str] = Query(None, description="Filter by category name"),
@@ -129,42 +204,9 @@ async def get_depreciation_reports(
 
         skip = (page - 1) * pageSize
 
-        # Build where clause
-        where_clause: Dict[str, Any] = {
-            "isDeleted": False,
-        }
-
-        # Category filter
-        if category:
-            where_clause["category"] = {
-                "name": category
-            }
-
-        # Depreciation method filter
-        if depreciationMethod:
-            where_clause["depreciationMethod"] = depreciationMethod
-
-        # Location filter
-        if location:
-            where_clause["location"] = location
-
-        # Site filter
-        if site:
-            where_clause["site"] = site
-
-        # Depreciable asset filter
-        if isDepreciable is not None:
-            where_clause["depreciableAsset"] = isDepreciable
-
-        # Date range filter (dateAcquired)
-        if startDate or endDate:
-            date_acquired_filter: Dict[str, Any] = {}
-            if startDate:
-                date_acquired_filter["gte"] = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
-            if endDate:
-                date_acquired_filter["lte"] = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
-            if date_acquired_filter:
-                where_clause["dateAcquired"] = date_acquired_filter
+        where_clause = _build_depreciation_where(
+            category, depreciationMethod, location, site, isDepreciable, startDate, endDate
+        )
 
         # Get total count
         total = await prisma.assets.count(where=where_clause)
@@ -172,51 +214,14 @@ async def get_depreciation_reports(
         # Get paginated assets
         assets_raw = await prisma.assets.find_many(
             where=where_clause,
-            include={
-                "category": True,
-                "subCategory": True
-            },
+            include=_DEPRECIATION_INCLUDE,
             order={"dateAcquired": "desc"},
             skip=skip,
             take=pageSize
         )
 
         # Calculate depreciation for each asset
-        formatted_assets = []
-        for asset in assets_raw:
-            dep_values = calculate_depreciation(
-                depreciable_asset=asset.depreciableAsset or False,
-                depreciable_cost=float(asset.depreciableCost) if asset.depreciableCost else None,
-                salvage_value=float(asset.salvageValue) if asset.salvageValue else None,
-                asset_life_months=asset.assetLifeMonths,
-                depreciation_method=asset.depreciationMethod,
-                date_acquired=asset.dateAcquired
-            )
-
-            formatted_assets.append(
-                DepreciationAsset(
-                    id=asset.id,
-                    assetTagId=asset.assetTagId,
-                    description=asset.description,
-                    category=asset.category.name if asset.category else None,
-                    subCategory=asset.subCategory.name if asset.subCategory else None,
-                    originalCost=float(asset.cost) if asset.cost else None,
-                    depreciableCost=float(asset.depreciableCost) if asset.depreciableCost else None,
-                    salvageValue=float(asset.salvageValue) if asset.salvageValue else None,
-                    assetLifeMonths=asset.assetLifeMonths,
-                    depreciationMethod=asset.depreciationMethod,
-                    dateAcquired=asset.dateAcquired.isoformat() if asset.dateAcquired else None,
-                    location=asset.location,
-                    site=asset.site,
-                    isDepreciable=asset.depreciableAsset or False,
-                    monthlyDepreciation=dep_values["monthlyDepreciation"],
-                    annualDepreciation=dep_values["annualDepreciation"],
-                    accumulatedDepreciation=dep_values["accumulatedDepreciation"],
-                    currentValue=dep_values["currentValue"],
-                    depreciationYears=dep_values["depreciationYears"],
-                    depreciationMonths=dep_values["depreciationMonths"],
-                )
-            )
+        formatted_assets = [_depreciation_asset(asset) for asset in assets_raw]
 
         total_pages = (total + pageSize - 1) // pageSize if total > 0 else 0
 
@@ -238,9 +243,178 @@ async def get_depreciation_reports(
         logger.error(f"Error fetching depreciation reports: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch depreciation reports")
 
+
+async def build_depreciation_export(
+    category: Optional[str] = None,
+    depreciationMethod: Optional[str] = None,
+    location: Optional[str] = None,
+    site: Optional[str] = None,
+    isDepreciable: Optional[bool] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    includeAssetList: Optional[bool] = False
+) -> ReportExport:
+    """Depreciation report export: assets read in keyset chunks, summary computed in one pass"""
+    where_clause = _build_depreciation_where(
+        category, depreciationMethod, location, site, isDepreciable, startDate, endDate
+    )
+
+    async def asset_items():
+        # Keyset chunks need a non-null sort key, so exports are ordered by
+        # createdAt rather than the nullable dateAcquired
+        async for asset in iter_rows(iter_chunks(
+            prisma.assets,
+            where=where_clause,
+            include=_DEPRECIATION_INCLUDE
+        )):
+            yield _depreciation_asset(asset)
+
+    # Summary statistics in one pass over the asset chunks
+    total_assets = 0
+    depreciable_count = 0
+    total_original_cost = 0.0
+    total_depreciable_cost = 0.0
+    total_accumulated_depreciation = 0.0
+    total_current_value = 0.0
+    total_annual_depreciation = 0.0
+    by_method: Dict[str, Dict[str, Any]] = {}
+    async for asset in asset_items():
+        total_assets += 1
+        total_original_cost += asset.originalCost or 0
+        if not asset.isDepreciable:
+            continue
+        depreciable_count += 1
+        total_depreciable_cost += asset.depreciableCost or 0
+        total_accumulated_depreciation += asset.accumulatedDepreciation
+        total_current_value += asset.currentValue
+        total_annual_depreciation += asset.annualDepreciation
+
+        # Group by method
+        method = asset.depreciationMethod or 'Not Specified'
+        if method not in by_method:
+            by_method[method] = {
+                "count": 0,
+                "totalCost": 0.0,
+                "totalDepreciation": 0.0,
+                "totalCurrentValue": 0.0,
+            }
+        by_method[method]["count"] += 1
+        by_method[method]["totalCost"] += asset.depreciableCost or 0
+        by_method[method]["totalDepreciation"] += asset.accumulatedDepreciation
+        by_method[method]["totalCurrentValue"] += asset.currentValue
+
+    asset_headers = [
+        "Asset Tag ID",
+        "Description",
+        "Category",
+        "Depreciation Method",
+        "Original Cost",
+        "Depreciable Cost",
+        "Salvage Value",
+        "Asset Life (Months)",
+        "Date Acquired",
+        "Monthly Depreciation",
+        "Annual Depreciation",
+        "Accumulated Depreciation",
+        "Current Value",
+    ]
+
+    async def asset_rows():
+        async for asset in asset_items():
+            yield [
+                asset.assetTagId,
+                asset.description,
+                asset.category or "N/A",
+                asset.depreciationMethod or "N/A",
+                format_number(asset.originalCost),
+                format_number(asset.depreciableCost),
+                format_number(asset.salvageValue),
+                asset.assetLifeMonths or "N/A",
+                asset.dateAcquired[:10] if asset.dateAcquired else "N/A",
+                format_number(asset.monthlyDepreciation),
+                format_number(asset.annualDepreciation),
+                format_number(asset.accumulatedDepreciation),
+                format_number(asset.currentValue),
+            ]
+
+    summary_rows = [
+        ["DEPRECIATION REPORT SUMMARY"],
+        ["Total Assets", total_assets],
+        ["Depreciable Assets", depreciable_count],
+        ["Total Original Cost", format_number(total_original_cost)],
+        ["Total Depreciable Cost", format_number(total_depreciable_cost)],
+        ["Accumulated Depreciation", format_number(total_accumulated_depreciation)],
+        ["Total Current Value", format_number(total_current_value)],
+        ["Total Annual Depreciation", format_number(total_annual_depreciation)],
+        [],
+        ["DEPRECIATION BY METHOD"],
+        ["Method", "Asset Count", "Total Cost", "Accumulated Depreciation", "Current Value"],
+        *[[method, stats["count"], format_number(stats["totalCost"]), format_number(stats["totalDepreciation"]), format_number(stats["totalCurrentValue"])] for method, stats in by_method.items()],
+    ]
+
+    async def csv_rows():
+        for row in summary_rows:
+            yield row
+        if includeAssetList:
+            yield []
+            yield ["ASSET DEPRECIATION DETAILS"]
+            yield asset_headers
+            async for row in asset_rows():
+                yield row
+
+    def sheets():
+        tables = [("Summary", rows_from(summary_rows))]
+        if includeAssetList:
+            tables.append(("Asset List", with_header(asset_headers, asset_rows())))
+        return tables
+
+    async def pdf_sections():
+        pdf_summary_rows = [
+            ["Total Assets", total_assets],
+            ["Depreciable Assets", depreciable_count],
+            ["Total Original Cost", format_number(total_original_cost)],
+            ["Total Depreciable Cost", format_number(total_depreciable_cost)],
+            ["Total Accumulated Depreciation", format_number(total_accumulated_depreciation)],
+            ["Total Current Value", format_number(total_current_value)],
+            ["Total Annual Depreciation", format_number(total_annual_depreciation)],
+            # By method breakdown
+            *[[f"Method: {method}", f"{stats['count']} assets"] for method, stats in by_method.items()],
+        ]
+        yield ReportSection("Summary Statistics", ["Metric", "Value"], rows_from(pdf_summary_rows))
+        if includeAssetList:
+            async def asset_list():
+                async for a in asset_items():
+                    yield [
+                        a.assetTagId,
+                        (a.description or "")[:50],
+                        a.category,
+                        a.depreciationMethod,
+                        format_number(a.originalCost),
+                        format_number(a.depreciableCost),
+                        format_number(a.accumulatedDepreciation),
+                        format_number(a.currentValue),
+                        a.dateAcquired[:10] if a.dateAcquired else "",
+                    ]
+
+            yield ReportSection(
+                "Asset List ({count} assets)",
+                ["Asset Tag ID", "Description", "Category", "Depreciation Method", "Original Cost", "Depreciable Cost", "Accumulated Depreciation", "Current Value", "Date Acquired"],
+                asset_list()
+            )
+
+    return ReportExport(
+        filename=f"depreciation-report-{datetime.now().strftime('%Y-%m-%d')}",
+        title="Depreciation Report",
+        report_type="Depreciation",
+        csv_rows=csv_rows,
+        sheets=sheets,
+        pdf_sections=pdf_sections,
+    )
+
+
 @router.get("/export")
 async def export_depreciation_reports(
-    format: str = Query("csv", description="Export format: csv or excel"),
+    format: str = Query("csv", description="Export format: csv, excel, or pdf"),
     category: Optional[str] = Query(None, description="Filter by category name"),
     depreciationMethod: Optional[str] = Query(None, description="Filter by depreciation method"),
     location: Optional[str] = Query(None, description="Filter by location"),
@@ -249,31 +423,26 @@ async def export_depreciation_reports(
     startDate: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     endDate: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     includeAssetList: Optional[bool] = Query(False, description="Include asset list in export"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
-    """Export depreciation reports to CSV or Excel"""
+    """Export depreciation reports to CSV, Excel, or PDF"""
     try:
         user_id = auth.get("user_id")
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageReports to export reports
-        has_permission = await check_permission(user_id, "canManageReports")
+        has_permission = permissions.has("canManageReports")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
                 detail="You do not have permission to export reports"
             )
 
-        if format not in ["csv", "excel", "pdf"]:
-            raise HTTPException(status_code=400, detail="Invalid format. Use csv, excel, or pdf.")
-        
-        if format == "pdf" and not PDF_AVAILABLE:
-            raise HTTPException(status_code=500, detail="PDF export not available - fpdf2 not installed")
+        check_export_format(format)
 
-        # Fetch all assets for export
-        page_size = 10000 if includeAssetList else 1
-        report_data = await get_depreciation_reports(
+        export = await build_depreciation_export(
             category=category,
             depreciationMethod=depreciationMethod,
             location=location,
@@ -281,269 +450,12 @@ async def export_depreciation_reports(
             isDepreciable=isDepreciable,
             startDate=startDate,
             endDate=endDate,
-            page=1,
-            pageSize=page_size,
-            auth=auth
+            includeAssetList=includeAssetList,
         )
-
-        assets = report_data.assets
-
-        # Calculate summary statistics
-        depreciable_assets = [a for a in assets if a.isDepreciable]
-        total_original_cost = sum(a.originalCost or 0 for a in assets)
-        total_depreciable_cost = sum(a.depreciableCost or 0 for a in depreciable_assets)
-        total_accumulated_depreciation = sum(a.accumulatedDepreciation for a in depreciable_assets)
-        total_current_value = sum(a.currentValue for a in depreciable_assets)
-        total_annual_depreciation = sum(a.annualDepreciation for a in depreciable_assets)
-
-        # Group by method
-        by_method: Dict[str, Dict[str, Any]] = {}
-        for asset in depreciable_assets:
-            method = asset.depreciationMethod or 'Not Specified'
-            if method not in by_method:
-                by_method[method] = {
-                    "count": 0,
-                    "totalCost": 0.0,
-                    "totalDepreciation": 0.0,
-                    "totalCurrentValue": 0.0,
-                }
-            by_method[method]["count"] += 1
-            by_method[method]["totalCost"] += asset.depreciableCost or 0
-            by_method[method]["totalDepreciation"] += asset.accumulatedDepreciation
-            by_method[method]["totalCurrentValue"] += asset.currentValue
-
-        filename = f"depreciation-report-{datetime.now().strftime('%Y-%m-%d')}"
-
-        if format == "csv":
-            # Generate CSV
-            output = io.StringIO()
-            writer = csv.writer(output)
-
-            if includeAssetList:
-                # Include summary and asset list
-                writer.writerow(["DEPRECIATION REPORT SUMMARY"])
-                writer.writerow(["Total Assets", len(assets)])
-                writer.writerow(["Depreciable Assets", len(depreciable_assets)])
-                writer.writerow(["Total Original Cost", format_number(total_original_cost)])
-                writer.writerow(["Total Depreciable Cost", format_number(total_depreciable_cost)])
-                writer.writerow(["Accumulated Depreciation", format_number(total_accumulated_depreciation)])
-                writer.writerow(["Total Current Value", format_number(total_current_value)])
-                writer.writerow(["Total Annual Depreciation", format_number(total_annual_depreciation)])
-                writer.writerow([])
-                
-                writer.writerow(["DEPRECIATION BY METHOD"])
-                writer.writerow(["Method", "Asset Count", "Total Cost", "Accumulated Depreciation", "Current Value"])
-                for method, stats in by_method.items():
-                    writer.writerow([
-                        method,
-                        stats["count"],
-                        format_number(stats["totalCost"]),
-                        format_number(stats["totalDepreciation"]),
-                        format_number(stats["totalCurrentValue"]),
-                    ])
-                writer.writerow([])
-                
-                writer.writerow(["ASSET DEPRECIATION DETAILS"])
-                writer.writerow([
-                    "Asset Tag ID",
-                    "Description",
-                    "Category",
-                    "Depreciation Method",
-                    "Original Cost",
-                    "Depreciable Cost",
-                    "Salvage Value",
-                    "Asset Life (Months)",
-                    "Date Acquired",
-                    "Monthly Depreciation",
-                    "Annual Depreciation",
-                    "Accumulated Depreciation",
-                    "Current Value",
-                ])
-                for asset in assets:
-                    writer.writerow([
-                        asset.assetTagId,
-                        asset.description,
-                        asset.category or "N/A",
-                        asset.depreciationMethod or "N/A",
-                        format_number(asset.originalCost),
-                        format_number(asset.depreciableCost),
-                        format_number(asset.salvageValue),
-                        asset.assetLifeMonths or "N/A",
-                        asset.dateAcquired[:10] if asset.dateAcquired else "N/A",
-                        format_number(asset.monthlyDepreciation),
-                        format_number(asset.annualDepreciation),
-                        format_number(asset.accumulatedDepreciation),
-                        format_number(asset.currentValue),
-                    ])
-            else:
-                # Summary only
-                writer.writerow(["DEPRECIATION REPORT SUMMARY"])
-                writer.writerow(["Total Assets", len(assets)])
-                writer.writerow(["Depreciable Assets", len(depreciable_assets)])
-                writer.writerow(["Total Original Cost", format_number(total_original_cost)])
-                writer.writerow(["Total Depreciable Cost", format_number(total_depreciable_cost)])
-                writer.writerow(["Accumulated Depreciation", format_number(total_accumulated_depreciation)])
-                writer.writerow(["Total Current Value", format_number(total_current_value)])
-                writer.writerow(["Total Annual Depreciation", format_number(total_annual_depreciation)])
-                writer.writerow([])
-                writer.writerow(["DEPRECIATION BY METHOD"])
-                writer.writerow(["Method", "Asset Count", "Total Cost", "Accumulated Depreciation", "Current Value"])
-                for method, stats in by_method.items():
-                    writer.writerow([
-                        method,
-                        stats["count"],
-                        format_number(stats["totalCost"]),
-                        format_number(stats["totalDepreciation"]),
-                        format_number(stats["totalCurrentValue"]),
-                    ])
-
-            csv_content = output.getvalue()
-            output.close()
-
-            filename += ".csv"
-            return Response(
-                content=csv_content,
-                media_type="text/csv",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
-                }
-            )
-
-        elif format == "excel":
-            # Import openpyxl for Excel generation
-            try:
-                from openpyxl import Workbook  # type: ignore
-            except ImportError:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Excel export not available - openpyxl not installed"
-                )
-
-            wb = Workbook()
-            wb.remove(wb.active)  # Remove default sheet
-
-            # Summary sheet
-            summary_data = [
-                ["DEPRECIATION REPORT SUMMARY"],
-                ["Total Assets", len(assets)],
-                ["Depreciable Assets", len(depreciable_assets)],
-                ["Total Original Cost", format_number(total_original_cost)],
-                ["Total Depreciable Cost", format_number(total_depreciable_cost)],
-                ["Accumulated Depreciation", format_number(total_accumulated_depreciation)],
-                ["Total Current Value", format_number(total_current_value)],
-                ["Total Annual Depreciation", format_number(total_annual_depreciation)],
-                [],
-                ["DEPRECIATION BY METHOD"],
-                ["Method", "Asset Count", "Total Cost", "Accumulated Depreciation", "Current Value"],
-                *[[method, stats["count"], format_number(stats["totalCost"]), format_number(stats["totalDepreciation"]), format_number(stats["totalCurrentValue"])] for method, stats in by_method.items()],
-            ]
-            summary_ws = wb.create_sheet("Summary")
-            for row in summary_data:
-                summary_ws.append(row)
-
-            if includeAssetList:
-                # Asset list sheet
-                asset_data = [
-                    [
-                        asset.assetTagId,
-                        asset.description,
-                        asset.category or "N/A",
-                        asset.depreciationMethod or "N/A",
-                        format_number(asset.originalCost),
-                        format_number(asset.depreciableCost),
-                        format_number(asset.salvageValue),
-                        asset.assetLifeMonths or "N/A",
-                        asset.dateAcquired[:10] if asset.dateAcquired else "N/A",
-                        format_number(asset.monthlyDepreciation),
-                        format_number(asset.annualDepreciation),
-                        format_number(asset.accumulatedDepreciation),
-                        format_number(asset.currentValue),
-                    ]
-                    for asset in assets
-                ]
-                asset_ws = wb.create_sheet("Asset List")
-                asset_ws.append([
-                    "Asset Tag ID",
-                    "Description",
-                    "Category",
-                    "Depreciation Method",
-                    "Original Cost",
-                    "Depreciable Cost",
-                    "Salvage Value",
-                    "Asset Life (Months)",
-                    "Date Acquired",
-                    "Monthly Depreciation",
-                    "Annual Depreciation",
-                    "Accumulated Depreciation",
-                    "Current Value",
-                ])
-                for row in asset_data:
-                    asset_ws.append(row)
-
-            # Save to buffer
-            buffer = io.BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
-            filename += ".xlsx"
-            return StreamingResponse(
-                buffer,
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
-                }
-            )
-
-        else:  # pdf
-            pdf = ReportPDF("Depreciation Report", "Depreciation")
-            pdf.add_page()
-
-            pdf.add_section_title("Summary Statistics")
-            summary_rows = [
-                ["Total Assets", str(len(assets))],
-                ["Depreciable Assets", str(len(depreciable_assets))],
-                ["Total Original Cost", format_number(total_original_cost)],
-                ["Total Depreciable Cost", format_number(total_depreciable_cost)],
-                ["Total Accumulated Depreciation", format_number(total_accumulated_depreciation)],
-                ["Total Current Value", format_number(total_current_value)],
-                ["Total Annual Depreciation", format_number(total_annual_depreciation)],
-            ]
-            # Add by method breakdown
-            for method, stats in by_method.items():
-                summary_rows.append([f"Method: {method}", f"{stats['count']} assets"])
-            
-            if summary_rows:
-                headers = ["Metric", "Value"]
-                pdf.add_table(headers, summary_rows)
-            
-            pdf.ln(10)
-
-            if assets and includeAssetList:
-                pdf.add_section_title(f"Asset List ({len(assets)} assets)")
-                simplified_headers = ["Asset Tag ID", "Description", "Category", "Depreciation Method", "Original Cost", "Depreciable Cost", "Accumulated Depreciation", "Current Value", "Date Acquired"]
-                simplified_rows = [
-                    [
-                        str(a.assetTagId or ""),
-                        str(a.description or "")[:50],
-                        str(a.category or ""),
-                        str(a.depreciationMethod or ""),
-                        format_number(a.originalCost),
-                        format_number(a.depreciableCost),
-                        format_number(a.accumulatedDepreciation),
-                        format_number(a.currentValue),
-                        a.dateAcquired[:10] if a.dateAcquired else "",
-                    ]
-                    for a in assets
-                ]
-                pdf.add_table(simplified_headers, simplified_rows)
-
-            pdf_content = bytes(pdf.output())
-            filename += ".pdf"
-            return Response(content=pdf_content, media_type="application/pdf", headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+        return await export_response(export, format)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error exporting depreciation reports: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to export depreciation reports")
-
@@ -2,39 +2,23 @@
 Location Reports API router
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
-from fastapi.responses import StreamingResponse, Response
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import logging
-import io
-import csv
 import asyncio
 
 from models.reports import LocationReportResponse, LocationSummary, LocationReportGroup, SiteReportGroup, LocationAsset, MovementItem, PaginationInfo
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
-from utils.pdf_generator import ReportPDF, PDF_AVAILABLE
+from utils.pagination import keyset_order, keyset_where, split_page
+from utils.export_stream import iter_chunks, iter_rows, rows_from, with_header
+from utils.report_export import ReportExport, ReportSection, check_export_format, export_response
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/reports/location", tags=["reports"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 def format_number(value: Optional[float]) -> str:
     """Format number with commas and 2 decimal places"""
@@ -42,6 +26,170 @@ def format_number(value: Optional[float]) -> str:
         return '0.00'
     return f"{float(value):,.2f}"
 
+
+def _build_location_where(
+    location: Optional[str],
+    site: Optional[str],
+    category: Optional[str],
+    status: Optional[str],
+    startDate: Optional[str],
+    endDate: Optional[str]
+) -> Dict[str, Any]:
+    """Where clause for assets shared by the list and export routes"""
+    # Build where clause
+    where_clause: Dict[str, Any] = {
+        "isDeleted": False,
+    }
+
+    # Apply filters
+    if location:
+        where_clause["location"] = location
+
+    if site:
+        where_clause["site"] = site
+
+    if category:
+        where_clause["categoryId"] = category
+
+    if status:
+        where_clause["status"] = status
+
+    # Date range filter (on purchaseDate or createdAt)
+    if startDate or endDate:
+        date_filters: List[Dict[str, Any]] = []
+
+        purchase_date_filter: Dict[str, Any] = {}
+        if startDate:
+            date_obj = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
+            if date_obj.tzinfo is not None:
+                date_obj = date_obj.replace(tzinfo=None)
+            purchase_date_filter["gte"] = date_obj
+        if endDate:
+            date_obj = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
+            if date_obj.tzinfo is not None:
+                date_obj = date_obj.replace(tzinfo=None)
+            purchase_date_filter["lte"] = date_obj
+        if purchase_date_filter:
+            date_filters.append({"purchaseDate": purchase_date_filter})
+
+        created_at_filter: Dict[str, Any] = {}
+        if startDate:
+            date_obj = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
+            if date_obj.tzinfo is not None:
+                date_obj = date_obj.replace(tzinfo=None)
+            created_at_filter["gte"] = date_obj
+        if endDate:
+            date_obj = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
+            if date_obj.tzinfo is not None:
+                date_obj = date_obj.replace(tzinfo=None)
+            created_at_filter["lte"] = date_obj
+        if created_at_filter:
+            date_filters.append({"createdAt": created_at_filter})
+
+        if date_filters:
+            where_clause["OR"] = date_filters
+
+    return where_clause
+
+
+async def _location_summary(where_clause: Dict[str, Any]) -> LocationSummary:
+    """Asset counts and values per location and per site, from one group_by"""
+    groups = await prisma.assets.group_by(
+        by=["location", "site"],
+        where=where_clause,
+        count=True,
+        sum={"cost": True}
+    )
+
+    total_assets = 0
+    by_location_map: Dict[str, Dict[str, Any]] = {}
+    by_site_map: Dict[str, Dict[str, Any]] = {}
+    for group in groups:
+        count = group.get("_count", {}).get("_all", 0)
+        cost = float(group.get("_sum", {}).get("cost") or 0)
+        total_assets += count
+
+        location_key = group.get("location") or 'Unassigned'
+        if location_key not in by_location_map:
+            by_location_map[location_key] = {
+                "location": location_key,
+                "count": 0,
+                "totalValue": 0.0,
+            }
+        by_location_map[location_key]["count"] += count
+        by_location_map[location_key]["totalValue"] += cost
+
+        site_key = group.get("site") or 'Unassigned'
+        if site_key not in by_site_map:
+            by_site_map[site_key] = {
+                "site": site_key,
+                "count": 0,
+                "totalValue": 0.0,
+                "locations": set(),
+            }
+        by_site_map[site_key]["count"] += count
+        by_site_map[site_key]["totalValue"] += cost
+        if group.get("location"):
+            by_site_map[site_key]["locations"].add(group["location"])
+
+    # Calculate location utilization
+    by_location = [
+        LocationReportGroup(
+            location=group["location"],
+            assetCount=group["count"],
+            totalValue=group["totalValue"],
+            averageValue=group["totalValue"] / group["count"] if group["count"] > 0 else 0.0,
+            utilizationPercentage=(group["count"] / total_assets * 100) if total_assets > 0 else 0.0,
+        )
+        for group in by_location_map.values()
+    ]
+
+    # Calculate site utilization
+    by_site = [
+        SiteReportGroup(
+            site=group["site"],
+            assetCount=group["count"],
+            totalValue=group["totalValue"],
+            locationCount=len(group["locations"]),
+            averageValue=group["totalValue"] / group["count"] if group["count"] > 0 else 0.0,
+            utilizationPercentage=(group["count"] / total_assets * 100) if total_assets > 0 else 0.0,
+        )
+        for group in by_site_map.values()
+    ]
+
+    return LocationSummary(
+        totalAssets=total_assets,
+        totalLocations=len(by_location_map),
+        totalSites=len(by_site_map),
+        byLocation=by_location,
+        bySite=by_site,
+    )
+
+
+_LOCATION_ASSET_INCLUDE: Dict[str, Any] = {
+    "category": True,
+    "moves": True
+}
+
+
+def _location_asset(asset: Any) -> LocationAsset:
+    """Format an asset row (with _LOCATION_ASSET_INCLUDE relations)"""
+    move_dates = [move.moveDate for move in asset.moves or [] if move.moveDate]
+    last_move = max(move_dates) if move_dates else None
+    return LocationAsset(
+        id=asset.id,
+        assetTagId=asset.assetTagId,
+        description=asset.description,
+        status=asset.status,
+        cost=float(asset.cost) if asset.cost else None,
+        category=asset.category.name if asset.category else None,
+        location=asset.location,
+        site=asset.site,
+        department=asset.department,
+        lastMoveDate=last_move.isoformat().split('T')[0] if last_move else None,
+    )
+
+
 @router.get("", response_model=LocationReportResponse)
 async def get_location_reports(
     location: Optional[str] = Query(None, description="Filter by location"),
@@ -52,6 +200,7 @@ async def get_location_reports(
     endDate: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     page: int = Query(1, ge=1),
     pageSize: int = Query(50, ge=1, le=10000),
+    cursor: Optional[str] = Query(None, description="pagination.nextCursor of the previous page; replaces page"),
     auth: dict = Depends(verify_auth)
 ):
     """Get location reports with optional filters and pagination"""
@@ -62,140 +211,21 @@ async def get_location_reports(
 
         skip = (page - 1) * pageSize
 
-        # Build where clause
-        where_clause: Dict[str, Any] = {
-            "isDeleted": False,
-        }
-
-        # Apply filters
-        if location:
-            where_clause["location"] = location
+        where_clause = _build_location_where(location, site, category, status, startDate, endDate)
 
-        if site:
-            where_clause["site"] = site
-
-        if category:
-            where_clause["categoryId"] = category
-
-        if status:
-            where_clause["status"] = status
-
-        # Date range filter (on purchaseDate or createdAt)
-        if startDate or endDate:
-            date_filters: List[Dict[str, Any]] = []
-            
-            purchase_date_filter: Dict[str, Any] = {}
-            if startDate:
-                date_obj = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
-                if date_obj.tzinfo is not None:
-                    date_obj = date_obj.replace(tzinfo=None)
-                purchase_date_filter["gte"] = date_obj
-            if endDate:
-                date_obj = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
-                if date_obj.tzinfo is not None:
-                    date_obj = date_obj.replace(tzinfo=None)
-                purchase_date_filter["lte"] = date_obj
-            if purchase_date_filter:
-                date_filters.append({"purchaseDate": purchase_date_filter})
-            
-            created_at_filter: Dict[str, Any] = {}
-            if startDate:
-                date_obj = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
-                if date_obj.tzinfo is not None:
-                    date_obj = date_obj.replace(tzinfo=None)
-                created_at_filter["gte"] = date_obj
-            if endDate:
-                date_obj = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
-                if date_obj.tzinfo is not None:
-                    date_obj = date_obj.replace(tzinfo=None)
-                created_at_filter["lte"] = date_obj
-            if created_at_filter:
-                date_filters.append({"createdAt": created_at_filter})
-            
-            if date_filters:
-                where_clause["OR"] = date_filters
-
-        # Get total count and fetch all assets for summary (no pagination)
-        total_assets, all_assets_raw, paginated_assets_raw = await asyncio.gather(
-            prisma.assets.count(where=where_clause),
+        # Summary from grouped counts and the requested page of assets
+        summary, paginated_assets_raw = await asyncio.gather(
+            _location_summary(where_clause),
             prisma.assets.find_many(
-                where=where_clause,
-                include={"category": True}
-            ),
-            prisma.assets.find_many(
-                where=where_clause,
-                include={
-                    "category": True,
-                    "moves": True
-                },
-                order={"createdAt": "desc"},
-                skip=skip,
-                take=pageSize
+                where=keyset_where(where_clause, cursor),
+                include=_LOCATION_ASSET_INCLUDE,
+                order=keyset_order(),
+                skip=0 if cursor else skip,
+                take=pageSize + 1
             )
         )
-
-        # Sort moves by date descending for each asset
-        for asset in paginated_assets_raw:
-            if asset.moves:
-                asset.moves = sorted(
-                    asset.moves,
-                    key=lambda m: m.moveDate if m.moveDate else datetime.min,
-                    reverse=True
-                )[:10]
-
-        # Group by location (using ALL assets for summary)
-        by_location_map: Dict[str, Dict[str, Any]] = {}
-        for asset in all_assets_raw:
-            location_key = asset.location or 'Unassigned'
-            if location_key not in by_location_map:
-                by_location_map[location_key] = {
-                    "location": location_key,
-                    "count": 0,
-                    "totalValue": 0.0,
-                }
-            by_location_map[location_key]["count"] += 1
-            by_location_map[location_key]["totalValue"] += float(asset.cost) if asset.cost else 0.0
-
-        # Group by site (using ALL assets for summary)
-        by_site_map: Dict[str, Dict[str, Any]] = {}
-        for asset in all_assets_raw:
-            site_key = asset.site or 'Unassigned'
-            if site_key not in by_site_map:
-                by_site_map[site_key] = {
-                    "site": site_key,
-                    "count": 0,
-                    "totalValue": 0.0,
-                    "locations": set(),
-                }
-            by_site_map[site_key]["count"] += 1
-            by_site_map[site_key]["totalValue"] += float(asset.cost) if asset.cost else 0.0
-            if asset.location:
-                by_site_map[site_key]["locations"].add(asset.location)
-
-        # Calculate location utilization
-        by_location = [
-            LocationReportGroup(
-                location=group["location"],
-                assetCount=group["count"],
-                totalValue=group["totalValue"],
-                averageValue=group["totalValue"] / group["count"] if group["count"] > 0 else 0.0,
-                utilizationPercentage=(group["count"] / total_assets * 100) if total_assets > 0 else 0.0,
-            )
-            for group in by_location_map.values()
-        ]
-
-        # Calculate site utilization
-        by_site = [
-            SiteReportGroup(
-                site=group["site"],
-                assetCount=group["count"],
-                totalValue=group["totalValue"],
-                locationCount=len(group["locations"]),
-                averageValue=group["totalValue"] / group["count"] if group["count"] > 0 else 0.0,
-                utilizationPercentage=(group["count"] / total_assets * 100) if total_assets > 0 else 0.0,
-            )
-            for group in by_site_map.values()
-        ]
+        paginated_assets_raw, next_cursor = split_page(paginated_assets_raw, pageSize)
+        total_assets = summary.totalAssets
 
         # Get movement history
         movement_where: Dict[str, Any] = {}
@@ -225,21 +255,7 @@ async def get_location_reports(
         )
 
         # Format assets
-        formatted_assets = [
-            LocationAsset(
-                id=asset.id,
-                assetTagId=asset.assetTagId,
-                description=asset.description,
-                status=asset.status,
-                cost=float(asset.cost) if asset.cost else None,
-                category=asset.category.name if asset.category else None,
-                location=asset.location,
-                site=asset.site,
-                department=asset.department,
-                lastMoveDate=asset.moves[0].moveDate.isoformat().split('T')[0] if asset.moves and len(asset.moves) > 0 and asset.moves[0].moveDate else None,
-            )
-            for asset in paginated_assets_raw
-        ]
+        formatted_assets = [_location_asset(asset) for asset in paginated_assets_raw]
 
         # Format movements
         formatted_movements = [
@@ -259,13 +275,7 @@ async def get_location_reports(
         total_pages = (total_assets + pageSize - 1) // pageSize if total_assets > 0 else 0
 
         return LocationReportResponse(
-            summary=LocationSummary(
-                totalAssets=total_assets,
-                totalLocations=len(by_location_map),
-                totalSites=len(by_site_map),
-                byLocation=by_location,
-                bySite=by_site,
-            ),
+            summary=summary,
             assets=formatted_assets,
             movements=formatted_movements,
             generatedAt=datetime.now().isoformat(),
@@ -274,8 +284,9 @@ async def get_location_reports(
                 page=page,
                 pageSize=pageSize,
                 totalPages=total_pages,
-                hasNextPage=page < total_pages,
-                hasPreviousPage=page > 1,
+                hasNextPage=next_cursor is not None,
+                hasPreviousPage=page > 1 or cursor is not None,
+                nextCursor=next_cursor,
             )
         )
 
@@ -285,9 +296,185 @@ async def get_location_reports(
         logger.error(f"Error fetching location reports: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch location reports")
 
+
+async def build_location_export(
+    location: Optional[str] = None,
+    site: Optional[str] = None,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    includeAssetList: Optional[bool] = False
+) -> ReportExport:
+    """Location report export: summary from the database, assets read in keyset chunks"""
+    where_clause = _build_location_where(location, site, category, status, startDate, endDate)
+    summary = await _location_summary(where_clause)
+
+    # Prepare summary statistics
+    summary_data = [
+        {
+            "Metric": "Total Assets",
+            "Value": str(summary.totalAssets),
+            "Total Value": "",
+            "Location Count": "",
+            "Average Value": "",
+            "Utilization %": "",
+        },
+        {
+            "Metric": "Total Locations",
+            "Value": str(summary.totalLocations),
+            "Total Value": "",
+            "Location Count": "",
+            "Average Value": "",
+            "Utilization %": "",
+        },
+        {
+            "Metric": "Total Sites",
+            "Value": str(summary.totalSites),
+            "Total Value": "",
+            "Location Count": "",
+            "Average Value": "",
+            "Utilization %": "",
+        },
+        {
+            "Metric": "---",
+            "Value": "---",
+            "Total Value": "---",
+            "Location Count": "---",
+            "Average Value": "---",
+            "Utilization %": "---",
+        },
+        {
+            "Metric": "ASSETS BY LOCATION",
+            "Value": "",
+            "Total Value": "",
+            "Location Count": "",
+            "Average Value": "",
+            "Utilization %": "",
+        },
+        *[
+            {
+                "Metric": f"Location: {loc.location}",
+                "Value": str(loc.assetCount),
+                "Total Value": format_number(loc.totalValue),
+                "Location Count": "",
+                "Average Value": format_number(loc.averageValue),
+                "Utilization %": f"{loc.utilizationPercentage:.1f}%",
+            }
+            for loc in summary.byLocation
+        ],
+        {
+            "Metric": "---",
+            "Value": "---",
+            "Total Value": "---",
+            "Location Count": "---",
+            "Average Value": "---",
+            "Utilization %": "---",
+        },
+        {
+            "Metric": "ASSETS BY SITE",
+            "Value": "",
+            "Total Value": "",
+            "Location Count": "",
+            "Average Value": "",
+            "Utilization %": "",
+        },
+        *[
+            {
+                "Metric": f"Site: {site.site}",
+                "Value": str(site.assetCount),
+                "Total Value": format_number(site.totalValue),
+                "Location Count": str(site.locationCount),
+                "Average Value": format_number(site.averageValue),
+                "Utilization %": f"{site.utilizationPercentage:.1f}%",
+            }
+            for site in summary.bySite
+        ],
+    ]
+
+    summary_headers = list(summary_data[0].keys())
+    summary_rows = [[row.get(header, "") for header in summary_headers] for row in summary_data]
+
+    asset_headers = ["Asset Tag ID", "Description", "Status", "Cost", "Category", "Location", "Site", "Department", "Last Move Date"]
+
+    async def asset_items():
+        async for asset in iter_rows(iter_chunks(
+            prisma.assets,
+            where=where_clause,
+            include=_LOCATION_ASSET_INCLUDE
+        )):
+            yield _location_asset(asset)
+
+    async def asset_rows():
+        async for asset in asset_items():
+            yield [
+                asset.assetTagId or "",
+                asset.description or "",
+                asset.status or "",
+                format_number(asset.cost) if asset.cost else "",
+                asset.category or "",
+                asset.location or "",
+                asset.site or "",
+                asset.department or "",
+                asset.lastMoveDate or "",
+            ]
+
+    async def csv_rows():
+        if includeAssetList:
+            yield ["=== SUMMARY STATISTICS ==="]
+        yield summary_headers
+        for row in summary_rows:
+            yield row
+        if includeAssetList:
+            yield []
+            yield ["=== ASSET LIST ==="]
+            async for row in with_header(asset_headers, asset_rows()):
+                yield row
+
+    def sheets():
+        tables = [("Summary", rows_from([summary_headers, *summary_rows]))]
+        if includeAssetList:
+            location_rows = [row for row in summary_rows if str(row[0]).startswith("Location:")]
+            site_rows = [row for row in summary_rows if str(row[0]).startswith("Site:")]
+            tables.append(("By Location", with_header(summary_headers, rows_from(location_rows))))
+            tables.append(("By Site", with_header(summary_headers, rows_from(site_rows))))
+            tables.append(("Asset List", with_header(asset_headers, asset_rows())))
+        return tables
+
+    async def pdf_sections():
+        yield ReportSection("Summary Statistics", summary_headers, rows_from(summary_rows))
+        if includeAssetList:
+            async def asset_list():
+                async for asset in asset_items():
+                    yield [
+                        asset.assetTagId,
+                        (asset.description or "")[:50],
+                        asset.location,
+                        asset.site,
+                        asset.department,
+                        asset.status,
+                        asset.lastMoveDate,
+                    ]
+
+            yield ReportSection(
+                "Asset List ({count} assets)",
+                ["Asset Tag", "Description", "Location", "Site", "Department", "Status", "Last Move"],
+                asset_list()
+            )
+
+    return ReportExport(
+        filename=f"location-report-{datetime.now().strftime('%Y-%m-%d')}",
+        title="Location Report",
+        report_type="Location",
+        csv_rows=csv_rows,
+        sheets=sheets,
+        pdf_sections=pdf_sections,
+    )
+
+
 @router.get("/export")
 async def export_location_reports(
-    format: str = Query("csv", description="Export format: csv or excel"),
+    format: str = Query("csv", description="Export format: csv, excel, or pdf"),
     location: Optional[str] = Query(None, description="Filter by location"),
     site: Optional[str] = Query(None, description="Filter by site"),
     category: Optional[str] = Query(None, description="Filter by category ID"),
@@ -295,299 +482,38 @@ async def export_location_reports(
     startDate: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     endDate: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     includeAssetList: Optional[bool] = Query(False, description="Include asset list in export"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
-    """Export location reports to CSV or Excel"""
+    """Export location reports to CSV, Excel, or PDF"""
     try:
         user_id = auth.get("user_id")
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageReports to export reports
-        has_permission = await check_permission(user_id, "canManageReports")
+        has_permission = permissions.has("canManageReports")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
                 detail="You do not have permission to export reports"
             )
 
-        if format not in ["csv", "excel", "pdf"]:
-            raise HTTPException(status_code=400, detail="Invalid format. Use csv, excel, or pdf.")
-        
-        if format == "pdf" and not PDF_AVAILABLE:
-            raise HTTPException(status_code=500, detail="PDF export not available - fpdf2 not installed")
+        check_export_format(format)
 
-        # Fetch all data for export
-        page_size = 10000 if includeAssetList else 1
-        report_data = await get_location_reports(
+        export = await build_location_export(
             location=location,
             site=site,
             category=category,
             status=status,
             startDate=startDate,
             endDate=endDate,
-            page=1,
-            pageSize=page_size,
-            auth=auth
+            includeAssetList=includeAssetList,
         )
-
-        summary = report_data.summary
-        assets = report_data.assets
-
-        # Prepare summary statistics
-        summary_data = [
-            {
-                "Metric": "Total Assets",
-                "Value": str(summary.totalAssets),
-                "Total Value": "",
-                "Location Count": "",
-                "Average Value": "",
-                "Utilization %": "",
-            },
-            {
-                "Metric": "Total Locations",
-                "Value": str(summary.totalLocations),
-                "Total Value": "",
-                "Location Count": "",
-                "Average Value": "",
-                "Utilization %": "",
-            },
-            {
-                "Metric": "Total Sites",
-                "Value": str(summary.totalSites),
-                "Total Value": "",
-                "Location Count": "",
-                "Average Value": "",
-                "Utilization %": "",
-            },
-            {
-                "Metric": "---",
-                "Value": "---",
-                "Total Value": "---",
-                "Location Count": "---",
-                "Average Value": "---",
-                "Utilization %": "---",
-            },
-            {
-                "Metric": "ASSETS BY LOCATION",
-                "Value": "",
-                "Total Value": "",
-                "Location Count": "",
-                "Average Value": "",
-                "Utilization %": "",
-            },
-            *[
-                {
-                    "Metric": f"Location: {loc.location}",
-                    "Value": str(loc.assetCount),
-                    "Total Value": format_number(loc.totalValue),
-                    "Location Count": "",
-                    "Average Value": format_number(loc.averageValue),
-                    "Utilization %": f"{loc.utilizationPercentage:.1f}%",
-                }
-                for loc in summary.byLocation
-            ],
-            {
-                "Metric": "---",
-                "Value": "---",
-                "Total Value": "---",
-                "Location Count": "---",
-                "Average Value": "---",
-                "Utilization %": "---",
-            },
-            {
-                "Metric": "ASSETS BY SITE",
-                "Value": "",
-                "Total Value": "",
-                "Location Count": "",
-                "Average Value": "",
-                "Utilization %": "",
-            },
-            *[
-                {
-                    "Metric": f"Site: {site.site}",
-                    "Value": str(site.assetCount),
-                    "Total Value": format_number(site.totalValue),
-                    "Location Count": str(site.locationCount),
-                    "Average Value": format_number(site.averageValue),
-                    "Utilization %": f"{site.utilizationPercentage:.1f}%",
-                }
-                for site in summary.bySite
-            ],
-        ]
-
-        # Prepare asset list data
-        asset_list_data = [
-            {
-                "Asset Tag ID": asset.assetTagId or "",
-                "Description": asset.description or "",
-                "Status": asset.status or "",
-                "Cost": format_number(asset.cost) if asset.cost else "",
-                "Category": asset.category or "",
-                "Location": asset.location or "",
-                "Site": asset.site or "",
-                "Department": asset.department or "",
-                "Last Move Date": asset.lastMoveDate or "",
-            }
-            for asset in assets
-        ]
-
-        filename = f"location-report-{datetime.now().strftime('%Y-%m-%d')}"
-
-        if format == "csv":
-            # Generate CSV
-            output = io.StringIO()
-            writer = csv.writer(output)
-
-            if includeAssetList:
-                # Include summary and asset list
-                writer.writerow(["=== SUMMARY STATISTICS ==="])
-                if summary_data:
-                    summary_headers = list(summary_data[0].keys())
-                    writer.writerow(summary_headers)
-                    for row in summary_data:
-                        writer.writerow([row.get(header, "") for header in summary_headers])
-                
-                writer.writerow([])
-                writer.writerow(["=== ASSET LIST ==="])
-                
-                if asset_list_data:
-                    asset_headers = list(asset_list_data[0].keys())
-                    writer.writerow(asset_headers)
-                    for row in asset_list_data:
-                        writer.writerow([row.get(header, "") for header in asset_headers])
-            else:
-                # Summary only
-                if summary_data:
-                    summary_headers = list(summary_data[0].keys())
-                    writer.writerow(summary_headers)
-                    for row in summary_data:
-                        writer.writerow([row.get(header, "") for header in summary_headers])
-
-            csv_content = output.getvalue()
-            output.close()
-
-            filename += ".csv"
-            return Response(
-                content=csv_content,
-                media_type="text/csv",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
-                }
-            )
-
-        elif format == "excel":
-            # Import openpyxl for Excel generation
-            try:
-                from openpyxl import Workbook  # type: ignore
-            except ImportError:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Excel export not available - openpyxl not installed"
-                )
-
-            wb = Workbook()
-            wb.remove(wb.active)  # Remove default sheet
-
-            # Summary sheet
-            if summary_data:
-                summary_ws = wb.create_sheet("Summary")
-                summary_headers = list(summary_data[0].keys())
-                summary_ws.append(summary_headers)
-                for row in summary_data:
-                    summary_ws.append([row.get(header, "") for header in summary_headers])
-
-            if includeAssetList:
-                # By Location sheet
-                location_data = [row for row in summary_data if row.get("Metric", "").startswith("Location:")]
-                if location_data:
-                    location_ws = wb.create_sheet("By Location")
-                    location_headers = list(location_data[0].keys())
-                    location_ws.append(location_headers)
-                    for row in location_data:
-                        location_ws.append([row.get(header, "") for header in location_headers])
-
-                # By Site sheet
-                site_data = [row for row in summary_data if row.get("Metric", "").startswith("Site:")]
-                if site_data:
-                    site_ws = wb.create_sheet("By Site")
-                    site_headers = list(site_data[0].keys())
-                    site_ws.append(site_headers)
-                    for row in site_data:
-                        site_ws.append([row.get(header, "") for header in site_headers])
-
-                # Asset List sheet
-                if asset_list_data:
-                    asset_list_ws = wb.create_sheet("Asset List")
-                    asset_headers = list(asset_list_data[0].keys())
-                    asset_list_ws.append(asset_headers)
-                    for row in asset_list_data:
-                        asset_list_ws.append([row.get(header, "") for header in asset_headers])
-            else:
-                # Single sheet export
-                if not summary_data:
-                    raise HTTPException(status_code=400, detail="No data to export")
-
-            # Save to buffer
-            buffer = io.BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
-            filename += ".xlsx"
-            return StreamingResponse(
-                buffer,
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
-                }
-            )
-
-        else:  # pdf
-            # Generate PDF using fpdf2
-            pdf = ReportPDF("Location Report", "Location")
-            pdf.add_page()
-
-            # Summary section
-            pdf.add_section_title("Summary Statistics")
-            if summary_data:
-                headers = list(summary_data[0].keys())
-                rows = [[str(row.get(h, '')) for h in headers] for row in summary_data]
-                pdf.add_table(headers, rows)
-            
-            pdf.ln(10)
-
-            # Asset List section
-            if asset_list_data and includeAssetList:
-                pdf.add_section_title(f"Asset List ({len(asset_list_data)} assets)")
-                simplified_headers = ["Asset Tag", "Description", "Location", "Site", "Department", "Status", "Last Move"]
-                simplified_rows = [
-                    [
-                        str(row.get("Asset Tag ID", "")),
-                        str(row.get("Description", ""))[:50],
-                        str(row.get("Location", "")),
-                        str(row.get("Site", "")),
-                        str(row.get("Department", "")),
-                        str(row.get("Status", "")),
-                        str(row.get("Last Move Date", "")),
-                    ]
-                    for row in asset_list_data
-                ]
-                pdf.add_table(simplified_headers, simplified_rows)
-
-            pdf_content = bytes(pdf.output())
-            
-            filename += ".pdf"
-            return Response(
-                content=pdf_content,
-                media_type="application/pdf",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"'
-                }
-            )
+        return await export_response(export, format)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error exporting location reports: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to export location reports")
-
@@ -9,26 +9,14 @@ import re
 
 from models.reserve import ReserveCreate, ReserveResponse, ReserveStatsResponse
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.asset_distinct import invalidate_distinct_asset_values
+from utils.response_cache import cached_response, invalidate_response_cache, TAG_ASSETS, TAG_RESERVE
+from utils.activity_ledger import ACTIVITY_RESERVE, activity, record_activity
 
 logger = logging.getLogger(__name__)
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 def is_uuid(value: str) -> bool:
     """Check if a string is a UUID"""
@@ -116,7 +104,8 @@ def parse_date(date_str: str) -> datetime:
 @router.post("", response_model=ReserveResponse, status_code=status.HTTP_201_CREATED)
 async def create_reserve(
     reserve_data: ReserveCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a reservation for an asset"""
     try:
@@ -125,7 +114,7 @@ async def create_reserve(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canReserve")
+        has_permission = permissions.has("canReserve")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -220,6 +209,16 @@ async def create_reserve(
                         }
                     )
 
+            await record_activity(transaction, activity(
+                ACTIVITY_RESERVE,
+                reservation.id,
+                reserve_data.assetId,
+                reservation_date,
+                actor=userName,
+                employee_user_id=reservation.employeeUserId,
+                details=f"Reserved for {(reservation.employeeUser.name if reservation.employeeUser else None) or reservation.department or 'Unknown'}"
+            ))
+
             # Format response
             reservation_dict = {
                 "id": str(reservation.id),
@@ -243,10 +242,13 @@ async def create_reserve(
                 } if reservation.employeeUser else None
             }
 
-            return ReserveResponse(
-                success=True,
-                reservation=reservation_dict
-            )
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS, TAG_RESERVE)
+
+        return ReserveResponse(
+            success=True,
+            reservation=reservation_dict
+        )
 
     except HTTPException:
         raise
@@ -255,6 +257,7 @@ async def create_reserve(
         raise HTTPException(status_code=500, detail=f"Failed to create reservation: {str(e)}")
 
 @router.get("/stats", response_model=ReserveStatsResponse)
+@cached_response("reserve.stats", tags=[TAG_RESERVE], ttl=30)
 async def get_reserve_stats(
     auth: dict = Depends(verify_auth)
 ):
@@ -309,7 +312,8 @@ async def get_reserve_stats(
 @router.delete("/{reservation_id}")
 async def delete_reservation(
     reservation_id: str,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete a reservation record and update asset status if needed"""
     try:
@@ -318,7 +322,7 @@ async def delete_reservation(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canReserve")
+        has_permission = permissions.has("canReserve")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -378,6 +382,9 @@ async def delete_reservation(
                     }
                 )
         
+        invalidate_distinct_asset_values()
+        await invalidate_response_cache(TAG_ASSETS, TAG_RESERVE)
+        
         return {"success": True}
     
     except HTTPException:
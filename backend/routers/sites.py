@@ -12,7 +12,9 @@ from models.sites import (
     SiteResponse
 )
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.response_cache import invalidate_response_cache, TAG_ASSETS
 from typing import List
 from pydantic import BaseModel
 
@@ -20,22 +22,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/sites", tags=["sites"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
 
 class BulkDeleteRequest(BaseModel):
     ids: List[str]
@@ -90,7 +76,8 @@ async def get_sites(
 @router.post("", response_model=SiteResponse, status_code=201)
 async def create_site(
     site_data: SiteCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new site"""
     try:
@@ -99,7 +86,7 @@ async def create_site(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to create sites
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -150,7 +137,8 @@ async def create_site(
 async def update_site(
     site_id: str,
     site_data: SiteUpdate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Update an existing site"""
     try:
@@ -159,7 +147,7 @@ async def update_site(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to update sites
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -201,6 +189,7 @@ async def update_site(
                 "description": site_data.description.strip() if site_data.description else None
             }
         )
+        await invalidate_response_cache(TAG_ASSETS)
         
         site = Site(
             id=updated_site.id,
@@ -221,7 +210,8 @@ async def update_site(
 @router.delete("/bulk-delete")
 async def bulk_delete_sites(
     request: BulkDeleteRequest,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Bulk delete sites"""
     try:
@@ -230,7 +220,7 @@ async def bulk_delete_sites(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to delete sites
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -248,17 +238,20 @@ async def bulk_delete_sites(
         sites_with_assets: List[str] = []
         sites_to_delete: List[str] = []
         
-        # Check each site for associated assets
-        for site in sites:
-            assets_count = await prisma.assets.count(
+        # Names still used by an active asset, with one query for all sites
+        used_names = {
+            asset.site
+            for asset in await prisma.assets.find_many(
                 where={
-                    "site": site.name,
+                    "site": {"in": [site.name for site in sites]},
                     "isDeleted": False
                 },
-                take=1
+                distinct=["site"]
             )
-            
-            if assets_count > 0:
+        }
+        
+        for site in sites:
+            if site.name in used_names:
                 sites_with_assets.append(site.name)
             else:
                 sites_to_delete.append(site.id)
@@ -274,6 +267,7 @@ async def bulk_delete_sites(
         result = await prisma.assetssite.delete_many(
             where={"id": {"in": sites_to_delete}}
         )
+        await invalidate_response_cache(TAG_ASSETS)
         
         return {
             "success": True,
@@ -296,7 +290,8 @@ async def bulk_delete_sites(
 @router.delete("/{site_id}")
 async def delete_site(
     site_id: str,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete a site"""
     try:
@@ -305,7 +300,7 @@ async def delete_site(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to delete sites
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -339,6 +334,7 @@ async def delete_site(
         await prisma.assetssite.delete(
             where={"id": site_id}
         )
+        await invalidate_response_cache(TAG_ASSETS)
         
         return {"success": True}
     
@@ -12,29 +12,14 @@ from models.categories import (
     SubCategoryResponse
 )
 from auth import verify_auth
+from permissions import PermissionSet, get_user_permissions
 from database import prisma
+from utils.response_cache import invalidate_response_cache, TAG_ASSETS
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/subcategories", tags=["subcategories"])
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission. Admins have all permissions."""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
-
 
 @router.get("", response_model=SubCategoriesResponse)
 async def get_subcategories(
@@ -83,7 +68,8 @@ async def get_subcategories(
 @router.post("", response_model=SubCategoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_subcategory(
     subcategory_data: SubCategoryCreate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new subcategory"""
     try:
@@ -92,7 +78,7 @@ async def create_subcategory(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to create subcategories
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -147,7 +133,8 @@ async def create_subcategory(
 async def update_subcategory(
     subcategory_id: str,
     subcategory_data: SubCategoryUpdate,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Update an existing subcategory"""
     try:
@@ -156,7 +143,7 @@ async def update_subcategory(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to update subcategories
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -204,6 +191,7 @@ async def update_subcategory(
                 "category": True
             }
         )
+        await invalidate_response_cache(TAG_ASSETS)
         
         subcategory = SubCategory(
             id=str(updated_subcategory.id),
@@ -223,7 +211,8 @@ async def update_subcategory(
 @router.delete("/{subcategory_id}")
 async def delete_subcategory(
     subcategory_id: str,
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete a subcategory"""
     try:
@@ -232,7 +221,7 @@ async def delete_subcategory(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission - user must have canManageSetup to delete subcategories
-        has_permission = await check_permission(user_id, "canManageSetup")
+        has_permission = permissions.has("canManageSetup")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -241,17 +230,18 @@ async def delete_subcategory(
         
         # Check if subcategory exists
         subcategory = await prisma.subcategory.find_unique(
-            where={"id": subcategory_id},
-            include={
-                "assets": True
-            }
+            where={"id": subcategory_id}
         )
         
         if not subcategory:
             raise HTTPException(status_code=404, detail="Subcategory not found")
         
         # Check if any assets use this subcategory
-        if subcategory.assets and len(subcategory.assets) > 0:
+        assets_count = await prisma.assets.count(
+            where={"subCategoryId": subcategory_id},
+            take=1
+        )
+        if assets_count > 0:
             raise HTTPException(
                 status_code=400,
                 detail="Cannot delete subcategory with associated assets. Please reassign or delete assets first."
@@ -261,6 +251,7 @@ async def delete_subcategory(
         await prisma.subcategory.delete(
             where={"id": subcategory_id}
         )
+        await invalidate_response_cache(TAG_ASSETS)
         
         return {"success": True}
     
@@ -7,7 +7,6 @@ import logging
 import os
 import secrets
 import string
-import httpx
 from dotenv import load_dotenv
 
 from models.users import (
@@ -21,8 +20,10 @@ from models.users import (
     SendPasswordResetResponse,
     PaginationInfo,
 )
-from auth import verify_auth
+from auth import verify_auth, invalidate_user_tokens
+from permissions import PermissionSet, get_user_permissions, invalidate_user_permissions
 from database import prisma
+from http_client import get_http_client
 
 load_dotenv()
 
@@ -36,24 +37,6 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 SUPABASE_ANON_KEY = os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY") or os.getenv("SUPABASE_ANON_KEY")
 
 
-async def check_permission(user_id: str, permission: str) -> bool:
-    """Check if user has a specific permission"""
-    try:
-        asset_user = await prisma.assetuser.find_unique(
-            where={"userId": user_id}
-        )
-        if not asset_user or not asset_user.isActive:
-            return False
-        
-        # Admins have all permissions
-        if asset_user.role == "admin":
-            return True
-        
-        return getattr(asset_user, permission, False)
-    except Exception:
-        return False
-
-
 def generate_random_password(length: int = 12) -> str:
     """Generate a random password"""
     charset = string.ascii_letters + string.digits + "!@#$%^&*()_+-=[]{}|;:,.<>?/~`"
@@ -65,20 +48,20 @@ async def get_supabase_user_by_id(user_id: str) -> dict:
     if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
         raise HTTPException(status_code=500, detail="Supabase configuration missing")
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{SUPABASE_URL}/auth/v1/admin/users/{user_id}",
-            headers={
-                "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
-                "apikey": SUPABASE_SERVICE_ROLE_KEY,
-            },
-            timeout=10.0
-        )
-        
-        if response.status_code != 200:
-            return {}
-        
-        return response.json()
+    client = get_http_client()
+    response = await client.get(
+        f"{SUPABASE_URL}/auth/v1/admin/users/{user_id}",
+        headers={
+            "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+            "apikey": SUPABASE_SERVICE_ROLE_KEY,
+        },
+        timeout=10.0
+    )
+    
+    if response.status_code != 200:
+        return {}
+    
+    return response.json()
 
 
 async def create_supabase_user(email: str, password: str, name: Optional[str] = None) -> dict:
@@ -90,33 +73,33 @@ async def create_supabase_user(email: str, password: str, name: Optional[str] =
     if name:
         user_metadata = {"name": name, "full_name": name}
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{SUPABASE_URL}/auth/v1/admin/users",
-            headers={
-                "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
-                "apikey": SUPABASE_SERVICE_ROLE_KEY,
-                "Content-Type": "application/json",
-            },
-            json={
-                "email": email,
-                "password": password,
-                "email_confirm": True,
-                "user_metadata": user_metadata if user_metadata else None,
-            },
-            timeout=10.0
-        )
+    client = get_http_client()
+    response = await client.post(
+        f"{SUPABASE_URL}/auth/v1/admin/users",
+        headers={
+            "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+            "apikey": SUPABASE_SERVICE_ROLE_KEY,
+            "Content-Type": "application/json",
+        },
+        json={
+            "email": email,
+            "password": password,
+            "email_confirm": True,
+            "user_metadata": user_metadata if user_metadata else None,
+        },
+        timeout=10.0
+    )
+    
+    if response.status_code not in [200, 201]:
+        error_data = response.json() if response.content else {}
+        error_msg = error_data.get("message", error_data.get("msg", "Failed to create user"))
         
-        if response.status_code not in [200, 201]:
-            error_data = response.json() if response.content else {}
-            error_msg = error_data.get("message", error_data.get("msg", "Failed to create user"))
-            
-            if "already registered" in error_msg.lower() or "already exists" in error_msg.lower():
-                raise HTTPException(status_code=409, detail="User already exists")
-            
-            raise HTTPException(status_code=response.status_code, detail=error_msg)
+        if "already registered" in error_msg.lower() or "already exists" in error_msg.lower():
+            raise HTTPException(status_code=409, detail="User already exists")
         
-        return response.json()
+        raise HTTPException(status_code=response.status_code, detail=error_msg)
+    
+    return response.json()
 
 
 async def update_supabase_user(user_id: str, name: Optional[str] = None) -> dict:
@@ -135,24 +118,24 @@ async def update_supabase_user(user_id: str, name: Optional[str] = None) -> dict
         "full_name": name or None,
     }
     
-    async with httpx.AsyncClient() as client:
-        response = await client.put(
-            f"{SUPABASE_URL}/auth/v1/admin/users/{user_id}",
-            headers={
-                "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
-                "apikey": SUPABASE_SERVICE_ROLE_KEY,
-                "Content-Type": "application/json",
-            },
-            json={
-                "user_metadata": updated_metadata,
-            },
-            timeout=10.0
-        )
-        
-        if response.status_code != 200:
-            logger.error(f"Failed to update Supabase user: {response.text}")
-        
-        return response.json() if response.status_code == 200 else {}
+    client = get_http_client()
+    response = await client.put(
+        f"{SUPABASE_URL}/auth/v1/admin/users/{user_id}",
+        headers={
+            "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+            "apikey": SUPABASE_SERVICE_ROLE_KEY,
+            "Content-Type": "application/json",
+        },
+        json={
+            "user_metadata": updated_metadata,
+        },
+        timeout=10.0
+    )
+    
+    if response.status_code != 200:
+        logger.error(f"Failed to update Supabase user: {response.text}")
+    
+    return response.json() if response.status_code == 200 else {}
 
 
 async def delete_supabase_user(user_id: str) -> bool:
@@ -160,21 +143,21 @@ async def delete_supabase_user(user_id: str) -> bool:
     if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
         raise HTTPException(status_code=500, detail="Supabase configuration missing")
     
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(
-            f"{SUPABASE_URL}/auth/v1/admin/users/{user_id}",
-            headers={
-                "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
-                "apikey": SUPABASE_SERVICE_ROLE_KEY,
-            },
-            timeout=10.0
-        )
-        
-        if response.status_code not in [200, 204]:
-            logger.error(f"Failed to delete Supabase user: {response.text}")
-            raise HTTPException(status_code=500, detail="Failed to delete user from authentication system")
-        
-        return True
+    client = get_http_client()
+    response = await client.delete(
+        f"{SUPABASE_URL}/auth/v1/admin/users/{user_id}",
+        headers={
+            "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+            "apikey": SUPABASE_SERVICE_ROLE_KEY,
+        },
+        timeout=10.0
+    )
+    
+    if response.status_code not in [200, 204]:
+        logger.error(f"Failed to delete Supabase user: {response.text}")
+        raise HTTPException(status_code=500, detail="Failed to delete user from authentication system")
+    
+    return True
 
 
 async def send_password_reset_email(email: str) -> dict:
@@ -186,26 +169,26 @@ async def send_password_reset_email(email: str) -> dict:
     base_url = os.getenv("NEXT_PUBLIC_SITE_URL") or os.getenv("NEXT_PUBLIC_APP_URL") or "http://localhost:3000"
     redirect_to = f"{base_url}/reset-password"
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{SUPABASE_URL}/auth/v1/recover",
-            headers={
-                "apikey": SUPABASE_ANON_KEY,
-                "Content-Type": "application/json",
-            },
-            json={
-                "email": email,
-                "redirect_to": redirect_to,
-            },
-            timeout=10.0
-        )
-        
-        if response.status_code not in [200, 204]:
-            error_data = response.json() if response.content else {}
-            error_msg = error_data.get("message", error_data.get("msg", "Failed to send password reset email"))
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        return {"success": True}
+    client = get_http_client()
+    response = await client.post(
+        f"{SUPABASE_URL}/auth/v1/recover",
+        headers={
+            "apikey": SUPABASE_ANON_KEY,
+            "Content-Type": "application/json",
+        },
+        json={
+            "email": email,
+            "redirect_to": redirect_to,
+        },
+        timeout=10.0
+    )
+    
+    if response.status_code not in [200, 204]:
+        error_data = response.json() if response.content else {}
+        error_msg = error_data.get("message", error_data.get("msg", "Failed to send password reset email"))
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    return {"success": True}
 
 
 def user_to_response(db_user, email: Optional[str] = None, name: Optional[str] = None) -> User:
@@ -374,7 +357,8 @@ async def get_users(
 @router.post("", response_model=CreateUserResponse, status_code=201)
 async def create_user(
     request: CreateUserRequest = Body(...),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Create a new user"""
     try:
@@ -383,7 +367,7 @@ async def create_user(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(user_id, "canManageUsers")
+        has_permission = permissions.has("canManageUsers")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -502,7 +486,8 @@ async def get_user(
 async def update_user(
     user_id: str = Path(..., description="User ID"),
     request: UpdateUserRequest = Body(...),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Update a user"""
     try:
@@ -511,7 +496,7 @@ async def update_user(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(auth_user_id, "canManageUsers")
+        has_permission = permissions.has("canManageUsers")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -576,6 +561,7 @@ async def update_user(
             where={"id": user_id},
             data=update_data,
         )
+        invalidate_user_permissions(db_user.userId)
         
         # Update name in Supabase Auth if provided
         if request.name is not None:
@@ -605,7 +591,8 @@ async def update_user(
 @router.delete("/{user_id}", response_model=DeleteUserResponse)
 async def delete_user(
     user_id: str = Path(..., description="User ID"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Delete a user"""
     try:
@@ -614,7 +601,7 @@ async def delete_user(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(auth_user_id, "canManageUsers")
+        has_permission = permissions.has("canManageUsers")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
@@ -636,6 +623,8 @@ async def delete_user(
         
         # Delete from asset_users
         await prisma.assetuser.delete(where={"id": user_id})
+        invalidate_user_permissions(user_to_delete.userId)
+        invalidate_user_tokens(user_to_delete.userId)
         
         return DeleteUserResponse(success=True)
     
@@ -651,7 +640,8 @@ async def delete_user(
 @router.post("/{user_id}/send-password-reset", response_model=SendPasswordResetResponse)
 async def send_password_reset(
     user_id: str = Path(..., description="User ID"),
-    auth: dict = Depends(verify_auth)
+    auth: dict = Depends(verify_auth),
+    permissions: PermissionSet = Depends(get_user_permissions)
 ):
     """Send password reset email to user"""
     try:
@@ -660,7 +650,7 @@ async def send_password_reset(
             raise HTTPException(status_code=401, detail="Unauthorized")
         
         # Check permission
-        has_permission = await check_permission(auth_user_id, "canManageUsers")
+        has_permission = permissions.has("canManageUsers")
         if not has_permission:
             raise HTTPException(
                 status_code=403,
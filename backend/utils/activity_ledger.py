@@ -0,0 +1,249 @@
+"""
+Asset activity ledger
+asset_activity is an append-only ledger of asset transactions: one row per
+checkout, checkin, move, reservation, lease, lease return, disposal,
+maintenance and audit. The write routers insert the row inside the same
+transaction as the source record, so feeds can read one table ordered by
+(activity_date, id) instead of reassembling nine tables at read time.
+
+Rows are keyed by (activity_type, source_id), which makes the backfill
+idempotent: it copies source records that have no ledger row yet.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from database import prisma
+
+ACTIVITY_CHECKOUT = "checkout"
+ACTIVITY_CHECKIN = "checkin"
+ACTIVITY_MOVE = "move"
+ACTIVITY_RESERVE = "reserve"
+ACTIVITY_LEASE = "lease"
+ACTIVITY_LEASE_RETURN = "lease_return"
+ACTIVITY_DISPOSE = "dispose"
+ACTIVITY_MAINTENANCE = "maintenance"
+ACTIVITY_AUDIT = "audit"
+
+ACTIVITY_TYPES = [
+    ACTIVITY_CHECKOUT,
+    ACTIVITY_CHECKIN,
+    ACTIVITY_MOVE,
+    ACTIVITY_RESERVE,
+    ACTIVITY_LEASE,
+    ACTIVITY_LEASE_RETURN,
+    ACTIVITY_DISPOSE,
+    ACTIVITY_MAINTENANCE,
+    ACTIVITY_AUDIT,
+]
+
+_INSERT_SQL = """
+    INSERT INTO asset_activity
+        (activity_type, source_id, asset_id, activity_date, actor, employee_user_id, details)
+    SELECT * FROM unnest($1::text[], $2::text[], $3::text[], $4::timestamp[], $5::text[], $6::text[], $7::text[])
+    ON CONFLICT (activity_type, source_id) DO NOTHING
+"""
+
+# Ledger rows for the source records written before the ledger existed. The
+# acting user was not stored on these tables, so actor is left empty except for
+# audits, whose auditor is also the actor of live audit rows.
+_BACKFILL_SQL: Dict[str, str] = {
+    ACTIVITY_CHECKOUT: """
+        SELECT 'checkout', c.id, c.asset_id, c.checkout_date::timestamp, NULL, c.employee_user_id,
+               'Checked out to ' || coalesce(e.name, 'Unknown')
+        FROM assets_checkout c LEFT JOIN employee_users e ON e.id = c.employee_user_id
+    """,
+    ACTIVITY_CHECKIN: """
+        SELECT 'checkin', c.id, c.asset_id, c.checkin_date::timestamp, NULL, c.employee_user_id,
+               'Checked in from ' || coalesce(e.name, 'Unknown')
+        FROM assets_checkin c LEFT JOIN employee_users e ON e.id = c.employee_user_id
+    """,
+    ACTIVITY_MOVE: """
+        SELECT 'move', m.id, m.asset_id, m.move_date::timestamp, NULL, m.employee_user_id,
+               m.move_type || ': ' || coalesce(nullif(m.reason, ''), 'No reason provided')
+        FROM assets_move m
+    """,
+    ACTIVITY_RESERVE: """
+        SELECT 'reserve', r.id, r.asset_id, r.reservation_date::timestamp, NULL, r.employee_user_id,
+               'Reserved for ' || coalesce(e.name, r.department, 'Unknown')
+        FROM assets_reserve r LEFT JOIN employee_users e ON e.id = r.employee_user_id
+    """,
+    ACTIVITY_LEASE: """
+        SELECT 'lease', l.id, l.asset_id, l.lease_start_date::timestamp, NULL, NULL,
+               'Leased to ' || l.lessee
+        FROM assets_lease l
+    """,
+    ACTIVITY_LEASE_RETURN: """
+        SELECT 'lease_return', r.id, r.asset_id, r.return_date::timestamp, NULL, NULL,
+               'Returned from ' || l.lessee
+        FROM assets_lease_return r JOIN assets_lease l ON l.id = r.lease_id
+    """,
+    ACTIVITY_DISPOSE: """
+        SELECT 'dispose', d.id, d.asset_id, d.dispose_date::timestamp, NULL, NULL,
+               d.disposal_method || coalesce(': ' || nullif(d.dispose_reason, ''), '')
+        FROM assets_dispose d
+    """,
+    ACTIVITY_MAINTENANCE: """
+        SELECT 'maintenance', m.id, m.asset_id, m.created_at, NULL, NULL,
+               m.title
+        FROM assets_maintenance m
+    """,
+    ACTIVITY_AUDIT: """
+        SELECT 'audit', a.id, a.asset_id, a.audit_date::timestamp, a.auditor, NULL,
+               a.audit_type
+        FROM assets_audit_history a
+    """,
+}
+
+
+def _utc_naive(value: datetime) -> datetime:
+    """Ledger dates are stored like Prisma's DateTime columns: UTC without an offset"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def actor_name(auth: Dict[str, Any]) -> str:
+    """Display name of the signed-in user, as written to history logs"""
+    user = auth.get("user", {})
+    user_metadata = user.get("user_metadata", {})
+    return (
+        user_metadata.get("name") or
+        user_metadata.get("full_name") or
+        user.get("email", "").split("@")[0] or
+        user.get("email") or
+        user.get("id", "Unknown")
+    )
+
+
+def activity(
+    activity_type: str,
+    source_id: str,
+    asset_id: str,
+    activity_date: datetime,
+    actor: Optional[str] = None,
+    employee_user_id: Optional[str] = None,
+    details: Optional[str] = None
+) -> Dict[str, Any]:
+    """One ledger entry for record_activity"""
+    return {
+        "activity_type": activity_type,
+        "source_id": str(source_id),
+        "asset_id": str(asset_id),
+        "activity_date": _utc_naive(activity_date).isoformat(),
+        "actor": actor,
+        "employee_user_id": employee_user_id,
+        "details": details,
+    }
+
+
+async def record_activity(client: Any, *entries: Dict[str, Any]) -> None:
+    """
+    Append entries to the ledger with one INSERT. Pass the transaction client
+    (`async with prisma.tx() as transaction`) so the rows commit or roll back
+    with the records they describe.
+    """
+    if not entries:
+        return
+    columns = ["activity_type", "source_id", "asset_id", "activity_date", "actor", "employee_user_id", "details"]
+    await client.execute_raw(
+        _INSERT_SQL,
+        *[[entry[column] for entry in entries] for column in columns]
+    )
+
+
+async def backfill_activity_ledger(activity_types: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Copy source records that have no ledger row yet into asset_activity.
+    Safe to re-run; returns the number of rows written per activity type.
+    """
+    written: Dict[str, int] = {}
+    for activity_type in activity_types or ACTIVITY_TYPES:
+        written[activity_type] = await prisma.execute_raw(
+            f"""
+            INSERT INTO asset_activity
+                (activity_type, source_id, asset_id, activity_date, actor, employee_user_id, details)
+            {_BACKFILL_SQL[activity_type]}
+            ON CONFLICT (activity_type, source_id) DO NOTHING
+            """
+        )
+    return written
+
+
+def _build_feed_filter_sql(
+    activity_type: Optional[str],
+    asset_id: Optional[str],
+    actor: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> Tuple[str, List[Any]]:
+    """WHERE fragment over asset_activity `l`; each filter matches one of the ledger's indexes"""
+    params: List[Any] = []
+    conditions: List[str] = []
+    if activity_type:
+        params.append(activity_type)
+        conditions.append(f"l.activity_type = ${len(params)}")
+    if asset_id:
+        params.append(asset_id)
+        conditions.append(f"l.asset_id = ${len(params)}")
+    if actor:
+        params.append(actor)
+        conditions.append(f"l.actor = ${len(params)}")
+    if start_date:
+        params.append(_utc_naive(start_date).isoformat())
+        conditions.append(f"l.activity_date >= ${len(params)}::timestamp")
+    if end_date:
+        params.append(_utc_naive(end_date).isoformat())
+        conditions.append(f"l.activity_date <= ${len(params)}::timestamp")
+    return " AND ".join(conditions) or "true", params
+
+
+async def count_activity(
+    activity_type: Optional[str] = None,
+    asset_id: Optional[str] = None,
+    actor: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> int:
+    """Number of ledger rows matching the filters"""
+    where_sql, params = _build_feed_filter_sql(activity_type, asset_id, actor, start_date, end_date)
+    rows = await prisma.query_raw(f"SELECT count(*) AS count FROM asset_activity l WHERE {where_sql}", *params)
+    return int(rows[0]["count"]) if rows else 0
+
+
+async def fetch_activity(
+    take: int,
+    skip: int = 0,
+    after: Optional[Tuple[datetime, str]] = None,
+    activity_type: Optional[str] = None,
+    asset_id: Optional[str] = None,
+    actor: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Ledger rows newest first (activity_date desc, id desc) with the asset and
+    employee they refer to. `after` is the (activity_date, id) of the last row
+    of the previous page and replaces `skip`.
+    """
+    where_sql, params = _build_feed_filter_sql(activity_type, asset_id, actor, start_date, end_date)
+    if after:
+        params.extend([_utc_naive(after[0]).isoformat(), after[1]])
+        where_sql += f" AND (l.activity_date, l.id) < (${len(params) - 1}::timestamp, ${len(params)})"
+        skip = 0
+    params.extend([take, skip])
+    n = len(params)
+    return await prisma.query_raw(
+        f"""
+        SELECT l.id, l.activity_type, l.source_id, l.asset_id, l.activity_date, l.actor,
+               l.employee_user_id, l.details, l.created_at,
+               a.asset_tag_id, a.description AS asset_description,
+               e.name AS employee_name, e.email AS employee_email
+        FROM asset_activity l
+        JOIN assets a ON a.id = l.asset_id
+        LEFT JOIN employee_users e ON e.id = l.employee_user_id
+        WHERE {where_sql}
+        ORDER BY l.activity_date DESC, l.id DESC
+        LIMIT ${n - 1} OFFSET ${n}
+        """,
+        *params
+    )
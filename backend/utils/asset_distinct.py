@@ -0,0 +1,71 @@
+"""
+Distinct asset column values for filter dropdowns (status, location, site, ...)
+Values come from a group_by on the indexed column and are cached until an asset
+write invalidates them.
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from database import prisma
+
+logger = logging.getLogger(__name__)
+
+# Columns that can be listed, each backed by an (isDeleted, <column>) index
+DISTINCT_ASSET_FIELDS = ("status", "location", "site", "department", "assetType")
+
+# Upper bound on staleness for writes that do not go through this process
+DISTINCT_CACHE_TTL_SECONDS = 300
+# Keys include the caller's where clause (e.g. free-text search), so keep only the most recent
+DISTINCT_CACHE_MAX_ENTRIES = 256
+
+# cache key -> (expires_at, values), least recently used first
+_cache: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+# Bumped on every invalidation so a query that started before a write is not cached
+_generation = 0
+
+
+def _cache_key(field: str, where: Dict[str, Any]) -> str:
+    return json.dumps({"field": field, "where": where}, sort_keys=True, default=str)
+
+
+async def get_distinct_asset_values(field: str, where: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Sorted distinct non-empty values of an asset column among assets matching `where`
+    (defaults to non-deleted assets). Raises ValueError for unsupported fields.
+    """
+    if field not in DISTINCT_ASSET_FIELDS:
+        raise ValueError(f"Unsupported field: {field}")
+
+    if where is None:
+        where = {"isDeleted": False}
+
+    key = _cache_key(field, where)
+    entry = _cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        _cache.move_to_end(key)
+        return entry[1]
+
+    generation = _generation
+    # AND keeps any condition the caller already has on the same column
+    rows = await prisma.assets.group_by(
+        by=[field],
+        where={"AND": [where, {field: {"not": None}}]}
+    )
+    values = sorted({row.get(field) for row in rows if row.get(field)})
+
+    if generation == _generation:
+        _cache[key] = (time.monotonic() + DISTINCT_CACHE_TTL_SECONDS, values)
+        _cache.move_to_end(key)
+        while len(_cache) > DISTINCT_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return values
+
+
+def invalidate_distinct_asset_values() -> None:
+    """Drop all cached distinct values. Call after creating, updating or deleting assets."""
+    global _generation
+    _generation += 1
+    _cache.clear()
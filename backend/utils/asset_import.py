@@ -0,0 +1,557 @@
+"""
+Asset import pipeline
+Shared by POST /api/assets/import (synchronous, small batches) and the import
+jobs (POST /api/assets/import/jobs), which process a whole spreadsheet in the
+background:
+
+1. validate the rows and drop repeated asset tags
+2. upsert the referenced categories, subcategories, locations, departments and
+   sites with one create_many(skip_duplicates) + find_many per table
+3. insert the assets in chunks of IMPORT_CHUNK_SIZE with create_many (bisected
+   when the database rejects a row, so only that row fails), followed by their
+   history, audit and checkout rows as one engine batch
+
+A job's progress and outcome live on its FileHistory row (operationType
+"import"): status moves queued -> processing -> success/partial/failed and the
+record counters are updated after every chunk, so any worker can answer a poll.
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from database import prisma
+from utils.asset_distinct import invalidate_distinct_asset_values
+from utils.asset_search import refresh_asset_search_index
+from utils.batch_writes import execute_batched
+from utils.bulk_transactions import new_id
+from utils.response_cache import invalidate_response_cache, TAG_ASSETS
+
+logger = logging.getLogger(__name__)
+
+# Assets inserted per create_many (and per progress update of a job)
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+# A queued/processing job whose FileHistory row has not been touched for this
+# long lost its worker (restart, crash) and is reported as failed
+IMPORT_JOB_STALE_SECONDS = int(os.getenv("IMPORT_JOB_STALE_SECONDS", "600"))
+
+JOB_QUEUED = "queued"
+JOB_PROCESSING = "processing"
+JOB_ACTIVE_STATUSES = (JOB_QUEUED, JOB_PROCESSING)
+
+# Failures kept on the job's metadata for the status endpoint
+_MAX_REPORTED_FAILURES = 100
+
+CHECKOUT_STATUSES = ["checked out", "checked-out", "checkedout", "in use"]
+
+# Running jobs, referenced so the event loop does not drop them
+_running_jobs: Dict[str, asyncio.Task] = {}
+
+
+def parse_date(date_str: Optional[str]) -> Optional[datetime]:
+    """Parse date string to datetime"""
+    if not date_str:
+        return None
+    if isinstance(date_str, datetime):
+        return date_str
+    try:
+        # Try ISO format first
+        return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+    except:
+        for fmt in ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%S.%f']:
+            try:
+                return datetime.strptime(date_str, fmt)
+            except:
+                continue
+    return None
+
+
+def parse_number(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, str):
+            value = value.replace(",", "")
+        num = float(value)
+        return num if not (num != num) else None  # Check for NaN
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_boolean(value: Any) -> Optional[bool]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        lower = value.lower().strip()
+        if lower in ["true", "yes", "1"]:
+            return True
+        if lower in ["false", "no", "0"]:
+            return False
+    return bool(value) if value else None
+
+
+def _clean(value: Any) -> Optional[str]:
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+def invalid_import_rows(assets: List[Any]) -> List[int]:
+    """Spreadsheet row numbers (row 1 is the header) of rows without an Asset Tag ID"""
+    return [
+        index + 2
+        for index, asset in enumerate(assets)
+        if not asset or not isinstance(asset, dict) or not asset.get("assetTagId")
+        or (isinstance(asset.get("assetTagId"), str) and asset.get("assetTagId", "").strip() == "")
+    ]
+
+
+async def _upsert_names(model: Any, names: List[str], extra: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, str]:
+    """Create the missing names (unique column) in one statement and return name -> id"""
+    if not names:
+        return {}
+    await model.create_many(
+        data=[
+            {"name": name, "description": "Auto-created during import", **((extra or {}).get(name) or {})}
+            for name in names
+        ],
+        skip_duplicates=True
+    )
+    rows = await model.find_many(where={"name": {"in": names}})
+    return {row.name: str(row.id) for row in rows}
+
+
+async def resolve_reference_data(assets: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+    """
+    Name -> id maps for the categories, subcategories, locations, departments
+    and sites the rows refer to, creating the missing ones
+    """
+    categories: Dict[str, None] = {}
+    subcategory_parents: Dict[str, Optional[str]] = {}
+    locations: Dict[str, None] = {}
+    departments: Dict[str, None] = {}
+    sites: Dict[str, None] = {}
+
+    for asset in assets:
+        category_name = _clean(asset.get("category"))
+        subcategory_name = _clean(asset.get("subCategory"))
+        if category_name:
+            categories[category_name] = None
+        if subcategory_name and not subcategory_parents.get(subcategory_name):
+            subcategory_parents[subcategory_name] = category_name
+        for name, names in ((asset.get("location"), locations), (asset.get("department"), departments), (asset.get("site"), sites)):
+            if _clean(name):
+                names[_clean(name)] = None
+
+    category_map = await _upsert_names(prisma.category, list(categories))
+
+    subcategory_map: Dict[str, str] = {}
+    if subcategory_parents:
+        # Subcategories without a known parent go under the first category (or a new "Default")
+        default_category_id = None
+        if any(category_map.get(parent or "") is None for parent in subcategory_parents.values()):
+            default_category = await prisma.category.find_first()
+            if not default_category:
+                default_category = await prisma.category.create(
+                    data={"name": "Default", "description": "Default category for subcategories without parent"}
+                )
+            default_category_id = str(default_category.id)
+        subcategory_map = await _upsert_names(
+            prisma.subcategory,
+            list(subcategory_parents),
+            {
+                name: {"categoryId": category_map.get(parent or "") or default_category_id}
+                for name, parent in subcategory_parents.items()
+            }
+        )
+
+    return {
+        "category": category_map,
+        "subcategory": subcategory_map,
+        "location": await _upsert_names(prisma.assetslocation, list(locations)),
+        "department": await _upsert_names(prisma.assetsdepartment, list(departments)),
+        "site": await _upsert_names(prisma.assetssite, list(sites)),
+    }
+
+
+def build_asset_data(asset: Dict[str, Any], reference: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
+    """Assets create_many row for one spreadsheet row (raises on unusable values)"""
+    category_id = None
+    if asset.get("category"):
+        category_id = reference["category"].get(_clean(asset.get("category")) or "")
+    elif asset.get("categoryId"):
+        category_id = asset.get("categoryId")
+
+    subcategory_id = None
+    if asset.get("subCategory"):
+        subcategory_id = reference["subcategory"].get(_clean(asset.get("subCategory")) or "")
+    elif asset.get("subCategoryId"):
+        subcategory_id = asset.get("subCategoryId")
+
+    return {
+        "assetTagId": asset.get("assetTagId"),
+        "description": asset.get("description") or "",
+        "purchasedFrom": asset.get("purchasedFrom"),
+        "purchaseDate": parse_date(asset.get("purchaseDate")),
+        "brand": asset.get("brand"),
+        "cost": parse_number(asset.get("cost")),
+        "model": asset.get("model"),
+        "serialNo": asset.get("serialNo"),
+        "additionalInformation": asset.get("additionalInformation"),
+        "xeroAssetNo": asset.get("xeroAssetNo"),
+        "owner": asset.get("owner"),
+        "pbiNumber": asset.get("pbiNumber"),
+        "status": asset.get("status"),
+        "issuedTo": asset.get("issuedTo"),
+        "poNumber": asset.get("poNumber"),
+        "paymentVoucherNumber": asset.get("paymentVoucherNumber"),
+        "assetType": asset.get("assetType"),
+        "deliveryDate": parse_date(asset.get("deliveryDate")),
+        "unaccountedInventory": parse_boolean(asset.get("unaccountedInventory") or asset.get("unaccounted2021Inventory")),
+        "remarks": asset.get("remarks"),
+        "qr": asset.get("qr"),
+        "oldAssetTag": asset.get("oldAssetTag"),
+        "depreciableAsset": parse_boolean(asset.get("depreciableAsset")) or False,
+        "depreciableCost": parse_number(asset.get("depreciableCost")),
+        "salvageValue": parse_number(asset.get("salvageValue")),
+        "assetLifeMonths": int(asset.get("assetLifeMonths")) if asset.get("assetLifeMonths") else None,
+        "depreciationMethod": asset.get("depreciationMethod"),
+        "dateAcquired": parse_date(asset.get("dateAcquired")),
+        "categoryId": category_id,
+        "subCategoryId": subcategory_id,
+        "department": asset.get("department"),
+        "site": asset.get("site"),
+        "location": asset.get("location"),
+    }
+
+
+def _audit_row(asset: Dict[str, Any], asset_id: str) -> Optional[Dict[str, Any]]:
+    if not asset.get("lastAuditDate") and not asset.get("lastAuditType"):
+        return None
+    return {
+        "assetId": asset_id,
+        "auditType": asset.get("lastAuditType") or "Imported Audit",
+        "auditDate": parse_date(asset.get("lastAuditDate")) or datetime.now(),
+        "auditor": asset.get("lastAuditor"),
+        "status": "Completed",
+        "notes": "Imported from Excel file",
+    }
+
+
+def _checkout_row(asset_data: Dict[str, Any], asset_id: str) -> Optional[Dict[str, Any]]:
+    if not asset_data.get("status") or asset_data["status"].lower().strip() not in CHECKOUT_STATUSES:
+        return None
+    checkout_date = asset_data.get("deliveryDate") or asset_data.get("purchaseDate") or datetime.now()
+    return {
+        "assetId": asset_id,
+        "employeeUserId": None,
+        "checkoutDate": checkout_date,
+        "expectedReturnDate": None,
+    }
+
+
+async def _insert_assets(rows: List[Dict[str, Any]], errors: Dict[str, str]) -> None:
+    """
+    create_many the rows; if the database rejects the statement, bisect so one bad
+    row (over-length value, bad reference, overflow) only fails itself. The error of
+    each rejected row is recorded in `errors` by row id.
+    """
+    try:
+        await prisma.assets.create_many(data=rows, skip_duplicates=True)
+    except Exception as e:
+        if len(rows) == 1:
+            errors[rows[0]["id"]] = str(e)
+            return
+        middle = len(rows) // 2
+        await _insert_assets(rows[:middle], errors)
+        await _insert_assets(rows[middle:], errors)
+
+
+async def import_asset_chunk(
+    assets: List[Dict[str, Any]],
+    reference: Dict[str, Dict[str, str]],
+    user_name: str
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Insert one chunk of rows: assets with one create_many (bisected when a row is
+    rejected), then their "added" history, audit and checkout rows as one batch.
+    Returns the per-row results ({"asset", "action", "reason"/"error"}) and the
+    number of assets created.
+    """
+    tags = [asset.get("assetTagId") for asset in assets if isinstance(asset.get("assetTagId"), str)]
+    existing_assets = await prisma.assets.find_many(
+        where={"assetTagId": {"in": tags}},
+        select={"assetTagId": True, "isDeleted": True}
+    ) if tags else []
+    existing_asset_tags = {asset.assetTagId for asset in existing_assets}
+    deleted_asset_tags = {asset.assetTagId for asset in existing_assets if asset.isDeleted}
+
+    results: List[Dict[str, Any]] = []
+    # (result, spreadsheet row, create_many row); the result is filled in after the insert
+    rows_to_create: List[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]] = []
+    for asset in assets:
+        asset_tag_id = asset.get("assetTagId")
+        if not asset_tag_id:
+            results.append({"asset": None, "action": "failed", "error": "Missing Asset Tag ID"})
+            continue
+        if asset_tag_id in existing_asset_tags:
+            reason = "Asset exists in trash" if asset_tag_id in deleted_asset_tags else "Duplicate asset tag"
+            results.append({"asset": asset_tag_id, "action": "skipped", "reason": reason})
+            continue
+        try:
+            # Our own ids tell the rows we created from tags skip_duplicates dropped
+            asset_data = {"id": new_id(), **build_asset_data(asset, reference)}
+        except (ValueError, TypeError) as e:
+            results.append({"asset": asset_tag_id, "action": "failed", "error": f"Invalid value: {str(e)}"})
+            continue
+        result = {"asset": asset_tag_id}
+        results.append(result)
+        rows_to_create.append((result, asset, asset_data))
+
+    if not rows_to_create:
+        return results, 0
+
+    insert_errors: Dict[str, str] = {}
+    await _insert_assets([asset_data for _, _, asset_data in rows_to_create], insert_errors)
+    invalidate_distinct_asset_values()
+    await invalidate_response_cache(TAG_ASSETS)
+
+    created_assets = await prisma.assets.find_many(
+        where={"id": {"in": [asset_data["id"] for _, _, asset_data in rows_to_create]}},
+        select={"id": True, "assetTagId": True, "createdAt": True}
+    )
+    created_by_id = {str(asset.id): asset for asset in created_assets}
+    for result, _, asset_data in rows_to_create:
+        if asset_data["id"] in created_by_id:
+            result["action"] = "created"
+        elif asset_data["id"] in insert_errors:
+            result.update({"action": "failed", "error": insert_errors[asset_data["id"]]})
+        else:
+            # Created by someone else since the existence check
+            result.update({"action": "skipped", "reason": "Duplicate asset tag"})
+    await refresh_asset_search_index(list(created_by_id))
+
+    history_rows: List[Dict[str, Any]] = []
+    audit_rows: List[Dict[str, Any]] = []
+    checkout_rows: List[Dict[str, Any]] = []
+    for _, asset, asset_data in rows_to_create:
+        created = created_by_id.get(asset_data["id"])
+        if not created:
+            continue
+        asset_id = str(created.id)
+        # Only assets inserted by this chunk are listed, so none has an "added" log yet
+        history_rows.append({
+            "assetId": asset_id,
+            "eventType": "added",
+            "actionBy": user_name,
+            "eventDate": created.createdAt,
+        })
+        audit_row = _audit_row(asset, asset_id)
+        if audit_row:
+            audit_rows.append(audit_row)
+        checkout_row = _checkout_row(asset_data, asset_id)
+        if checkout_row:
+            checkout_rows.append(checkout_row)
+
+    follow_up_writes = [
+        (lambda batch, model=model, rows=rows: getattr(batch, model).create_many(data=rows, skip_duplicates=True))
+        for model, rows in (
+            ("assetshistorylogs", history_rows),
+            ("assetsaudithistory", audit_rows),
+            ("assetscheckout", checkout_rows),
+        )
+        if rows
+    ]
+    await execute_batched(prisma, follow_up_writes)
+    return results, len(created_assets)
+
+
+def _job_metadata(file_history: Any) -> Dict[str, Any]:
+    try:
+        return json.loads(file_history.metadata) if file_history.metadata else {}
+    except (TypeError, ValueError):
+        return {}
+
+
+async def _update_job(job_id: str, data: Dict[str, Any], metadata: Dict[str, Any]) -> None:
+    await prisma.filehistory.update(
+        where={"id": job_id},
+        data={**data, "metadata": json.dumps(metadata)}
+    )
+
+
+async def run_import_job(job_id: str, assets: List[Dict[str, Any]], user_name: str, chunk_size: Optional[int] = None) -> None:
+    """Process an import job created by start_import_job, recording progress on its FileHistory row"""
+    chunk_size = max(chunk_size or IMPORT_CHUNK_SIZE, 1)
+    created = skipped = failed = processed = 0
+    failures: List[Dict[str, Any]] = []
+    metadata: Dict[str, Any] = {
+        "job": True,
+        "chunkSize": chunk_size,
+        "totalRows": len(assets),
+        "chunksCompleted": 0,
+        "totalChunks": (len(assets) + chunk_size - 1) // chunk_size,
+        "failures": failures,
+    }
+
+    try:
+        await _update_job(job_id, {"status": JOB_PROCESSING}, metadata)
+
+        # Repeated asset tags: the first row wins, like the import page does
+        seen_tags = set()
+        rows: List[Dict[str, Any]] = []
+        for index, asset in enumerate(assets):
+            asset_tag_id = asset.get("assetTagId")
+            if asset_tag_id and asset_tag_id in seen_tags:
+                skipped += 1
+                if len(failures) < _MAX_REPORTED_FAILURES:
+                    failures.append({"row": index + 2, "asset": asset_tag_id, "action": "skipped", "reason": "Duplicate row in file"})
+                continue
+            seen_tags.add(asset_tag_id)
+            rows.append(asset)
+        processed = skipped
+        metadata["duplicateRowsInFile"] = skipped
+        metadata["totalChunks"] = (len(rows) + chunk_size - 1) // chunk_size
+
+        reference = await resolve_reference_data(rows)
+
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            try:
+                results, chunk_created = await import_asset_chunk(chunk, reference, user_name)
+            except Exception as e:
+                logger.error(f"Import job {job_id}: chunk at row {start} failed: {type(e).__name__}: {str(e)}", exc_info=True)
+                results = [{"asset": asset.get("assetTagId"), "action": "failed", "error": str(e)} for asset in chunk]
+                chunk_created = 0
+
+            created += chunk_created
+            skipped += sum(1 for result in results if result["action"] == "skipped")
+            failed += sum(1 for result in results if result["action"] == "failed")
+            processed += len(chunk)
+            for result in results:
+                if result["action"] != "created" and len(failures) < _MAX_REPORTED_FAILURES:
+                    failures.append(result)
+
+            metadata["chunksCompleted"] += 1
+            await _update_job(
+                job_id,
+                {
+                    "recordsProcessed": processed,
+                    "recordsCreated": created,
+                    "recordsSkipped": skipped,
+                    "recordsFailed": failed,
+                },
+                metadata
+            )
+            # Let request handlers run between chunks
+            await asyncio.sleep(0)
+
+        status = "failed" if created == 0 and failed > 0 else ("partial" if failed > 0 else "success")
+        await _update_job(
+            job_id,
+            {
+                "status": status,
+                "recordsProcessed": processed,
+                "recordsCreated": created,
+                "recordsSkipped": skipped,
+                "recordsFailed": failed,
+                "errorMessage": f"{failed} record(s) failed to import" if failed else None,
+            },
+            metadata
+        )
+    except Exception as e:
+        logger.error(f"Import job {job_id} failed: {type(e).__name__}: {str(e)}", exc_info=True)
+        try:
+            await _update_job(
+                job_id,
+                {
+                    "status": "failed",
+                    "recordsProcessed": processed,
+                    "recordsCreated": created,
+                    "recordsSkipped": skipped,
+                    "recordsFailed": len(assets) - created - skipped,
+                    "errorMessage": f"Import stopped: {str(e)}",
+                },
+                metadata
+            )
+        except Exception as update_error:
+            logger.error(f"Import job {job_id}: could not record failure: {type(update_error).__name__}: {str(update_error)}")
+
+
+async def start_import_job(
+    assets: List[Dict[str, Any]],
+    user_id: str,
+    user_name: str,
+    file_name: str,
+    file_path: Optional[str] = None,
+    file_size: Optional[int] = None,
+    mime_type: Optional[str] = None
+) -> Any:
+    """Create the job's FileHistory row and start processing it in the background"""
+    file_history = await prisma.filehistory.create(
+        data={
+            "operationType": "import",
+            "fileName": file_name,
+            "filePath": file_path,
+            "fileSize": file_size,
+            "mimeType": mime_type,
+            "userId": user_id,
+            "recordsProcessed": 0,
+            "recordsCreated": 0,
+            "recordsSkipped": 0,
+            "recordsFailed": 0,
+            "status": JOB_QUEUED,
+            "metadata": json.dumps({"job": True, "totalRows": len(assets)}),
+        }
+    )
+    job_id = str(file_history.id)
+    task = asyncio.create_task(run_import_job(job_id, assets, user_name))
+    _running_jobs[job_id] = task
+    task.add_done_callback(lambda _: _running_jobs.pop(job_id, None))
+    return file_history
+
+
+async def get_import_job(job_id: str) -> Optional[Any]:
+    """
+    The job's FileHistory row. A job still marked queued/processing that no worker
+    has updated for IMPORT_JOB_STALE_SECONDS is marked failed first.
+    """
+    file_history = await prisma.filehistory.find_unique(where={"id": job_id})
+    if not file_history or file_history.operationType != "import":
+        return None
+    if (
+        file_history.status in JOB_ACTIVE_STATUSES
+        and job_id not in _running_jobs
+        and file_history.updatedAt.replace(tzinfo=None) < datetime.utcnow() - timedelta(seconds=IMPORT_JOB_STALE_SECONDS)
+    ):
+        file_history = await prisma.filehistory.update(
+            where={"id": job_id},
+            data={"status": "failed", "errorMessage": "Import job stopped before finishing"}
+        )
+    return file_history
+
+
+def import_job_progress(file_history: Any) -> Dict[str, Any]:
+    """Status endpoint payload for a job's FileHistory row"""
+    metadata = _job_metadata(file_history)
+    total_rows = int(metadata.get("totalRows") or 0)
+    processed = file_history.recordsProcessed or 0
+    return {
+        "jobId": str(file_history.id),
+        "status": file_history.status,
+        "fileName": file_history.fileName,
+        "totalRows": total_rows,
+        "recordsProcessed": processed,
+        "recordsCreated": file_history.recordsCreated or 0,
+        "recordsSkipped": file_history.recordsSkipped or 0,
+        "recordsFailed": file_history.recordsFailed or 0,
+        "progress": round(processed / total_rows * 100, 1) if total_rows else (100.0 if file_history.status not in JOB_ACTIVE_STATUSES else 0.0),
+        "chunksCompleted": int(metadata.get("chunksCompleted") or 0),
+        "totalChunks": int(metadata.get("totalChunks") or 0),
+        "failures": metadata.get("failures") or [],
+        "errorMessage": file_history.errorMessage,
+        "createdAt": file_history.createdAt,
+        "updatedAt": file_history.updatedAt,
+    }
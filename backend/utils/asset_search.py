@@ -0,0 +1,226 @@
+"""
+Trigram search index for assets
+asset_search_index holds one lowercased document per asset (the default search
+fields plus the employees it was checked out to) behind a pg_trgm GIN index, so the
+assets search box is answered by one index lookup instead of a dozen ILIKE clauses
+and nested checkout/employee semi-joins.
+
+Rows are refreshed by the write paths that change searchable text and by
+reconcile_asset_search_index (cron), which also catches writes made elsewhere.
+Until every asset has a document (e.g. right after deploy, before the first
+reindex) search_index_ready() is false and searches use the ILIKE path.
+"""
+import os
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from database import prisma
+
+logger = logging.getLogger(__name__)
+
+# Set to "false" to fall back to the per-field ILIKE search (e.g. before the table exists)
+ASSET_SEARCH_INDEX_ENABLED = os.getenv("ASSET_SEARCH_INDEX_ENABLED", "true").lower() == "true"
+
+# How long a search_index_ready() answer is reused
+SEARCH_INDEX_READY_TTL_SECONDS = 60
+
+_index_ready: Optional[bool] = None
+_index_ready_checked_at = 0.0
+
+# Document = default search fields of build_search_conditions, including every
+# employee the asset was ever checked out to (the ILIKE search matches
+# checkouts.some.employeeUser). Fields are separated by newlines so a term
+# cannot match across two fields.
+_DOCUMENT_SQL = """
+    SELECT
+        a.id AS asset_id,
+        lower(concat_ws(chr(10),
+            a.asset_tag_id, a.description, a.brand, a.model, a.serial_no, a.owner,
+            a.issued_to, a.department, a.site, a.location,
+            assignees.people
+        )) AS document
+    FROM assets a
+    LEFT JOIN LATERAL (
+        SELECT
+            string_agg(DISTINCT concat_ws(chr(10), e.name, e.email), chr(10)) AS people,
+            max(GREATEST(c.updated_at, e.updated_at)) AS changed_at
+        FROM assets_checkout c
+        JOIN employee_users e ON e.id = c.employee_user_id
+        WHERE c.asset_id = a.id
+    ) assignees ON true
+"""
+
+_UPSERT_SQL = """
+    INSERT INTO asset_search_index (asset_id, document, updated_at)
+    SELECT asset_id, document, now() FROM ({documents}) docs
+    ON CONFLICT (asset_id) DO UPDATE
+    SET document = EXCLUDED.document, updated_at = EXCLUDED.updated_at
+"""
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def can_use_search_index(search: Optional[str], search_fields: Optional[str]) -> bool:
+    """The index covers the default search fields only; custom field lists use the ILIKE path"""
+    return ASSET_SEARCH_INDEX_ENABLED and bool(search and search.strip()) and not search_fields
+
+
+async def search_index_ready() -> bool:
+    """
+    Whether every asset has a search document, so the indexed search cannot miss
+    any. Checked with one anti-join at most every SEARCH_INDEX_READY_TTL_SECONDS;
+    errors (e.g. the table does not exist yet) count as not ready.
+    """
+    global _index_ready, _index_ready_checked_at
+    now = time.monotonic()
+    if _index_ready is not None and now - _index_ready_checked_at < SEARCH_INDEX_READY_TTL_SECONDS:
+        return _index_ready
+    try:
+        rows = await prisma.query_raw(
+            """
+            SELECT NOT EXISTS (
+                SELECT 1 FROM assets a
+                WHERE NOT EXISTS (SELECT 1 FROM asset_search_index s WHERE s.asset_id = a.id)
+            ) AS ready
+            """
+        )
+        ready = bool(rows and rows[0]["ready"])
+    except Exception as e:
+        logger.warning(f"Failed to check asset search index: {type(e).__name__}: {str(e)}")
+        ready = False
+    if not ready:
+        logger.info("Asset search index is not fully populated, using ILIKE search (run /api/cron/reindex-asset-search)")
+    _index_ready, _index_ready_checked_at = ready, now
+    return ready
+
+
+async def refresh_asset_search_index(asset_ids: List[str]) -> None:
+    """Rebuild the search documents of the given assets. Failures are logged, not raised."""
+    if not asset_ids or not ASSET_SEARCH_INDEX_ENABLED:
+        return
+    try:
+        await prisma.execute_raw(
+            _UPSERT_SQL.format(documents=_DOCUMENT_SQL + " WHERE a.id = ANY($1::text[])"),
+            list(asset_ids)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to refresh asset search index: {type(e).__name__}: {str(e)}")
+
+
+async def refresh_asset_search_index_for_employee(employee_id: str) -> None:
+    """Rebuild the documents of assets checked out to an employee (after a name/email change)"""
+    if not employee_id or not ASSET_SEARCH_INDEX_ENABLED:
+        return
+    try:
+        await prisma.execute_raw(
+            _UPSERT_SQL.format(
+                documents=_DOCUMENT_SQL
+                + " WHERE a.id IN (SELECT asset_id FROM assets_checkout WHERE employee_user_id = $1)"
+            ),
+            employee_id
+        )
+    except Exception as e:
+        logger.warning(f"Failed to refresh asset search index: {type(e).__name__}: {str(e)}")
+
+
+async def reconcile_asset_search_index() -> int:
+    """
+    Bring the index up to date with the assets table: add missing documents and
+    rebuild those older than the asset, its checkouts or their employees.
+    Returns the number of documents written.
+    """
+    global _index_ready
+    written = await prisma.execute_raw(
+        _UPSERT_SQL.format(
+            documents=_DOCUMENT_SQL
+            + """
+            LEFT JOIN asset_search_index s ON s.asset_id = a.id
+            WHERE s.asset_id IS NULL
+               OR s.updated_at < a.updated_at
+               OR s.updated_at < assignees.changed_at
+            """
+        )
+    )
+    # Re-check readiness on the next search
+    _index_ready = None
+    return written
+
+
+def _build_filter_sql(
+    search: str,
+    category: Optional[str],
+    status: Optional[str],
+    include_deleted: bool
+) -> Tuple[str, List[Any]]:
+    """FROM/WHERE fragment equivalent to build_where_clause for the indexed search"""
+    params: List[Any] = ["%" + _escape_like(search.strip().lower()) + "%"]
+    sql = """
+        FROM asset_search_index s
+        JOIN assets a ON a.id = s.asset_id
+        WHERE s.document LIKE $1
+    """
+    if not include_deleted:
+        sql += " AND a.is_deleted = false"
+    if category and category != 'all':
+        params.append(category)
+        sql += f" AND a.category_id IN (SELECT id FROM categories WHERE lower(name) = lower(${len(params)}))"
+    if status and status != 'all':
+        params.append(status)
+        sql += f" AND lower(a.status) = lower(${len(params)})"
+    return sql, params
+
+
+async def search_asset_ids(
+    search: str,
+    skip: int,
+    take: int,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    include_deleted: bool = False
+) -> List[str]:
+    """
+    One page of matching asset ids, best matches first: exact tag prefix, then
+    trigram word similarity, then newest first.
+    """
+    filter_sql, params = _build_filter_sql(search, category, status, include_deleted)
+    term = search.strip().lower()
+    params.extend([_escape_like(term) + "%", term, take, skip])
+    n = len(params)
+    rows = await prisma.query_raw(
+        f"""
+        SELECT a.id
+        {filter_sql}
+        ORDER BY (lower(a.asset_tag_id) LIKE ${n - 3}) DESC,
+                 word_similarity(${n - 2}, s.document) DESC,
+                 a.created_at DESC,
+                 a.id DESC
+        LIMIT ${n - 1} OFFSET ${n}
+        """,
+        *params
+    )
+    return [row["id"] for row in rows]
+
+
+async def search_asset_status_groups(
+    search: str,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    include_deleted: bool = False
+) -> List[Dict[str, Any]]:
+    """Per-status count and cost sum of the matching assets, shaped like prisma group_by rows"""
+    filter_sql, params = _build_filter_sql(search, category, status, include_deleted)
+    rows = await prisma.query_raw(
+        f"""
+        SELECT a.status AS status, count(*) AS count, sum(a.cost) AS cost
+        {filter_sql}
+        GROUP BY a.status
+        """,
+        *params
+    )
+    return [
+        {"status": row["status"], "_count": {"_all": int(row["count"])}, "_sum": {"cost": row["cost"]}}
+        for row in rows
+    ]
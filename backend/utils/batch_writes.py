@@ -0,0 +1,48 @@
+"""
+Batched writes through Prisma's batch API
+client.batch_() queues write operations and sends them to the query engine as
+one request (executed in one database transaction) instead of one HTTP
+round-trip per operation. Bulk paths describe their writes as operations on
+the batch and execute_batched() commits them every BATCH_WRITE_SIZE operations.
+
+Pass a transaction client (`async with prisma.tx() as transaction`) to keep
+several batches, and the surrounding reads and writes, in one transaction.
+The batch API returns no results, so writes whose result is needed (counts,
+created rows) stay regular calls.
+"""
+import os
+from typing import Any, Callable, Iterable, Optional
+
+# Operations per engine request
+BATCH_WRITE_SIZE = int(os.getenv("BATCH_WRITE_SIZE", "500"))
+
+# An operation queues one write on the batch, e.g.
+# lambda batch: batch.assetshistorylogs.create(data={...})
+BatchOperation = Callable[[Any], None]
+
+
+async def execute_batched(
+    client: Any,
+    operations: Iterable[BatchOperation],
+    batch_size: Optional[int] = None
+) -> int:
+    """
+    Queue `operations` on client.batch_() and commit them every `batch_size`
+    operations (BATCH_WRITE_SIZE by default). Returns the number of engine
+    requests sent.
+    """
+    batch_size = max(batch_size or BATCH_WRITE_SIZE, 1)
+    requests = 0
+    batch = client.batch_()
+    queued = 0
+    for operation in operations:
+        operation(batch)
+        queued += 1
+        if queued >= batch_size:
+            await batch.commit()
+            requests += 1
+            queued = 0
+    if queued:
+        await batch.commit()
+        requests += 1
+    return requests
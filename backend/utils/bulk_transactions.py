@@ -0,0 +1,111 @@
+"""
+Set-based helpers for multi-asset transactions
+Checkout, checkin, disposal and lease return act on a batch of assets. Routers
+prefetch everything the batch needs with one query per table, validate it, and
+write it back with create_many/update_many, so the number of round-trips inside
+the open transaction stays constant instead of growing with the batch.
+
+create_many does not return the created rows, so rows get their ids here and
+are read back once, with their relations, to build the response.
+"""
+import json
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+
+
+def new_id() -> str:
+    """Primary key for a row written with create_many (the models use @default(uuid()))"""
+    return str(uuid.uuid4())
+
+
+def unique_ids(ids: Iterable[str]) -> List[str]:
+    """Ids in request order without repeats, so an asset listed twice is processed once"""
+    return list(dict.fromkeys(ids))
+
+
+async def fetch_assets_by_id(
+    client: Any,
+    asset_ids: List[str],
+    include: Optional[Dict[str, Any]] = None,
+    not_found: Callable[[str], str] = lambda asset_id: f"Asset with ID {asset_id} not found"
+) -> Dict[str, Any]:
+    """
+    Load the batch's assets with one query, keyed by id. Raises 404 (message from
+    `not_found`) for the first requested id that does not exist.
+    """
+    assets = await client.assets.find_many(
+        where={"id": {"in": asset_ids}},
+        include=include
+    )
+    assets_by_id = {asset.id: asset for asset in assets}
+    for asset_id in asset_ids:
+        if asset_id not in assets_by_id:
+            raise HTTPException(status_code=404, detail=not_found(asset_id))
+    return assets_by_id
+
+
+async def fetch_employee_names(client: Any, employee_ids: Iterable[Optional[str]]) -> Dict[str, str]:
+    """Names of the given employees with one query (ids without an employee are left out)"""
+    ids = unique_ids(employee_id for employee_id in employee_ids if employee_id)
+    if not ids:
+        return {}
+    employees = await client.employeeuser.find_many(where={"id": {"in": ids}})
+    return {employee.id: employee.name for employee in employees}
+
+
+async def update_assets(client: Any, updates: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Apply per-asset update data (asset id -> data) with one update_many per
+    distinct data dict. Batches usually share one dict, e.g. {"status": "Available"}.
+    """
+    groups: Dict[str, Dict[str, Any]] = {}
+    for asset_id, data in updates.items():
+        key = json.dumps(data, sort_keys=True, default=str)
+        group = groups.setdefault(key, {"data": data, "ids": []})
+        group["ids"].append(asset_id)
+
+    for group in groups.values():
+        await client.assets.update_many(
+            where={"id": {"in": group["ids"]}},
+            data=group["data"]
+        )
+
+
+def history_log(asset_id: str, field: str, change_from: str, change_to: str, action_by: str, event_date: Any) -> Dict[str, Any]:
+    """One "edited" asset history row for create_history_logs"""
+    return {
+        "assetId": asset_id,
+        "eventType": "edited",
+        "field": field,
+        "changeFrom": change_from,
+        "changeTo": change_to,
+        "actionBy": action_by,
+        "eventDate": event_date,
+    }
+
+
+async def create_history_logs(client: Any, logs: List[Dict[str, Any]]) -> None:
+    """Insert all history rows of the batch with one query"""
+    if logs:
+        await client.assetshistorylogs.create_many(data=logs)
+
+
+async def create_rows(model: Any, rows: List[Dict[str, Any]]) -> List[str]:
+    """Insert rows with one create_many, assigning their ids; returns the ids in row order"""
+    if not rows:
+        return []
+    for row in rows:
+        row.setdefault("id", new_id())
+    await model.create_many(data=rows)
+    return [row["id"] for row in rows]
+
+
+async def fetch_rows_in_order(model: Any, ids: List[str], include: Optional[Dict[str, Any]] = None) -> List[Any]:
+    """Read rows created by create_rows back with one query, in the order of `ids`"""
+    if not ids:
+        return []
+    rows = await model.find_many(where={"id": {"in": ids}}, include=include)
+    rows_by_id = {row.id: row for row in rows}
+    return [rows_by_id[row_id] for row_id in ids if row_id in rows_by_id]
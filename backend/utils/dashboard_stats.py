@@ -0,0 +1,149 @@
+"""
+Precomputed dashboard statistics
+dashboard_stats holds a single row with the dashboard's counts and sums (asset
+totals and value, status counts, feed totals, value by category). One SQL
+statement rebuilds the row; the scheduler refreshes it every minute and
+readers refresh it themselves when it is older than DASHBOARD_STATS_MAX_AGE_SECONDS
+(one rebuild at a time per process), so the stats endpoint reads one row instead
+of aggregating every table per call.
+"""
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from database import prisma
+
+# Readers rebuild the row when it is older than this; well above the scheduler's
+# 1 minute interval so a late cron run does not send readers to the aggregate
+DASHBOARD_STATS_MAX_AGE_SECONDS = int(os.getenv("DASHBOARD_STATS_MAX_AGE_SECONDS", "150"))
+
+# Concurrent readers that find the row stale share one rebuild
+_refresh_lock = asyncio.Lock()
+
+_COLUMNS = """
+    id, total_active_assets, total_value, checked_out_count, available_count,
+    purchases_in_fiscal_year, total_new_assets, total_active_checkouts, total_checkins,
+    total_assets_under_repair, total_moves, total_reserves, total_leases, total_returns,
+    total_disposes, value_by_category, refreshed_at
+"""
+
+_REFRESH_SQL = f"""
+    INSERT INTO dashboard_stats ({_COLUMNS})
+    SELECT 1, a.total_active_assets, a.total_value, a.checked_out_count, a.available_count,
+           a.purchases_in_fiscal_year, a.total_new_assets,
+           (SELECT count(*) FROM assets_checkout c
+            WHERE NOT EXISTS (SELECT 1 FROM assets_checkin ci WHERE ci.checkout_id = c.id)),
+           (SELECT count(*) FROM assets_checkin),
+           (SELECT count(*) FROM assets_maintenance WHERE status IN ('Scheduled', 'In progress')),
+           (SELECT count(*) FROM assets_move),
+           (SELECT count(*) FROM assets_reserve),
+           (SELECT count(*) FROM assets_lease),
+           (SELECT count(*) FROM assets_lease_return),
+           (SELECT count(*) FROM assets_dispose),
+           (SELECT coalesce(jsonb_agg(jsonb_build_object('name', v.name, 'value', v.value) ORDER BY v.value DESC), '[]'::jsonb)
+            FROM (
+                SELECT coalesce(cat.name, 'Uncategorized') AS name, coalesce(sum(x.cost), 0)::float8 AS value
+                FROM assets x LEFT JOIN categories cat ON cat.id = x.category_id
+                WHERE x.is_deleted = false AND x.cost IS NOT NULL
+                GROUP BY x.category_id, cat.name
+            ) v),
+           now() AT TIME ZONE 'utc'
+    FROM (
+        SELECT count(*) AS total_active_assets,
+               coalesce(sum(cost), 0) AS total_value,
+               count(*) FILTER (WHERE lower(status) = 'checked out') AS checked_out_count,
+               count(*) FILTER (WHERE lower(status) = 'available') AS available_count,
+               count(*) FILTER (
+                   WHERE (purchase_date >= $1::date AND purchase_date < $2::date)
+                      OR (date_acquired >= $1::date AND date_acquired < $2::date)
+               ) AS purchases_in_fiscal_year,
+               count(*) FILTER (WHERE created_at >= $3::timestamp) AS total_new_assets
+        FROM assets
+        WHERE is_deleted = false
+    ) a
+    ON CONFLICT (id) DO UPDATE SET
+        total_active_assets = EXCLUDED.total_active_assets,
+        total_value = EXCLUDED.total_value,
+        checked_out_count = EXCLUDED.checked_out_count,
+        available_count = EXCLUDED.available_count,
+        purchases_in_fiscal_year = EXCLUDED.purchases_in_fiscal_year,
+        total_new_assets = EXCLUDED.total_new_assets,
+        total_active_checkouts = EXCLUDED.total_active_checkouts,
+        total_checkins = EXCLUDED.total_checkins,
+        total_assets_under_repair = EXCLUDED.total_assets_under_repair,
+        total_moves = EXCLUDED.total_moves,
+        total_reserves = EXCLUDED.total_reserves,
+        total_leases = EXCLUDED.total_leases,
+        total_returns = EXCLUDED.total_returns,
+        total_disposes = EXCLUDED.total_disposes,
+        value_by_category = EXCLUDED.value_by_category,
+        refreshed_at = EXCLUDED.refreshed_at
+    RETURNING {_COLUMNS}
+"""
+
+
+def _stats_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalise a raw dashboard_stats row (bigints, decimal and json arrive loosely typed)"""
+    value_by_category = row.get("value_by_category") or []
+    if isinstance(value_by_category, str):
+        value_by_category = json.loads(value_by_category)
+
+    stats: Dict[str, Any] = {
+        key: int(row.get(key) or 0)
+        for key in (
+            "total_active_assets", "checked_out_count", "available_count",
+            "purchases_in_fiscal_year", "total_new_assets", "total_active_checkouts",
+            "total_checkins", "total_assets_under_repair", "total_moves", "total_reserves",
+            "total_leases", "total_returns", "total_disposes",
+        )
+    }
+    stats["total_value"] = float(row.get("total_value") or 0)
+    stats["value_by_category"] = [
+        {"name": item.get("name") or "Uncategorized", "value": float(item.get("value") or 0)}
+        for item in value_by_category
+    ]
+    stats["refreshed_at"] = row.get("refreshed_at")
+    return stats
+
+
+async def refresh_dashboard_stats() -> Dict[str, Any]:
+    """Rebuild the dashboard_stats row and return it"""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    rows = await prisma.query_raw(
+        _REFRESH_SQL,
+        datetime(today.year, 1, 1).date().isoformat(),
+        datetime(today.year + 1, 1, 1).date().isoformat(),
+        (today - timedelta(days=30)).isoformat(),
+    )
+    return _stats_from_row(rows[0])
+
+
+async def load_dashboard_stats(max_age_seconds: Optional[int] = None) -> Dict[str, Any]:
+    """
+    The precomputed dashboard statistics, rebuilt first when the row is missing
+    or older than max_age_seconds (DASHBOARD_STATS_MAX_AGE_SECONDS by default)
+    """
+    if max_age_seconds is None:
+        max_age_seconds = DASHBOARD_STATS_MAX_AGE_SECONDS
+    stats = await _read_fresh_stats(max_age_seconds)
+    if stats is not None:
+        return stats
+    async with _refresh_lock:
+        # Another reader may have rebuilt the row while this one waited
+        stats = await _read_fresh_stats(max_age_seconds)
+        if stats is not None:
+            return stats
+        return await refresh_dashboard_stats()
+
+
+async def _read_fresh_stats(max_age_seconds: int) -> Optional[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = await prisma.query_raw(
+        f"""
+        SELECT {_COLUMNS} FROM dashboard_stats
+        WHERE id = 1 AND refreshed_at > (now() AT TIME ZONE 'utc') - make_interval(secs => $1::int)
+        """,
+        max_age_seconds
+    )
+    return _stats_from_row(rows[0]) if rows else None
@@ -1,15 +1,80 @@
 """
 Form PDF generation utility using Playwright for HTML-to-PDF conversion
-Uses multiprocessing to avoid Windows asyncio subprocess issues
+One Chromium is kept warm by FormPdfRenderer for the life of the app instead of
+being launched per request. It runs on a dedicated thread with its own event
+loop (a Proactor loop on Windows, where the app's Selector loop cannot start
+Playwright's driver subprocess) and renders on a pool of browser contexts:
+
+- FORM_PDF_POOL_SIZE contexts render concurrently; each is recycled after
+  FORM_PDF_RENDERS_PER_CONTEXT renders or after a failed render, and the
+  browser is relaunched if it crashed
+- up to FORM_PDF_QUEUE_SIZE further requests wait (at most
+  FORM_PDF_QUEUE_TIMEOUT_SECONDS) for a context; beyond that
+  generate_form_pdf raises FormPdfBusyError so callers can answer 503
+
+The app lifespan starts and closes the shared renderer; it also starts lazily
+on first use (scripts, or when the startup launch failed).
+
+Renders wait for readiness signals, never fixed sleeps: posted HTML for its
+load event, form pages for their data-pdf-ready flag (see _READY_CHECK_SCRIPT).
 """
 import asyncio
 import logging
-import multiprocessing
-from typing import List, Optional
-from concurrent.futures import ProcessPoolExecutor
+import os
+import sys
+import threading
+from typing import Any, Awaitable, List, Optional, TypeVar
 
 logger = logging.getLogger(__name__)
 
+FORM_PDF_POOL_SIZE = max(int(os.getenv("FORM_PDF_POOL_SIZE", "2")), 1)
+FORM_PDF_RENDERS_PER_CONTEXT = max(int(os.getenv("FORM_PDF_RENDERS_PER_CONTEXT", "50")), 1)
+FORM_PDF_QUEUE_SIZE = max(int(os.getenv("FORM_PDF_QUEUE_SIZE", "8")), 0)
+FORM_PDF_QUEUE_TIMEOUT_SECONDS = float(os.getenv("FORM_PDF_QUEUE_TIMEOUT_SECONDS", "30"))
+
+_BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-accelerated-2d-canvas',
+    '--disable-gpu',
+    '--disable-web-security',
+]
+
+# A4 proportions
+_VIEWPORT = {"width": 794, "height": 1123}
+
+# Upper bound for a form page to load and signal readiness
+FORM_PDF_READY_TIMEOUT_MS = int(os.getenv("FORM_PDF_READY_TIMEOUT_MS", "15000"))
+
+# Form pages opt in to an explicit readiness signal (hooks/use-pdf-ready.ts) by
+# setting data-pdf-ready on <html>: "false" while loading, "true" once rendered.
+# For pages without it, the target elements in a fully loaded document count as ready.
+_READY_CHECK_SCRIPT = """
+(ids) => {
+    const flag = document.documentElement.getAttribute('data-pdf-ready');
+    if (flag !== null) return flag === 'true';
+    return document.readyState === 'complete' && ids.every((id) => document.querySelector(id) !== null);
+}
+"""
+
+# Resolves at once when nothing is pending; lazy images (copied from next/image
+# markup) are switched to eager since they would not load outside the viewport
+_ASSETS_READY_SCRIPT = """
+async () => {
+    const images = Array.from(document.images).filter((img) => !img.complete);
+    await Promise.all(images.map((img) => new Promise((resolve) => {
+        img.addEventListener('load', resolve, { once: true });
+        img.addEventListener('error', resolve, { once: true });
+        setTimeout(resolve, 3000);
+        img.loading = 'eager';
+    })));
+    await document.fonts.ready;
+}
+"""
+
+T = TypeVar("T")
+
 # JavaScript to apply PDF styling (converted from the Next.js version)
 PDF_STYLING_SCRIPT = """
 (targetIds) => {
@@ -349,134 +414,249 @@ PDF_STYLING_SCRIPT = """
 """
 
 
-def _run_playwright_in_process(html: Optional[str], url: Optional[str], element_ids: List[str]) -> bytes:
-    """
-    Run Playwright in a separate process with its own event loop.
-    This function is the target for multiprocessing.
-    """
-    import asyncio
-    import sys
+async def _render_page(page: Any, html: Optional[str], url: Optional[str], element_ids: List[str]) -> bytes:
+    """Load the form into `page`, wait until it is ready, apply the PDF styling and print it"""
+    # Navigate or set content
+    if url:
+        try:
+            await page.goto(url, wait_until="domcontentloaded", timeout=FORM_PDF_READY_TIMEOUT_MS)
+            await page.wait_for_function(_READY_CHECK_SCRIPT, arg=element_ids, timeout=FORM_PDF_READY_TIMEOUT_MS)
+        except Exception as nav_error:
+            if html:
+                await page.set_content(html, wait_until="load", timeout=FORM_PDF_READY_TIMEOUT_MS)
+            else:
+                raise ValueError(f"Form page did not become ready: {nav_error}")
+    elif html:
+        # Posted HTML is complete: the load event covers its stylesheets and images
+        await page.set_content(html, wait_until="load", timeout=FORM_PDF_READY_TIMEOUT_MS)
+    
+    await page.evaluate(_ASSETS_READY_SCRIPT)
+    
+    # Verify elements exist
+    missing_elements = []
+    for element_id in element_ids:
+        element = await page.query_selector(element_id)
+        if not element:
+            missing_elements.append(element_id)
     
-    # On Windows, we need to set the event loop policy for subprocess support
-    if sys.platform == 'win32':
-        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    if missing_elements:
+        raise ValueError(f"Elements {', '.join(missing_elements)} not found")
     
-    async def _generate():
+    # Apply PDF styling
+    await page.evaluate(PDF_STYLING_SCRIPT, element_ids)
+    
+    # Emulate print media
+    await page.emulate_media(media="print")
+    
+    # Generate PDF
+    return await page.pdf(
+        format="A4",
+        print_background=True,
+        margin={
+            "top": "10mm",
+            "right": "10mm",
+            "bottom": "10mm",
+            "left": "10mm",
+        },
+    )
+
+
+class FormPdfBusyError(RuntimeError):
+    """The render queue is full, or a queued render waited too long for a browser context"""
+
+
+class _ContextSlot:
+    """One pooled browser context and the number of renders it has served"""
+
+    def __init__(self):
+        self.context: Any = None
+        self.renders = 0
+
+
+class FormPdfRenderer:
+    """Warm Chromium with a bounded pool of browser contexts (see module docstring)"""
+
+    def __init__(
+        self,
+        pool_size: int = FORM_PDF_POOL_SIZE,
+        renders_per_context: int = FORM_PDF_RENDERS_PER_CONTEXT,
+        queue_size: int = FORM_PDF_QUEUE_SIZE,
+        queue_timeout: float = FORM_PDF_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.pool_size = pool_size
+        self.renders_per_context = renders_per_context
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        # Caller side (app event loop)
+        self._start_lock = asyncio.Lock()
+        self._pending = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        # Render side (renderer event loop)
+        self._playwright: Any = None
+        self._browser: Any = None
+        self._browser_lock: Optional[asyncio.Lock] = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._slots: List[_ContextSlot] = []
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    async def start(self) -> None:
+        """Start the renderer thread, launch Chromium and open the contexts"""
+        async with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.ProactorEventLoop() if sys.platform == 'win32' else asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="form-pdf-renderer", daemon=True)
+            thread.start()
+            self._loop, self._thread = loop, thread
+            try:
+                await self._call(self._launch())
+            except BaseException:
+                # Close whatever was started (e.g. the Playwright driver when only
+                # the Chromium launch failed) so retries do not leak processes
+                try:
+                    await self._call(self._shutdown())
+                except Exception as e:
+                    logger.warning(f"Error closing form PDF renderer: {type(e).__name__}: {str(e)}")
+                await self._stop_thread()
+                raise
+            logger.info(f"Form PDF renderer started with {self.pool_size} browser context(s)")
+
+    async def stop(self) -> None:
+        """Close the contexts, the browser and the renderer thread"""
+        async with self._start_lock:
+            if self._loop is None:
+                return
+            try:
+                await self._call(self._shutdown())
+            except Exception as e:
+                logger.warning(f"Error closing form PDF renderer: {type(e).__name__}: {str(e)}")
+            await self._stop_thread()
+
+    async def render(self, html: Optional[str], url: Optional[str], element_ids: List[str]) -> bytes:
+        """Render one form on a pooled context; raises FormPdfBusyError when the queue is full"""
+        if self._pending >= self.pool_size + self.queue_size:
+            raise FormPdfBusyError("PDF generation is busy, please try again shortly")
+        self._pending += 1
+        try:
+            await self.start()
+            return await self._call(self._render(html, url, element_ids))
+        finally:
+            self._pending -= 1
+
+    # Caller side helpers
+
+    async def _call(self, coro: Awaitable[T]) -> T:
+        """Run `coro` on the renderer loop and await its result from the calling loop"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop))
+
+    async def _stop_thread(self) -> None:
+        loop, thread = self._loop, self._thread
+        self._loop, self._thread = None, None
+        loop.call_soon_threadsafe(loop.stop)
+        await asyncio.to_thread(thread.join, 10)
+        if not thread.is_alive():
+            loop.close()
+
+    # Render side (run on the renderer loop)
+
+    async def _launch(self) -> None:
         from playwright.async_api import async_playwright
-        
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-accelerated-2d-canvas',
-                    '--disable-gpu',
-                    '--disable-web-security',
-                ]
-            )
-            
+
+        self._browser_lock = asyncio.Lock()
+        self._idle = asyncio.Queue()
+        self._slots = []
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True, args=_BROWSER_ARGS)
+        for _ in range(self.pool_size):
+            slot = _ContextSlot()
+            slot.context = await self._browser.new_context(viewport=_VIEWPORT)
+            self._slots.append(slot)
+            self._idle.put_nowait(slot)
+
+    async def _shutdown(self) -> None:
+        for slot in self._slots:
+            await self._close_context(slot)
+        if self._browser is not None:
             try:
-                page = await browser.new_page()
-                
-                # Set viewport to A4 proportions
-                await page.set_viewport_size({"width": 794, "height": 1123})
-                
-                # Navigate or set content
-                if url:
-                    try:
-                        await page.goto(url, wait_until="networkidle", timeout=60000)
-                        
-                        # Wait for target elements
-                        for element_id in element_ids:
-                            try:
-                                await page.wait_for_selector(element_id, timeout=20000, state="visible")
-                            except Exception:
-                                # Wait a bit more for React hydration
-                                await asyncio.sleep(3)
-                                element = await page.query_selector(element_id)
-                                if not element:
-                                    raise ValueError(f"Element {element_id} not found on page")
-                    except Exception as nav_error:
-                        if html:
-                            await page.set_content(html, wait_until="networkidle", timeout=60000)
-                        else:
-                            raise ValueError(f"Failed to navigate to URL: {nav_error}")
-                elif html:
-                    await page.set_content(html, wait_until="networkidle", timeout=60000)
-                
-                # Wait for images
-                await page.evaluate("""
-                    async () => {
-                        const images = Array.from(document.querySelectorAll('img'));
-                        await Promise.all(
-                            images.map((img) => {
-                                if (img.complete) return Promise.resolve();
-                                return new Promise((resolve) => {
-                                    img.onload = resolve;
-                                    img.onerror = resolve;
-                                    setTimeout(resolve, 3000);
-                                });
-                            })
-                        );
-                        await document.fonts.ready;
-                    }
-                """)
-                
-                # Wait for dynamic content
-                await asyncio.sleep(2)
-                
-                # Verify elements exist
-                missing_elements = []
-                for element_id in element_ids:
-                    element = await page.query_selector(element_id)
-                    if not element:
-                        missing_elements.append(element_id)
-                
-                if missing_elements:
-                    raise ValueError(f"Elements {', '.join(missing_elements)} not found")
-                
-                # Apply PDF styling
-                await page.evaluate(PDF_STYLING_SCRIPT, element_ids)
-                
-                # Emulate print media
-                await page.emulate_media(media="print")
-                
-                # Generate PDF
-                pdf_data = await page.pdf(
-                    format="A4",
-                    print_background=True,
-                    margin={
-                        "top": "10mm",
-                        "right": "10mm",
-                        "bottom": "10mm",
-                        "left": "10mm",
-                    },
-                )
-                
-                return pdf_data
-            
+                await self._browser.close()
+            except Exception:
+                pass
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._browser = self._playwright = None
+        self._slots = []
+
+    async def _close_context(self, slot: _ContextSlot) -> None:
+        if slot.context is not None:
+            try:
+                await slot.context.close()
+            except Exception:
+                pass
+        slot.context = None
+        slot.renders = 0
+
+    async def _ensure_context(self, slot: _ContextSlot) -> None:
+        """Give `slot` a fresh context, relaunching Chromium first if it has gone away"""
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                logger.warning("Form PDF renderer browser is not connected, relaunching")
+                self._browser = await self._playwright.chromium.launch(headless=True, args=_BROWSER_ARGS)
+        slot.context = await self._browser.new_context(viewport=_VIEWPORT)
+
+    async def _render(self, html: Optional[str], url: Optional[str], element_ids: List[str]) -> bytes:
+        try:
+            slot = await asyncio.wait_for(self._idle.get(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise FormPdfBusyError("PDF generation is busy, please try again shortly")
+
+        recycle = False
+        try:
+            if slot.context is None:
+                await self._ensure_context(slot)
+            page = await slot.context.new_page()
+            try:
+                return await _render_page(page, html, url, element_ids)
             finally:
-                await browser.close()
-    
-    # Create new event loop and run
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(_generate())
-    finally:
-        loop.close()
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+        except ValueError:
+            # The form itself was at fault (missing elements, bad URL); the context is fine
+            raise
+        except BaseException:
+            recycle = True
+            raise
+        finally:
+            slot.renders += 1
+            if recycle or slot.renders >= self.renders_per_context:
+                await self._close_context(slot)
+                try:
+                    await self._ensure_context(slot)
+                except Exception as e:
+                    # Retried by the next render on this slot
+                    logger.warning(f"Could not reopen form PDF browser context: {type(e).__name__}: {str(e)}")
+            self._idle.put_nowait(slot)
+
+
+_renderer = FormPdfRenderer()
 
 
-def _process_wrapper(args):
-    """Wrapper to unpack arguments for multiprocessing"""
-    html, url, element_ids = args
-    return _run_playwright_in_process(html, url, element_ids)
+async def start_form_pdf_renderer() -> None:
+    """Warm up the shared renderer on app startup (failures are retried on first use)"""
+    try:
+        await _renderer.start()
+    except Exception as e:
+        logger.warning(f"Form PDF renderer not started: {type(e).__name__}: {str(e)}")
 
 
-# Use spawn method for Windows compatibility
-_mp_context = multiprocessing.get_context('spawn')
+async def close_form_pdf_renderer() -> None:
+    """Close the shared renderer on app shutdown"""
+    await _renderer.stop()
 
 
 async def generate_form_pdf(
@@ -494,6 +674,9 @@ async def generate_form_pdf(
     
     Returns:
         PDF content as bytes
+    
+    Raises:
+        FormPdfBusyError: the renderer is saturated
     """
     if not html and not url:
         raise ValueError("HTML content or URL is required")
@@ -501,14 +684,4 @@ async def generate_form_pdf(
     if not element_ids or len(element_ids) == 0:
         raise ValueError("Element ID(s) required")
     
-    # Run Playwright in a separate process to avoid Windows asyncio issues
-    loop = asyncio.get_event_loop()
-    
-    with ProcessPoolExecutor(max_workers=1, mp_context=_mp_context) as executor:
-        pdf_data = await loop.run_in_executor(
-            executor,
-            _process_wrapper,
-            (html, url, element_ids),
-        )
-    
-    return pdf_data
+    return await _renderer.render(html, url, element_ids)
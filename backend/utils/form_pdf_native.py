@@ -0,0 +1,547 @@
+"""
+Browser-free rendering of return and accountability forms
+Draws the forms straight from their data with fpdf2 (as used for the report
+PDFs), following the layout of the form pages (app/forms/history/[id]), so
+form PDFs need no Chromium and many forms can be rendered into one document.
+
+A form is a dict shaped like the forms API response: employeeUser (name,
+department), department, ctrlNo / accountabilityFormNo, dateReturned /
+dateIssued, returnType and formData (selectedAssets with subCategory names,
+signatures, ...). load_forms() builds these for saved forms.
+"""
+import io
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from database import prisma
+from http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+try:
+    from fpdf import FPDF
+    PDF_AVAILABLE = True
+except ImportError:
+    FPDF = object
+    PDF_AVAILABLE = False
+
+FORM_TYPES = ("return", "accountability")
+
+# Most saved forms rendered into one document per request
+NATIVE_FORM_BATCH_LIMIT = 500
+
+# Row labels of the printed forms (kept in step with app/forms/history/[id]/page.tsx)
+IT_EQUIPMENT = [
+    'Monitor', 'UPS', 'CPU', 'Headset', 'Video Camera', 'Mouse', 'Keyboard',
+    'Dport to VGA adapter', 'HDMI to VGA adapter', 'Dport Male to HDMI Male Cable', 'HDMI Male to DVI cable',
+]
+OTHER_ITEMS = ['Laptop', 'Speaker', 'Chair', 'Wacom', 'IP Phone', 'Wrist Rest', 'Router', 'Printer']
+RESIGNED_STAFF_ITEMS = ['Company ID', 'RFID']
+ASSET_DESCRIPTIONS = [
+    'LAPTOP', 'CPU/SYSTEM UNIT', 'MONITOR 1', 'MONITOR 2', 'HEADSET', 'WEBCAM', 'KEYBOARD', 'MOUSE', 'UPS', 'IP PHONES',
+]
+CABLES_AND_EXTENSIONS = [
+    'DPORT TO VGA ADAPTER', 'HDMI TO VGA ADAPTER', 'DPORT MALE TO HDMI MALE CABLE', 'HDMI MALE TO DVI CABLE',
+]
+
+RULES_INTRODUCTION = (
+    "All users of the Company's Computer Equipment and Mobile Phone units and services shall be "
+    "subject to the following rules and regulations:"
+)
+RULES = [
+    "All computers and mobile phones shall be used solely for official business.",
+    "If the user opted to pay the extra cost for whatever reason (i.e., upgrade of phones), this will not entitle the staff ownership of the property. Staff must surrender all accountabilities prior to or upon exit.",
+    "Users shall not use the computers and mobile phones in operating personal business nor lend it to anyone.",
+    "Users shall comply with all software licenses and copyrights. Installation of pirated software is strictly prohibited.",
+    "All files, messages, and other information created, sent, or received over the company's equipment, email, internet systems are the company's property and should not be considered personal information. The company reserves the right to access, review, copy, or delete files.",
+    "Company information should never be transmitted or forwarded to outside individuals or companies not authorized to receive the information, and should not even be sent or forwarded to other employees who do not clearly need to know the information.",
+    "Users shall not create or design, install, or store any malicious programs (virus, worm, Trojan horse) nor intentionally release such programs to infect others.",
+    "Users shall not engage in any fraudulent, harassing, embarrassing, sexually implicit, obscene, or other unlawful or improper material or actions.",
+    "Users shall ensure that any material that is authorized and brought onto the company's computers or which is authorized and downloaded from the internet or provided from any other source shall be scanned for viruses or other destructive elements.",
+    "Users shall not install games or play games in the company's computers.",
+    "Users are expected to demonstrate proper care, respect for intellectual property, data ownership, system security, and rights to access information.",
+    "Computer resources and Mobile Phones are to be used in an effective, efficient, ethical, and lawful manner.",
+    "Damage units shall be reported immediately. Units that are damaged due to the negligence of an employee shall be charged to the employee.",
+    "Lost or stolen units should be reported immediately. Cost incurred for the replacement of the unit shall be charged to the employee who is responsible for the loss. The lost or stolen unit may be the responsibility of the employee with the same unit or any unit with the same function and value, or pay the market value of the lost unit.",
+]
+RULES_ACKNOWLEDGEMENT = (
+    "The undersigned user executes these rules and regulations as a condition of their continuing employment "
+    "or other relationship with the company. The user acknowledges that the employee has read and understood "
+    "these policies and agrees to abide by all of the requirements of these rules and understands that failure "
+    "to abide may result in sanctions, including but not limited to adverse employment actions, suspension, "
+    "termination, and potential civil and criminal liabilities."
+)
+
+# Table rows: (label, qty, asset tag, checked) / (label, asset tag, remarks) ...
+# A row of None draws an empty row; a str draws a section label across the table
+TableRow = Optional[Any]
+
+
+def _text(value: Any) -> str:
+    """Cell text limited to what the built-in PDF fonts can encode"""
+    if value is None:
+        return ''
+    return str(value).encode('latin-1', 'replace').decode('latin-1')
+
+
+def _format_date(value: Any) -> str:
+    """Dates as the form pages print them (M/D/YYYY)"""
+    if not value:
+        return ''
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return value
+    if isinstance(value, (datetime, date)):
+        return f"{value.month}/{value.day}/{value.year}"
+    return str(value)
+
+
+def _matches(asset: Dict[str, Any], item: str) -> bool:
+    """Same loose name match the form pages use to place an asset on a row"""
+    name = ((asset.get('subCategory') or {}).get('name') or '').strip() or (asset.get('description') or '')
+    name, item = name.lower(), item.lower()
+    return name == item or item in name or name in item
+
+
+def _first_match(assets: List[Dict[str, Any]], item: str) -> Optional[Dict[str, Any]]:
+    return next((asset for asset in assets if _matches(asset, item)), None)
+
+
+def _matching(assets: List[Dict[str, Any]], items: Sequence[str]) -> List[Dict[str, Any]]:
+    return [asset for asset in assets if any(_matches(asset, item) for item in items)]
+
+
+def _asset_label(asset: Dict[str, Any]) -> str:
+    return (asset.get('subCategory') or {}).get('name') or asset.get('description') or ''
+
+
+class FormPDF(FPDF):
+    """A4 portrait document with the drawing primitives the forms share"""
+
+    def __init__(self, logo: Optional[bytes] = None):
+        super().__init__(orientation='P', format='A4')
+        self.set_margins(left=10, top=10, right=10)
+        self.set_auto_page_break(auto=False)
+        self.logo = logo
+        self._header_lines: Dict[Tuple[Tuple[float, ...], Tuple[str, ...]], List[List[str]]] = {}
+
+    @property
+    def content_width(self) -> float:
+        return self.w - self.l_margin - self.r_margin
+
+    def form_header(self, number_label: str, number: str):
+        """Logo on the left, control / form number on the right"""
+        top = self.get_y()
+        if self.logo:
+            try:
+                self.image(io.BytesIO(self.logo), x=self.l_margin, y=top, h=14)
+            except Exception as e:
+                logger.warning(f"Could not draw form logo: {type(e).__name__}: {str(e)}")
+                self.logo = None
+        right = self.w - self.r_margin
+        self.set_font('Helvetica', 'B', 8)
+        self.set_xy(right - 70, top + 4)
+        self.cell(20, 5, number_label)
+        self.set_font('Helvetica', '', 8)
+        self.cell(50, 5, _text(number), border='B')
+        self.set_xy(self.l_margin, top + 16)
+
+    def form_title(self, title: str, subtitle: Optional[str] = None):
+        self.set_font('Helvetica', 'B', 11)
+        self.cell(0, 6, title, align='C', new_x='LMARGIN', new_y='NEXT')
+        if subtitle:
+            self.set_font('Helvetica', 'B', 8)
+            self.cell(0, 5, subtitle, align='C', new_x='LMARGIN', new_y='NEXT')
+        self.ln(2)
+
+    def field(self, x: float, y: float, w: float, label: str, value: Any, label_w: Optional[float] = None):
+        """Label followed by an underlined value"""
+        self.set_font('Helvetica', 'B', 7)
+        label_w = label_w if label_w is not None else self.get_string_width(label) + 2
+        self.set_xy(x, y)
+        self.cell(label_w, 5, label)
+        self.set_font('Helvetica', '', 8)
+        self.cell(max(w - label_w, 1), 5, self._fit(_text(value), w - label_w), border='B')
+
+    def checkbox(self, x: float, y: float, checked: bool, size: float = 3):
+        self.set_draw_color(0, 0, 0)
+        self.set_fill_color(0, 0, 0)
+        self.rect(x, y, size, size, style='DF' if checked else 'D')
+        if checked:
+            self.set_draw_color(255, 255, 255)
+            self.line(x + 0.6, y + size * 0.55, x + size * 0.42, y + size - 0.6)
+            self.line(x + size * 0.42, y + size - 0.6, x + size - 0.5, y + 0.6)
+            self.set_draw_color(0, 0, 0)
+
+    def details_box(self, fields: List[Tuple[str, Any]], columns: int = 2, extra_rows: int = 0):
+        """Bordered grid of label/value fields, with `extra_rows` left free for the caller"""
+        x0, y0 = self.l_margin, self.get_y()
+        col_w = self.content_width / columns
+        rows = (len(fields) + columns - 1) // columns + extra_rows
+        for index, (label, value) in enumerate(fields):
+            row, col = divmod(index, columns)
+            self.field(x0 + 2 + col * col_w, y0 + 2 + row * 7, col_w - 4, label, value)
+        height = rows * 7 + 3
+        self.rect(x0, y0, self.content_width, height)
+        self.set_xy(x0, y0 + height + 3)
+
+    def table(self, x: float, y: float, widths: List[float], headers: List[str], rows: List[TableRow],
+              checkbox_column: Optional[int] = None, row_h: float = 5) -> float:
+        """Bordered table at (x, y); returns the y below it"""
+        self.set_font('Helvetica', 'B', 6.5)
+        # Line breaking is the slow part of fpdf2; every copy of a form shares its headers
+        key = (tuple(widths), tuple(headers))
+        if key not in self._header_lines:
+            self._header_lines[key] = [
+                self.multi_cell(w, 3, header, dry_run=True, output='LINES') for w, header in zip(widths, headers)
+            ]
+        header_lines = self._header_lines[key]
+        header_h = max(len(lines) for lines in header_lines) * 3 + 1
+        cx = x
+        self.set_fill_color(240, 240, 240)
+        for w, lines in zip(widths, header_lines):
+            self.rect(cx, y, w, header_h, style='DF')
+            line_y = y + (header_h - len(lines) * 3) / 2
+            for line in lines:
+                self.set_xy(cx, line_y)
+                self.cell(w, 3, line, align='C')
+                line_y += 3
+            cx += w
+        y += header_h
+
+        total_w = sum(widths)
+        for row in rows:
+            if isinstance(row, str):
+                self.set_font('Helvetica', 'B', 7)
+                self.set_xy(x, y)
+                self.cell(total_w, row_h, f' {row}', border=1)
+            else:
+                cells = row if row is not None else [''] * len(widths)
+                cx = x
+                self.set_font('Helvetica', '', 7)
+                for index, (w, value) in enumerate(zip(widths, cells)):
+                    text = '' if index == checkbox_column else _text(value)
+                    if text:
+                        self.set_xy(cx, y)
+                        self.cell(w, row_h, self._fit(text, w), border=1, align='L' if index == 0 else 'C')
+                    else:
+                        self.rect(cx, y, w, row_h)
+                    if index == checkbox_column and row is not None:
+                        self.checkbox(cx + (w - 3) / 2, y + (row_h - 3) / 2, bool(value))
+                    cx += w
+            y += row_h
+        return y
+
+    def signature(self, x: float, y: float, w: float, name: Any, caption: str):
+        """Value over a signature line with a caption below"""
+        self.set_font('Helvetica', '', 8)
+        self.set_xy(x, y)
+        self.cell(w, 5, self._fit(_text(name), w), border='B', align='C')
+        self.set_font('Helvetica', '', 6.5)
+        self.set_xy(x, y + 5)
+        self.cell(w, 4, caption, align='C')
+
+    def paragraph(self, text: str, size: float = 7.5, style: str = '', line_h: float = 3.6):
+        self.set_font('Helvetica', style, size)
+        self.multi_cell(0, line_h, _text(text), new_x='LMARGIN', new_y='NEXT')
+
+    def _fit(self, text: str, width: float) -> str:
+        """Truncate `text` to the cell width"""
+        if self.get_string_width(text) <= width - 2:
+            return text
+        while text and self.get_string_width(text + '...') > width - 2:
+            text = text[:-1]
+        return text + '...'
+
+
+def _return_form_copy(pdf: FormPDF, form: Dict[str, Any], copy_label: str):
+    form_data = form.get('formData') or {}
+    employee = form.get('employeeUser') or {}
+    assets = form_data.get('selectedAssets') or []
+    resigned = bool(form_data.get('resignedStaff'))
+
+    it_equipment = _matching(assets, IT_EQUIPMENT)
+    other_items = _matching(assets, OTHER_ITEMS)
+    resigned_items = _matching(assets, RESIGNED_STAFF_ITEMS) if resigned else []
+    custom_items = [
+        asset for asset in assets
+        if asset not in it_equipment and asset not in other_items
+        and not (resigned and any(_matches(asset, item) for item in RESIGNED_STAFF_ITEMS))
+    ]
+
+    pdf.add_page()
+    pdf.form_header('CTRL NO.:', form_data.get('controlNumber') or form.get('ctrlNo') or '')
+    pdf.form_title('RETURN OF ASSETS FORM', copy_label)
+
+    top = pdf.get_y()
+    pdf.details_box([
+        ('NAME OF THE EMPLOYEE:', employee.get('name') or 'Unknown'),
+        ('CLIENT / DEPARTMENT:', form.get('department') or employee.get('department') or ''),
+        ('DATE RETURNED:', _format_date(form_data.get('returnDate') or form.get('dateReturned'))),
+        ('POSITION:', form_data.get('position') or ''),
+    ], extra_rows=1)
+    # Return type checkboxes in the last row of the box
+    box_y = top + 2 + 2 * 7 + 1
+    half = pdf.l_margin + pdf.content_width / 2
+    for offset, (label, checked) in enumerate((
+        ('RETURN TO OFFICE', form_data.get('returnToOffice')),
+        ('RESIGNED STAFF', resigned),
+    )):
+        x = half + 2 + offset * 45
+        pdf.checkbox(x, box_y, bool(checked))
+        pdf.set_font('Helvetica', 'B', 7)
+        pdf.set_xy(x + 4, box_y - 1)
+        pdf.cell(40, 5, label)
+
+    def asset_row(item: str, pool: List[Dict[str, Any]]):
+        asset = _first_match(pool, item)
+        return [item, (asset.get('quantity') or 1) if asset else '', asset.get('assetTagId') if asset else '',
+                bool(asset.get('condition')) if asset else False]
+
+    left_rows: List[TableRow] = [asset_row(item, it_equipment) for item in IT_EQUIPMENT]
+    left_rows += [None] * max(0, 5 - len(it_equipment))
+
+    right_rows: List[TableRow] = ['Others:'] + [asset_row(item, other_items) for item in OTHER_ITEMS]
+    if resigned:
+        right_rows += ['Resigned Staff:'] + [asset_row(item, resigned_items) for item in RESIGNED_STAFF_ITEMS]
+    right_rows += [
+        [_asset_label(asset), asset.get('quantity') or 1, asset.get('assetTagId') or '', bool(asset.get('condition'))]
+        for asset in custom_items
+    ]
+    right_rows += [None] * max(
+        0, 5 - len(other_items) - len(custom_items) - (len(resigned_items) + len(RESIGNED_STAFF_ITEMS) if resigned else 0)
+    )
+
+    headers = ['Assets Returned', 'QTY', 'Asset Tag / QR code', 'Tick the box if counted and in good condition']
+    table_w = (pdf.content_width - 4) / 2
+    widths = [table_w * 0.36, table_w * 0.1, table_w * 0.27, table_w * 0.27]
+    y = pdf.get_y()
+    left_end = pdf.table(pdf.l_margin, y, widths, headers, left_rows, checkbox_column=3)
+    right_end = pdf.table(pdf.l_margin + table_w + 4, y, widths, headers, right_rows, checkbox_column=3)
+
+    y = max(left_end, right_end) + 6
+    col_w = (pdf.content_width - 10) / 2
+    right_x = pdf.l_margin + col_w + 10
+    pdf.set_font('Helvetica', 'B', 7.5)
+    pdf.set_xy(pdf.l_margin, y)
+    pdf.cell(col_w, 4, 'Returned by:')
+    pdf.set_xy(right_x, y)
+    pdf.cell(col_w, 4, 'IT DEPARTMENT')
+    pdf.set_font('Helvetica', 'I', 6.5)
+    pdf.set_text_color(107, 114, 128)
+    pdf.set_xy(right_x, y + 4)
+    pdf.multi_cell(col_w, 3, 'This certify that assets brought back to the office above staff are complete and in good condition.')
+    pdf.set_text_color(0, 0, 0)
+    y += 12
+    pdf.signature(pdf.l_margin, y, col_w, form_data.get('returnerSignature'), 'Signature over Printed Name')
+    pdf.signature(right_x, y, col_w, form_data.get('itSignature'), 'Signature over Printed Name')
+    y += 11
+    pdf.signature(pdf.l_margin, y, col_w, form_data.get('returnerDate'), 'Date')
+    pdf.signature(right_x, y, col_w, form_data.get('itDate'), 'Date')
+
+
+def _accountability_form(pdf: FormPDF, form: Dict[str, Any]):
+    form_data = form.get('formData') or {}
+    employee = form.get('employeeUser') or {}
+    assets = form_data.get('selectedAssets') or []
+    main_assets = _matching(assets, ASSET_DESCRIPTIONS)
+    cables = _matching(assets, CABLES_AND_EXTENSIONS)
+
+    pdf.add_page()
+    pdf.form_header('AF NO.:', form_data.get('accountabilityFormNo') or form.get('accountabilityFormNo') or '')
+    pdf.form_title('ACCOUNTABILITY FORM')
+    pdf.details_box([
+        ('NAME OF THE EMPLOYEE:', employee.get('name') or 'Unknown'),
+        ('CLIENT/DEPARTMENT:', form_data.get('clientDepartment') or form.get('department') or employee.get('department') or ''),
+        ('POSITION:', form_data.get('position') or ''),
+        ('TICKET NO.:', form_data.get('ticketNo') or ''),
+        ('DATE ISSUED:', _format_date(form_data.get('dateIssued') or form.get('dateIssued'))),
+    ])
+
+    width = pdf.content_width
+    rows: List[TableRow] = []
+    for item in ASSET_DESCRIPTIONS:
+        asset = _first_match(main_assets, item)
+        rows.append([item, asset.get('assetTagId') if asset else '', (asset.get('remarks') or '') if asset else ''])
+    y = pdf.table(pdf.l_margin, pdf.get_y(), [width * 0.4, width * 0.3, width * 0.3],
+                  ['ASSET DESCRIPTION', 'ASSET TAG', 'REMARKS'], rows)
+
+    if cables:
+        cable_rows: List[TableRow] = [
+            [item, 1 if _first_match(cables, item) else ''] for item in CABLES_AND_EXTENSIONS
+        ]
+        y = pdf.table(pdf.l_margin, y + 4, [width * 0.7, width * 0.3], ['ASSET DESCRIPTION', 'QTY'], cable_rows)
+
+    mobile_fields = [
+        ('BRAND:', form_data.get('mobileBrand')), ('MODEL:', form_data.get('mobileModel')),
+        ('IMEI NO.:', form_data.get('imeiNo')), ('SIM NO.:', form_data.get('simNo')),
+        ('NETWORK PROVIDER:', form_data.get('networkProvider')), ('PLAN AMOUNT:', form_data.get('planAmount')),
+    ]
+    if any(value for _, value in mobile_fields):
+        pdf.set_xy(pdf.l_margin, y + 4)
+        pdf.set_font('Helvetica', 'B', 8)
+        pdf.cell(0, 5, 'Mobile Phone:', new_x='LMARGIN', new_y='NEXT')
+        pdf.details_box([(label, value or '') for label, value in mobile_fields], columns=3)
+        y = pdf.get_y() - 3
+
+    replacements = form_data.get('replacementItems') or []
+    if replacements:
+        pdf.set_xy(pdf.l_margin, y + 4)
+        pdf.set_font('Helvetica', 'B', 8)
+        pdf.cell(0, 5, 'REPLACEMENT:', new_x='LMARGIN', new_y='NEXT')
+        y = pdf.table(
+            pdf.l_margin, pdf.get_y(), [width * 0.3, width * 0.175, width * 0.175, width * 0.2, width * 0.15],
+            ['ASSET DESCRIPTION', 'OLD ASSET TAG', 'NEW ASSET TAG', 'DESIGNATED IT', 'DATE'],
+            [[item.get('assetDescription'), item.get('oldAssetTag'), item.get('newAssetTag'),
+              item.get('designatedIT'), item.get('date')] for item in replacements]
+        )
+
+    signatures = [
+        ("Staff's Conforme Signature:", form_data.get('staffSignature'), form_data.get('staffDate')),
+        ('IT Signature:', form_data.get('itSignature'), form_data.get('itDate')),
+        ('Asset Custodian Signature:', form_data.get('assetCustodianSignature'), form_data.get('assetCustodianDate')),
+    ]
+    if form_data.get('financeSignature'):
+        signatures.append(('Finance Department Signature:', form_data.get('financeSignature'), form_data.get('financeDate')))
+    col_w = (width - 10) / 2
+    y += 8
+    for index, (label, name, signed_on) in enumerate(signatures):
+        row, col = divmod(index, 2)
+        x = pdf.l_margin + col * (col_w + 10)
+        top = y + row * 20
+        pdf.set_font('Helvetica', 'B', 7.5)
+        pdf.set_xy(x, top)
+        pdf.cell(col_w, 4, label)
+        pdf.signature(x, top + 5, col_w, name, f"Date: {_text(signed_on)}")
+
+    # Rules and regulations page
+    pdf.add_page()
+    pdf.set_font('Helvetica', 'B', 11)
+    pdf.cell(0, 7, 'RULES AND REGULATIONS:', new_x='LMARGIN', new_y='NEXT')
+    pdf.paragraph(RULES_INTRODUCTION)
+    pdf.ln(1)
+    for number, rule in enumerate(RULES, start=1):
+        pdf.set_font('Helvetica', '', 7.5)
+        pdf.cell(6, 3.6, f"{number}.")
+        pdf.multi_cell(0, 3.6, rule, new_x='LMARGIN', new_y='NEXT')
+    pdf.ln(2)
+    pdf.paragraph(RULES_ACKNOWLEDGEMENT, style='I')
+
+    y = pdf.get_y() + 6
+    sections = [
+        [("STAFF'S CONFORME", form_data.get('staffSignature'), form_data.get('staffDate')),
+         ('IT DEPARTMENT', form_data.get('itSignature'), form_data.get('itDate'))],
+        [('ASSET CUSTODIAN', form_data.get('assetCustodianSignature'), form_data.get('assetCustodianDate')),
+         ('FINANCE DEPARTMENT (If related to Mobile Phones)', form_data.get('financeSignature'), form_data.get('financeDate'))],
+    ]
+    for index, section in enumerate(sections):
+        if index == 1:
+            pdf.set_draw_color(0, 0, 0)
+            pdf.line(pdf.l_margin, y, pdf.l_margin + width, y)
+            pdf.set_font('Helvetica', 'B', 7.5)
+            pdf.set_xy(pdf.l_margin, y + 2)
+            pdf.cell(0, 5, 'TO BE COMPLETED BY ASSET CUSTODIAN / FINANCE DEPARTMENT', align='C')
+            y += 9
+        for col, (label, name, signed_on) in enumerate(section):
+            x = pdf.l_margin + col * (col_w + 10)
+            pdf.set_font('Helvetica', 'B', 7.5)
+            pdf.set_xy(x, y)
+            pdf.cell(col_w, 4, label)
+            pdf.signature(x, y + 6, col_w, name, 'Signature Over Printed Name')
+            pdf.signature(x, y + 17, col_w, signed_on, 'Date:')
+        y += 30
+
+
+def render_forms_pdf(form_type: str, forms: List[Dict[str, Any]], logo: Optional[bytes] = None) -> bytes:
+    """
+    One PDF with every form in `forms`: both copies (IT department and admin)
+    of a return form, the form and its rules page for an accountability form.
+    CPU-bound; run it off the event loop for large batches.
+    """
+    if not PDF_AVAILABLE:
+        raise ImportError("fpdf2 is required for native form PDFs")
+    if form_type not in FORM_TYPES:
+        raise ValueError(f"Unknown form type: {form_type}")
+
+    pdf = FormPDF(logo)
+    for form in forms:
+        if form_type == "return":
+            _return_form_copy(pdf, form, 'IT DEPARTMENT COPY')
+            _return_form_copy(pdf, form, 'ADMIN COPY')
+        else:
+            _accountability_form(pdf, form)
+    return bytes(pdf.output())
+
+
+async def load_forms(form_type: str, form_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Saved forms in `form_ids` order, shaped for render_forms_pdf, with the
+    subcategory names of their selected assets. Raises ValueError for unknown ids.
+    """
+    if form_type == "return":
+        db_forms = await prisma.returnform.find_many(where={"id": {"in": form_ids}}, include={"employeeUser": True})
+    else:
+        db_forms = await prisma.accountabilityform.find_many(where={"id": {"in": form_ids}}, include={"employeeUser": True})
+    forms_by_id = {db_form.id: db_form for db_form in db_forms}
+    missing = [form_id for form_id in form_ids if form_id not in forms_by_id]
+    if missing:
+        raise ValueError(f"Form(s) not found: {', '.join(missing)}")
+
+    forms: List[Dict[str, Any]] = []
+    for form_id in form_ids:
+        db_form = forms_by_id[form_id]
+        try:
+            form_data = json.loads(db_form.formData) if isinstance(db_form.formData, str) else (db_form.formData or {})
+        except ValueError:
+            form_data = {}
+        form = {
+            "id": db_form.id,
+            "department": db_form.department,
+            "formData": form_data if isinstance(form_data, dict) else {},
+            "employeeUser": {
+                "name": db_form.employeeUser.name,
+                "department": db_form.employeeUser.department,
+            } if db_form.employeeUser else None,
+        }
+        if form_type == "return":
+            form.update(dateReturned=db_form.dateReturned, ctrlNo=db_form.ctrlNo, returnType=db_form.returnType)
+        else:
+            form.update(dateIssued=db_form.dateIssued, accountabilityFormNo=db_form.accountabilityFormNo)
+        forms.append(form)
+
+    # Subcategory names decide which row an asset is printed on
+    selected_assets = [
+        asset for form in forms for asset in (form["formData"].get("selectedAssets") or [])
+        if isinstance(asset, dict) and asset.get("id")
+    ]
+    if selected_assets:
+        db_assets = await prisma.assets.find_many(
+            where={"id": {"in": list({asset["id"] for asset in selected_assets})}},
+            include={"subCategory": True}
+        )
+        sub_categories = {
+            db_asset.id: {"id": db_asset.subCategory.id, "name": db_asset.subCategory.name}
+            for db_asset in db_assets if db_asset.subCategory
+        }
+        for asset in selected_assets:
+            if asset["id"] in sub_categories:
+                asset["subCategory"] = sub_categories[asset["id"]]
+    return forms
+
+
+async def load_company_logo() -> Optional[bytes]:
+    """The company's primary logo for the form header, if one is set and reachable"""
+    try:
+        company_info = await prisma.companyinfo.find_first()
+        if not company_info or not company_info.primaryLogoUrl:
+            return None
+        response = await get_http_client().get(company_info.primaryLogoUrl, timeout=10)
+        response.raise_for_status()
+        return response.content
+    except Exception as e:
+        logger.warning(f"Could not load company logo for form PDF: {type(e).__name__}: {str(e)}")
+        return None
@@ -0,0 +1,170 @@
+"""
+Media catalog
+The media and documents pages read storage_objects (kept current by the storage
+client and the reconcile-storage cron job, see utils/storage_usage.py) instead
+of listing the buckets: one query pages the objects under the scopes newest
+first and joins each to the AssetsImage / AssetsDocument rows that reference
+its public URL, with the linked asset's deleted flag.
+
+Links are matched on the exact public URL, with or without the trailing "?"
+the storage client appends, through the imageUrl / documentUrl indexes. Rows
+stored under another URL form (a different host, a signed URL) are rewritten to
+their object's public URL by normalize_link_urls(), which runs with the storage
+reconciliation rather than on every page request.
+"""
+import json
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+from database import prisma
+from http_client import SUPABASE_URL
+from utils.storage_usage import StorageScope, scopes_sql, DOCUMENT_STORAGE_SCOPES, IMAGE_STORAGE_SCOPES
+
+PUBLIC_OBJECT_URL_PREFIX = f"{SUPABASE_URL}/storage/v1/object/public/"
+
+# Link columns per catalog: (table, url column, extra json fields)
+_LINK_TABLES = {
+    "images": (
+        "assets_images",
+        "image_url",
+        "'imageType', l.image_type, 'imageSize', l.image_size",
+    ),
+    "documents": (
+        "assets_documents",
+        "document_url",
+        "'documentType', l.document_type, 'documentSize', l.document_size, "
+        "'fileName', l.file_name, 'mimeType', l.mime_type",
+    ),
+}
+
+# Objects each catalog's link rows may point at
+_LINK_SCOPES = {
+    "images": IMAGE_STORAGE_SCOPES,
+    "documents": DOCUMENT_STORAGE_SCOPES,
+}
+
+
+def asset_tag_id_from_file_name(file_name: str, standalone_prefix: str) -> str:
+    """
+    Asset tag encoded in an uploaded file name (assetTagId-timestamp.ext);
+    "" for standalone uploads named `standalone_prefix`-timestamp.ext
+    """
+    stem = file_name.rsplit('.', 1)[0] if '.' in file_name else file_name
+    timestamp_match = re.search(r'-(20\d{2}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2}-\d{3}Z)$', stem)
+    asset_tag_id = stem[:timestamp_match.start()] if timestamp_match else stem.split('-')[0]
+    return '' if asset_tag_id == standalone_prefix else asset_tag_id
+
+
+def public_object_url(bucket: str, path: str) -> str:
+    """Public URL of a storage object (without the storage client's trailing "?")"""
+    return f"{PUBLIC_OBJECT_URL_PREFIX}{bucket}/{path}"
+
+
+async def fetch_catalog_page(
+    kind: str,
+    scopes: Sequence[StorageScope],
+    page: int,
+    page_size: int
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    One page of the `kind` ("images" or "documents") catalog under `scopes`,
+    newest first, and the total object count. Each row has bucket, path, size,
+    mime_type, created_at, public_url and links: the referencing rows as dicts
+    with url, assetTagId, isDeleted and the table's metadata fields.
+    """
+    table, url_column, link_fields = _LINK_TABLES[kind]
+    params: List[Any] = []
+    where_sql = scopes_sql(scopes, params)
+
+    count_rows = await prisma.query_raw(
+        f"SELECT count(*) AS count FROM storage_objects WHERE {where_sql}",
+        *params
+    )
+    total = int(count_rows[0]["count"]) if count_rows else 0
+    if total == 0:
+        return [], 0
+
+    params.extend([PUBLIC_OBJECT_URL_PREFIX, page_size, (page - 1) * page_size])
+    n = len(params)
+    rows = await prisma.query_raw(
+        f"""
+        WITH page AS (
+            SELECT bucket, path, size, mime_type, created_at,
+                   ${n - 2} || bucket || '/' || path AS public_url
+            FROM storage_objects
+            WHERE {where_sql}
+            ORDER BY created_at DESC, bucket, path
+            LIMIT ${n - 1} OFFSET ${n}
+        )
+        SELECT p.bucket, p.path, p.size, p.mime_type, p.created_at, p.public_url,
+               coalesce(links.links, '[]'::json) AS links
+        FROM page p
+        LEFT JOIN LATERAL (
+            SELECT json_agg(json_build_object(
+                       'url', l.{url_column},
+                       'assetTagId', l.asset_tag_id,
+                       'isDeleted', coalesce(a.is_deleted, false),
+                       {link_fields}
+                   ) ORDER BY l.created_at) AS links
+            FROM {table} l
+            LEFT JOIN assets a ON a.asset_tag_id = l.asset_tag_id
+            WHERE l.{url_column} IN (p.public_url, p.public_url || '?')
+        ) links ON true
+        ORDER BY p.created_at DESC, p.bucket, p.path
+        """,
+        *params
+    )
+    for row in rows:
+        if isinstance(row.get("links"), str):
+            row["links"] = json.loads(row["links"])
+        row["links"] = row.get("links") or []
+    return rows, total
+
+
+async def normalize_link_urls() -> Dict[str, int]:
+    """
+    Point AssetsImage / AssetsDocument rows at their object's public URL when
+    they were stored under another URL form. A row is rewritten when its URL
+    names no object in storage_objects and contains the file name of exactly
+    one object in the catalog's scopes (case-insensitive). Returns the number
+    of rewritten rows per catalog.
+    """
+    summary: Dict[str, int] = {}
+    for kind, (table, url_column, _) in _LINK_TABLES.items():
+        params: List[Any] = []
+        where_sql = scopes_sql(_LINK_SCOPES[kind], params)
+        params.append(PUBLIC_OBJECT_URL_PREFIX)
+        n = len(params)
+        # Rows already on a public object URL are excluded through the
+        # storage_objects primary key; only the rest are matched by file name
+        summary[kind] = await prisma.execute_raw(
+            f"""
+            UPDATE {table} l
+            SET {url_column} = ${n} || m.bucket || '/' || m.path,
+                updated_at = now() AT TIME ZONE 'utc'
+            FROM (
+                SELECT u.id, min(o.bucket) AS bucket, min(o.path) AS path
+                FROM {table} u
+                CROSS JOIN LATERAL (
+                    SELECT CASE WHEN starts_with(u.{url_column}, ${n})
+                                THEN rtrim(substr(u.{url_column}, length(${n}) + 1), '?')
+                           END AS object_key
+                ) k
+                JOIN (
+                    SELECT bucket, path, lower(regexp_replace(path, '^.*/', '')) AS file_name
+                    FROM storage_objects
+                    WHERE {where_sql}
+                ) o ON strpos(lower(u.{url_column}), o.file_name) > 0
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM storage_objects e
+                    WHERE e.bucket = split_part(k.object_key, '/', 1)
+                      AND e.path = substr(k.object_key, strpos(k.object_key, '/') + 1)
+                )
+                GROUP BY u.id
+                HAVING count(*) = 1
+            ) m
+            WHERE l.id = m.id
+            """,
+            *params
+        )
+    return summary
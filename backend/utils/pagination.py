@@ -0,0 +1,83 @@
+"""
+Keyset (cursor) pagination helpers
+Lists are ordered by (<sort field> desc, id desc). A cursor encodes the sort
+value and id of the last row of a page, and the next page is selected with
+`(sort, id) < (cursor sort, cursor id)` so Postgres walks the index from that
+point instead of scanning and discarding every preceding row as skip/offset does.
+
+Endpoints keep page-number mode for backward compatibility; `cursor` replaces
+`page` when given and every page returns `nextCursor` when more rows follow.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+
+def encode_cursor(sort_field: str, sort_value: datetime, row_id: str) -> str:
+    """Opaque cursor for the row (sort_value, row_id) of a list ordered by sort_field"""
+    payload = {"f": sort_field, "v": sort_value.isoformat(), "i": str(row_id)}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str) -> Tuple[datetime, str]:
+    """Decode a cursor issued for sort_field. Raises 400 if it is malformed or for another list."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload["f"] != sort_field:
+            raise ValueError("cursor was issued for a different sort field")
+        return datetime.fromisoformat(payload["v"]), str(payload["i"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_order(sort_field: str = "createdAt") -> List[Dict[str, str]]:
+    """Order matching the cursor: sort field then id, both descending"""
+    return [{sort_field: "desc"}, {"id": "desc"}]
+
+
+def keyset_where(
+    where: Optional[Dict[str, Any]],
+    cursor: Optional[str],
+    sort_field: str = "createdAt"
+) -> Optional[Dict[str, Any]]:
+    """Restrict `where` to the rows after `cursor` (returns `where` unchanged without a cursor)"""
+    if not cursor:
+        return where
+
+    sort_value, row_id = decode_cursor(cursor, sort_field)
+    return after_row_where(where, sort_field, sort_value, row_id)
+
+
+def after_row_where(
+    where: Optional[Dict[str, Any]],
+    sort_field: str,
+    sort_value: datetime,
+    row_id: str
+) -> Dict[str, Any]:
+    """Restrict `where` to the rows ordered after (sort_value, row_id)"""
+    after_row = {
+        "OR": [
+            {sort_field: {"lt": sort_value}},
+            {sort_field: sort_value, "id": {"lt": row_id}},
+        ]
+    }
+    if not where:
+        return after_row
+    return {"AND": [where, after_row]}
+
+
+def split_page(rows: List[Any], page_size: int, sort_field: str = "createdAt") -> Tuple[List[Any], Optional[str]]:
+    """
+    Split rows fetched with take=page_size + 1 into the page and the cursor of the
+    next page (None when this is the last page)
+    """
+    if len(rows) <= page_size:
+        return rows, None
+    page = rows[:page_size]
+    last = page[-1]
+    return page, encode_cursor(sort_field, getattr(last, sort_field), last.id)
@@ -1,7 +1,6 @@
 """
 PDF generation utility for automated reports
 """
-import io
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone, timedelta
 import logging
@@ -352,172 +351,6 @@ class ReportPDF(FPDF):
         return widths
 
 
-def generate_pdf_from_excel_data(
-    excel_content: bytes,
-    report_name: str,
-    report_type: str
-) -> Optional[bytes]:
-    """
-    Generate PDF from Excel data by parsing the Excel file and 
-    recreating it as a formatted PDF.
-    """
-    if not PDF_AVAILABLE:
-        logger.error("fpdf2 not available for PDF generation")
-        return None
-        
-    try:
-        from openpyxl import load_workbook
-        
-        # Load the Excel workbook from bytes
-        wb = load_workbook(io.BytesIO(excel_content))
-        
-        # Create PDF
-        pdf = ReportPDF(report_name, report_type)
-        pdf.add_page()
-        
-        # Define simplified columns per report type (to fit well in A4 Landscape PDF)
-        REPORT_TYPE_COLUMNS = {
-            "assets": [
-                "Asset Tag ID", "Description", "Category", "Status", 
-                "Cost", "Location", "Site", "Department"
-            ],
-            "location": [
-                "Asset Tag", "Description", "Location", "Site", 
-                "Department", "Status", "Last Move"
-            ],
-            "checkout": [
-                "Asset Tag ID", "Description", "Category", "SUB-CATEGORY",
-                "Check-out Date", "Due date", "Return Date", "Department", "Cost", "Employee"
-            ],
-            "maintenance": [
-                "Asset Tag", "Description", "Title", "Status",
-                "Due Date", "Completed", "Cost", "Inventory Items"
-            ],
-            "audit": [
-                "Asset Tag ID", "Category", "Sub-Category", "Audit Type",
-                "Audited to Site", "Audited to Location", "Last Audit Date", "Audit By"
-            ],
-            "depreciation": [
-                "Asset Tag ID", "Description", "Category", "Depreciation Method",
-                "Original Cost", "Depreciable Cost", "Accumulated Depreciation", "Current Value", "Date Acquired"
-            ],
-            "lease": [
-                "Asset Tag ID", "Description", "Category", "Lessee",
-                "Lease Start", "Lease End", "Status", "Days Remaining", "Asset Cost"
-            ],
-            "reservation": [
-                "Asset Tag ID", "Description", "Category", "Reservation Type",
-                "Reserved By", "Reservation Date", "Status", "Days Until/From", "Asset Cost"
-            ],
-            "transaction": [
-                "Transaction Type", "Asset Tag ID", "Description", "Category",
-                "Date", "Action By", "Details", "Location", "Asset Cost"
-            ],
-        }
-        
-        # Get simplified columns for this report type (default to assets)
-        report_type_lower = report_type.lower()
-        SIMPLIFIED_COLUMNS = REPORT_TYPE_COLUMNS.get(report_type_lower, REPORT_TYPE_COLUMNS["assets"])
-        
-        # Sheets that should use simplified columns (detail lists)
-        DETAIL_SHEET_NAMES = [
-            "Asset List", "Assets", "Asset Details", "Details",
-            "Checkout List", "Maintenance List", "Audit List",
-            "Lease List", "Reservation List", "Transaction List",
-            "Location Assets", "Depreciation List"
-        ]
-        
-        for sheet_name in wb.sheetnames:
-            sheet = wb[sheet_name]
-            
-            # Add section for this sheet
-            pdf.add_section_title(sheet_name)
-            
-            # Get all rows
-            rows = list(sheet.iter_rows(values_only=True))
-            if not rows:
-                pdf.set_font('Helvetica', 'I', 10)
-                pdf.cell(0, 6, 'No data available', new_x='LMARGIN', new_y='NEXT')
-                pdf.ln(5)
-                continue
-                
-            # First row is header
-            original_headers = [str(h) if h else '' for h in rows[0]]
-            original_data_rows = [[str(c) if c else '' for c in row] for row in rows[1:]]
-            
-            # Check if this is a detail list sheet that should use simplified columns
-            is_detail_sheet = any(
-                name.lower() in sheet_name.lower() 
-                for name in DETAIL_SHEET_NAMES
-            )
-            
-            # Also check if headers contain many columns (detail list indicator)
-            has_many_columns = (
-                len(original_headers) > 10 and 
-                any('asset' in h.lower() or 'tag' in h.lower() or 'id' in h.lower() for h in original_headers)
-            )
-            
-            if is_detail_sheet or has_many_columns:
-                # Use simplified columns for detail list
-                # Map original headers to simplified ones
-                header_indices = []
-                simplified_headers = []
-                
-                for simplified_col in SIMPLIFIED_COLUMNS:
-                    # Find matching column in original headers (case-insensitive, partial match)
-                    for idx, orig_header in enumerate(original_headers):
-                        # Normalize for comparison
-                        orig_lower = orig_header.lower().replace(' ', '').replace('_', '')
-                        simp_lower = simplified_col.lower().replace(' ', '').replace('_', '')
-                        
-                        if simp_lower in orig_lower or orig_lower in simp_lower:
-                            header_indices.append(idx)
-                            simplified_headers.append(simplified_col)
-                            break
-                
-                if simplified_headers and header_indices:
-                    # Extract only the simplified columns from data rows
-                    simplified_data_rows = []
-                    for row in original_data_rows:
-                        simplified_row = []
-                        for idx in header_indices:
-                            if idx < len(row):
-                                value = row[idx]
-                                # Truncate long descriptions
-                                if idx == header_indices[1] if len(header_indices) > 1 else -1:  # Description column
-                                    value = value[:50] + '...' if len(value) > 50 else value
-                                simplified_row.append(value)
-                            else:
-                                simplified_row.append('')
-                        simplified_data_rows.append(simplified_row)
-                    
-                    if simplified_headers and simplified_data_rows:
-                        pdf.add_table(simplified_headers, simplified_data_rows)
-                    elif simplified_headers:
-                        pdf.set_font('Helvetica', 'I', 10)
-                        pdf.cell(0, 6, 'No records found', new_x='LMARGIN', new_y='NEXT')
-                else:
-                    # Fallback to original if mapping failed
-                    if original_headers and original_data_rows:
-                        pdf.add_table(original_headers, original_data_rows)
-            else:
-                # Non-asset-list sheets (Summary, By Status, By Category, etc.) - use all columns
-                if original_headers and original_data_rows:
-                    pdf.add_table(original_headers, original_data_rows)
-                elif original_headers and not original_data_rows:
-                    pdf.set_font('Helvetica', 'I', 10)
-                    pdf.cell(0, 6, 'No records found', new_x='LMARGIN', new_y='NEXT')
-                
-            pdf.ln(10)
-        
-        # Return PDF content
-        return bytes(pdf.output())
-        
-    except Exception as e:
-        logger.error(f"Error generating PDF: {e}", exc_info=True)
-        return None
-
-
 def generate_simple_pdf(
     report_name: str,
     report_type: str,
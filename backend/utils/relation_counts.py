@@ -0,0 +1,32 @@
+"""
+Grouped child-row counts
+Counts rows of a model per foreign-key value with one group_by, instead of
+loading every child row and counting them in Python.
+"""
+from typing import Any, Dict, Iterable, Optional
+
+
+async def count_by(
+    model: Any,
+    field: str,
+    values: Iterable[Optional[str]],
+    where: Optional[Dict[str, Any]] = None
+) -> Dict[str, int]:
+    """
+    Number of rows of `model` (e.g. prisma.assetsimage) per value of `field`
+    among `values`, optionally narrowed by `where`. Every requested value is in
+    the result, with 0 when it has no rows.
+    """
+    keys = list(dict.fromkeys(value for value in values if value))
+    if not keys:
+        return {}
+
+    rows = await model.group_by(
+        by=[field],
+        where={**(where or {}), field: {"in": keys}},
+        count=True
+    )
+    counts = dict.fromkeys(keys, 0)
+    for row in rows:
+        counts[row[field]] = row.get("_count", {}).get("_all", 0)
+    return counts
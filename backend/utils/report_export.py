@@ -0,0 +1,125 @@
+"""
+Report exports
+Each report router builds its export (build_<report>_export) as a ReportExport:
+the CSV rows, workbook sheets and PDF sections of the report, produced lazily
+from the same queries. The export endpoints send it in the requested format
+(export_response) and the scheduled-report cron job renders it in-process
+(render_report_file, via utils/report_service.py), so a PDF is written
+straight from the report rows (no Excel export parsed back with openpyxl).
+"""
+import inspect
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from utils.export_stream import Row, XLSX_MEDIA_TYPE, csv_bytes, stream_csv, stream_xlsx, xlsx_bytes
+from utils.pdf_generator import ReportPDF, PDF_AVAILABLE
+
+EXPORT_FORMATS = ("csv", "excel", "pdf")
+
+
+@dataclass
+class ReportSection:
+    """
+    A titled table of the PDF. `title` may contain {count}, the number of rows;
+    sections without rows are left out.
+    """
+    title: str
+    headers: List[str]
+    rows: AsyncIterable[Row]
+    space_after: float = 10
+
+
+@dataclass
+class ReportExport:
+    """
+    One report, ready to be written as CSV, Excel or PDF. The callables start
+    fresh row iterators, so each is meant to be used once.
+    """
+    filename: str  # without extension
+    title: str
+    report_type: str
+    csv_rows: Callable[[], AsyncIterable[Row]]
+    sheets: Callable[[], Sequence[Tuple[str, AsyncIterable[Row]]]]
+    pdf_sections: Callable[[], AsyncIterable[ReportSection]]
+
+
+@dataclass
+class ReportFile:
+    """A rendered export, for callers that need the whole file (e.g. email attachments)"""
+    content: bytes
+    media_type: str
+    extension: str
+
+
+def check_export_format(format: str) -> None:
+    """Reject unknown formats, and PDF when fpdf2 is missing"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid format. Use csv, excel, or pdf.")
+    if format == "pdf" and not PDF_AVAILABLE:
+        raise HTTPException(status_code=500, detail="PDF export not available - fpdf2 not installed")
+
+
+async def write_report_pdf(export: ReportExport) -> bytes:
+    """Lay out the export's PDF sections, reading each section's rows as they come"""
+    pdf = ReportPDF(export.title, export.report_type)
+    pdf.add_page()
+    async for section in export.pdf_sections():
+        rows = [['' if value is None else str(value) for value in row] async for row in section.rows]
+        if rows:
+            pdf.add_section_title(section.title.format(count=len(rows)))
+            pdf.add_table(section.headers, rows)
+            pdf.ln(section.space_after)
+    return bytes(pdf.output())
+
+
+async def export_response(export: ReportExport, format: str):
+    """Send the export as a CSV / XLSX attachment (streamed) or a PDF attachment"""
+    if format == "csv":
+        return stream_csv(export.csv_rows(), export.filename + ".csv")
+    if format == "excel":
+        return await stream_xlsx(export.sheets(), export.filename + ".xlsx")
+
+    pdf_content = await write_report_pdf(export)
+    return Response(
+        content=pdf_content,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'attachment; filename="{export.filename}.pdf"'
+        }
+    )
+
+
+async def render_report_file(export: ReportExport, format: str) -> ReportFile:
+    """Write the export as a complete CSV, XLSX or PDF file"""
+    if format == "csv":
+        return ReportFile(await csv_bytes(export.csv_rows()), "text/csv", "csv")
+    if format == "excel":
+        return ReportFile(await xlsx_bytes(export.sheets()), XLSX_MEDIA_TYPE, "xlsx")
+    return ReportFile(await write_report_pdf(export), "application/pdf", "pdf")
+
+
+def export_arguments(
+    builder: Callable[..., Awaitable[ReportExport]],
+    filters: Optional[Dict[str, Any]],
+    include_list: bool
+) -> Dict[str, Any]:
+    """
+    Keyword arguments for a build_<report>_export from saved report filters
+    (named like the export endpoint's query parameters). Unknown and empty
+    filters are dropped; `include_list` sets the builder's include*List flag.
+    """
+    parameters = inspect.signature(builder).parameters
+    arguments: Dict[str, Any] = {}
+    for key, value in (filters or {}).items():
+        if key not in parameters or value is None or value == "":
+            continue
+        if parameters[key].annotation in (bool, Optional[bool]) and isinstance(value, str):
+            value = value.lower() in ("true", "1", "yes")
+        arguments[key] = value
+    for name in parameters:
+        if name.startswith("include"):
+            arguments[name] = include_list
+    return arguments
@@ -0,0 +1,59 @@
+"""
+Report service
+Generates report files in-process for callers outside a request, such as the
+scheduled-report cron job. It uses the same build_<report>_export functions
+and writers as the /api/reports/<type>/export endpoints (utils/report_export.py),
+so a scheduled report needs no HTTP round-trip back to this server, no auth
+and no worker slot of its own.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from routers.reports import build_assets_export
+from routers.reports_audit import build_audit_export
+from routers.reports_checkout import build_checkout_export
+from routers.reports_depreciation import build_depreciation_export
+from routers.reports_lease import build_lease_export
+from routers.reports_location import build_location_export
+from routers.reports_maintenance import build_maintenance_export
+from routers.reports_reservation import build_reservation_export
+from routers.reports_transaction import build_transaction_export
+from utils.report_export import ReportExport, ReportFile, export_arguments, render_report_file
+
+# Export builder per report type (the <type> of /api/reports/<type>/export)
+REPORT_EXPORT_BUILDERS: Dict[str, Callable[..., Awaitable[ReportExport]]] = {
+    "assets": build_assets_export,
+    "checkout": build_checkout_export,
+    "location": build_location_export,
+    "maintenance": build_maintenance_export,
+    "audit": build_audit_export,
+    "depreciation": build_depreciation_export,
+    "lease": build_lease_export,
+    "reservation": build_reservation_export,
+    "transaction": build_transaction_export,
+}
+
+
+def is_report_type_supported(report_type: str) -> bool:
+    return report_type in REPORT_EXPORT_BUILDERS
+
+
+async def generate_report_file(
+    report_type: str,
+    format: str,
+    filters: Optional[Dict[str, Any]] = None,
+    include_list: bool = False,
+    title: Optional[str] = None
+) -> ReportFile:
+    """
+    Build the `report_type` report with the saved `filters` and write it as
+    `format` (csv, excel or pdf). `title` replaces the report's PDF title.
+    Raises ValueError for unknown report types.
+    """
+    builder = REPORT_EXPORT_BUILDERS.get(report_type)
+    if builder is None:
+        raise ValueError(f"Unsupported report type: {report_type}")
+
+    export = await builder(**export_arguments(builder, filters, include_list))
+    if title:
+        export.title = title
+    return await render_report_file(export, format)
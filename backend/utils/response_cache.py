@@ -0,0 +1,281 @@
+"""
+Response cache for read endpoints
+GET routes decorated with @cached_response store their serialized response
+under a key built from the route, the normalized query/path parameters, the
+caller's permission scope and the current version of each of the route's tags.
+Write paths call invalidate_response_cache(*tags), which bumps those tag
+versions: every entry built from an older version stops matching and ages out.
+
+Backends:
+- "memory" (default): bounded in-process LRU, per worker
+- "redis": shared between workers; used when REDIS_URL is set and the optional
+  `redis` package is installed (pip install redis)
+- "none": caching disabled
+Tests can install a fresh MemoryCacheBackend with set_response_cache_backend().
+"""
+import functools
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from permissions import PermissionSet, check_permission
+
+# Try to import redis for the shared backend
+try:
+    import redis.asyncio as redis_asyncio  # type: ignore
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis_asyncio = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "redis" if REDIS_URL else "memory").lower()
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+RESPONSE_CACHE_PREFIX = os.getenv("RESPONSE_CACHE_PREFIX", "asset-dog:rc")
+
+# Tags invalidated by write paths
+TAG_ASSETS = "assets"
+TAG_EMPLOYEES = "employees"
+TAG_FORMS = "forms"
+TAG_INVENTORY = "inventory"
+TAG_CHECKOUT = "checkout"
+TAG_CHECKIN = "checkin"
+TAG_MOVE = "move"
+TAG_RESERVE = "reserve"
+TAG_LEASE = "lease"
+TAG_LEASE_RETURN = "lease_return"
+TAG_DISPOSE = "dispose"
+TAG_MAINTENANCE = "maintenance"
+TAG_AUDIT = "audit"
+
+
+class MemoryCacheBackend:
+    """Bounded LRU of serialized responses plus tag versions, local to this process"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._tag_versions: Dict[str, int] = {}
+        self._max_entries = max_entries
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, body = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return body
+
+    async def set(self, key: str, body: bytes, ttl: float) -> None:
+        if self._max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_tag_versions(self, tags: Sequence[str]) -> List[int]:
+        return [self._tag_versions.get(tag, 0) for tag in tags]
+
+    async def bump_tags(self, tags: Sequence[str]) -> None:
+        for tag in tags:
+            self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._entries), "maxSize": self._max_entries}
+
+
+class RedisCacheBackend:
+    """Responses and tag versions in Redis, shared by every worker"""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = RESPONSE_CACHE_PREFIX):
+        self._client = redis_asyncio.from_url(url)
+        self._prefix = prefix
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self._prefix}:tag:{tag}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(f"{self._prefix}:{key}")
+
+    async def set(self, key: str, body: bytes, ttl: float) -> None:
+        await self._client.set(f"{self._prefix}:{key}", body, px=max(int(ttl * 1000), 1))
+
+    async def get_tag_versions(self, tags: Sequence[str]) -> List[int]:
+        if not tags:
+            return []
+        values = await self._client.mget([self._tag_key(tag) for tag in tags])
+        return [int(value) if value is not None else 0 for value in values]
+
+    async def bump_tags(self, tags: Sequence[str]) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(self._tag_key(tag))
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"prefix": self._prefix}
+
+
+def _create_backend() -> Optional[Any]:
+    if RESPONSE_CACHE_BACKEND == "none":
+        return None
+    if RESPONSE_CACHE_BACKEND == "redis":
+        if REDIS_URL and REDIS_AVAILABLE:
+            return RedisCacheBackend(REDIS_URL)
+        logger.warning("Response cache: Redis requested but REDIS_URL or the redis package is missing; using in-process cache")
+    return MemoryCacheBackend()
+
+
+_backend: Optional[Any] = _create_backend()
+
+# route -> hit/miss/bypass/error counters; tag -> invalidation count
+_route_metrics: Dict[str, Dict[str, int]] = {}
+_invalidations: Dict[str, int] = {}
+
+
+def set_response_cache_backend(backend: Optional[Any]) -> None:
+    """Replace the cache backend (None disables caching) and reset the metrics"""
+    global _backend
+    _backend = backend
+    _route_metrics.clear()
+    _invalidations.clear()
+
+
+async def close_response_cache() -> None:
+    """Release the backend's connections on shutdown"""
+    if _backend is not None:
+        await _backend.close()
+
+
+def _count(route: str, outcome: str) -> None:
+    metrics = _route_metrics.setdefault(route, {"hits": 0, "misses": 0, "bypasses": 0, "errors": 0})
+    metrics[outcome] += 1
+
+
+def get_response_cache_stats() -> Dict[str, Any]:
+    """Backend details plus hit/miss counters per route and invalidations per tag"""
+    hits = sum(metrics["hits"] for metrics in _route_metrics.values())
+    misses = sum(metrics["misses"] for metrics in _route_metrics.values())
+    return {
+        "backend": _backend.name if _backend is not None else "none",
+        **(_backend.stats() if _backend is not None else {}),
+        "hits": hits,
+        "misses": misses,
+        "hitRate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "routes": {route: dict(metrics) for route, metrics in _route_metrics.items()},
+        "invalidations": dict(_invalidations),
+    }
+
+
+async def invalidate_response_cache(*tags: str) -> None:
+    """Drop every cached response built from any of `tags`. Call after a successful write."""
+    if not tags:
+        return
+    for tag in tags:
+        _invalidations[tag] = _invalidations.get(tag, 0) + 1
+    if _backend is None:
+        return
+    try:
+        await _backend.bump_tags(tags)
+    except Exception as e:
+        # Entries still expire after their TTL
+        logger.error(f"Error invalidating response cache tags {list(tags)}: {type(e).__name__}: {str(e)}")
+
+
+def _cache_key(route: str, scope: str, tags: Sequence[str], versions: Sequence[int], params: Dict[str, Any]) -> str:
+    # Unset parameters are dropped so `?x=` defaults and omitted parameters share an entry
+    normalized = {name: value for name, value in params.items() if value is not None}
+    digest = hashlib.sha256(
+        json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    ).hexdigest()
+    tag_part = ",".join(f"{tag}.{version}" for tag, version in zip(tags, versions))
+    return f"{route}:{scope}:{tag_part}:{digest}"
+
+
+def cached_response(
+    route: str,
+    tags: Sequence[str],
+    ttl: float = 30,
+    permission: Optional[str] = None
+) -> Callable:
+    """
+    Cache a GET route's response for `ttl` seconds, until one of `tags` is invalidated.
+    Apply below @router.get; the route must take `auth: dict = Depends(verify_auth)`
+    (and may take `permissions: PermissionSet = Depends(get_user_permissions)`).
+
+    With `permission`, entries are shared by the users holding it and callers
+    without it always reach the route (which answers 403 as before); without it,
+    entries are shared by all authenticated users. Only pydantic model results
+    are cached, so error and streaming responses never are.
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        @functools.wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            backend = _backend
+            if backend is None:
+                return await endpoint(*args, **kwargs)
+
+            scope = "authenticated"
+            if permission:
+                permissions = kwargs.get("permissions")
+                if isinstance(permissions, PermissionSet):
+                    allowed = permissions.has(permission)
+                else:
+                    auth = kwargs.get("auth") or {}
+                    user_id = auth.get("user", {}).get("id") or auth.get("user_id")
+                    allowed = bool(user_id) and await check_permission(user_id, permission)
+                if not allowed:
+                    _count(route, "bypasses")
+                    return await endpoint(*args, **kwargs)
+                scope = permission
+
+            params = {name: value for name, value in kwargs.items() if name not in ("auth", "permissions")}
+            try:
+                versions = await backend.get_tag_versions(tags)
+                key = _cache_key(route, scope, tags, versions, params)
+                body = await backend.get(key)
+            except Exception as e:
+                logger.warning(f"Response cache read failed for {route}: {type(e).__name__}: {str(e)}")
+                _count(route, "errors")
+                return await endpoint(*args, **kwargs)
+
+            if body is not None:
+                _count(route, "hits")
+                return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+            _count(route, "misses")
+            result = await endpoint(*args, **kwargs)
+            if isinstance(result, BaseModel):
+                try:
+                    body = json.dumps(jsonable_encoder(result), separators=(",", ":")).encode("utf-8")
+                    await backend.set(key, body, ttl)
+                except Exception as e:
+                    logger.warning(f"Response cache write failed for {route}: {type(e).__name__}: {str(e)}")
+                    _count(route, "errors")
+            return result
+
+        return wrapper
+    return decorator
@@ -0,0 +1,114 @@
+"""
+Non-blocking Supabase Storage access
+The supabase-py Client is synchronous, so its storage calls block the event
+loop (and every other request on the worker) for the whole network round-trip.
+Routers use one shared, natively async storage client instead, authenticated
+with the service role key:
+
+    storage_admin = get_storage_admin()
+    await storage_admin.from_("assets").upload(path, content, file_options={...})
+    await storage_admin.from_("assets").get_public_url(path)
+
+Bucket methods (list, upload, download, remove, get_public_url) take the same
+arguments and return the same values as the sync client. upload() and remove()
+also keep storage_objects (utils/storage_usage.py) in step, so quota checks
+never have to list the buckets. The client is closed by the app lifespan.
+"""
+import os
+import logging
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from storage3 import AsyncStorageClient
+
+from http_client import SUPABASE_URL
+from utils.storage_usage import forget_stored_objects, record_stored_object
+
+logger = logging.getLogger(__name__)
+
+STORAGE_TIMEOUT_SECONDS = int(os.getenv("STORAGE_TIMEOUT_SECONDS", "60"))
+
+
+def _object_size(file: Any) -> int:
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return len(file)
+    if isinstance(file, (str, os.PathLike)):
+        try:
+            return os.path.getsize(file)
+        except OSError:
+            return 0
+    return 0
+
+
+class AccountedBucket:
+    """Bucket proxy that records uploads and removals in storage_objects"""
+
+    def __init__(self, bucket_id: str, bucket: Any):
+        self._bucket_id = bucket_id
+        self._bucket = bucket
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._bucket, name)
+
+    async def upload(self, path: str, file: Any, file_options: Optional[Dict[str, str]] = None) -> Any:
+        response = await self._bucket.upload(path, file, file_options)
+        await record_stored_object(
+            self._bucket_id,
+            path,
+            _object_size(file),
+            (file_options or {}).get("content-type")
+        )
+        return response
+
+    async def remove(self, paths: List[str]) -> Any:
+        response = await self._bucket.remove(paths)
+        await forget_stored_objects(self._bucket_id, paths)
+        return response
+
+
+class StorageAdmin:
+    """Shared async storage client whose buckets keep storage_objects up to date"""
+
+    def __init__(self, client: AsyncStorageClient):
+        self._client = client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def from_(self, bucket_id: str) -> AccountedBucket:
+        return AccountedBucket(bucket_id, self._client.from_(bucket_id))
+
+
+_client: Optional[StorageAdmin] = None
+
+
+def get_storage_admin() -> StorageAdmin:
+    """Return the shared async storage client (service role), creating it on first use"""
+    global _client
+    supabase_service_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not supabase_service_key:
+        raise HTTPException(
+            status_code=500,
+            detail="Supabase service role key not configured"
+        )
+    if _client is None:
+        _client = StorageAdmin(AsyncStorageClient(
+            f"{SUPABASE_URL}/storage/v1/",
+            {
+                "apiKey": supabase_service_key,
+                "Authorization": f"Bearer {supabase_service_key}",
+            },
+            timeout=STORAGE_TIMEOUT_SECONDS
+        ))
+    return _client
+
+
+async def close_storage_admin() -> None:
+    """Close the storage client's connections on app shutdown"""
+    global _client
+    if _client is not None:
+        try:
+            await _client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing storage client: {type(e).__name__}: {str(e)}")
+        _client = None
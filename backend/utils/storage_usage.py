@@ -0,0 +1,190 @@
+"""
+Storage usage accounting
+storage_objects holds one row per object in Supabase Storage with its size.
+The storage client from utils/storage.py records uploads and removals as they
+happen; reconcile_storage_objects() lists the buckets and corrects whatever
+those missed (uploads from other tools, failed bookkeeping, objects that
+predate the table; at startup it runs once if the table is still empty).
+Quota checks and the "storage used" figures sum this table with one query
+instead of recursively listing the buckets on every request.
+
+A scope is a (bucket, path prefix) pair; "" covers the whole bucket.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from database import prisma
+
+logger = logging.getLogger(__name__)
+
+StorageScope = Tuple[str, str]
+
+# Everything counted against the asset media quota
+ASSET_STORAGE_SCOPES: List[StorageScope] = [("assets", ""), ("file-history", "assets/")]
+DOCUMENT_STORAGE_SCOPES: List[StorageScope] = [("assets", "assets_documents/"), ("file-history", "assets/assets_documents/")]
+IMAGE_STORAGE_SCOPES: List[StorageScope] = [("assets", "assets_images/"), ("file-history", "assets/assets_images/")]
+
+# Buckets the reconciliation job walks
+RECONCILED_SCOPES: List[StorageScope] = [("assets", ""), ("file-history", "")]
+
+# Page size for bucket listings
+_LIST_PAGE_SIZE = 1000
+
+_UPSERT_SQL = """
+    INSERT INTO storage_objects (bucket, path, size, mime_type, created_at, updated_at)
+    SELECT o.bucket, o.path, o.size, o.mime_type,
+           coalesce(o.created_at::timestamptz AT TIME ZONE 'utc', now() AT TIME ZONE 'utc'),
+           now() AT TIME ZONE 'utc'
+    FROM unnest($1::text[], $2::text[], $3::bigint[], $4::text[], $5::text[])
+        AS o(bucket, path, size, mime_type, created_at)
+    ON CONFLICT (bucket, path) DO UPDATE SET
+        size = EXCLUDED.size,
+        mime_type = coalesce(EXCLUDED.mime_type, storage_objects.mime_type),
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+def scopes_sql(scopes: Sequence[StorageScope], params: List[Any]) -> str:
+    """WHERE fragment matching any of the scopes; appends its parameters to `params`"""
+    conditions = []
+    for bucket, prefix in scopes:
+        params.append(bucket)
+        if prefix:
+            params.append(prefix)
+            conditions.append(f"(bucket = ${len(params) - 1} AND starts_with(path, ${len(params)}))")
+        else:
+            conditions.append(f"bucket = ${len(params)}")
+    return " OR ".join(conditions) or "false"
+
+
+async def _upsert_objects(client: Any, objects: List[Dict[str, Any]]) -> int:
+    if not objects:
+        return 0
+    columns = ["bucket", "path", "size", "mime_type", "created_at"]
+    return await client.execute_raw(
+        _UPSERT_SQL,
+        *[[obj.get(column) for obj in objects] for column in columns]
+    )
+
+
+async def record_stored_object(bucket: str, path: str, size: int, mime_type: Optional[str] = None) -> None:
+    """Record an uploaded object. Failures are logged; the reconciliation job repairs them."""
+    try:
+        await _upsert_objects(prisma, [{"bucket": bucket, "path": path, "size": size, "mime_type": mime_type}])
+    except Exception as e:
+        logger.warning(f"Could not record storage object {bucket}/{path}: {type(e).__name__}: {str(e)}")
+
+
+async def forget_stored_objects(bucket: str, paths: List[str]) -> None:
+    """Drop removed objects. Failures are logged; the reconciliation job repairs them."""
+    if not paths:
+        return
+    try:
+        await prisma.execute_raw(
+            "DELETE FROM storage_objects WHERE bucket = $1 AND path = ANY($2::text[])",
+            bucket,
+            list(paths)
+        )
+    except Exception as e:
+        logger.warning(f"Could not forget storage objects in {bucket}: {type(e).__name__}: {str(e)}")
+
+
+async def get_storage_usage(scopes: Sequence[StorageScope] = ASSET_STORAGE_SCOPES) -> int:
+    """Total bytes stored under the scopes"""
+    params: List[Any] = []
+    where_sql = scopes_sql(scopes, params)
+    rows = await prisma.query_raw(
+        f"SELECT coalesce(sum(size), 0)::bigint AS used FROM storage_objects WHERE {where_sql}",
+        *params
+    )
+    return int(rows[0]["used"]) if rows else 0
+
+
+async def _list_objects(storage: Any, bucket: str, folder: str) -> List[Dict[str, Any]]:
+    """Every object under `folder`, recursively and across listing pages (raises on listing errors)"""
+    objects: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        items = await storage.from_(bucket).list(folder, {"limit": _LIST_PAGE_SIZE, "offset": offset})
+        for item in items or []:
+            item_path = f"{folder}/{item['name']}" if folder else item['name']
+            # Folders are listed without an id
+            if item.get('id') is None:
+                objects.extend(await _list_objects(storage, bucket, item_path))
+                continue
+            metadata = item.get('metadata') if isinstance(item.get('metadata'), dict) else {}
+            objects.append({
+                "bucket": bucket,
+                "path": item_path,
+                "size": int(metadata.get('size') or 0),
+                "mime_type": metadata.get('mimetype'),
+                "created_at": item.get('created_at'),
+            })
+        if not items or len(items) < _LIST_PAGE_SIZE:
+            return objects
+        offset += _LIST_PAGE_SIZE
+
+
+async def reconcile_storage_objects(scopes: Sequence[StorageScope] = RECONCILED_SCOPES) -> Dict[str, Any]:
+    """
+    Bring storage_objects in line with the buckets: upsert every listed object
+    and delete rows for objects that no longer exist. A scope whose listing fails
+    is left untouched. Returns per-scope counts.
+    """
+    # Imported here: utils.storage wraps its client with this module's bookkeeping
+    from utils.storage import get_storage_admin
+    storage = get_storage_admin()
+
+    summary: Dict[str, Any] = {}
+    for bucket, prefix in scopes:
+        scope_name = f"{bucket}/{prefix}"
+        started_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        try:
+            objects = await _list_objects(storage, bucket, prefix.rstrip("/"))
+        except Exception as e:
+            logger.error(f"Error listing {scope_name} for storage reconciliation: {type(e).__name__}: {str(e)}")
+            summary[scope_name] = {"error": str(e)}
+            continue
+
+        await _upsert_objects(prisma, objects)
+
+        # Rows written by uploads during the listing are newer than started_at and kept
+        params: List[Any] = []
+        where_sql = scopes_sql([(bucket, prefix)], params)
+        params.extend([[obj["path"] for obj in objects], started_at.isoformat()])
+        removed = await prisma.execute_raw(
+            f"""
+            DELETE FROM storage_objects
+            WHERE ({where_sql})
+              AND NOT (path = ANY(${len(params) - 1}::text[]))
+              AND updated_at < ${len(params)}::timestamp
+            """,
+            *params
+        )
+        summary[scope_name] = {
+            "objects": len(objects),
+            "bytes": sum(obj["size"] for obj in objects),
+            "removed": removed,
+        }
+    return summary
+
+
+async def reconcile_storage_objects_if_empty() -> None:
+    """
+    Fill storage_objects right after deploy (run at startup): reconcile when the
+    table has no rows yet, so the media pages and quotas do not wait for the
+    hourly job. Failures are logged, not raised.
+    """
+    try:
+        rows = await prisma.query_raw("SELECT EXISTS (SELECT 1 FROM storage_objects) AS populated")
+        if rows and rows[0]["populated"]:
+            return
+        logger.info("storage_objects is empty, reconciling with the buckets")
+        summary = await reconcile_storage_objects()
+        logger.info(f"Initial storage reconciliation: {summary}")
+        # Imported here: the media catalog builds on this module
+        from utils.media_catalog import normalize_link_urls
+        logger.info(f"Normalized media link URLs: {await normalize_link_urls()}")
+    except Exception as e:
+        logger.error(f"Initial storage reconciliation failed: {type(e).__name__}: {str(e)}")
@@ -0,0 +1,473 @@
+"""
+Transaction report query engine
+The transaction report merges ten event sources (asset history, disposals,
+leases, lease returns, maintenance, moves, checkouts and checkins). Each source
+is one SELECT projecting the same columns; they are combined with UNION ALL and
+filtered, ordered, counted and paginated by Postgres, so a page of the report
+reads one page of rows instead of every matching row of every source.
+"""
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from database import prisma
+
+# Rows fetched per round-trip when a whole report is read (exports)
+TRANSACTION_CHUNK_SIZE = 500
+
+ACTIONS_BY_USERS = 'Actions By Users'
+
+DISPOSAL_METHODS = ['Sold', 'Donated', 'Scrapped', 'Lost/Missing', 'Destroyed']
+
+# Columns every source projects, with their SQL types (sources leave out the
+# columns they do not have and get a typed NULL instead)
+_COLUMNS: List[Tuple[str, str]] = [
+    ("id", "text"),
+    ("transaction_type", "text"),
+    ("transaction_date", "timestamp"),
+    ("action_by", "text"),
+    ("details", "text"),
+    ("asset_tag_id", "text"),
+    ("asset_description", "text"),
+    ("category_id", "text"),
+    ("sub_category_id", "text"),
+    ("location", "text"),
+    ("site", "text"),
+    ("department", "text"),
+    ("asset_cost", "numeric"),
+    ("field_changed", "text"),
+    ("old_value", "text"),
+    ("new_value", "text"),
+    ("lessee", "text"),
+    ("lease_start_date", "timestamp"),
+    ("lease_end_date", "timestamp"),
+    ("conditions", "text"),
+    ("return_date", "timestamp"),
+    ("condition", "text"),
+    ("notes", "text"),
+    ("title", "text"),
+    ("maintenance_by", "text"),
+    ("due_date", "timestamp"),
+    ("status", "text"),
+    ("cost", "numeric"),
+    ("date_completed", "timestamp"),
+    ("move_type", "text"),
+    ("move_date", "timestamp"),
+    ("employee_name", "text"),
+    ("reason", "text"),
+    ("from_location", "text"),
+    ("to_location", "text"),
+    ("checkout_date", "timestamp"),
+    ("expected_return_date", "timestamp"),
+    ("is_overdue", "boolean"),
+    ("checkin_date", "timestamp"),
+    ("dispose_date", "timestamp"),
+    ("dispose_reason", "text"),
+    ("dispose_value", "numeric"),
+]
+
+_ASSET_COLUMNS = {
+    "asset_tag_id": "a.asset_tag_id",
+    "asset_description": "a.description",
+    "category_id": "a.category_id",
+    "sub_category_id": "a.sub_category_id",
+    "location": "a.location",
+    "site": "a.site",
+    "department": "a.department",
+    "asset_cost": "a.cost",
+}
+
+_EDIT_DETAILS = """CASE WHEN h.field IS NOT NULL
+    THEN format('Field "%s" changed from "%s" to "%s"', h.field,
+                coalesce(nullif(h.change_from, ''), 'N/A'), coalesce(nullif(h.change_to, ''), 'N/A'))
+    ELSE 'Asset edited' END"""
+
+# (transaction type(s), column expressions, FROM/WHERE) per source. A source is
+# left out of the union when a transaction type filter excludes it.
+_SOURCES: List[Tuple[List[str], Dict[str, str], str]] = [
+    (
+        ["Add Asset"],
+        {
+            "id": "'add-' || a.id",
+            "transaction_type": "'Add Asset'",
+            "transaction_date": "a.created_at",
+            "action_by": "added.action_by",
+            "details": "'Asset added to system'",
+        },
+        """
+        FROM assets a
+        LEFT JOIN LATERAL (
+            SELECT action_by FROM assets_history_logs
+            WHERE asset_id = a.id AND event_type = 'added'
+            ORDER BY event_date DESC LIMIT 1
+        ) added ON true
+        WHERE a.is_deleted = false
+        """,
+    ),
+    (
+        ["Edit Asset"],
+        {
+            "id": "'edit-' || h.id",
+            "transaction_type": "'Edit Asset'",
+            "transaction_date": "h.event_date",
+            "action_by": "h.action_by",
+            "details": _EDIT_DETAILS,
+            "field_changed": "h.field",
+            "old_value": "h.change_from",
+            "new_value": "h.change_to",
+        },
+        """
+        FROM assets_history_logs h
+        JOIN assets a ON a.id = h.asset_id
+        WHERE h.event_type = 'edited' AND a.is_deleted = false
+        """,
+    ),
+    (
+        ["Delete Asset"],
+        {
+            "id": "'delete-' || a.id",
+            "transaction_type": "'Delete Asset'",
+            "transaction_date": "coalesce(a.deleted_at, deleted.event_date, LOCALTIMESTAMP)",
+            "action_by": "deleted.action_by",
+            "details": "'Asset deleted'",
+        },
+        """
+        FROM assets a
+        LEFT JOIN LATERAL (
+            SELECT action_by, event_date FROM assets_history_logs
+            WHERE asset_id = a.id AND event_type = 'deleted'
+            ORDER BY event_date DESC LIMIT 1
+        ) deleted ON true
+        WHERE a.is_deleted = true
+        """,
+    ),
+    (
+        [f"{method} Asset" for method in DISPOSAL_METHODS],
+        {
+            "id": "'dispose-' || d.id",
+            "transaction_type": "d.disposal_method || ' Asset'",
+            "transaction_date": "d.dispose_date",
+            "details": "coalesce(nullif(d.dispose_reason, ''), 'Asset ' || lower(d.disposal_method))",
+            "dispose_date": "d.dispose_date",
+            "dispose_reason": "d.dispose_reason",
+            "dispose_value": "d.dispose_value",
+        },
+        """
+        FROM assets_dispose d
+        JOIN assets a ON a.id = d.asset_id
+        WHERE d.disposal_method IN ({disposal_methods}) AND a.is_deleted = false
+        """,
+    ),
+    (
+        ["Lease Out"],
+        {
+            "id": "'lease-' || l.id",
+            "transaction_type": "'Lease Out'",
+            "transaction_date": "l.lease_start_date",
+            "details": "'Leased to ' || l.lessee",
+            "lessee": "l.lessee",
+            "lease_start_date": "l.lease_start_date",
+            "lease_end_date": "l.lease_end_date",
+            "conditions": "l.conditions",
+        },
+        """
+        FROM assets_lease l
+        JOIN assets a ON a.id = l.asset_id
+        WHERE a.is_deleted = false
+        """,
+    ),
+    (
+        ["Lease Return"],
+        {
+            "id": "'lease-return-' || r.id",
+            "transaction_type": "'Lease Return'",
+            "transaction_date": "r.return_date",
+            "details": "'Returned from ' || l.lessee",
+            "lessee": "l.lessee",
+            "return_date": "r.return_date",
+            "condition": "r.condition",
+            "notes": "r.notes",
+        },
+        """
+        FROM assets_lease_return r
+        JOIN assets_lease l ON l.id = r.lease_id
+        JOIN assets a ON a.id = r.asset_id
+        WHERE a.is_deleted = false
+        """,
+    ),
+    (
+        ["Repair Asset"],
+        {
+            "id": "'maintenance-' || m.id",
+            "transaction_type": "'Repair Asset'",
+            "transaction_date": "m.created_at",
+            "action_by": "m.maintenance_by",
+            "details": "m.title",
+            "title": "m.title",
+            "maintenance_by": "m.maintenance_by",
+            "due_date": "m.due_date",
+            "status": "m.status",
+            "cost": "m.cost",
+            "date_completed": "m.date_completed",
+        },
+        """
+        FROM assets_maintenance m
+        JOIN assets a ON a.id = m.asset_id
+        WHERE a.is_deleted = false
+        """,
+    ),
+    (
+        ["Move Asset"],
+        {
+            "id": "'move-' || mv.id",
+            "transaction_type": "'Move Asset'",
+            "transaction_date": "mv.move_date",
+            "action_by": "moved.action_by",
+            "details": "mv.move_type || ': ' || coalesce(nullif(mv.reason, ''), 'No reason provided')",
+            "move_type": "mv.move_type",
+            "move_date": "mv.move_date",
+            "employee_name": "e.name",
+            "reason": "mv.reason",
+            "from_location": "CASE WHEN mv.move_type = 'Location Transfer' AND moved.field = 'location' THEN coalesce(moved.change_from, '') END",
+            "to_location": "CASE mv.move_type WHEN 'Location Transfer' THEN a.location WHEN 'Department Transfer' THEN a.department END",
+        },
+        # The user and previous location of a move come from the location or
+        # department edit logged within a day of it, preferring the field the
+        # move changed
+        """
+        FROM assets_move mv
+        JOIN assets a ON a.id = mv.asset_id
+        LEFT JOIN employee_users e ON e.id = mv.employee_user_id
+        LEFT JOIN LATERAL (
+            SELECT h.action_by, h.field, h.change_from FROM assets_history_logs h
+            WHERE h.asset_id = mv.asset_id
+              AND h.event_type = 'edited'
+              AND h.field IN ('location', 'department')
+              AND abs(extract(epoch FROM h.event_date - mv.move_date::timestamp)) < 86400
+            ORDER BY ((mv.move_type = 'Location Transfer' AND h.field = 'location')
+                      OR (mv.move_type = 'Department Transfer' AND h.field = 'department')) DESC,
+                     h.event_date DESC
+            LIMIT 1
+        ) moved ON true
+        WHERE a.is_deleted = false
+        """,
+    ),
+    (
+        ["Checkout Asset"],
+        {
+            "id": "'checkout-' || co.id",
+            "transaction_type": "'Checkout Asset'",
+            "transaction_date": "co.checkout_date",
+            "action_by": "e.name",
+            "details": "'Checked out to ' || coalesce(e.name, 'Unknown')",
+            "employee_name": "e.name",
+            "checkout_date": "co.checkout_date",
+            "expected_return_date": "co.expected_return_date",
+            "is_overdue": "coalesce(co.expected_return_date < CURRENT_DATE AND NOT EXISTS (SELECT 1 FROM assets_checkin ci WHERE ci.checkout_id = co.id), false)",
+        },
+        """
+        FROM assets_checkout co
+        JOIN assets a ON a.id = co.asset_id
+        LEFT JOIN employee_users e ON e.id = co.employee_user_id
+        WHERE a.is_deleted = false
+        """,
+    ),
+    (
+        ["Checkin Asset"],
+        {
+            "id": "'checkin-' || ci.id",
+            "transaction_type": "'Checkin Asset'",
+            "transaction_date": "ci.checkin_date",
+            "action_by": "e.name",
+            "details": "'Checked in from ' || coalesce(e.name, 'Unknown')",
+            "employee_name": "e.name",
+            "checkin_date": "ci.checkin_date",
+            "condition": "ci.condition",
+            "notes": "ci.notes",
+        },
+        """
+        FROM assets_checkin ci
+        JOIN assets a ON a.id = ci.asset_id
+        LEFT JOIN employee_users e ON e.id = ci.employee_user_id
+        WHERE a.is_deleted = false
+        """,
+    ),
+]
+
+# "Actions By Users" replaces the union with every history log, deleted assets included
+_ACTIONS_SOURCE: Tuple[Dict[str, str], str] = (
+    {
+        "id": "'action-' || h.id",
+        "transaction_type": "CASE h.event_type WHEN 'added' THEN 'Add Asset' WHEN 'deleted' THEN 'Delete Asset' ELSE 'Edit Asset' END",
+        "transaction_date": "h.event_date",
+        "action_by": "h.action_by",
+        "details": """CASE
+            WHEN h.event_type = 'edited' AND h.field IS NOT NULL
+                THEN format('Field "%s" changed from "%s" to "%s"', h.field,
+                            coalesce(nullif(h.change_from, ''), 'N/A'), coalesce(nullif(h.change_to, ''), 'N/A'))
+            WHEN h.event_type = 'added' THEN 'Asset added to system'
+            WHEN h.event_type = 'deleted' THEN 'Asset deleted'
+            ELSE 'Asset action' END""",
+        "field_changed": "h.field",
+        "old_value": "h.change_from",
+        "new_value": "h.change_to",
+    },
+    """
+    FROM assets_history_logs h
+    JOIN assets a ON a.id = h.asset_id
+    """,
+)
+
+
+def _select(columns: Dict[str, str], from_sql: str) -> str:
+    expressions = {**_ASSET_COLUMNS, **columns}
+    select_list = ",\n            ".join(
+        f"({expressions[name]})::{sql_type} AS {name}" if name in expressions else f"NULL::{sql_type} AS {name}"
+        for name, sql_type in _COLUMNS
+    )
+    return f"SELECT\n            {select_list}\n        {from_sql}"
+
+
+def _union_sql(transaction_type: Optional[str]) -> str:
+    """UNION ALL of the sources matching the transaction type filter"""
+    if transaction_type == ACTIONS_BY_USERS:
+        return _select(*_ACTIONS_SOURCE)
+
+    selects = []
+    for types, columns, from_sql in _SOURCES:
+        if transaction_type and transaction_type not in types:
+            continue
+        if "{disposal_methods}" in from_sql:
+            # Methods are the fixed DISPOSAL_METHODS values, never user input
+            methods = [
+                method for method in DISPOSAL_METHODS
+                if not transaction_type or transaction_type == f"{method} Asset"
+            ]
+            from_sql = from_sql.format(disposal_methods=", ".join(f"'{method}'" for method in methods))
+        selects.append(_select(columns, from_sql))
+    if not selects:
+        # Unknown transaction type: an empty result with the same columns
+        return _select({}, "FROM assets a WHERE false")
+    return "\n        UNION ALL\n        ".join(selects)
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def build_transaction_query(
+    transaction_type: Optional[str] = None,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    site: Optional[str] = None,
+    department: Optional[str] = None,
+    action_by: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> Tuple[str, List[Any]]:
+    """
+    FROM/WHERE fragment selecting the report's transactions as `t` with the
+    given filters, and its positional parameters. Postgres pushes the filters
+    on `t` down into each source of the union.
+    """
+    params: List[Any] = []
+    conditions: List[str] = []
+    if category:
+        params.append(category)
+        conditions.append(f"t.category_id IN (SELECT id FROM categories WHERE name = ${len(params)})")
+    for column, value in (("location", location), ("site", site), ("department", department)):
+        if value:
+            params.append(value)
+            conditions.append(f"t.{column} = ${len(params)}")
+    if action_by:
+        params.append("%" + _escape_like(action_by) + "%")
+        conditions.append(f"t.action_by ILIKE ${len(params)}")
+    if start_date:
+        params.append(start_date.isoformat())
+        conditions.append(f"t.transaction_date >= ${len(params)}::timestamp")
+    if end_date:
+        params.append(end_date.isoformat())
+        conditions.append(f"t.transaction_date <= ${len(params)}::timestamp")
+
+    sql = f"""
+        FROM (
+        {_union_sql(transaction_type)}
+        ) t
+        WHERE {" AND ".join(conditions) or "true"}
+    """
+    return sql, params
+
+
+def _rows_sql(query_sql: str, limit_sql: str, after_sql: str = "") -> str:
+    # Page the bare transactions first, then look up category names for that page only
+    return f"""
+        SELECT t.*, c.name AS category, sc.name AS sub_category
+        FROM (
+            SELECT t.* {query_sql} {after_sql}
+            ORDER BY t.transaction_date DESC, t.id DESC
+            {limit_sql}
+        ) t
+        LEFT JOIN categories c ON c.id = t.category_id
+        LEFT JOIN sub_categories sc ON sc.id = t.sub_category_id
+        ORDER BY t.transaction_date DESC, t.id DESC
+    """
+
+
+async def fetch_transaction_page(query_sql: str, params: List[Any], skip: int, take: int) -> List[Dict[str, Any]]:
+    """One page of transactions, newest first"""
+    n = len(params)
+    return await prisma.query_raw(
+        _rows_sql(query_sql, f"LIMIT ${n + 1} OFFSET ${n + 2}"),
+        *params, take, skip
+    )
+
+
+async def fetch_transaction_type_groups(query_sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Count and asset value per transaction type, ordered by each type's newest
+    transaction (the order the types first appear in the report)
+    """
+    rows = await prisma.query_raw(
+        f"""
+        SELECT t.transaction_type AS type, count(*) AS count, coalesce(sum(t.asset_cost), 0) AS total_value
+        {query_sql}
+        GROUP BY t.transaction_type
+        ORDER BY max(t.transaction_date) DESC
+        """,
+        *params
+    )
+    return [
+        {"type": row["type"], "count": int(row["count"]), "totalValue": float(row["total_value"] or 0)}
+        for row in rows
+    ]
+
+
+async def iter_transaction_chunks(
+    query_sql: str,
+    params: List[Any],
+    chunk_size: int = TRANSACTION_CHUNK_SIZE
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yield every transaction of the query in chunks, newest first. Each chunk
+    continues after the (date, id) of the previous chunk's last row.
+    """
+    n = len(params)
+    after_sql = f"AND (t.transaction_date, t.id) < (${n + 1}::timestamp, ${n + 2})"
+    last: Optional[Dict[str, Any]] = None
+    while True:
+        if last is None:
+            rows = await prisma.query_raw(_rows_sql(query_sql, f"LIMIT ${n + 1}"), *params, chunk_size)
+        else:
+            rows = await prisma.query_raw(
+                _rows_sql(query_sql, f"LIMIT ${n + 3}", after_sql),
+                *params, _as_text(last["transaction_date"]), last["id"], chunk_size
+            )
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]
+
+
+def _as_text(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
@@ -0,0 +1,39 @@
+import * as React from "react"
+
+/**
+ * Readiness signal for the backend form PDF renderer (backend/utils/form_pdf_generator.py).
+ * Sets data-pdf-ready="false" on <html> while the page is loading and "true" once
+ * `ready` holds and the page's images and fonts have finished loading, so the
+ * renderer prints as soon as the form is complete instead of sleeping.
+ */
+export function usePdfReady(ready: boolean) {
+  React.useEffect(() => {
+    const root = document.documentElement
+    let cancelled = false
+    root.setAttribute("data-pdf-ready", "false")
+
+    if (ready) {
+      const pendingImages = Array.from(document.images).filter((img) => !img.complete)
+      Promise.all([
+        ...pendingImages.map(
+          (img) =>
+            new Promise((resolve) => {
+              img.addEventListener("load", resolve, { once: true })
+              img.addEventListener("error", resolve, { once: true })
+              setTimeout(resolve, 3000)
+              // Lazy images below the renderer's viewport would never load
+              img.loading = "eager"
+            })
+        ),
+        document.fonts.ready,
+      ]).then(() => {
+        if (!cancelled) root.setAttribute("data-pdf-ready", "true")
+      })
+    }
+
+    return () => {
+      cancelled = true
+      root.removeAttribute("data-pdf-ready")
+    }
+  }, [ready])
+}
@@ -3,6 +3,9 @@
  * 
  * Runs multiple scheduled tasks:
  * - Every 5 minutes: Trigger automated reports
+ * - Every minute: Refresh the precomputed dashboard statistics
+ * - Every 15 minutes: Reconcile the asset search index
+ * - Every hour: Reconcile storage usage accounting
  * - Every day at midnight: Cleanup expired deleted assets and inventory
  * 
  * Deploy this as a separate Railway service.
@@ -18,6 +21,9 @@ const fetch = require('node-fetch');
 // Configuration
 const REPORTS_INTERVAL_MS = 5 * 60 * 1000; // 5 minutes in milliseconds
 const CLEANUP_CHECK_INTERVAL_MS = 60 * 1000; // Check every minute if it's midnight
+const SEARCH_REINDEX_INTERVAL_MS = 15 * 60 * 1000; // 15 minutes in milliseconds
+const DASHBOARD_STATS_INTERVAL_MS = 60 * 1000; // 1 minute in milliseconds
+const STORAGE_RECONCILE_INTERVAL_MS = 60 * 60 * 1000; // 1 hour in milliseconds
 const FASTAPI_BASE_URL = process.env.FASTAPI_BASE_URL;
 const CRON_SECRET = process.env.CRON_SECRET;
 const TIMEZONE = process.env.TIMEZONE || 'Asia/Manila';
@@ -40,13 +46,22 @@ if (!CRON_SECRET) {
 const REPORTS_ENDPOINT = `${FASTAPI_BASE_URL}/api/cron/send-scheduled-reports`;
 const CLEANUP_ASSETS_ENDPOINT = `${FASTAPI_BASE_URL}/api/cron/cleanup-deleted-assets`;
 const CLEANUP_INVENTORY_ENDPOINT = `${FASTAPI_BASE_URL}/api/cron/cleanup-deleted-inventory`;
+const SEARCH_REINDEX_ENDPOINT = `${FASTAPI_BASE_URL}/api/cron/reindex-asset-search`;
+const DASHBOARD_STATS_ENDPOINT = `${FASTAPI_BASE_URL}/api/cron/refresh-dashboard-stats`;
+const STORAGE_RECONCILE_ENDPOINT = `${FASTAPI_BASE_URL}/api/cron/reconcile-storage`;
 
 console.log('🚀 Asset Dog Scheduler Started');
 console.log(`📍 Reports endpoint: ${REPORTS_ENDPOINT}`);
 console.log(`📍 Cleanup assets endpoint: ${CLEANUP_ASSETS_ENDPOINT}`);
 console.log(`📍 Cleanup inventory endpoint: ${CLEANUP_INVENTORY_ENDPOINT}`);
+console.log(`📍 Search reindex endpoint: ${SEARCH_REINDEX_ENDPOINT}`);
+console.log(`📍 Dashboard stats endpoint: ${DASHBOARD_STATS_ENDPOINT}`);
+console.log(`📍 Storage reconcile endpoint: ${STORAGE_RECONCILE_ENDPOINT}`);
 console.log(`⏰ Reports interval: ${REPORTS_INTERVAL_MS / 1000 / 60} minutes`);
 console.log(`🕛 Cleanup schedule: Daily at midnight (${TIMEZONE})`);
+console.log(`🔎 Search reindex interval: ${SEARCH_REINDEX_INTERVAL_MS / 1000 / 60} minutes`);
+console.log(`📊 Dashboard stats interval: ${DASHBOARD_STATS_INTERVAL_MS / 1000 / 60} minutes`);
+console.log(`🗄️ Storage reconcile interval: ${STORAGE_RECONCILE_INTERVAL_MS / 1000 / 60} minutes`);
 console.log('-------------------------------------------');
 
 /**
@@ -158,6 +173,93 @@ async function triggerCleanupInventory() {
   }
 }
 
+/**
+ * Call the asset search index reconciliation endpoint
+ */
+async function triggerSearchReindex() {
+  const timestamp = new Date().toISOString();
+  console.log(`\n[${timestamp}] 🔎 Triggering asset search reindex...`);
+
+  try {
+    const response = await fetch(SEARCH_REINDEX_ENDPOINT, {
+      method: 'GET',
+      headers: {
+        'Authorization': `Bearer ${CRON_SECRET}`,
+        'Content-Type': 'application/json'
+      },
+      timeout: 120000 // 2 minute timeout
+    });
+
+    const data = await response.json();
+
+    if (response.ok) {
+      console.log(`[${timestamp}] ✅ Search Reindex Success:`, JSON.stringify(data, null, 2));
+    } else {
+      console.error(`[${timestamp}] ❌ Search Reindex Failed (${response.status}):`, JSON.stringify(data, null, 2));
+    }
+    return response.ok;
+  } catch (error) {
+    console.error(`[${timestamp}] ❌ Search Reindex Error:`, error.message);
+    return false;
+  }
+}
+
+/**
+ * Call the dashboard statistics refresh endpoint
+ */
+async function triggerDashboardStatsRefresh() {
+  const timestamp = new Date().toISOString();
+
+  try {
+    const response = await fetch(DASHBOARD_STATS_ENDPOINT, {
+      method: 'GET',
+      headers: {
+        'Authorization': `Bearer ${CRON_SECRET}`,
+        'Content-Type': 'application/json'
+      },
+      timeout: 60000 // 1 minute timeout
+    });
+
+    if (!response.ok) {
+      const data = await response.json();
+      console.error(`[${timestamp}] ❌ Dashboard Stats Refresh Failed (${response.status}):`, JSON.stringify(data, null, 2));
+    }
+    return response.ok;
+  } catch (error) {
+    console.error(`[${timestamp}] ❌ Dashboard Stats Refresh Error:`, error.message);
+    return false;
+  }
+}
+
+/**
+ * Call the storage usage reconciliation endpoint
+ */
+async function triggerStorageReconcile() {
+  const timestamp = new Date().toISOString();
+
+  try {
+    const response = await fetch(STORAGE_RECONCILE_ENDPOINT, {
+      method: 'GET',
+      headers: {
+        'Authorization': `Bearer ${CRON_SECRET}`,
+        'Content-Type': 'application/json'
+      },
+      timeout: 300000 // 5 minute timeout
+    });
+
+    const data = await response.json();
+    if (response.ok) {
+      console.log(`[${timestamp}] ✅ Storage Reconcile: ${data.message}`);
+    } else {
+      console.error(`[${timestamp}] ❌ Storage Reconcile Failed (${response.status}):`, JSON.stringify(data, null, 2));
+    }
+    return response.ok;
+  } catch (error) {
+    console.error(`[${timestamp}] ❌ Storage Reconcile Error:`, error.message);
+    return false;
+  }
+}
+
 /**
  * Run all cleanup tasks
  */
@@ -193,6 +295,15 @@ triggerScheduledReports();
 // Then run reports every 5 minutes
 setInterval(triggerScheduledReports, REPORTS_INTERVAL_MS);
 
+// Reconcile the asset search index every 15 minutes
+setInterval(triggerSearchReindex, SEARCH_REINDEX_INTERVAL_MS);
+
+// Refresh the precomputed dashboard statistics every minute
+setInterval(triggerDashboardStatsRefresh, DASHBOARD_STATS_INTERVAL_MS);
+
+// Reconcile storage usage accounting every hour
+setInterval(triggerStorageReconcile, STORAGE_RECONCILE_INTERVAL_MS);
+
 // Check for midnight cleanup every minute
 setInterval(checkAndRunCleanup, CLEANUP_CHECK_INTERVAL_MS);
 